@@ -0,0 +1,267 @@
+"""
+Size-bounded file caches for rendered output (PDFs, SVGs, PNGs).
+
+Each named cache in ``settings.RENDER_CACHES`` maps to a directory on
+local disk.  Entries are plain files named by their key, so the same
+content rendered twice lands on the same file.  A hit bumps the file's
+mtime; once the directory grows past ``MAX_BYTES`` the least recently
+used files are dropped.
+
+Writes go through a temporary file and ``os.replace`` so concurrent
+gunicorn workers never read a half-written entry.
+
+Usage::
+
+    from app.disk_cache import caches, digest
+
+    cache = caches["travelers"]
+    key = digest({"work_order": 12, "steps": [...]})
+    data = cache.get(key)
+    if data is None:
+        data = render()
+        cache.set(key, data)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_TMP_PREFIX = ".tmp-"
+
+
+def digest(payload: Any) -> str:
+    """Stable SHA-256 hex digest of a JSON-serialisable payload."""
+    blob = json.dumps(
+        payload, sort_keys=True, default=str, separators=(",", ":")
+    )
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def instance_fields(instance) -> Optional[list]:
+    """Concrete field values of a model instance, in declaration order."""
+    if instance is None:
+        return None
+    return [
+        (f.attname, f.value_from_object(instance))
+        for f in instance._meta.concrete_fields
+    ]
+
+
+def file_fingerprint(path) -> Any:
+    """[path, mtime_ns, size] of a file, or just the path if it is missing."""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return str(path)
+    return [str(path), st.st_mtime_ns, st.st_size]
+
+
+def template_fingerprint(template_name: str) -> Any:
+    """Fingerprint of a template's source, so template edits bust a cache."""
+    from django.template.loader import get_template
+
+    return file_fingerprint(get_template(template_name).origin.name)
+
+
+class DiskLRUCache:
+    """
+    A directory of cache files with least-recently-used eviction.
+
+    Hit/miss counters are kept per instance, i.e. per worker process.
+    """
+
+    def __init__(self, directory, max_bytes: int, suffix: str = "") -> None:
+        self.directory = Path(directory)
+        self.max_bytes = int(max_bytes)
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached bytes for ``key`` or None on a miss."""
+        path = self.path_for(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        self._count(hit=True)
+        return data
+
+    def open(self, key: str) -> Optional[BinaryIO]:
+        """
+        The cached entry for ``key`` as an open binary file, or None on a
+        miss; for serving large entries without reading them into memory.
+        """
+        path = self.path_for(key)
+        try:
+            fh = path.open("rb")
+        except FileNotFoundError:
+            self._count(hit=False)
+            return None
+
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        self._count(hit=True)
+        return fh
+
+    def set(self, key: str, data: bytes) -> Path:
+        """Store ``data`` under ``key``; evict old entries if over budget."""
+        self.set_chunks(key, [data])
+        return self.path_for(key)
+
+    def set_chunks(self, key: str, chunks: Iterable[bytes]) -> int:
+        """
+        Store ``chunks`` under ``key``, writing each as it comes so the
+        whole entry is never held in memory; returns its size in bytes.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(key)
+
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, prefix=_TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+                    size += len(chunk)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except FileNotFoundError:
+                pass
+            raise
+
+        self.evict()
+        return size
+
+    def delete(self, key: str) -> bool:
+        try:
+            self.path_for(key).unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Remove every entry whose key starts with ``prefix``."""
+        removed = 0
+        for _mtime, _size, path in self._entries():
+            if path.name.startswith(prefix):
+                try:
+                    path.unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    def clear(self) -> int:
+        return self.delete_prefix("")
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under ``max_bytes``."""
+        entries = self._entries()
+        total = sum(size for _mtime, size, _path in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        for _mtime, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+
+        logger.debug("Evicted %s entries from %s", removed, self.directory)
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _mtime, size, _path in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _entries(self):
+        """(mtime, size, path) for every committed entry in the directory."""
+        try:
+            scan = os.scandir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        with scan:
+            for entry in scan:
+                if entry.name.startswith(_TMP_PREFIX) or not entry.is_file():
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, Path(entry.path)))
+        return entries
+
+
+class CacheHandler:
+    """
+    Lazy access to the caches configured in ``settings.RENDER_CACHES``.
+
+    Instances are memoised per (name, directory, size) so settings
+    overrides in tests get their own cache and counters.
+    """
+
+    def __init__(self) -> None:
+        self._caches: Dict[tuple, DiskLRUCache] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> DiskLRUCache:
+        config = settings.RENDER_CACHES[name]
+        ident = (name, str(config["DIR"]), int(config["MAX_BYTES"]))
+        with self._lock:
+            cache = self._caches.get(ident)
+            if cache is None:
+                cache = DiskLRUCache(
+                    config["DIR"],
+                    config["MAX_BYTES"],
+                    suffix=config.get("SUFFIX", ""),
+                )
+                self._caches[ident] = cache
+        return cache
+
+
+caches = CacheHandler()
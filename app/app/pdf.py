@@ -0,0 +1,138 @@
+"""
+In-memory PDF rendering with WeasyPrint.
+
+Every PDF in the app (travelers, template travelers, masking procedures,
+batch prints) is rendered through ``render_pdf()``.  The module keeps one
+``FontConfiguration`` and the parsed ``CSS`` for each print stylesheet
+per process, so font discovery and stylesheet parsing happen once per
+worker instead of once per render, and writes the PDF straight into a
+``BytesIO`` instead of a temporary file.
+
+Nothing here needs Django at import time, so the spawn-based render
+pool (app/render_pool.py) can render with it too.
+
+Usage::
+
+    from app.pdf import pdf_response, render_pdf, stylesheet_path
+
+    css = stylesheet_path("part/css/traveler_print.css")
+    data = render_pdf(html, stylesheets=[css], label="traveler")
+    return pdf_response(data, "Traveler.pdf")
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_font_config: Optional[FontConfiguration] = None
+_stylesheets: Dict[str, Tuple[int, CSS]] = {}  # path -> (mtime_ns, parsed CSS)
+_stats: Dict[str, Dict[str, float]] = {}
+
+
+def font_config() -> FontConfiguration:
+    """The process-wide FontConfiguration, created on first use."""
+    global _font_config
+    with _lock:
+        if _font_config is None:
+            _font_config = FontConfiguration()
+        return _font_config
+
+
+def stylesheet(path: str) -> CSS:
+    """Parsed CSS for ``path``, re-parsed only when the file changes."""
+    mtime = os.stat(path).st_mtime_ns
+    with _lock:
+        cached = _stylesheets.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    css = CSS(filename=path, font_config=font_config())
+    with _lock:
+        _stylesheets[path] = (mtime, css)
+    return css
+
+
+def stylesheet_path(name: str) -> str:
+    """Absolute path of a print stylesheet found by the staticfiles finders."""
+    from django.contrib.staticfiles import finders
+
+    path = finders.find(name)
+    if not path:
+        raise FileNotFoundError(
+            f"Stylesheet {name!r} not found in static files."
+        )
+    return path
+
+
+def render_pdf(
+    html: str,
+    stylesheets: Iterable[str] = (),
+    base_url: Optional[str] = None,
+    label: str = "pdf",
+) -> bytes:
+    """
+    Render an HTML string to PDF bytes.
+
+    ``stylesheets`` are file paths applied after the document's own
+    ``<style>`` blocks.  ``label`` groups the timing recorded for
+    ``render_stats()``.
+    """
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    HTML(string=html, base_url=base_url).write_pdf(
+        buffer,
+        stylesheets=[stylesheet(path) for path in stylesheets],
+        font_config=font_config(),
+    )
+    data = buffer.getvalue()
+    elapsed = time.perf_counter() - started
+
+    _record(label, elapsed)
+    logger.info(
+        "Rendered %s PDF in %.3fs (%s bytes)", label, elapsed, len(data)
+    )
+    return data
+
+
+def _record(label: str, elapsed: float) -> None:
+    with _lock:
+        entry = _stats.setdefault(
+            label, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0}
+        )
+        entry["count"] += 1
+        entry["total_seconds"] += elapsed
+        entry["max_seconds"] = max(entry["max_seconds"], elapsed)
+        entry["last_seconds"] = elapsed
+
+
+def render_stats() -> Dict[str, Dict[str, float]]:
+    """Render count and timings per label for this process."""
+    with _lock:
+        return {
+            label: {
+                **entry,
+                "avg_seconds": entry["total_seconds"] / entry["count"],
+            }
+            for label, entry in _stats.items()
+        }
+
+
+def pdf_response(data: bytes, filename: str = "", as_attachment: bool = False):
+    """Stream PDF bytes to the client as a FileResponse."""
+    from django.http import FileResponse
+
+    return FileResponse(
+        io.BytesIO(data),
+        content_type="application/pdf",
+        as_attachment=as_attachment,
+        filename=filename,
+    )
@@ -0,0 +1,112 @@
+# app/render_pool.py
+"""
+Shared process pool for CPU-bound renders: traveler PDFs
+(part/travelers.py) and flowchart SVGs (process/export.py).
+
+The pool only runs inside ``manage.py render_worker``, which marks its
+processes with ``worker_process()``.  Anywhere else (a gunicorn web
+worker, an eager render, a shell) ``pool_map`` renders in-process, so a
+web host never starts a pool per web worker.  Pool processes are started
+with the ``spawn`` method and only import Django-free modules (this one,
+app/pdf.py, process/flowchart_svg.py), so they do not inherit the
+worker's database connections.  The pool is created on first use and
+reused for the lifetime of the worker process, so each pool process
+keeps its fonts and parsed stylesheets warm between batches.
+
+Usage::
+
+    from app.render_pool import pool_map
+
+    svgs = pool_map(render, contents)  # RENDER_POOL_WORKERS processes
+"""
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import fitz  # PyMuPDF
+from django.conf import settings
+
+_pool = None
+_pool_size = 0
+_lock = threading.Lock()
+
+# True while ``render_worker`` runs jobs in this process
+_in_worker = False
+
+
+def in_worker():
+    """Whether the caller runs inside ``manage.py render_worker``."""
+    return _in_worker
+
+
+@contextmanager
+def worker_process():
+    """Mark the block as running in a render worker (see ``in_worker``)."""
+    global _in_worker
+    previous, _in_worker = _in_worker, True
+    try:
+        yield
+    finally:
+        _in_worker = previous
+
+
+def _shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def get_pool(max_workers):
+    """Shared spawn-based pool with ``max_workers`` processes."""
+    global _pool, _pool_size
+    with _lock:
+        if _pool is None or _pool_size != max_workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _pool_size = max_workers
+    return _pool
+
+
+atexit.register(_shutdown)
+
+
+def pool_map(render, items, max_workers=None):
+    """
+    ``render(item)`` for each item, in order.
+
+    ``render`` must be picklable and importable without Django.  Outside
+    a render worker, for a single item or with a pool size of 1 the items
+    are rendered in-process; the pool only pays off once there is more
+    than one render to spread.  ``max_workers`` defaults to
+    ``RENDER_POOL_WORKERS``.
+    """
+    items = list(items)
+    workers = max_workers or settings.RENDER_POOL_WORKERS
+    if workers <= 1 or len(items) <= 1 or not in_worker():
+        return [render(item) for item in items]
+    return list(get_pool(workers).map(render, items))
+
+
+def render_html_pdf(html, stylesheets=(), label="render_pool"):
+    """HTML to PDF bytes with app/pdf.py; a pool task."""
+    from app.pdf import render_pdf
+    return render_pdf(html, stylesheets=stylesheets, label=label)
+
+
+def merge_pdfs(documents):
+    """Concatenate PDF byte strings into one PDF, in order."""
+    merged = fitz.open()
+    try:
+        for data in documents:
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                merged.insert_pdf(doc)
+        return merged.tobytes(garbage=1, deflate=True)
+    finally:
+        merged.close()
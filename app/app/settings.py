@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'widget_tweaks',
 
     'landing_page',
@@ -59,6 +60,7 @@ INSTALLED_APPS = [
     'scheduler',
     'drawings',
     'ndt',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -153,6 +155,95 @@ MEDIA_ROOT = BASE_DIR / 'mediafiles'
 
 GRAPHVIZ_LOGO_PATH = "staticfiles/img/company_logo.png"
 
+# Size-bounded on-disk caches for rendered output (see app/disk_cache.py)
+RENDER_CACHES = {
+    'travelers': {
+        'DIR': MEDIA_ROOT / 'cache' / 'travelers',
+        'MAX_BYTES': int(
+            os.environ.get("TRAVELER_PDF_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        ),
+        'SUFFIX': '.pdf',
+    },
+    'flowcharts': {
+        'DIR': MEDIA_ROOT / 'cache' / 'flowcharts',
+        'MAX_BYTES': int(
+            os.environ.get("FLOWCHART_SVG_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+        ),
+        'SUFFIX': '.svg',
+    },
+    'jobs': {
+        'DIR': MEDIA_ROOT / 'cache' / 'jobs',
+        'MAX_BYTES': int(
+            os.environ.get("RENDER_JOB_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+        ),
+    },
+    'drawings': {
+        'DIR': MEDIA_ROOT / 'cache' / 'drawings',
+        'MAX_BYTES': int(
+            os.environ.get("DRAWING_PAGE_CACHE_MAX_BYTES", 512 * 1024 * 1024)
+        ),
+        'SUFFIX': '.png',
+    },
+    'analytics': {
+        'DIR': MEDIA_ROOT / 'cache' / 'analytics',
+        'MAX_BYTES': int(
+            os.environ.get(
+                "SCHEDULE_ANALYTICS_CACHE_MAX_BYTES", 16 * 1024 * 1024
+            )
+        ),
+        'SUFFIX': '.json',
+    },
+}
+
+# Background render queue (jobs app, `python manage.py render_worker`).
+# With RENDER_JOBS_EAGER the views render inside the request instead of
+# queueing, for setups that run no worker.
+RENDER_JOBS_EAGER = os.environ.get("RENDER_JOBS_EAGER", "").lower() == "true"
+RENDER_JOBS_CONCURRENCY = int(os.environ.get("RENDER_JOBS_CONCURRENCY", 2))
+RENDER_JOBS_POLL_INTERVAL = float(
+    os.environ.get("RENDER_JOBS_POLL_INTERVAL", 1.0)
+)
+# A running job's process touches its heartbeat every
+# RENDER_JOBS_HEARTBEAT seconds; without one for RENDER_JOBS_TIMEOUT
+# seconds its worker is presumed dead and the job is requeued
+RENDER_JOBS_HEARTBEAT = 30
+RENDER_JOBS_TIMEOUT = 300
+RENDER_JOBS_MAX_ATTEMPTS = 3
+# Finished jobs older than this are deleted by `manage.py prune_render_jobs`
+RENDER_JOBS_RETENTION_DAYS = int(
+    os.environ.get("RENDER_JOBS_RETENTION_DAYS", 14)
+)
+
+# Scheduler timeline rebuilds after a process or method edit
+# (scheduler/timeline.py): only open orders and those planned to start
+# within the last SCHEDULER_TIMELINE_HISTORY_DAYS are rewritten, inline
+# up to SCHEDULER_TIMELINE_QUEUE_AT orders and as a render job above it
+SCHEDULER_TIMELINE_HISTORY_DAYS = int(
+    os.environ.get("SCHEDULER_TIMELINE_HISTORY_DAYS", 7)
+)
+SCHEDULER_TIMELINE_QUEUE_AT = int(
+    os.environ.get("SCHEDULER_TIMELINE_QUEUE_AT", 200)
+)
+
+# Drawing renders queued when a PDF is uploaded (drawings/derivatives.py)
+DRAWING_PRERENDER_DPIS = [
+    int(dpi)
+    for dpi in os.environ.get("DRAWING_PRERENDER_DPIS", "72,150").split(",")
+    if dpi.strip()
+]
+DRAWING_PRERENDER_TILE_LEVELS = int(
+    os.environ.get("DRAWING_PRERENDER_TILE_LEVELS", 4)
+)
+
+# Process pool size for batch renders (app/render_pool.py: batch
+# travelers, flowchart exports), per render_worker process; web workers
+# never start a pool
+RENDER_POOL_WORKERS = int(os.environ.get("RENDER_POOL_WORKERS", 2))
+TRAVELER_BATCH_MAX = 500
+
+# Per-worker LRU of compiled processes (process/compiled.py)
+COMPILED_PROCESS_CACHE_SIZE = 256
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
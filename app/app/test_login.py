@@ -162,8 +162,10 @@ class TestAllViewsRequireAuth(TestCase):
         # part
         'operator_start',
         'part_list',
+        'part_search_json',
         'part_create',
         'global_template_list',
+        'work_order_batch_pdf',
         # masking
         'masking_list',
         'masking_process_add',
@@ -178,10 +180,13 @@ class TestAllViewsRequireAuth(TestCase):
         'pm_calendar',
         # tanks
         'export_tanks_to_excel',
+        'rack_load',
+        'rack_load_api',
         # process
         'get_classifications',
         'get_method_info',
         'process_landing',
+        'process_flowchart_export',
         # customer_links
         'customer_links_list',
         # sds
@@ -204,8 +209,13 @@ class TestAllViewsRequireAuth(TestCase):
         # scheduler (namespaced)
         'scheduler:main',
         'scheduler:data',
+        'scheduler:changes',
+        'scheduler:events',
         'scheduler:add_delay',
         'scheduler:update_status',
+        'scheduler:replan',
+        'scheduler:analytics',
+        'scheduler:analytics_data',
         # drawings (namespaced)
         'drawings:operator_list',
         # ndt (namespaced)
@@ -220,6 +230,10 @@ class TestAllViewsRequireAuth(TestCase):
         'ndt:curve_add',
         'ndt:log_list',
         'ndt:log_add',
+        # jobs (namespaced)
+        'jobs:enqueue',
+        'jobs:metrics',
+        'jobs:render',
     ]
 
     # --- Views that require URL arguments ---
@@ -261,11 +275,14 @@ class TestAllViewsRequireAuth(TestCase):
         # drawings (namespaced)
         ('drawings:annotate', {'drawing_id': 99999}),
         ('drawings:page_image', {'drawing_id': 99999}),
+        ('drawings:tiles_json', {'drawing_id': 99999}),
+        ('drawings:tile', {'drawing_id': 99999, 'level': 0, 'x': 0, 'y': 0}),
         ('drawings:zones_json', {'drawing_id': 99999}),
         ('drawings:save_zone', {'drawing_id': 99999}),
+        ('drawings:save_zones', {'drawing_id': 99999}),
         ('drawings:delete_zone', {'drawing_id': 99999, 'zone_id': 99999}),
-        ('drawings:operator_card', {'drawing_id': 99999}),
-        ('drawings:operator_zones_json', {'drawing_id': 99999}),
+        ('drawings:operator_card', {'card_id': 99999}),
+        ('drawings:operator_zones_json', {'card_id': 99999}),
         # ndt (namespaced)
         ('ndt:product_edit', _PK),
         ('ndt:lot_edit', _PK),
@@ -278,6 +295,10 @@ class TestAllViewsRequireAuth(TestCase):
         ('ndt:curvepoint_delete', _PK),
         ('ndt:log_detail', _PK),
         ('ndt:log_edit', _PK),
+        # jobs (namespaced)
+        ('jobs:wait', _PK),
+        ('jobs:status', _PK),
+        ('jobs:result', _PK),
     ]
 
     def _assert_redirects_to_login(self, url):
@@ -88,3 +88,119 @@ class TestSettingsEnvVars:
         assert settings.DATABASES["default"]["NAME"] == (
             os.environ.get("SQL_DATABASE")
         )
+
+
+class TestDiskLRUCache:
+    """Verify the on-disk render cache stores, counts and evicts entries."""
+
+    def _cache(self, tmp_path, max_bytes=1024):
+        from app.disk_cache import DiskLRUCache
+        return DiskLRUCache(tmp_path / "cache", max_bytes, suffix=".bin")
+
+    def test_miss_then_hit(self, tmp_path):
+        cache = self._cache(tmp_path)
+        assert cache.get("abc") is None
+        cache.set("abc", b"payload")
+        assert cache.get("abc") == b"payload"
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_entries_are_named_by_key(self, tmp_path):
+        cache = self._cache(tmp_path)
+        path = cache.set("abc", b"payload")
+        assert path.name == "abc.bin"
+
+    def test_evicts_least_recently_used_when_over_budget(self, tmp_path):
+        cache = self._cache(tmp_path, max_bytes=250)
+        cache.set("old", b"x" * 100)
+        cache.set("mid", b"x" * 100)
+        # Backdate both, then touch "old" so "mid" becomes the LRU entry
+        for i, key in enumerate(("old", "mid")):
+            os.utime(cache.path_for(key), (1000 + i, 1000 + i))
+        cache.get("old")
+
+        cache.set("new", b"x" * 100)
+
+        assert cache.get("mid") is None
+        assert cache.get("old") is not None
+        assert cache.get("new") is not None
+        assert cache.stats()["bytes"] <= 250
+
+    def test_chunks_are_written_and_read_back_as_a_file(self, tmp_path):
+        cache = self._cache(tmp_path)
+        assert cache.open("zip") is None
+        chunks = (bytes([i]) * 10 for i in range(3))
+        assert cache.set_chunks("zip", chunks) == 30
+        with cache.open("zip") as fh:
+            assert fh.read() == b"\x00" * 10 + b"\x01" * 10 + b"\x02" * 10
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_delete_prefix_only_removes_matching_keys(self, tmp_path):
+        cache = self._cache(tmp_path)
+        cache.set("12-aaa", b"1")
+        cache.set("120-bbb", b"2")
+        assert cache.delete_prefix("12-") == 1
+        assert cache.get("120-bbb") == b"2"
+
+    def test_digest_is_stable_and_order_independent(self):
+        from app.disk_cache import digest
+        assert digest({"a": 1, "b": [1, 2]}) == digest({"b": [1, 2], "a": 1})
+        assert digest({"a": 1}) != digest({"a": 2})
+
+
+class TestPdfRendering:
+    """app/pdf.py keeps fonts and stylesheets warm and renders in memory."""
+
+    def test_stylesheet_is_parsed_once_until_file_changes(self, tmp_path):
+        from app import pdf
+
+        css_file = tmp_path / "print.css"
+        css_file.write_text("body { color: #000; }")
+        first = pdf.stylesheet(str(css_file))
+        assert pdf.stylesheet(str(css_file)) is first
+
+        css_file.write_text("body { color: #111; }")
+        os.utime(css_file, ns=(0, 1))
+        assert pdf.stylesheet(str(css_file)) is not first
+
+    def test_font_config_is_shared(self):
+        from app import pdf
+
+        assert pdf.font_config() is pdf.font_config()
+
+    def test_render_pdf_returns_bytes_and_records_timing(self, tmp_path):
+        from app import pdf
+
+        css_file = tmp_path / "print.css"
+        css_file.write_text("p { font-size: 10px; }")
+        data = pdf.render_pdf(
+            "<p>Traveler</p>", stylesheets=[str(css_file)], label="test"
+        )
+
+        assert data.startswith(b"%PDF")
+        stats = pdf.render_stats()["test"]
+        assert stats["count"] >= 1
+        assert stats["max_seconds"] >= stats["last_seconds"] >= 0
+
+    def test_print_stylesheets_are_found(self):
+        from app.pdf import stylesheet_path
+
+        assert stylesheet_path("part/css/traveler_print.css").endswith(
+            "traveler_print.css"
+        )
+        assert stylesheet_path("masking/css/masking_print.css").endswith(
+            "masking_print.css"
+        )
+
+    def test_pdf_response_streams_with_length(self):
+        from app.pdf import pdf_response
+
+        response = pdf_response(
+            b"%PDF-1.7", "Traveler.pdf", as_attachment=True
+        )
+        assert response.streaming
+        assert response["Content-Length"] == "8"
+        assert (
+            response["Content-Disposition"]
+            == 'attachment; filename="Traveler.pdf"'
+        )
+        assert response.getvalue() == b"%PDF-1.7"
@@ -47,6 +47,7 @@ urlpatterns = [
     path('schedule/', include('scheduler.urls', namespace='scheduler')),
     path('drawings/', include('drawings.urls', namespace='drawings')),
     path('ndt/', include('ndt.urls', namespace='ndt')),
+    path('jobs/', include('jobs.urls', namespace='jobs')),
 ]
 if bool(settings.DEBUG):
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -45,12 +45,27 @@ class DrawingAdmin(admin.ModelAdmin):
     date_hierarchy = "uploaded_at"
 
     fieldsets = (
-        ("Identification", {"fields": ("drawing_number", "title", "revision", "is_active")}),
-        ("File", {"fields": ("pdf_file",)}),
-        ("Control", {"fields": ("effective_date", "superseded_date", "notes")}),
-        ("Audit", {"fields": ("uploaded_by", "uploaded_at"), "classes": ("collapse",)}),
+        ("Identification", {
+            "fields": ("drawing_number", "title", "revision", "is_active"),
+        }),
+        ("File", {
+            "fields": ("pdf_file", "pdf_sha256", "page_count", "page_width",
+                       "page_height", "derivatives"),
+        }),
+        ("Control", {
+            "fields": ("effective_date", "superseded_date", "area_scale",
+                       "notes"),
+        }),
+        ("Audit", {
+            "fields": ("uploaded_by", "uploaded_at"),
+            "classes": ("collapse",),
+        }),
+    )
+    # Filled in after upload (drawings/derivatives.py)
+    readonly_fields = (
+        "uploaded_at", "pdf_sha256", "page_count", "page_width",
+        "page_height", "derivatives",
     )
-    readonly_fields = ("uploaded_at",)
 
     def save_model(self, request, obj, form, change):
         if not obj.uploaded_by:
@@ -91,14 +106,24 @@ class DrawingZoneAdmin(admin.ModelAdmin):
     search_fields = ("drawing__drawing_number",)
     ordering = ("drawing", "plating_type", "id")
     autocomplete_fields = ("drawing",)
-    readonly_fields = ("created_by", "created_at", "updated_at")
+    readonly_fields = (
+        "computed_area_value", "created_by", "created_at", "updated_at",
+    )
 
     fieldsets = (
-        ("Zone", {"fields": ("drawing", "plating_type", "label", "geom_type")}),
+        ("Zone", {
+            "fields": ("drawing", "plating_type", "label", "geom_type"),
+        }),
         ("Geometry", {"fields": ("geometry",)}),
-        ("Area", {"fields": ("area_value", "area_unit", "is_exclusion_zone", "default_selected")}),
+        ("Area", {
+            "fields": ("area_value", "computed_area_value", "area_unit",
+                       "is_exclusion_zone", "default_selected"),
+        }),
         ("Notes", {"fields": ("notes",)}),
-        ("Audit", {"fields": ("created_by", "created_at", "updated_at"), "classes": ("collapse",)}),
+        ("Audit", {
+            "fields": ("created_by", "created_at", "updated_at"),
+            "classes": ("collapse",),
+        }),
     )
 
     def save_model(self, request, obj, form, change):
@@ -124,7 +149,11 @@ class PlatingAreaCardAdmin(admin.ModelAdmin):
     ordering = ("-updated_at",)
     date_hierarchy = "updated_at"
     autocomplete_fields = ("drawing",)
-    readonly_fields = ("created_by", "created_at", "updated_at")
+    # Totals are kept from the zone selections (drawings/areas.py)
+    readonly_fields = (
+        "gross_area_value", "excluded_area_value", "net_area_value",
+        "created_by", "created_at", "updated_at",
+    )
     inlines = (PlatingCardZoneSelectionInline,)
 
     fieldsets = (
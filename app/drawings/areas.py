@@ -0,0 +1,254 @@
+# drawings/areas.py
+"""
+Zone areas and plating card totals.
+
+Card totals
+    ``PlatingAreaCard.gross_area_value`` is the selected non-exclusion
+    zones, ``excluded_area_value`` the selected exclusion zones, and
+    ``net_area_value`` gross minus excluded (never below zero), all in
+    the card's ``area_unit`` (in² / ft², 144 in² to the ft²).
+    drawings/signals.py calls ``refresh_card_totals`` for just the cards
+    a change touches (a zone edited or deleted, a selection toggled, a
+    card's unit changed); each refresh is one query for any number of
+    cards plus one ``bulk_update``.  Bulk writes send no signals; call it
+    after them.  Inside ``batched_card_totals()`` the signal-driven
+    refreshes are collected and run once when the block ends, so a batch
+    that deletes many zones does not refresh the card once per zone.
+
+Geometry areas
+    Once a drawing's scale is calibrated (``Drawing.area_scale``: real
+    inches per PDF point) and its page size is known
+    (drawings/derivatives.py), ``geometry_areas`` turns normalised 0..1
+    polygons and rects into real areas: the shoelace formula over all
+    polygons at once in NumPy (each ring padded with its first point,
+    which adds nothing to the sum), times the page's area in real square
+    inches.  The result is kept in ``DrawingZone.computed_area_value`` as
+    a check on, or default for, the typed-in ``area_value``.
+
+Usage::
+
+    from drawings.areas import refresh_card_totals, refresh_zone_areas
+
+    refresh_card_totals([card.pk])
+    refresh_zone_areas(drawing.pk)
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from django.db.models import F
+
+from .models import (
+    Drawing, DrawingZone, PlatingAreaCard, PlatingCardZoneSelection,
+)
+
+SQ_IN_PER_SQ_FT = Decimal(144)
+AREA_PLACES = Decimal("0.0001")
+
+# Card ids waiting for a refresh inside batched_card_totals(), else None
+_pending_cards: ContextVar[Optional[Set[int]]] = ContextVar(
+    "pending_card_totals", default=None
+)
+
+
+def convert_area(value, from_unit: str, to_unit: str) -> Decimal:
+    """``value`` (in² or ft²) in ``to_unit``."""
+    value = Decimal(value)
+    if from_unit == to_unit:
+        return value
+    if from_unit == "in2" and to_unit == "ft2":
+        return value / SQ_IN_PER_SQ_FT
+    if from_unit == "ft2" and to_unit == "in2":
+        return value * SQ_IN_PER_SQ_FT
+    raise ValueError(
+        f"Unknown area unit conversion {from_unit!r} -> {to_unit!r}"
+    )
+
+
+# ----------------------------------------------------------------------
+# Card totals
+# ----------------------------------------------------------------------
+
+def card_totals(card_ids: Iterable[int]) -> Dict[int, Dict[str, Decimal]]:
+    """
+    ``{card id: {"gross", "excluded", "net"}}`` from the selected zones, in
+    each card's unit (one query).
+    """
+    ids = list(card_ids)
+    totals = {pk: {"gross": Decimal(0), "excluded": Decimal(0)} for pk in ids}
+    rows = (
+        PlatingCardZoneSelection.objects
+        .filter(
+            plating_card_id__in=ids,
+            selected=True,
+            # Same zones the operator sees (operator_zones_json_view)
+            zone__drawing_id=F("plating_card__drawing_id"),
+            zone__plating_type=F("plating_card__plating_type"),
+        )
+        .values_list("plating_card_id", "plating_card__area_unit",
+                     "zone__area_value", "zone__area_unit",
+                     "zone__is_exclusion_zone")
+    )
+    for card_id, card_unit, area, zone_unit, is_exclusion in rows:
+        side = "excluded" if is_exclusion else "gross"
+        totals[card_id][side] += convert_area(area, zone_unit, card_unit)
+    for total in totals.values():
+        total["gross"] = total["gross"].quantize(AREA_PLACES)
+        total["excluded"] = total["excluded"].quantize(AREA_PLACES)
+        total["net"] = max(total["gross"] - total["excluded"], Decimal(0))
+    return totals
+
+
+def refresh_card_totals(card_ids: Iterable[int]) -> int:
+    """
+    Recompute and store the totals of the given cards; returns the number
+    changed.
+    """
+    ids = sorted({pk for pk in card_ids if pk is not None})
+    if not ids:
+        return 0
+    totals = card_totals(ids)
+    fields = ["gross_area_value", "excluded_area_value", "net_area_value"]
+    changed = []
+    for card in PlatingAreaCard.objects.filter(pk__in=ids).only("id", *fields):
+        total = totals[card.pk]
+        new = (total["gross"], total["excluded"], total["net"])
+        if new != tuple(getattr(card, field) for field in fields):
+            for field, value in zip(fields, new):
+                setattr(card, field, value)
+            changed.append(card)
+    # bulk_update sends no signals, so this never re-enters the receivers
+    PlatingAreaCard.objects.bulk_update(changed, fields, batch_size=500)
+    return len(changed)
+
+
+def schedule_card_totals(card_ids: Iterable[int]) -> None:
+    """
+    Refresh the cards now, or at the end of the enclosing
+    ``batched_card_totals()``.
+    """
+    pending = _pending_cards.get()
+    if pending is None:
+        refresh_card_totals(card_ids)
+    else:
+        pending.update(pk for pk in card_ids if pk is not None)
+
+
+@contextmanager
+def batched_card_totals():
+    """
+    Collect ``schedule_card_totals`` calls in the block and refresh those
+    cards once on success.
+    """
+    if _pending_cards.get() is not None:
+        # Nested: the outer block refreshes
+        yield
+        return
+    pending: Set[int] = set()
+    token = _pending_cards.set(pending)
+    try:
+        yield
+    finally:
+        _pending_cards.reset(token)
+    refresh_card_totals(pending)
+
+
+def cards_for_zones(zone_ids: Iterable[int]) -> List[int]:
+    return list(
+        PlatingCardZoneSelection.objects
+        .filter(zone_id__in=list(zone_ids))
+        .values_list("plating_card_id", flat=True)
+        .distinct()
+    )
+
+
+# ----------------------------------------------------------------------
+# Geometry areas
+# ----------------------------------------------------------------------
+
+def normalized_areas(zones) -> np.ndarray:
+    """
+    Areas of ``(geom_type, geometry)`` pairs in normalised page units
+    (the whole page is 1.0); invalid geometry gives 0.
+    """
+    areas = np.zeros(len(zones))
+    rings = []
+    ring_index = []
+    for i, (geom_type, geometry) in enumerate(zones):
+        try:
+            if geom_type == "rect" and isinstance(geometry, dict):
+                areas[i] = abs(float(geometry["w"]) * float(geometry["h"]))
+            elif (geom_type == "polygon" and isinstance(geometry, list)
+                    and len(geometry) >= 3):
+                rings.append(
+                    [(float(p["x"]), float(p["y"])) for p in geometry]
+                )
+                ring_index.append(i)
+        except (KeyError, TypeError, ValueError):
+            continue
+    if rings:
+        longest = max(len(ring) for ring in rings)
+        # Pad every ring with its first point: the extra edges have zero
+        # length
+        points = np.array(
+            [ring + [ring[0]] * (longest - len(ring)) for ring in rings]
+        )
+        x, y = points[:, :, 0], points[:, :, 1]
+        next_x, next_y = np.roll(x, -1, axis=1), np.roll(y, -1, axis=1)
+        twice = np.sum(x * next_y - next_x * y, axis=1)
+        areas[ring_index] = np.abs(twice) / 2
+    return areas
+
+
+def page_area_sq_in(drawing: Drawing) -> Optional[float]:
+    """
+    Real area of the whole page in in², or None until the scale and page
+    size are known.
+    """
+    scale = drawing.area_scale
+    if not scale or not drawing.page_width or not drawing.page_height:
+        return None
+    return drawing.page_width * scale * drawing.page_height * scale
+
+
+def geometry_areas(drawing: Drawing, zones) -> List[Optional[Decimal]]:
+    """
+    Real area of each zone in its own ``area_unit``; all None if the
+    drawing is not calibrated.
+    """
+    page = page_area_sq_in(drawing)
+    if page is None:
+        return [None] * len(zones)
+    shapes = [(zone.geom_type, zone.geometry) for zone in zones]
+    areas = normalized_areas(shapes) * page
+    return [
+        convert_area(Decimal(repr(float(area))), "in2", zone.area_unit)
+        .quantize(AREA_PLACES)
+        for zone, area in zip(zones, areas)
+    ]
+
+
+def refresh_zone_areas(drawing_id: int) -> int:
+    """
+    Recompute ``computed_area_value`` for every zone of a drawing; returns
+    the number changed.
+    """
+    drawing = Drawing.objects.get(pk=drawing_id)
+    zones = list(
+        DrawingZone.objects.filter(drawing_id=drawing_id)
+        .only("id", "geom_type", "geometry", "area_unit",
+              "computed_area_value")
+    )
+    changed = []
+    for zone, area in zip(zones, geometry_areas(drawing, zones)):
+        if zone.computed_area_value != area:
+            zone.computed_area_value = area
+            changed.append(zone)
+    DrawingZone.objects.bulk_update(
+        changed, ["computed_area_value"], batch_size=500
+    )
+    return len(changed)
@@ -0,0 +1,126 @@
+# drawings/derivatives.py
+"""
+Post-upload pipeline for drawing PDFs.
+
+When a drawing is saved with a PDF (drawings/signals.py, after the
+transaction commits) ``prepare_drawing``:
+
+1. hashes the file and reads its page count and first-page size, and
+   stores them on the drawing (``pdf_sha256``, ``page_count``,
+   ``page_width``/``page_height``);
+2. queues background renders (jobs app) of the page at
+   ``DRAWING_PRERENDER_DPIS`` and of the first
+   ``DRAWING_PRERENDER_TILE_LEVELS`` tile-pyramid levels, so the first
+   viewer no longer pays for rasterising on the request thread;
+3. records what it queued or found in ``Drawing.derivatives``;
+4. recomputes geometry zone areas if the page size changed
+   (drawings/areas.py).
+
+Renders are cached by PDF content hash (drawings/renderers.py), so a PDF
+that was uploaded before, to this drawing or another, reuses the renders
+already in the cache and queues nothing.  Saving a drawing whose PDF did
+not change is a no-op.
+
+``manage.py prerender_drawings`` runs the same pipeline for existing
+drawings.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import fitz  # PyMuPDF
+from django.conf import settings
+from django.utils import timezone
+
+from jobs.queue import cached_result, enqueue, run_now
+from jobs.registry import get_renderer
+
+from .areas import refresh_zone_areas
+from .models import Drawing
+from .renderers import clamp_dpi, pdf_digest
+
+
+def inspect_pdf(pdf_path) -> Dict[str, Any]:
+    """Page count and first-page size (points) of a PDF."""
+    doc = fitz.open(str(pdf_path))
+    try:
+        if doc.page_count < 1:
+            return {"page_count": 0, "page_width": None, "page_height": None}
+        rect = doc.load_page(0).rect
+        return {"page_count": doc.page_count, "page_width": rect.width,
+                "page_height": rect.height}
+    finally:
+        doc.close()
+
+
+def _wanted(drawing: Drawing):
+    """(kind, params) of every derivative to pre-render for ``drawing``."""
+    dpis = sorted({clamp_dpi(dpi) for dpi in settings.DRAWING_PRERENDER_DPIS})
+    wanted = [("drawing_page_png", {"drawing_id": drawing.pk, "dpi": dpi})
+              for dpi in dpis]
+    if settings.DRAWING_PRERENDER_TILE_LEVELS > 0:
+        levels = settings.DRAWING_PRERENDER_TILE_LEVELS
+        wanted.append(
+            ("drawing_tiles", {"drawing_id": drawing.pk, "levels": levels})
+        )
+    return dpis, wanted
+
+
+def queue_derivatives(drawing: Drawing) -> Dict[str, Any]:
+    """
+    Queue the renders of ``drawing`` that are not cached yet (run them
+    at once with ``RENDER_JOBS_EAGER``); returns the derivatives record.
+    """
+    dpis, wanted = _wanted(drawing)
+    queued, reused = [], 0
+    for kind, params in wanted:
+        key = get_renderer(kind).key(**params)
+        if cached_result(kind, key) is not None:
+            reused += 1
+            continue
+        job, _created = enqueue(kind, params, key=key)
+        if settings.RENDER_JOBS_EAGER:
+            job = run_now(job)
+        queued.append(job.pk)
+    return {
+        "sha256": pdf_digest(drawing),
+        "dpis": dpis,
+        "tile_levels": settings.DRAWING_PRERENDER_TILE_LEVELS,
+        "jobs": queued,
+        "reused": reused,
+        "prepared_at": timezone.now().isoformat(),
+    }
+
+
+def prepare_drawing(
+    drawing_id: int, force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Hash, inspect and pre-render the drawing's PDF; None when it has no
+    PDF on disk.  Without ``force`` an unchanged PDF is left alone.
+    """
+    drawing = Drawing.objects.filter(pk=drawing_id).first()
+    if (drawing is None or not drawing.pdf_file
+            or not Path(drawing.pdf_file.path).exists()):
+        return None
+
+    sha256 = pdf_digest(drawing)
+    unchanged = (drawing.pdf_sha256 == sha256
+                 and drawing.derivatives.get("sha256") == sha256)
+    if unchanged and not force:
+        return drawing.derivatives
+
+    info = inspect_pdf(drawing.pdf_file.path)
+    if info["page_count"]:
+        derivatives = queue_derivatives(drawing)
+    else:
+        derivatives = {"sha256": sha256, "jobs": [], "reused": 0}
+    # update() sends no post_save, so this does not trigger itself again
+    Drawing.objects.filter(pk=drawing.pk).update(
+        pdf_sha256=sha256, derivatives=derivatives, **info
+    )
+    page_size = (drawing.page_width, drawing.page_height)
+    if (info["page_width"], info["page_height"]) != page_size:
+        refresh_zone_areas(drawing.pk)
+    return derivatives
@@ -0,0 +1,44 @@
+# drawings/management/commands/prerender_drawings.py
+"""
+Hash, inspect and queue pre-renders for drawing PDFs (drawings/derivatives.py).
+
+    python manage.py prerender_drawings
+    python manage.py prerender_drawings --drawing 12 --force
+
+Uploads are handled by a signal; run this for drawings uploaded before
+the pipeline existed, or with ``--force`` after changing
+``DRAWING_PRERENDER_DPIS``/``DRAWING_PRERENDER_TILE_LEVELS``.
+"""
+from django.core.management.base import BaseCommand
+
+from drawings.derivatives import prepare_drawing
+from drawings.models import Drawing
+
+
+class Command(BaseCommand):
+    help = "Queue pre-renders for all active drawings, or the given ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--drawing", type=int, action="append",
+                            dest="drawings", help="Drawing id (repeatable).")
+        parser.add_argument(
+            "--force", action="store_true",
+            help="Re-check drawings whose PDF has not changed.",
+        )
+
+    def handle(self, *args, **options):
+        drawing_ids = options["drawings"] or (
+            Drawing.objects.filter(is_active=True).values_list("id", flat=True)
+        )
+        queued = reused = skipped = 0
+        for pk in drawing_ids:
+            derivatives = prepare_drawing(pk, force=options["force"])
+            if derivatives is None:
+                skipped += 1
+                continue
+            queued += len(derivatives.get("jobs", []))
+            reused += derivatives.get("reused", 0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {queued} renders, {reused} already cached, "
+            f"{skipped} drawings without a PDF."
+        ))
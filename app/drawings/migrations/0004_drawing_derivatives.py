@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drawings', '0003_alter_drawingzone_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drawing',
+            name='derivatives',
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text='Pre-rendered page images and tile levels for this '
+                          'PDF.',
+            ),
+        ),
+        migrations.AddField(
+            model_name='drawing',
+            name='page_count',
+            field=models.PositiveIntegerField(
+                blank=True, editable=False, null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name='drawing',
+            name='page_height',
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                help_text='First page height in points.',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='drawing',
+            name='page_width',
+            field=models.FloatField(
+                blank=True,
+                editable=False,
+                help_text='First page width in points.',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='drawing',
+            name='pdf_sha256',
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=64
+            ),
+        ),
+    ]
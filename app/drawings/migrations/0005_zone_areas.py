@@ -0,0 +1,80 @@
+# Generated by Django 5.2 on 2026-10-18 11:50
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_card_totals(apps, schema_editor):
+    # Same totals as drawings/areas.py:card_totals
+    PlatingAreaCard = apps.get_model('drawings', 'PlatingAreaCard')
+    PlatingCardZoneSelection = apps.get_model(
+        'drawings', 'PlatingCardZoneSelection'
+    )
+    to_in2 = {'in2': Decimal(1), 'ft2': Decimal(144)}
+
+    totals = defaultdict(lambda: [Decimal(0), Decimal(0)])
+    rows = PlatingCardZoneSelection.objects.filter(
+        selected=True,
+        # Same zones the operator sees (operator_zones_json_view)
+        zone__drawing_id=F('plating_card__drawing_id'),
+        zone__plating_type=F('plating_card__plating_type'),
+    ).values_list(
+        'plating_card_id', 'plating_card__area_unit',
+        'zone__area_value', 'zone__area_unit', 'zone__is_exclusion_zone',
+    )
+    for card_id, card_unit, area, zone_unit, exclusion in rows.iterator():
+        in_card_unit = area * to_in2[zone_unit] / to_in2[card_unit]
+        totals[card_id][1 if exclusion else 0] += in_card_unit
+
+    cards = list(PlatingAreaCard.objects.all())
+    for card in cards:
+        gross, excluded = (
+            value.quantize(Decimal('0.0001')) for value in totals[card.pk]
+        )
+        card.gross_area_value = gross
+        card.excluded_area_value = excluded
+        card.net_area_value = max(gross - excluded, Decimal(0))
+    PlatingAreaCard.objects.bulk_update(
+        cards,
+        ['gross_area_value', 'excluded_area_value', 'net_area_value'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drawings', '0004_drawing_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drawing',
+            name='area_scale',
+            field=models.FloatField(
+                blank=True,
+                help_text='Calibrated drawing scale: real inches per PDF '
+                          'point (1/72 for a 1:1 drawing). Enables computed '
+                          'zone areas.',
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name='drawingzone',
+            name='computed_area_value',
+            field=models.DecimalField(
+                blank=True,
+                decimal_places=4,
+                editable=False,
+                help_text="Area from the geometry and the drawing's "
+                          "calibrated scale, in area_unit "
+                          "(drawings/areas.py).",
+                max_digits=12,
+                null=True,
+            ),
+        ),
+        migrations.RunPython(backfill_card_totals, migrations.RunPython.noop),
+    ]
@@ -34,6 +34,34 @@ class Drawing(models.Model):
 
     notes = models.TextField(blank=True)
 
+    # Filled in after upload by drawings/derivatives.py
+    pdf_sha256 = models.CharField(
+        max_length=64, blank=True, db_index=True, editable=False
+    )
+    page_count = models.PositiveIntegerField(
+        blank=True, null=True, editable=False
+    )
+    page_width = models.FloatField(
+        blank=True, null=True, editable=False,
+        help_text="First page width in points.",
+    )
+    page_height = models.FloatField(
+        blank=True, null=True, editable=False,
+        help_text="First page height in points.",
+    )
+    area_scale = models.FloatField(
+        blank=True,
+        null=True,
+        help_text="Calibrated drawing scale: real inches per PDF point "
+                  "(1/72 for a 1:1 drawing). Enables computed zone areas.",
+    )
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Pre-rendered page images and tile levels for this PDF.",
+    )
+
     class Meta:
         ordering = ["drawing_number", "-uploaded_at"]
         constraints = [
@@ -114,6 +142,16 @@ class DrawingZone(models.Model):
         default="in2",
     )
 
+    computed_area_value = models.DecimalField(
+        max_digits=12,
+        decimal_places=4,
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Area from the geometry and the drawing's calibrated "
+                  "scale, in area_unit (drawings/areas.py).",
+    )
+
     is_exclusion_zone = models.BooleanField(
         default=False,
         help_text="If true, subtracts from plating area when selected.",
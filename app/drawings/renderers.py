@@ -0,0 +1,258 @@
+# drawings/renderers.py
+"""
+Drawing page rasters.
+
+Rendered pages are kept in ``RENDER_CACHES['drawings']`` keyed by PDF
+content hash and dpi, so a page is rasterised once per file and
+resolution (a drawing re-uploaded with the same PDF, or another drawing
+sharing it, finds the renders already there).  The rasterising runs in
+the job queue (see jobs/registry.py): drawings/derivatives.py queues it
+when a PDF is uploaded, and ``page_image_view`` on a cache miss.
+
+Large drawings are also served as a deep-zoom pyramid of ``TILE_SIZE``
+tiles.  Level 0 fits the whole page into one tile; each level doubles
+the resolution, up to the first level at or above ``MAX_DPI``.  A tile
+is rendered on first request with a clip rectangle, so only that part
+of the page is rasterised, and cached like a page.  Zone geometry is in
+normalised 0..1 page space, so it maps onto any level unchanged.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from functools import lru_cache
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+from app.disk_cache import caches
+from jobs.registry import object_id, register
+
+from .models import Drawing
+
+DEFAULT_DPI = 150
+MIN_DPI = 72
+MAX_DPI = 300
+TILE_SIZE = 256
+
+
+def render_page_png(
+    pdf_path: str | Path, dpi: int, page_number: int = 0
+) -> bytes:
+    """Rasterise one PDF page to PNG bytes at ``dpi``."""
+    doc = fitz.open(str(pdf_path))
+    try:
+        if doc.page_count < 1:
+            raise ValueError("PDF has no pages.")
+        page = doc.load_page(page_number)
+        scale = dpi / 72.0
+        mat = fitz.Matrix(scale, scale)
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+        return pix.tobytes("png")
+    finally:
+        doc.close()
+
+
+def clamp_dpi(value, default: int = DEFAULT_DPI) -> int:
+    """
+    ``value`` as an int dpi within MIN_DPI..MAX_DPI (``default`` if not a
+    number).
+    """
+    try:
+        dpi = int(value)
+    except (TypeError, ValueError):
+        dpi = default
+    return max(MIN_DPI, min(MAX_DPI, dpi))
+
+
+@lru_cache(maxsize=1024)
+def _file_sha256(path: str, mtime_ns: int, size: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def pdf_digest(drawing: Drawing) -> str:
+    """
+    SHA-256 of the drawing's PDF, hashed once per file version (path,
+    mtime, size).
+    """
+    path = Path(drawing.pdf_file.path)
+    st = path.stat()
+    return _file_sha256(str(path), st.st_mtime_ns, st.st_size)
+
+
+def page_png_key(drawing: Drawing, dpi: int) -> str:
+    return f"page-{pdf_digest(drawing)[:32]}-{dpi}dpi"
+
+
+@lru_cache(maxsize=1024)
+def _page_rect(path: str, mtime_ns: int, size: int):
+    doc = fitz.open(path)
+    try:
+        if doc.page_count < 1:
+            raise ValueError("PDF has no pages.")
+        rect = doc.load_page(0).rect
+        return rect.x0, rect.y0, rect.width, rect.height
+    finally:
+        doc.close()
+
+
+def page_rect(drawing: Drawing):
+    """
+    ``(x0, y0, width, height)`` of the drawing's first page in points, read
+    once per file version.
+    """
+    path = Path(drawing.pdf_file.path)
+    st = path.stat()
+    return _page_rect(str(path), st.st_mtime_ns, st.st_size)
+
+
+class TilePyramid:
+    """Level geometry of a page's tile pyramid; sizes are in pixels."""
+
+    __slots__ = ("x0", "y0", "width", "height", "max_level")
+
+    def __init__(self, x0, y0, width, height):
+        self.x0 = x0
+        self.y0 = y0
+        self.width = width
+        self.height = height
+        # First level whose resolution reaches MAX_DPI
+        longest = max(width, height) * MAX_DPI / 72.0
+        self.max_level = (
+            math.ceil(math.log2(longest / TILE_SIZE))
+            if longest > TILE_SIZE else 0
+        )
+
+    def scale(self, level: int) -> float:
+        """Pixels per point at ``level``."""
+        return TILE_SIZE * (2 ** level) / max(self.width, self.height)
+
+    def level_size(self, level: int):
+        scale = self.scale(level)
+        return math.ceil(self.width * scale), math.ceil(self.height * scale)
+
+    def grid(self, level: int):
+        """``(cols, rows)`` of tiles at ``level``."""
+        width, height = self.level_size(level)
+        return math.ceil(width / TILE_SIZE), math.ceil(height / TILE_SIZE)
+
+    def has_tile(self, level: int, x: int, y: int) -> bool:
+        if not 0 <= level <= self.max_level:
+            return False
+        cols, rows = self.grid(level)
+        return 0 <= x < cols and 0 <= y < rows
+
+    def clip(self, level: int, x: int, y: int):
+        """The tile's ``(x0, y0, x1, y1)`` in page points."""
+        step = TILE_SIZE / self.scale(level)
+        return (
+            self.x0 + x * step,
+            self.y0 + y * step,
+            self.x0 + min((x + 1) * step, self.width),
+            self.y0 + min((y + 1) * step, self.height),
+        )
+
+    def levels(self):
+        levels = []
+        for level in range(self.max_level + 1):
+            width, height = self.level_size(level)
+            cols, rows = self.grid(level)
+            levels.append({"level": level, "width": width, "height": height,
+                           "cols": cols, "rows": rows})
+        return levels
+
+
+def tile_pyramid(drawing: Drawing) -> TilePyramid:
+    return TilePyramid(*page_rect(drawing))
+
+
+def render_tile_png(
+    pdf_path: str | Path, pyramid: TilePyramid, level: int, x: int, y: int
+) -> bytes:
+    """Rasterise one tile of the first page: only its clip is rendered."""
+    doc = fitz.open(str(pdf_path))
+    try:
+        page = doc.load_page(0)
+        scale = pyramid.scale(level)
+        pix = page.get_pixmap(
+            matrix=fitz.Matrix(scale, scale),
+            clip=fitz.Rect(*pyramid.clip(level, x, y)),
+            alpha=False,
+        )
+        return pix.tobytes("png")
+    finally:
+        doc.close()
+
+
+def tile_png_key(drawing: Drawing, level: int, x: int, y: int) -> str:
+    return f"tile-{pdf_digest(drawing)[:32]}-{level}-{x}-{y}"
+
+
+def cached_tile_png(drawing: Drawing, level: int, x: int, y: int) -> bytes:
+    """One pyramid tile from the drawings cache, rendering it on a miss."""
+    cache = caches["drawings"]
+    key = tile_png_key(drawing, level, x, y)
+    data = cache.get(key)
+    if data is None:
+        pyramid = tile_pyramid(drawing)
+        data = render_tile_png(drawing.pdf_file.path, pyramid, level, x, y)
+        cache.set(key, data)
+    return data
+
+
+def drawing_page_key(drawing_id: int, dpi: int = DEFAULT_DPI) -> str:
+    drawing = Drawing.objects.get(pk=drawing_id)
+    return page_png_key(drawing, clamp_dpi(dpi))
+
+
+def _page_filename(drawing_id, dpi=DEFAULT_DPI):
+    return f"drawing-{drawing_id}-{clamp_dpi(dpi)}dpi.png"
+
+
+@register(
+    "drawing_page_png",
+    key=drawing_page_key,
+    cache="drawings",
+    filename=_page_filename,
+    params={"drawing_id": object_id, "dpi": clamp_dpi},
+    content_type="image/png",
+)
+def drawing_page_png(drawing_id: int, dpi: int = DEFAULT_DPI) -> bytes:
+    # Clamped here too: a job's params need not have come through a view
+    drawing = Drawing.objects.get(pk=drawing_id)
+    return render_page_png(drawing.pdf_file.path, clamp_dpi(dpi))
+
+
+def drawing_tiles_key(drawing_id: int, levels: int) -> str:
+    drawing = Drawing.objects.get(pk=drawing_id)
+    return f"tiles-{pdf_digest(drawing)[:32]}-{levels}"
+
+
+@register(
+    "drawing_tiles",
+    key=drawing_tiles_key,
+    cache="drawings",
+    params={"drawing_id": object_id, "levels": int},
+    content_type="application/json",
+)
+def drawing_tiles(drawing_id: int, levels: int) -> bytes:
+    """
+    Render every tile of pyramid levels ``0 .. levels - 1`` into the
+    drawings cache; the job's own result is a small JSON manifest.
+    """
+    drawing = Drawing.objects.get(pk=drawing_id)
+    pyramid = tile_pyramid(drawing)
+    top = min(levels, pyramid.max_level + 1)
+    count = 0
+    for level in range(top):
+        cols, rows = pyramid.grid(level)
+        for y in range(rows):
+            for x in range(cols):
+                cached_tile_png(drawing, level, x, y)
+                count += 1
+    return json.dumps({"levels": top, "tiles": count}).encode()
@@ -0,0 +1,64 @@
+# drawings/signals.py
+"""
+Keep derived drawing data in step:
+
+- pre-render a drawing's PDF after it is uploaded (drawings/derivatives.py);
+- computed zone areas and plating card totals (drawings/areas.py), for
+  just the zones and cards a change touches.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .areas import (
+    cards_for_zones, geometry_areas, refresh_zone_areas, schedule_card_totals,
+)
+from .derivatives import prepare_drawing
+from .models import (
+    Drawing, DrawingZone, PlatingAreaCard, PlatingCardZoneSelection,
+)
+
+
+def _deleting(origin, model):
+    """True when a delete cascades from ``model`` (whose rows go with it)."""
+    if isinstance(origin, QuerySet):
+        return origin.model is model
+    return isinstance(origin, model)
+
+
+@receiver(post_save, sender=Drawing)
+def drawing_saved(sender, instance, **kwargs):
+    if instance.pdf_file:
+        # The file and row are only visible to the render worker once committed
+        transaction.on_commit(partial(prepare_drawing, instance.pk))
+    # The scale may have been calibrated or changed
+    refresh_zone_areas(instance.pk)
+
+
+@receiver(pre_save, sender=DrawingZone)
+def zone_area(sender, instance, **kwargs):
+    areas = geometry_areas(instance.drawing, [instance])
+    instance.computed_area_value = areas[0]
+
+
+@receiver(post_save, sender=DrawingZone)
+def zone_saved(sender, instance, **kwargs):
+    schedule_card_totals(cards_for_zones([instance.pk]))
+
+
+@receiver(post_save, sender=PlatingCardZoneSelection)
+@receiver(post_delete, sender=PlatingCardZoneSelection)
+def selection_changed(sender, instance, **kwargs):
+    deleted = kwargs["signal"] is post_delete
+    if deleted and _deleting(kwargs.get("origin"), PlatingAreaCard):
+        return
+    schedule_card_totals([instance.plating_card_id])
+
+
+@receiver(post_save, sender=PlatingAreaCard)
+def card_saved(sender, instance, **kwargs):
+    # Totals follow the card's area_unit
+    schedule_card_totals([instance.pk])
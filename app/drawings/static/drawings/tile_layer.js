@@ -0,0 +1,131 @@
+// drawings/static/drawings/tile_layer.js
+//
+// Deep-zoom tiles over a drawing page image (drawings:tiles_json).
+//
+// The page <img> stays underneath as the base layer.  When it is shown
+// larger than its own resolution, the tiles of the first pyramid level
+// that is sharp enough are laid over it, and only those inside the
+// scrolled viewport are requested.  Tiles sit in a layer the size of the
+// image, so normalised 0..1 zone overlays line up with both.
+//
+// Usage:
+//   const tiles = DrawingTileLayer(container, img, TILES_JSON_URL);
+//   tiles.load();      // once
+//   tiles.update();    // after every resize/zoom of the image
+(function () {
+  "use strict";
+
+  function DrawingTileLayer(container, img, infoUrl) {
+    let info = null;
+    let level = null;
+    let frame = null;
+    const tiles = new Map();  // "level/x/y" -> <img>
+
+    const layer = document.createElement("div");
+    layer.className = "drawing-tile-layer";
+    layer.style.cssText = "position:absolute;left:0;top:0;overflow:hidden;pointer-events:none;";
+    img.insertAdjacentElement("afterend", layer);
+
+    function clear(keepLevel) {
+      for (const [key, el] of tiles) {
+        if (keepLevel === undefined || !key.startsWith(keepLevel + "/")) {
+          el.remove();
+          tiles.delete(key);
+        }
+      }
+    }
+
+    function tileUrl(l, x, y) {
+      return info.tile_url.replace("{level}", l).replace("{x}", x).replace("{y}", y);
+    }
+
+    function update() {
+      if (!info || !img.clientWidth) return;
+      const w = img.clientWidth;
+      const h = img.clientHeight;
+      layer.style.left = img.offsetLeft + "px";
+      layer.style.top = img.offsetTop + "px";
+      layer.style.width = w + "px";
+      layer.style.height = h + "px";
+
+      // The base image is sharp enough: no tiles needed
+      const needed = Math.max(w, h) * (window.devicePixelRatio || 1);
+      if (Math.max(img.naturalWidth, img.naturalHeight) >= needed) {
+        level = null;
+        clear();
+        return;
+      }
+
+      let next = info.levels[info.levels.length - 1];
+      for (const candidate of info.levels) {
+        if (Math.max(candidate.width, candidate.height) >= needed) {
+          next = candidate;
+          break;
+        }
+      }
+      if (level !== next.level) {
+        level = next.level;
+        clear(level);
+      }
+
+      // Visible part of the image, in display pixels
+      const left = Math.max(0, container.scrollLeft - img.offsetLeft);
+      const top = Math.max(0, container.scrollTop - img.offsetTop);
+      const right = Math.min(w, left + container.clientWidth);
+      const bottom = Math.min(h, top + container.clientHeight);
+      const scale = w / next.width;
+      const step = info.tile_size * scale;
+
+      const x0 = Math.floor(left / step);
+      const x1 = Math.min(next.cols - 1, Math.floor(right / step));
+      const y0 = Math.floor(top / step);
+      const y1 = Math.min(next.rows - 1, Math.floor(bottom / step));
+      for (let y = y0; y <= y1; y++) {
+        for (let x = x0; x <= x1; x++) {
+          const key = `${level}/${x}/${y}`;
+          let el = tiles.get(key);
+          if (!el) {
+            el = document.createElement("img");
+            el.alt = "";
+            el.draggable = false;
+            el.style.cssText = "position:absolute;display:block;max-width:none;";
+            el.src = tileUrl(level, x, y);
+            tiles.set(key, el);
+            layer.appendChild(el);
+          }
+          el.style.left = (x * step) + "px";
+          el.style.top = (y * step) + "px";
+          el.style.width = (Math.min(info.tile_size, next.width - x * info.tile_size) * scale) + "px";
+          el.style.height = (Math.min(info.tile_size, next.height - y * info.tile_size) * scale) + "px";
+        }
+      }
+    }
+
+    function schedule() {
+      if (frame) return;
+      frame = requestAnimationFrame(() => {
+        frame = null;
+        update();
+      });
+    }
+
+    async function load() {
+      try {
+        const res = await fetch(infoUrl, { headers: { "Accept": "application/json" } });
+        const data = await res.json();
+        if (!res.ok || !data.ok) return;
+        info = data;
+        update();
+      } catch (err) {
+        console.error("Tile pyramid unavailable:", err);
+      }
+    }
+
+    container.addEventListener("scroll", schedule, { passive: true });
+    window.addEventListener("resize", schedule);
+
+    return { load, update: schedule };
+  }
+
+  window.DrawingTileLayer = DrawingTileLayer;
+})();
@@ -1,10 +1,29 @@
 # drawings/tests.py
 import json
-from django.test import TestCase
+import os
+from decimal import Decimal
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz  # PyMuPDF
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
-from .models import Drawing, DrawingZone
+from app.disk_cache import caches
+from jobs.models import RenderJob
+from jobs.queue import claim_next, run_job
+
+from .models import (
+    Drawing, DrawingZone, PlatingAreaCard, PlatingCardZoneSelection,
+)
+from .areas import convert_area, normalized_areas, refresh_card_totals
+from .derivatives import prepare_drawing
+from .renderers import (
+    TILE_SIZE, TilePyramid, page_png_key, render_page_png, render_tile_png,
+)
 
 
 User = get_user_model()
@@ -120,3 +139,501 @@ class DrawingAnnotatorTests(TestCase):
         # user_passes_test usually redirects to login by default
         self.assertIn(resp.status_code, (302, 301))
         self.assertEqual(DrawingZone.objects.count(), 0)
+
+
+def _pdf_bytes(text="DWG"):
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=100)
+    page.insert_text((20, 50), text)
+    try:
+        return doc.tobytes()
+    finally:
+        doc.close()
+
+
+class _DrawingPdfBase(TestCase):
+    """
+    An engineer and a drawing with a real one-page PDF (200 x 100 pt) in a
+    temporary MEDIA_ROOT.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        override = override_settings(
+            MEDIA_ROOT=self._tmp.name,
+            RENDER_CACHES={
+                'drawings': {'DIR': Path(self._tmp.name) / 'cache',
+                             'MAX_BYTES': 10 * 1024 * 1024, 'SUFFIX': '.png'},
+            },
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.engineer = User.objects.create_user(
+            username="engineer", password="pass1234", is_staff=True
+        )
+        self.client.login(username="engineer", password="pass1234")
+        self.drawing = Drawing.objects.create(
+            drawing_number="DWG-2001", revision="A", uploaded_by=self.engineer
+        )
+        self.drawing.pdf_file.save("dwg-2001.pdf", ContentFile(_pdf_bytes()))
+
+
+@override_settings(RENDER_JOBS_EAGER=True)
+class DrawingPageImageCacheTests(_DrawingPdfBase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse(
+            "drawings:page_image", kwargs={"drawing_id": self.drawing.id}
+        )
+
+    def test_page_is_rendered_once_per_dpi(self):
+        with patch("drawings.renderers.render_page_png",
+                   wraps=render_page_png) as render:
+            first = self.client.get(self.url, {"dpi": 100})
+            again = self.client.get(self.url, {"dpi": 100})
+            self.client.get(self.url, {"dpi": 120})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Content-Type"], "image/png")
+        self.assertEqual(first.content, again.content)
+        self.assertEqual(render.call_count, 2)
+        self.assertIsNotNone(
+            caches["drawings"].get(page_png_key(self.drawing, 100))
+        )
+
+    @override_settings(RENDER_JOBS_EAGER=False)
+    def test_cache_miss_queues_the_render(self):
+        with patch("drawings.renderers.render_page_png") as render:
+            response = self.client.get(self.url, {"dpi": 100})
+        render.assert_not_called()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertIn("no-store", response["Cache-Control"])
+        job = RenderJob.objects.get(kind="drawing_page_png")
+        self.assertEqual(
+            job.params, {"drawing_id": self.drawing.pk, "dpi": 100}
+        )
+
+        run_job(claim_next())
+        self.assertEqual(
+            self.client.get(self.url, {"dpi": 100}).status_code, 200
+        )
+
+    def test_validators_give_304(self):
+        first = self.client.get(self.url, {"dpi": 100})
+        self.assertIn("Last-Modified", first)
+        self.assertIn("no-cache", first["Cache-Control"])
+        again = self.client.get(
+            self.url, {"dpi": 100}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(again.status_code, 304)
+        other_dpi = self.client.get(
+            self.url, {"dpi": 120}, HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(other_dpi.status_code, 200)
+
+    def test_versioned_url_is_cached_long_and_changes_with_the_pdf(self):
+        annotate_url = reverse(
+            "drawings:annotate", kwargs={"drawing_id": self.drawing.id}
+        )
+        annotate = self.client.get(annotate_url)
+        url = annotate.context["page_image_url"]
+        self.assertIn("?v=", url)
+        response = self.client.get(url + "&dpi=100")
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+        self.assertIn("immutable", response["Cache-Control"])
+
+        # A new file at the same path (new content, newer mtime) gets a new
+        # version and ETag
+        Path(self.drawing.pdf_file.path).write_bytes(_pdf_bytes("REV B"))
+        stat = os.stat(self.drawing.pdf_file.path)
+        os.utime(self.drawing.pdf_file.path,
+                 ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        annotate = self.client.get(annotate_url)
+        self.assertNotEqual(annotate.context["page_image_url"], url)
+        stale = self.client.get(
+            url + "&dpi=100", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(stale.status_code, 200)
+        self.assertIn("no-cache", stale["Cache-Control"])
+
+
+class TilePyramidTests(TestCase):
+    def test_levels_reach_max_dpi(self):
+        # E-size sheet: 44 x 34 in = 3168 x 2448 pt, 13200 px wide at 300 dpi
+        pyramid = TilePyramid(0, 0, 3168, 2448)
+        self.assertEqual(pyramid.max_level, 6)
+        levels = pyramid.levels()
+        self.assertEqual(
+            (levels[0]["width"], levels[0]["cols"], levels[0]["rows"]),
+            (256, 1, 1),
+        )
+        self.assertEqual(
+            (levels[6]["width"], levels[6]["height"]), (16384, 12661)
+        )
+        self.assertEqual((levels[6]["cols"], levels[6]["rows"]), (64, 50))
+
+    def test_clip_covers_the_page_edge(self):
+        pyramid = TilePyramid(0, 0, 200, 100)
+        self.assertEqual(pyramid.clip(0, 0, 0), (0, 0, 200, 100))
+        self.assertEqual(pyramid.clip(1, 1, 0), (100, 0, 200, 100))
+        self.assertFalse(pyramid.has_tile(1, 0, 1))
+        self.assertFalse(pyramid.has_tile(pyramid.max_level + 1, 0, 0))
+
+
+class DrawingTileTests(_DrawingPdfBase):
+    def tile_url(self, level, x, y):
+        return reverse("drawings:tile", kwargs={
+            "drawing_id": self.drawing.id, "level": level, "x": x, "y": y,
+        })
+
+    def test_tiles_json_describes_the_pyramid(self):
+        url = reverse("drawings:tiles_json",
+                      kwargs={"drawing_id": self.drawing.id})
+        data = self.client.get(url).json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(
+            (data["width"], data["height"], data["tile_size"]),
+            (200, 100, TILE_SIZE),
+        )
+        self.assertEqual(data["max_level"], 2)
+        self.assertEqual(len(data["levels"]), 3)
+        url = data["tile_url"].format(level=2, x=3, y=1)
+        self.assertIn("?v=", url)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertIn("immutable", response["Cache-Control"])
+        # Level 2 is 1024 x 512: tile (3, 1) is a full 256 px square
+        pix = fitz.Pixmap(response.content)
+        self.assertEqual((pix.width, pix.height), (256, 256))
+
+    def test_tiles_are_rendered_once_and_revalidate(self):
+        url = self.tile_url(1, 1, 0)
+        with patch("drawings.renderers.render_tile_png",
+                   wraps=render_tile_png) as render:
+            first = self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(render.call_count, 1)
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_missing_tile_is_404(self):
+        url = self.tile_url(1, 2, 0)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class DrawingDerivativeTests(_DrawingPdfBase):
+    def setUp(self):
+        super().setUp()
+        self.jobs = override_settings(
+            DRAWING_PRERENDER_DPIS=[72, 150],
+            DRAWING_PRERENDER_TILE_LEVELS=2,
+            RENDER_CACHES={
+                'drawings': {'DIR': Path(self._tmp.name) / 'cache',
+                             'MAX_BYTES': 10 * 1024 * 1024, 'SUFFIX': '.png'},
+                'jobs': {'DIR': Path(self._tmp.name) / 'jobs',
+                         'MAX_BYTES': 1024 * 1024},
+            },
+        )
+        self.jobs.enable()
+        self.addCleanup(self.jobs.disable)
+
+    def test_upload_queues_renders_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            drawing = Drawing.objects.create(
+                drawing_number="DWG-3001", revision="A"
+            )
+            drawing.pdf_file.save(
+                "dwg-3001.pdf", ContentFile(_pdf_bytes("NEW"))
+            )
+        drawing.refresh_from_db()
+        self.assertEqual(len(drawing.pdf_sha256), 64)
+        self.assertEqual(
+            (drawing.page_count, drawing.page_width, drawing.page_height),
+            (1, 200, 100),
+        )
+        self.assertEqual(drawing.derivatives["dpis"], [72, 150])
+        self.assertEqual(
+            sorted(RenderJob.objects.values_list("kind", flat=True)),
+            ["drawing_page_png", "drawing_page_png", "drawing_tiles"],
+        )
+        self.assertEqual(
+            sorted(drawing.derivatives["jobs"]),
+            sorted(RenderJob.objects.values_list("pk", flat=True)),
+        )
+
+        # Saving again without a new PDF does nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            drawing.notes = "checked"
+            drawing.save()
+        self.assertEqual(RenderJob.objects.count(), 3)
+
+    @override_settings(RENDER_JOBS_EAGER=True)
+    def test_eager_renders_and_same_pdf_reuses_them(self):
+        derivatives = prepare_drawing(self.drawing.pk)
+        self.assertEqual(
+            (len(derivatives["jobs"]), derivatives["reused"]), (3, 0)
+        )
+        self.assertTrue(all(job.status == RenderJob.STATUS_DONE
+                            for job in RenderJob.objects.all()))
+        # Levels 0 and 1 were pre-rendered: serving a tile renders nothing
+        url = reverse("drawings:tile", kwargs={
+            "drawing_id": self.drawing.id, "level": 1, "x": 1, "y": 0,
+        })
+        with patch("drawings.renderers.render_tile_png",
+                   side_effect=AssertionError("rendered on request")):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        other = Drawing.objects.create(drawing_number="DWG-2002", revision="A")
+        pdf = Path(self.drawing.pdf_file.path).read_bytes()
+        other.pdf_file.save("copy.pdf", ContentFile(pdf))
+        derivatives = prepare_drawing(other.pk)
+        self.assertEqual((derivatives["jobs"], derivatives["reused"]), ([], 3))
+        other.refresh_from_db()
+        self.drawing.refresh_from_db()
+        self.assertEqual(other.pdf_sha256, self.drawing.pdf_sha256)
+
+    def test_drawing_without_pdf(self):
+        bare = Drawing.objects.create(drawing_number="DWG-4001", revision="A")
+        self.assertIsNone(prepare_drawing(bare.pk))
+
+
+class ZoneAreaTests(TestCase):
+    def test_convert_area(self):
+        self.assertEqual(
+            convert_area(Decimal("2"), "ft2", "in2"), Decimal("288")
+        )
+        self.assertEqual(
+            convert_area(Decimal("72"), "in2", "ft2"), Decimal("0.5")
+        )
+        self.assertEqual(
+            convert_area(Decimal("3"), "in2", "in2"), Decimal("3")
+        )
+
+    def test_shoelace_in_bulk(self):
+        square = [
+            {"x": 0.1, "y": 0.1},
+            {"x": 0.5, "y": 0.1},
+            {"x": 0.5, "y": 0.5},
+            {"x": 0.1, "y": 0.5},
+        ]
+        triangle = [{"x": 0, "y": 0}, {"x": 1, "y": 0}, {"x": 0, "y": 1}]
+        areas = normalized_areas([
+            ("polygon", square),
+            ("polygon", triangle),
+            ("rect", {"x": 0.2, "y": 0.2, "w": 0.5, "h": 0.1}),
+            ("polygon", [{"x": 0, "y": 0}]),
+        ])
+        self.assertEqual([round(a, 6) for a in areas], [0.16, 0.5, 0.05, 0.0])
+
+
+class PlatingCardTotalsTests(TestCase):
+    def setUp(self):
+        self.engineer = User.objects.create_user(
+            username="engineer", password="pass1234", is_staff=True
+        )
+        self.drawing = Drawing.objects.create(
+            drawing_number="DWG-5001", revision="A",
+            page_width=720, page_height=360,
+        )
+        self.card = PlatingAreaCard.objects.create(
+            drawing=self.drawing, plating_type="nickel"
+        )
+
+    def zone(self, label, area, unit="in2", exclusion=False, selected=True):
+        zone = DrawingZone.objects.create(
+            drawing=self.drawing, plating_type="nickel", label=label,
+            geom_type="rect", geometry={"x": 0, "y": 0, "w": 0.5, "h": 0.5},
+            area_value=Decimal(area), area_unit=unit,
+            is_exclusion_zone=exclusion,
+        )
+        PlatingCardZoneSelection.objects.create(
+            plating_card=self.card, zone=zone, selected=selected
+        )
+        return zone
+
+    def totals(self):
+        self.card.refresh_from_db()
+        return (
+            self.card.gross_area_value,
+            self.card.excluded_area_value,
+            self.card.net_area_value,
+        )
+
+    def test_totals_follow_zones_and_selections(self):
+        outside = self.zone("Outside", "100")
+        self.zone("Flange", "1", unit="ft2")
+        threads = self.zone("Threads", "20", exclusion=True)
+        self.assertEqual(
+            self.totals(),
+            (Decimal("244.0000"), Decimal("20.0000"), Decimal("224.0000")),
+        )
+
+        outside.area_value = Decimal("50")
+        outside.save()
+        self.assertEqual(self.totals()[2], Decimal("174.0000"))
+
+        PlatingCardZoneSelection.objects.get(zone=threads).delete()
+        self.assertEqual(
+            self.totals()[1:], (Decimal("0.0000"), Decimal("194.0000"))
+        )
+
+        selection = PlatingCardZoneSelection.objects.get(zone=outside)
+        selection.selected = False
+        selection.save()
+        self.assertEqual(self.totals()[0], Decimal("144.0000"))
+
+        outside.delete()
+        self.card.area_unit = "ft2"
+        self.card.save()
+        self.assertEqual(
+            self.totals(),
+            (Decimal("1.0000"), Decimal("0.0000"), Decimal("1.0000")),
+        )
+
+    def test_operator_json_reads_stored_totals(self):
+        self.zone("Outside", "1", unit="ft2")
+        self.client.login(username="engineer", password="pass1234")
+        card_kwargs = {"card_id": self.card.id}
+        data = self.client.get(
+            reverse("drawings:operator_zones_json", kwargs=card_kwargs)
+        ).json()
+        self.assertEqual(data["totals"]["net_area_value"], "144.0000")
+        self.assertEqual(data["zones"][0]["card_area_value"], "144.0000")
+
+        home = self.client.get(reverse("drawings:operator_list"))
+        card_url = reverse("drawings:operator_card", kwargs=card_kwargs)
+        self.assertContains(home, card_url)
+        self.assertContains(home, "144.0000")
+        self.assertEqual(self.client.get(card_url).status_code, 200)
+
+    def test_net_never_negative_and_refresh_is_one_query(self):
+        self.zone("Small", "5")
+        self.zone("Big hole", "9", exclusion=True)
+        PlatingAreaCard.objects.filter(pk=self.card.pk).update(
+            net_area_value=Decimal("99")
+        )
+        with self.assertNumQueries(3):  # totals, cards, bulk update
+            self.assertEqual(refresh_card_totals([self.card.pk]), 1)
+        self.assertEqual(self.totals()[2], Decimal("0"))
+
+    def test_calibrated_geometry_area(self):
+        zone = self.zone("Half", "0")
+        self.assertIsNone(zone.computed_area_value)
+
+        # 720 x 360 pt at 1:1 is 10 x 5 in; a quarter of the page is 12.5 in²
+        self.drawing.area_scale = 1 / 72
+        self.drawing.save()
+        zone.refresh_from_db()
+        self.assertEqual(zone.computed_area_value, Decimal("12.5000"))
+
+        # The annotator may leave the area out once the drawing is calibrated
+        self.client.login(username="engineer", password="pass1234")
+        response = self.client.post(
+            reverse("drawings:save_zone",
+                    kwargs={"drawing_id": self.drawing.id}),
+            data=json.dumps({
+                "plating_type": "nickel", "label": "Strip",
+                "geom_type": "rect",
+                "geometry": {"x": 0, "y": 0, "w": 1, "h": 0.1},
+                "area_unit": "in2",
+            }),
+            content_type="application/json",
+        )
+        data = response.json()
+        self.assertEqual(data["zone"]["area_value"], "5.0000")
+        self.assertEqual(data["totals"]["gross_area_value"], "5.0000")
+
+
+class ZoneBatchSaveTests(TestCase):
+    def setUp(self):
+        self.engineer = User.objects.create_user(
+            username="engineer", password="pass1234", is_staff=True
+        )
+        self.drawing = Drawing.objects.create(
+            drawing_number="DWG-6001", revision="A"
+        )
+        self.url = reverse("drawings:save_zones",
+                           kwargs={"drawing_id": self.drawing.id})
+        self.client.login(username="engineer", password="pass1234")
+
+    def zone_json(self, label, area="10", **extra):
+        return {
+            "label": label, "geom_type": "rect",
+            "geometry": {"x": 0.1, "y": 0.1, "w": 0.2, "h": 0.2},
+            "area_value": area, "area_unit": "in2", **extra,
+        }
+
+    def post(self, payload):
+        data = json.dumps({"plating_type": "chrome", **payload})
+        return self.client.post(
+            self.url, data=data, content_type="application/json"
+        )
+
+    def test_create_update_delete_in_one_request(self):
+        response = self.post({"created": [
+            self.zone_json(f"Zone {i}", client_id=f"new-{i}")
+            for i in range(3)
+        ]})
+        data = response.json()
+        self.assertTrue(data["ok"], data)
+        ids = [row["id"] for row in data["created"]]
+        self.assertEqual([row["client_id"] for row in data["created"]],
+                         ["new-0", "new-1", "new-2"])
+        self.assertEqual(data["totals"]["net_area_value"], "30.0000")
+        card = PlatingAreaCard.objects.get(
+            drawing=self.drawing, plating_type="chrome"
+        )
+        self.assertEqual(card.zone_selections.filter(selected=True).count(), 3)
+
+        # Does not grow with the number of zones: one bulk write per kind
+        PlatingCardZoneSelection.objects.filter(zone_id=ids[0]).update(
+            selected=False
+        )
+        created = [
+            self.zone_json(f"More {i}", area="1", is_exclusion_zone=True)
+            for i in range(20)
+        ]
+        renamed = self.zone_json("Renamed", area="50")
+        with self.assertNumQueries(19):
+            data = self.post({
+                "created": created,
+                "updated": [{"id": ids[0], **renamed}],
+                "deleted": [ids[1], ids[2]],
+            }).json()
+        self.assertTrue(data["ok"], data)
+        self.assertEqual(data["deleted"], [ids[1], ids[2]])
+        self.assertEqual(DrawingZone.objects.get(pk=ids[0]).label, "Renamed")
+        self.assertFalse(DrawingZone.objects.filter(pk__in=ids[1:]).exists())
+        # The updated zone is selected again, as with save_zone_view
+        self.assertEqual(data["totals"]["gross_area_value"], "50.0000")
+        self.assertEqual(data["totals"]["excluded_area_value"], "20.0000")
+        self.assertEqual(data["totals"]["net_area_value"], "30.0000")
+
+    def test_one_invalid_zone_writes_nothing(self):
+        bad = self.zone_json("Bad")
+        bad["geometry"] = {"x": 0.5, "y": 0.5, "w": 1.5, "h": 0.1}
+        response = self.post({"created": [self.zone_json("Good"), bad]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["error"],
+                         "created[1]: Rect x,y,w,h must be normalized 0..1")
+        self.assertFalse(DrawingZone.objects.exists())
+
+        response = self.post(
+            {"created": [self.zone_json("Good")], "deleted": [999999]}
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(DrawingZone.objects.exists())
+
+    def test_zones_of_another_plating_type_are_not_touched(self):
+        other = DrawingZone.objects.create(
+            drawing=self.drawing, plating_type="nickel", label="Other",
+            geom_type="rect", geometry={"x": 0, "y": 0, "w": 0.1, "h": 0.1},
+            area_value=Decimal("1"),
+        )
+        response = self.post({"deleted": [other.id]})
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(DrawingZone.objects.filter(pk=other.pk).exists())
@@ -19,6 +19,16 @@ urlpatterns = [
         views.page_image_view,
         name="page_image",
     ),
+    path(
+        "drawing/<int:drawing_id>/tiles/",
+        views.tiles_json_view,
+        name="tiles_json",
+    ),
+    path(
+        "drawing/<int:drawing_id>/tiles/<int:level>/<int:x>/<int:y>.png",
+        views.tile_view,
+        name="tile",
+    ),
     path(
         "drawing/<int:drawing_id>/zones/",
         views.zones_json_view,
@@ -29,6 +39,11 @@ urlpatterns = [
         views.save_zone_view,
         name="save_zone",
     ),
+    path(
+        "drawing/<int:drawing_id>/zones/batch/",
+        views.save_zones_view,
+        name="save_zones",
+    ),
     path(
         "drawing/<int:drawing_id>/zones/<int:zone_id>/delete/",
         views.delete_zone_view,
@@ -44,12 +59,12 @@ urlpatterns = [
         name="operator_list",
     ),
     path(
-        "area-cards/<int:drawing_id>/",
+        "area-cards/<int:card_id>/",
         views.operator_plating_card_view,
         name="operator_card",
     ),
     path(
-        "area-cards/<int:drawing_id>/zones/",
+        "area-cards/<int:card_id>/zones/",
         views.operator_zones_json_view,
         name="operator_zones_json",
     ),
@@ -6,16 +6,30 @@ from decimal import Decimal, InvalidOperation
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-import fitz  # PyMuPDF
+from django.conf import settings
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils import timezone
+from django.utils.http import http_date
 from django.views.decorators.http import require_GET, require_POST
 
+from jobs.queue import cached_result, enqueue, run_now
+from jobs.shortcuts import job_payload
+
+from .areas import (
+    AREA_PLACES, batched_card_totals, cards_for_zones, convert_area,
+    geometry_areas, schedule_card_totals,
+)
 from .models import Drawing, DrawingZone, PlatingAreaCard, PlatingCardZoneSelection
+from .renderers import (
+    TILE_SIZE, cached_tile_png, clamp_dpi, page_png_key, pdf_digest,
+    tile_pyramid,
+)
 
 
 # -------------------------
@@ -35,6 +49,14 @@ def is_operator(user) -> bool:
 # Constants / Helpers
 # -------------------------
 PLATING_TYPES = ("cadmium", "chrome", "nickel")
+PAGE_VERSION_LENGTH = 16
+PAGE_IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+ZONE_BATCH_MAX = 1000
+ZONE_FIELDS = [
+    "label", "geom_type", "geometry", "area_value", "area_unit",
+    "computed_area_value", "is_exclusion_zone", "default_selected", "notes",
+    "updated_at",
+]
 
 
 def _normalize_plating_type(raw: Any) -> Optional[str]:
@@ -91,6 +113,44 @@ def _validate_normalized_geometry(geom_type: str, geometry: Any) -> Optional[str
     return "Invalid geom_type (must be 'polygon' or 'rect')"
 
 
+def _zone_fields(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validated DrawingZone fields from one zone's JSON; raises ValueError.
+    area_value is None when it was left blank (see geometry_areas).
+    """
+    label = (payload.get("label") or "").strip()
+    if not label:
+        raise ValueError("label is required")
+
+    geom_type = str(payload.get("geom_type") or "")
+    geometry = payload.get("geometry")
+    geom_error = _validate_normalized_geometry(geom_type, geometry)
+    if geom_error:
+        raise ValueError(geom_error)
+
+    area_value = payload.get("area_value")
+    if area_value not in (None, ""):
+        try:
+            area_value = Decimal(str(area_value))
+            if area_value < 0:
+                raise InvalidOperation
+        except (InvalidOperation, TypeError):
+            raise ValueError("area_value must be a number >= 0") from None
+    else:
+        area_value = None
+
+    return {
+        "label": label,
+        "geom_type": geom_type,
+        "geometry": geometry,
+        "area_value": area_value,
+        "area_unit": payload.get("area_unit") or "in2",
+        "is_exclusion_zone": bool(payload.get("is_exclusion_zone", False)),
+        "default_selected": bool(payload.get("default_selected", True)),
+        "notes": payload.get("notes") or "",
+    }
+
+
 def _zone_to_dict(zone: DrawingZone) -> Dict[str, Any]:
     return {
         "id": zone.id,
@@ -100,6 +160,10 @@ def _zone_to_dict(zone: DrawingZone) -> Dict[str, Any]:
         "geom_type": zone.geom_type,
         "geometry": zone.geometry,
         "area_value": str(zone.area_value),
+        "computed_area_value": (
+            None if zone.computed_area_value is None
+            else str(zone.computed_area_value)
+        ),
         "area_unit": zone.area_unit,
         "is_exclusion_zone": zone.is_exclusion_zone,
         "default_selected": zone.default_selected,
@@ -107,6 +171,27 @@ def _zone_to_dict(zone: DrawingZone) -> Dict[str, Any]:
     }
 
 
+def _card_totals(card: PlatingAreaCard) -> Dict[str, Any]:
+    """The card's stored totals (drawings/areas.py keeps them current)."""
+    return {
+        "gross_area_value": str(card.gross_area_value),
+        "excluded_area_value": str(card.excluded_area_value),
+        "net_area_value": str(card.net_area_value),
+        "area_unit": card.area_unit,
+    }
+
+
+def _page_image_url(drawing: Drawing) -> str:
+    """
+    page_image_view URL, versioned by the PDF's hash so browsers can cache
+    it for good.
+    """
+    url = reverse("drawings:page_image", kwargs={"drawing_id": drawing.id})
+    if drawing.pdf_file and Path(drawing.pdf_file.path).exists():
+        url += f"?v={pdf_digest(drawing)[:PAGE_VERSION_LENGTH]}"
+    return url
+
+
 def _card_to_context(card: PlatingAreaCard) -> Dict[str, Any]:
     return {
         "card": card,
@@ -147,10 +232,13 @@ def annotate_drawing_view(request: HttpRequest, drawing_id: int) -> HttpResponse
         "plating_types": PLATING_TYPES,
         "plating_type": plating_type,
         "card": card,
-        "page_image_url": reverse("drawings:page_image", kwargs={"drawing_id": drawing.id}),
+        "page_image_url": _page_image_url(drawing),
+        "tiles_json_url": reverse("drawings:tiles_json",
+                                  kwargs={"drawing_id": drawing.id}),
         # NOTE: these endpoints now require plating_type (querystring or payload)
         "zones_json_url": reverse("drawings:zones_json", kwargs={"drawing_id": drawing.id}),
-        "save_zone_url": reverse("drawings:save_zone", kwargs={"drawing_id": drawing.id}),
+        "save_zones_url": reverse("drawings:save_zones",
+                                  kwargs={"drawing_id": drawing.id}),
     }
     return render(request, "drawings/annotate.html", context)
 
@@ -207,30 +295,21 @@ def save_zone_view(request: HttpRequest, drawing_id: int) -> JsonResponse:
         )
 
     zone_id = payload.get("id")
-    label = (payload.get("label") or "").strip()
-    geom_type = str(payload.get("geom_type") or "")
-    geometry = payload.get("geometry")
-    area_unit = payload.get("area_unit") or "in2"
-    is_exclusion_zone = bool(payload.get("is_exclusion_zone", False))
-    default_selected = bool(payload.get("default_selected", True))
-    notes = payload.get("notes") or ""
-
-    if not label:
-        return JsonResponse({"ok": False, "error": "label is required"}, status=400)
-
     try:
-        area_value = Decimal(str(payload.get("area_value")))
-        if area_value < 0:
-            raise InvalidOperation
-    except (InvalidOperation, TypeError):
-        return JsonResponse(
-            {"ok": False, "error": "area_value must be a number >= 0"},
-            status=400,
-        )
+        fields = _zone_fields(payload)
+    except ValueError as exc:
+        return JsonResponse({"ok": False, "error": str(exc)}, status=400)
 
-    geom_error = _validate_normalized_geometry(geom_type, geometry)
-    if geom_error:
-        return JsonResponse({"ok": False, "error": geom_error}, status=400)
+    if fields["area_value"] is None:
+        # No typed-in area: use the geometry's, if the drawing scale is
+        # calibrated
+        zone = DrawingZone(**fields)
+        fields["area_value"] = geometry_areas(drawing, [zone])[0]
+        if fields["area_value"] is None:
+            return JsonResponse(
+                {"ok": False, "error": "area_value must be a number >= 0"},
+                status=400,
+            )
 
     with transaction.atomic():
         card, _ = PlatingAreaCard.objects.get_or_create(
@@ -253,14 +332,8 @@ def save_zone_view(request: HttpRequest, drawing_id: int) -> JsonResponse:
                 created_by=request.user,
             )
 
-        zone.label = label
-        zone.geom_type = geom_type
-        zone.geometry = geometry
-        zone.area_value = area_value
-        zone.area_unit = area_unit
-        zone.is_exclusion_zone = is_exclusion_zone
-        zone.default_selected = default_selected
-        zone.notes = notes
+        for name, value in fields.items():
+            setattr(zone, name, value)
         zone.save()
 
         # Ensure link exists for this card + zone, and default selected state.
@@ -270,16 +343,184 @@ def save_zone_view(request: HttpRequest, drawing_id: int) -> JsonResponse:
             defaults={"selected": True},
         )
 
+    # Signals have updated the totals (drawings/areas.py)
+    card.refresh_from_db(
+        fields=["gross_area_value", "excluded_area_value", "net_area_value"]
+    )
     return JsonResponse(
         {
             "ok": True,
             "plating_type": plating_type,
             "card_id": card.id,
+            "totals": _card_totals(card),
             "zone": _zone_to_dict(zone),
         }
     )
 
 
+def _zone_ids(values: Any, section: str) -> list[int]:
+    ids = []
+    for i, value in enumerate(values):
+        digits = isinstance(value, (int, str)) and str(value).isdigit()
+        if isinstance(value, bool) or not digits:
+            raise ValueError(f"{section}[{i}]: zone id must be an integer")
+        ids.append(int(value))
+    if len(set(ids)) != len(ids):
+        raise ValueError(f"{section} lists a zone more than once")
+    return ids
+
+
+@require_POST
+@login_required
+@user_passes_test(is_engineer)
+def save_zones_view(request: HttpRequest, drawing_id: int) -> JsonResponse:
+    """
+    Save all of the annotator's zone edits for one (drawing + plating_type).
+
+    Payload:
+      {"plating_type": "nickel",
+       "created": [{"client_id": "new-1", <save_zone_view fields>}, ...],
+       "updated": [{"id": 12, <save_zone_view fields>}, ...],
+       "deleted": [13, 14]}
+
+    Every zone is validated before anything is written; then all of them
+    are written with bulk_create / bulk_update / one delete in a single
+    transaction, and the card totals are refreshed once.
+    Returns the new zone ids in "created" order, with their client_id.
+    """
+    drawing = get_object_or_404(Drawing, pk=drawing_id, is_active=True)
+
+    try:
+        payload = _json_payload(request)
+    except ValueError as exc:
+        return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+
+    plating_type = _normalize_plating_type(payload.get("plating_type"))
+    if not plating_type:
+        error = "plating_type is required (cadmium/chrome/nickel)."
+        return JsonResponse({"ok": False, "error": error}, status=400)
+
+    keys = ("created", "updated", "deleted")
+    sections = {key: payload.get(key) or [] for key in keys}
+    if not all(isinstance(items, list) for items in sections.values()):
+        error = "created, updated and deleted must be lists"
+        return JsonResponse({"ok": False, "error": error}, status=400)
+    if sum(len(items) for items in sections.values()) > ZONE_BATCH_MAX:
+        error = f"At most {ZONE_BATCH_MAX} zones per batch"
+        return JsonResponse({"ok": False, "error": error}, status=400)
+
+    # (section, index, fields) of every zone to write
+    writes = []
+    try:
+        for section in ("created", "updated"):
+            for i, item in enumerate(sections[section]):
+                if not isinstance(item, dict):
+                    raise ValueError(f"{section}[{i}] must be an object")
+                try:
+                    writes.append((section, i, _zone_fields(item)))
+                except ValueError as exc:
+                    raise ValueError(f"{section}[{i}]: {exc}") from None
+        updated_ids = _zone_ids(
+            [item.get("id") for item in sections["updated"]], "updated"
+        )
+        deleted_ids = _zone_ids(sections["deleted"], "deleted")
+        if set(updated_ids) & set(deleted_ids):
+            raise ValueError("A zone cannot be both updated and deleted")
+    except ValueError as exc:
+        return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+
+    # Geometry areas of the whole batch in one pass
+    zones = [DrawingZone(**fields) for _section, _i, fields in writes]
+    areas = geometry_areas(drawing, zones)
+    for (section, i, fields), area in zip(writes, areas):
+        fields["computed_area_value"] = area
+        if fields["area_value"] is None:
+            if area is None:
+                error = f"{section}[{i}]: area_value must be a number >= 0"
+                return JsonResponse({"ok": False, "error": error}, status=400)
+            fields["area_value"] = area
+
+    with transaction.atomic(), batched_card_totals():
+        existing = (
+            DrawingZone.objects.select_for_update()
+            .filter(drawing=drawing, plating_type=plating_type)
+            .in_bulk([*updated_ids, *deleted_ids])
+        )
+        missing = sorted({*updated_ids, *deleted_ids} - existing.keys())
+        if missing:
+            error = (
+                "Zones not found for this drawing and plating type: "
+                f"{missing}"
+            )
+            return JsonResponse({"ok": False, "error": error}, status=404)
+
+        card, _ = PlatingAreaCard.objects.get_or_create(
+            drawing=drawing,
+            plating_type=plating_type,
+            defaults={"created_by": request.user, "is_active": True},
+        )
+
+        created = [
+            DrawingZone(drawing=drawing, plating_type=plating_type,
+                        created_by=request.user, **fields)
+            for section, _i, fields in writes
+            if section == "created"
+        ]
+        DrawingZone.objects.bulk_create(created, batch_size=500)
+
+        now = timezone.now()
+        updated = []
+        updates = (w for w in writes if w[0] == "updated")
+        for zone_id, (_section, _i, fields) in zip(updated_ids, updates):
+            zone = existing[zone_id]
+            for name, value in fields.items():
+                setattr(zone, name, value)
+            # bulk_update skips auto_now
+            zone.updated_at = now
+            updated.append(zone)
+        DrawingZone.objects.bulk_update(updated, ZONE_FIELDS, batch_size=500)
+
+        # Same link as save_zone_view: every saved zone is on the card and
+        # selected
+        PlatingCardZoneSelection.objects.bulk_create(
+            [
+                PlatingCardZoneSelection(
+                    plating_card=card, zone=zone, selected=True
+                )
+                for zone in created + updated
+            ],
+            update_conflicts=True,
+            unique_fields=["plating_card", "zone"],
+            update_fields=["selected"],
+            batch_size=500,
+        )
+
+        if deleted_ids:
+            DrawingZone.objects.filter(pk__in=deleted_ids).delete()
+
+        # Bulk writes send no signals; the deletes' refreshes are batched too
+        others = cards_for_zones(zone.pk for zone in updated)
+        schedule_card_totals([card.pk, *others])
+
+    card.refresh_from_db(
+        fields=["gross_area_value", "excluded_area_value", "net_area_value"]
+    )
+    return JsonResponse(
+        {
+            "ok": True,
+            "plating_type": plating_type,
+            "card_id": card.id,
+            "totals": _card_totals(card),
+            "created": [
+                {"client_id": item.get("client_id"), "id": zone.id}
+                for item, zone in zip(sections["created"], created)
+            ],
+            "updated": updated_ids,
+            "deleted": deleted_ids,
+        }
+    )
+
+
 @require_POST
 @login_required
 @user_passes_test(is_engineer)
@@ -318,6 +559,12 @@ def page_image_view(request: HttpRequest, drawing_id: int) -> HttpResponse:
 
     Query params:
       dpi (int) default 150, clamped 72..300
+      v   PDF version from _page_image_url; when it matches, the response
+          may be cached for a year (a new PDF gets a new URL)
+
+    Rendered pages come from the drawings disk cache, and responses carry
+    an ETag (PDF hash + dpi) and Last-Modified (the PDF's mtime), so a
+    revalidation of an unchanged page is a 304.
     """
     drawing = get_object_or_404(Drawing, pk=drawing_id, is_active=True)
 
@@ -328,11 +575,7 @@ def page_image_view(request: HttpRequest, drawing_id: int) -> HttpResponse:
             status=400,
         )
 
-    try:
-        dpi = int(request.GET.get("dpi", "150"))
-    except ValueError:
-        dpi = 150
-    dpi = max(72, min(300, dpi))
+    dpi = clamp_dpi(request.GET.get("dpi"))
 
     pdf_path = Path(pdf_field.path)
     if not pdf_path.exists():
@@ -345,25 +588,160 @@ def page_image_view(request: HttpRequest, drawing_id: int) -> HttpResponse:
             status=404,
         )
 
-    try:
-        doc = fitz.open(str(pdf_path))
+    return _png_response(
+        request, drawing, pdf_path, str(dpi),
+        lambda: _queued_page_png(drawing, dpi),
+    )
+
+
+def _queued_page_png(drawing: Drawing, dpi: int) -> Optional[bytes]:
+    """
+    The page PNG from the drawings cache, or ``None`` once a
+    ``drawing_page_png`` job is queued for it (run in the request with
+    ``RENDER_JOBS_EAGER``).
+    """
+    key = page_png_key(drawing, dpi)
+    data = cached_result("drawing_page_png", key)
+    if data is None:
+        job, _created = enqueue(
+            "drawing_page_png", {"drawing_id": drawing.pk, "dpi": dpi},
+            key=key,
+        )
+        if settings.RENDER_JOBS_EAGER:
+            job = run_now(job)
+            if job.status == job.STATUS_FAILED:
+                raise ValueError(job_payload(job)["error"])
+            data = cached_result("drawing_page_png", job.key)
+    return data
+
+
+def _png_response(
+    request: HttpRequest,
+    drawing: Drawing,
+    pdf_path: Path,
+    variant: str,
+    render,
+) -> HttpResponse:
+    """
+    PNG from ``render()`` with validators: ETag (PDF hash + ``variant``)
+    and Last-Modified (the PDF's mtime); a matching revalidation is a 304
+    without rendering.  ``?v=`` equal to the PDF version (_page_image_url)
+    makes the response cacheable for a year.  ``render()`` returning
+    ``None`` (render queued) is an uncached 202 with ``Retry-After``.
+    """
+    version = pdf_digest(drawing)
+    etag = f'"{version[:32]}-{variant}"'
+    last_modified = int(pdf_path.stat().st_mtime)
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
         try:
-            if doc.page_count < 1:
-                return JsonResponse(
-                    {"ok": False, "error": "PDF has no pages."},
-                    status=400,
-                )
-            page = doc.load_page(0)  # single-page behavior
-            scale = dpi / 72.0
-            mat = fitz.Matrix(scale, scale)
-            pix = page.get_pixmap(matrix=mat, alpha=False)
-            png_bytes = pix.tobytes("png")
-        finally:
-            doc.close()
-    except Exception as exc:
-        return JsonResponse({"ok": False, "error": f"Render failed: {exc}"}, status=500)
+            png_bytes = render()
+        except ValueError as exc:
+            return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+        except Exception as exc:
+            return JsonResponse(
+                {"ok": False, "error": f"Render failed: {exc}"}, status=500
+            )
+        if png_bytes is None:
+            response = JsonResponse(
+                {"ok": False, "error": "Rendering, try again shortly."},
+                status=202,
+            )
+            response["Retry-After"] = "1"
+            patch_cache_control(response, no_store=True)
+            return response
+        response = HttpResponse(png_bytes, content_type="image/png")
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    if request.GET.get("v") == version[:PAGE_VERSION_LENGTH]:
+        patch_cache_control(response, private=True,
+                            max_age=PAGE_IMAGE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _drawing_pdf(drawing_id: int):
+    """
+    ``(drawing, pdf path, None)``, or ``(drawing, None, error response)``
+    when there is no PDF to render.
+    """
+    drawing = get_object_or_404(Drawing, pk=drawing_id, is_active=True)
+    if not drawing.pdf_file:
+        error = {"ok": False, "error": "Drawing has no PDF attached."}
+        return drawing, None, JsonResponse(error, status=400)
+    pdf_path = Path(drawing.pdf_file.path)
+    if not pdf_path.exists():
+        error = {"ok": False, "error": "PDF file not found on disk."}
+        return drawing, None, JsonResponse(error, status=404)
+    return drawing, pdf_path, None
 
-    return HttpResponse(png_bytes, content_type="image/png")
+
+@require_GET
+@login_required
+@user_passes_test(is_operator)
+def tiles_json_view(request: HttpRequest, drawing_id: int) -> JsonResponse:
+    """
+    Deep-zoom tile pyramid of the drawing page (see drawings/renderers.py).
+
+    Returns the page size in points, the tile size, every level's pixel
+    size and tile grid, and ``tile_url`` with ``{level}``, ``{x}`` and
+    ``{y}`` placeholders (already versioned with the PDF hash).
+    """
+    drawing, pdf_path, error = _drawing_pdf(drawing_id)
+    if error:
+        return error
+    try:
+        pyramid = tile_pyramid(drawing)
+    except ValueError as exc:
+        return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+
+    # drawings:tile is drawings:tiles_json + "<level>/<x>/<y>.png"
+    tiles_url = reverse("drawings:tiles_json",
+                        kwargs={"drawing_id": drawing.id})
+    version = pdf_digest(drawing)[:PAGE_VERSION_LENGTH]
+    return JsonResponse(
+        {
+            "ok": True,
+            "width": pyramid.width,
+            "height": pyramid.height,
+            "tile_size": TILE_SIZE,
+            "max_level": pyramid.max_level,
+            "levels": pyramid.levels(),
+            "tile_url": f"{tiles_url}{{level}}/{{x}}/{{y}}.png?v={version}",
+        }
+    )
+
+
+@require_GET
+@login_required
+@user_passes_test(is_operator)
+def tile_view(
+    request: HttpRequest, drawing_id: int, level: int, x: int, y: int
+) -> HttpResponse:
+    """
+    One ``TILE_SIZE`` PNG tile of the page pyramid, rendered on first
+    request and cached.
+    """
+    drawing, pdf_path, error = _drawing_pdf(drawing_id)
+    if error:
+        return error
+    try:
+        pyramid = tile_pyramid(drawing)
+    except ValueError as exc:
+        return JsonResponse({"ok": False, "error": str(exc)}, status=400)
+    if not pyramid.has_tile(level, x, y):
+        return JsonResponse({"ok": False, "error": "No such tile."},
+                            status=404)
+
+    return _png_response(
+        request, drawing, pdf_path, f"tile-{level}-{x}-{y}",
+        lambda: cached_tile_png(drawing, level, x, y),
+    )
 
 
 # -------------------------
@@ -380,7 +758,20 @@ def operator_drawing_list_view(request: HttpRequest) -> HttpResponse:
     """
     q = (request.GET.get("q") or "").strip()
 
-    drawings_qs = Drawing.objects.filter(is_active=True).order_by("drawing_number", "id")
+    drawings_qs = (
+        Drawing.objects.filter(is_active=True)
+        .prefetch_related(
+            Prefetch(
+                "plating_cards",
+                queryset=(
+                    PlatingAreaCard.objects.filter(is_active=True)
+                    .order_by("plating_type", "id")
+                ),
+                to_attr="active_cards",
+            )
+        )
+        .order_by("drawing_number", "id")
+    )
     if q:
         drawings_qs = drawings_qs.filter(
             Q(drawing_number__icontains=q) | Q(title__icontains=q)
@@ -417,10 +808,9 @@ def operator_plating_card_view(request: HttpRequest, card_id: int) -> HttpRespon
             "drawings:operator_zones_json",
             kwargs={"card_id": card.id},
         ),
-        "page_image_url": reverse(
-            "drawings:page_image",
-            kwargs={"drawing_id": card.drawing_id},
-        ),
+        "page_image_url": _page_image_url(card.drawing),
+        "tiles_json_url": reverse("drawings:tiles_json",
+                                  kwargs={"drawing_id": card.drawing_id}),
     }
     return render(request, "drawings/operator_plating_card.html", context)
 
@@ -458,6 +848,12 @@ def operator_zones_json_view(request: HttpRequest, card_id: int) -> JsonResponse
                 "geometry": z.geometry,
                 "area_value": str(z.area_value),
                 "area_unit": z.area_unit,
+                # In the card's unit, for what-if totals when the operator
+                # toggles zones
+                "card_area_value": str(
+                    convert_area(z.area_value, z.area_unit, card.area_unit)
+                    .quantize(AREA_PLACES)
+                ),
                 "is_exclusion_zone": z.is_exclusion_zone,
                 "default_selected": z.default_selected,
                 "notes": z.notes or "",
@@ -467,5 +863,11 @@ def operator_zones_json_view(request: HttpRequest, card_id: int) -> JsonResponse
         )
 
     return JsonResponse(
-        {"ok": True, "card_id": card.id, "plating_type": card.plating_type, "zones": zones}
+        {
+            "ok": True,
+            "card_id": card.id,
+            "plating_type": card.plating_type,
+            "totals": _card_totals(card),
+            "zones": zones,
+        }
     )
@@ -0,0 +1,50 @@
+# jobs/admin.py
+from django.contrib import admin
+from django.db import IntegrityError, transaction
+
+from .models import RenderJob
+
+
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    """Read-only view of the render queue with per-job timings."""
+
+    list_display = (
+        "id",
+        "kind",
+        "status",
+        "attempts",
+        "created_at",
+        "queue_seconds",
+        "run_seconds",
+        "result_bytes",
+        "worker",
+    )
+    list_filter = ("status", "kind")
+    search_fields = ("key", "filename", "worker")
+    date_hierarchy = "created_at"
+    readonly_fields = [f.name for f in RenderJob._meta.fields]
+    actions = ["requeue"]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description="Re-queue selected jobs")
+    def requeue(self, request, queryset):
+        updated = 0
+        finished = queryset.exclude(status__in=RenderJob.ACTIVE_STATUSES)
+        for pk in finished.values_list("pk", flat=True):
+            try:
+                with transaction.atomic():
+                    updated += RenderJob.objects.filter(pk=pk).update(
+                        status=RenderJob.STATUS_QUEUED,
+                        started_at=None,
+                        heartbeat_at=None,
+                        finished_at=None,
+                        error="",
+                        worker="",
+                    )
+            except IntegrityError:
+                # The same content is already queued or running
+                continue
+        self.message_user(request, f"Re-queued {updated} job(s).")
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+    verbose_name = 'Render Jobs'
+
+    def ready(self):
+        # Each app registers the renders it offers in <app>/renderers.py
+        autodiscover_modules('renderers')
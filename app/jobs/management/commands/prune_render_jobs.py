@@ -0,0 +1,37 @@
+# jobs/management/commands/prune_render_jobs.py
+"""
+Delete finished render jobs (done or failed) older than the retention
+window. The rendered files live in the disk caches and are not touched.
+
+    python manage.py prune_render_jobs           # RENDER_JOBS_RETENTION_DAYS
+    python manage.py prune_render_jobs --days 3
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from jobs.models import RenderJob
+
+
+class Command(BaseCommand):
+    help = "Delete finished render jobs older than the retention window."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=settings.RENDER_JOBS_RETENTION_DAYS,
+            help="Keep jobs finished within this many days "
+                 "(default: RENDER_JOBS_RETENTION_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        if days < 0:
+            raise CommandError("--days must be zero or more.")
+        cutoff = timezone.now() - timedelta(days=days)
+        deleted, _ = RenderJob.objects.filter(
+            status__in=[RenderJob.STATUS_DONE, RenderJob.STATUS_FAILED],
+            finished_at__lt=cutoff,
+        ).delete()
+        self.stdout.write(f"Deleted {deleted} finished render job(s).")
@@ -0,0 +1,142 @@
+# jobs/management/commands/render_worker.py
+"""
+Run queued render jobs (PDF, SVG, PNG) outside the web workers.
+
+    python manage.py render_worker  # RENDER_JOBS_CONCURRENCY processes
+    python manage.py render_worker --concurrency 4
+    python manage.py render_worker --once  # drain the queue and exit
+"""
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from app.render_pool import worker_process
+from jobs.queue import claim_next, requeue_stale, run_job, worker_name
+
+logger = logging.getLogger(__name__)
+
+# How often (seconds) each worker looks for jobs abandoned by a dead worker
+STALE_CHECK_INTERVAL = 60
+
+
+def work(poll_interval, once=False, stop=None):
+    """
+    Claim and run jobs until ``stop`` is set (or the queue is empty with
+    ``once``).
+    """
+    with worker_process():
+        return _work(poll_interval, once, stop)
+
+
+def _work(poll_interval, once, stop):
+    name = worker_name()
+    processed = 0
+    last_stale_check = 0.0
+
+    while stop is None or not stop.is_set():
+        now = time.monotonic()
+        if now - last_stale_check > STALE_CHECK_INTERVAL:
+            requeue_stale()
+            last_stale_check = now
+
+        if not once:
+            # Long-running loop: drop connections past CONN_MAX_AGE or broken
+            close_old_connections()
+        job = claim_next(name)
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        run_job(job)
+        processed += 1
+
+    return processed
+
+
+def _child(poll_interval, stop):
+    # Let the parent decide when to stop; finish the current job first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    work(poll_interval, stop=stop)
+
+
+class Command(BaseCommand):
+    help = "Run queued render jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.RENDER_JOBS_CONCURRENCY,
+            help="Number of worker processes "
+                 "(default: RENDER_JOBS_CONCURRENCY).",
+        )
+        parser.add_argument(
+            "--poll", type=float, default=settings.RENDER_JOBS_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Run every queued job in this process, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        poll_interval = options["poll"]
+
+        if options["once"]:
+            processed = work(poll_interval, once=True)
+            self.stdout.write(f"Processed {processed} job(s).")
+            return
+
+        ctx = multiprocessing.get_context("fork")
+        stop = ctx.Event()
+
+        def shutdown(signum, frame):
+            logger.info("Render worker stopping (signal %s)", signum)
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        # Children open their own database connections
+        connections.close_all()
+        children = [
+            ctx.Process(
+                target=_child,
+                args=(poll_interval, stop),
+                name=f"render-worker-{i}",
+            )
+            for i in range(concurrency)
+        ]
+        for child in children:
+            child.start()
+        self.stdout.write(
+            f"Render worker started with {concurrency} process(es)."
+        )
+
+        while not stop.is_set():
+            for i, child in enumerate(children):
+                if not child.is_alive():
+                    logger.warning(
+                        "%s exited with %s; restarting",
+                        child.name,
+                        child.exitcode,
+                    )
+                    children[i] = ctx.Process(
+                        target=_child,
+                        args=(poll_interval, stop),
+                        name=child.name,
+                    )
+                    children[i].start()
+            stop.wait(1.0)
+
+        for child in children:
+            child.join()
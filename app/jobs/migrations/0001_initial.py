@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-18 10:15
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RenderJob',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('kind', models.CharField(max_length=50)),
+                (
+                    'key',
+                    models.CharField(
+                        help_text='Cache key the result is stored under.',
+                        max_length=200,
+                    ),
+                ),
+                ('cache', models.CharField(default='jobs', max_length=50)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                (
+                    'content_type',
+                    models.CharField(
+                        default='application/octet-stream', max_length=100
+                    ),
+                ),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('queued', 'Queued'),
+                            ('running', 'Running'),
+                            ('done', 'Done'),
+                            ('failed', 'Failed'),
+                        ],
+                        default='queued',
+                        max_length=10,
+                    ),
+                ),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                (
+                    'result_bytes',
+                    models.PositiveIntegerField(blank=True, null=True),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Render Job',
+                'verbose_name_plural': 'Render Jobs',
+                'ordering': ['-created_at'],
+                'indexes': [
+                    models.Index(
+                        fields=['status', 'created_at'],
+                        name='jobs_render_status_ac1bce_idx',
+                    ),
+                    models.Index(
+                        fields=['kind', 'key'],
+                        name='jobs_render_kind_6ac8f1_idx',
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2 on 2026-10-18 12:22
+
+from django.db import migrations, models
+from django.utils import timezone
+
+ACTIVE = ['queued', 'running']
+
+
+def fail_duplicate_active_jobs(apps, schema_editor):
+    # Keep the oldest queued/running job per (kind, key) so the
+    # constraint below can be created
+    RenderJob = apps.get_model('jobs', 'RenderJob')
+    seen = {}
+    duplicates = []
+    active = RenderJob.objects.filter(status__in=ACTIVE).order_by(
+        'created_at', 'pk'
+    )
+    for pk, kind, key in active.values_list('pk', 'kind', 'key'):
+        if (kind, key) in seen:
+            duplicates.append(pk)
+        else:
+            seen[(kind, key)] = pk
+    RenderJob.objects.filter(pk__in=duplicates).update(
+        status='failed',
+        error='Duplicate of an earlier job for the same content.',
+        finished_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='Last sign of life from the process running the '
+                          'job.',
+                null=True,
+            ),
+        ),
+        migrations.RunPython(
+            fail_duplicate_active_jobs, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='renderjob',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('status__in', ACTIVE)),
+                fields=('kind', 'key'),
+                name='jobs_renderjob_one_active_per_key',
+            ),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# jobs/models.py
+from __future__ import annotations
+
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class RenderJob(models.Model):
+    """
+    A queued render (PDF, SVG, PNG) picked up by ``manage.py render_worker``.
+
+    The rendered bytes are not stored on the row: they are written to the
+    ``RENDER_CACHES`` entry named by ``cache`` under ``key``, so a finished
+    job and a later request for the same content share one file.
+    """
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    kind = models.CharField(max_length=50)
+    key = models.CharField(
+        max_length=200, help_text="Cache key the result is stored under."
+    )
+    cache = models.CharField(max_length=50, default="jobs")
+    params = models.JSONField(default=dict, blank=True)
+
+    content_type = models.CharField(
+        max_length=100, default="application/octet-stream"
+    )
+    filename = models.CharField(max_length=255, blank=True)
+
+    status = models.CharField(
+        max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    result_bytes = models.PositiveIntegerField(null=True, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last sign of life from the process running the job.",
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Render Job"
+        verbose_name_plural = "Render Jobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["kind", "key"]),
+        ]
+        constraints = [
+            # At most one queued or running job per content
+            models.UniqueConstraint(
+                fields=["kind", "key"],
+                condition=Q(status__in=["queued", "running"]),
+                name="jobs_renderjob_one_active_per_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def queue_seconds(self) -> float | None:
+        """Time spent waiting for a worker."""
+        if not self.started_at:
+            return None
+        return (self.started_at - self.created_at).total_seconds()
+
+    @property
+    def run_seconds(self) -> float | None:
+        """Time spent rendering."""
+        if not (self.started_at and self.finished_at):
+            return None
+        return (self.finished_at - self.started_at).total_seconds()
@@ -0,0 +1,258 @@
+# jobs/queue.py
+"""
+Enqueue, claim and run render jobs.
+
+The queue is the ``RenderJob`` table.  Workers claim the oldest queued
+row with ``SELECT ... FOR UPDATE SKIP LOCKED`` so any number of worker
+processes can poll the same table without handing out a job twice, and
+a partial unique constraint allows one queued or running job per
+content, so concurrent requests for the same render share a job.
+
+While a job renders, its process touches ``heartbeat_at`` every
+``RENDER_JOBS_HEARTBEAT`` seconds; ``requeue_stale`` only recovers
+running jobs whose heartbeat is older than ``RENDER_JOBS_TIMEOUT``,
+i.e. whose worker died, never a slow render that is still going.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import BinaryIO, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from app.disk_cache import caches
+
+from .models import RenderJob
+from .registry import get_renderer
+
+logger = logging.getLogger(__name__)
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def cached_result(kind: str, key: str) -> Optional[bytes]:
+    """Rendered bytes for ``key`` if a job (or request) stored them."""
+    return caches[get_renderer(kind).cache].get(key)
+
+
+def cached_file(kind: str, key: str) -> Optional[BinaryIO]:
+    """``cached_result`` as an open file, for serving without reading it."""
+    return caches[get_renderer(kind).cache].open(key)
+
+
+def _active_job(kind: str, key: str) -> Optional[RenderJob]:
+    return (
+        RenderJob.objects
+        .filter(kind=kind, key=key, status__in=RenderJob.ACTIVE_STATUSES)
+        .first()
+    )
+
+
+def enqueue(
+    kind: str, params: dict, key: Optional[str] = None, filename: str = ""
+) -> Tuple[RenderJob, bool]:
+    """
+    Queue a render, or return the queued/running job for the same content.
+
+    Returns ``(job, created)``.
+    """
+    renderer = get_renderer(kind)
+    if key is None:
+        key = renderer.key(**params)
+    if not filename and renderer.filename:
+        filename = renderer.filename(**params)
+
+    existing = _active_job(kind, key)
+    if existing:
+        return existing, False
+    try:
+        with transaction.atomic():
+            job = RenderJob.objects.create(
+                kind=kind,
+                key=key,
+                cache=renderer.cache,
+                params=params,
+                content_type=renderer.content_type,
+                filename=filename,
+            )
+    except IntegrityError:
+        # Another request queued the same content in the meantime
+        existing = _active_job(kind, key)
+        if existing is None:
+            raise
+        return existing, False
+    logger.info("Queued %s", job)
+    return job, True
+
+
+def _claimed(job: RenderJob, worker: Optional[str], now) -> RenderJob:
+    job.status = RenderJob.STATUS_RUNNING
+    job.started_at = now
+    job.heartbeat_at = now
+    job.attempts += 1
+    job.worker = worker or worker_name()
+    return job
+
+
+def claim_next(worker: Optional[str] = None) -> Optional[RenderJob]:
+    """Mark the oldest queued job as running and return it (None if idle)."""
+    with transaction.atomic():
+        job = (
+            RenderJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=RenderJob.STATUS_QUEUED)
+            .order_by("created_at", "pk")
+            .first()
+        )
+        if job is None:
+            return None
+
+        _claimed(job, worker, timezone.now()).save(update_fields=[
+            "status", "started_at", "heartbeat_at", "attempts", "worker",
+        ])
+    return job
+
+
+@contextmanager
+def heartbeat(job: RenderJob):
+    """
+    Touch ``job.heartbeat_at`` every ``RENDER_JOBS_HEARTBEAT`` seconds
+    from a background thread while the block runs.
+    """
+    stop = threading.Event()
+
+    def beat():
+        try:
+            while not stop.wait(settings.RENDER_JOBS_HEARTBEAT):
+                RenderJob.objects.filter(
+                    pk=job.pk, status=RenderJob.STATUS_RUNNING
+                ).update(heartbeat_at=timezone.now())
+        finally:
+            # The thread's own connection, if it opened one
+            connection.close()
+
+    thread = threading.Thread(
+        target=beat, name=f"render-job-{job.pk}-heartbeat", daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_job(job: RenderJob) -> RenderJob:
+    """
+    Render a claimed job and store its bytes in the job's cache.
+
+    The key is computed again from the content the render reads: if it
+    changed after the job was queued, the bytes are stored under the new
+    key (and ``job.key`` moves with them), never under the stale one.
+    """
+    try:
+        renderer = get_renderer(job.kind)
+        key = renderer.key(**job.params)
+        with heartbeat(job):
+            data = renderer.render(**job.params)
+            if isinstance(data, bytes):
+                data = [data]
+            # A generator renders while it is written out
+            size = caches[job.cache].set_chunks(key, data)
+    except Exception:
+        job.status = RenderJob.STATUS_FAILED
+        job.error = traceback.format_exc()
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+        logger.exception("Render job %s failed", job.pk)
+        return job
+
+    if key != job.key:
+        logger.info("%s content changed since it was queued", job)
+    job.key = key
+    job.status = RenderJob.STATUS_DONE
+    job.error = ""
+    job.result_bytes = size
+    job.finished_at = timezone.now()
+    job.save(update_fields=[
+        "key", "status", "error", "result_bytes", "finished_at",
+    ])
+    logger.info(
+        "Rendered %s in %.2fs (waited %.2fs, %s bytes)",
+        job, job.run_seconds, job.queue_seconds, job.result_bytes,
+    )
+    return job
+
+
+def run_now(job: RenderJob) -> RenderJob:
+    """
+    Claim a queued job and run it in the calling process
+    (``RENDER_JOBS_EAGER``).  A job a worker claimed first is left to
+    the worker and returned as it stands.
+    """
+    now = timezone.now()
+    name = worker_name()
+    claimed = RenderJob.objects.filter(
+        pk=job.pk, status=RenderJob.STATUS_QUEUED
+    ).update(
+        status=RenderJob.STATUS_RUNNING,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=F("attempts") + 1,
+        worker=name,
+    )
+    job.refresh_from_db()
+    if not claimed:
+        return job
+    return run_job(job)
+
+
+def requeue_stale(
+    timeout: Optional[int] = None, max_attempts: Optional[int] = None
+) -> int:
+    """
+    Recover jobs whose worker died mid-render.
+
+    Running jobs without a heartbeat for ``timeout`` seconds go back to
+    the queue, or are failed once they have used up ``max_attempts``.
+    """
+    if timeout is None:
+        timeout = settings.RENDER_JOBS_TIMEOUT
+    if max_attempts is None:
+        max_attempts = settings.RENDER_JOBS_MAX_ATTEMPTS
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+
+    stale = RenderJob.objects.filter(status=RenderJob.STATUS_RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff)
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status=RenderJob.STATUS_FAILED,
+        error=(
+            f"Worker stopped responding for {timeout}s after "
+            f"{max_attempts} attempts."
+        ),
+        finished_at=timezone.now(),
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(
+        status=RenderJob.STATUS_QUEUED,
+        started_at=None,
+        heartbeat_at=None,
+        worker="",
+    )
+    if failed or requeued:
+        logger.warning(
+            "Stale render jobs: %s requeued, %s failed", requeued, failed
+        )
+    return failed + requeued
@@ -0,0 +1,122 @@
+# jobs/registry.py
+"""
+Registry of render kinds the job queue knows how to run.
+
+Each app declares its renders in a ``renderers.py`` module (autodiscovered
+by ``JobsConfig.ready()``)::
+
+    from jobs.registry import register
+
+    def traveler_key(work_order_id):
+        ...  # content digest of everything printed on the traveler
+
+    @register("traveler_pdf", key=traveler_key, cache="travelers",
+              params={"work_order_id": object_id},
+              content_type="application/pdf")
+    def traveler_pdf(work_order_id):
+        ...  # return the rendered bytes
+
+``key`` and the render function take the same keyword arguments, which
+are stored as the job's JSON ``params``.  A render returns bytes, or an
+iterable of byte chunks that the worker writes to the cache as they come
+(for results too large to hold in memory).  The key is computed in the web
+process; the render runs in the worker, which computes the key again
+and writes the bytes to the named ``RENDER_CACHES`` entry under it.
+
+``params`` maps each argument a client may send (jobs/views.py) to a
+converter that validates it; anything else is rejected, so a kind
+without ``params`` can only be queued from server code.  Arguments the
+client must not choose (URLs, file paths) are derived in the renderer.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+# Most ids a client may pass in one list param
+MAX_IDS = 1000
+
+
+def object_id(value: Any) -> int:
+    """A positive integer primary key."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError("ids must be integers")
+    pk = int(value)
+    if pk < 1:
+        raise ValueError("ids must be positive")
+    return pk
+
+
+def object_ids(value: Any, limit: int = MAX_IDS) -> List[int]:
+    """A list of at most ``limit`` primary keys."""
+    if not isinstance(value, list):
+        raise TypeError("ids must be a list")
+    if len(value) > limit:
+        raise ValueError(f"at most {limit} ids")
+    return [object_id(item) for item in value]
+
+
+def boolean(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise TypeError("expected true or false")
+    return value
+
+
+class Renderer:
+    def __init__(
+        self,
+        kind: str,
+        render: Callable[..., Union[bytes, Iterable[bytes]]],
+        key: Callable[..., str],
+        content_type: str,
+        cache: str = "jobs",
+        filename: Optional[Callable[..., str]] = None,
+        params: Optional[Dict[str, Callable[[Any], Any]]] = None,
+    ) -> None:
+        self.kind = kind
+        self.render = render
+        self.key = key
+        self.content_type = content_type
+        self.cache = cache
+        self.filename = filename
+        self.params = params or {}
+
+    def __repr__(self) -> str:
+        return f"<Renderer {self.kind}>"
+
+    def clean_params(self, params: dict) -> dict:
+        """
+        Client-supplied ``params`` passed through the kind's converters;
+        raises ValueError for names outside the schema (and the
+        converters raise TypeError/ValueError for bad values).
+        """
+        unknown = sorted(set(params) - set(self.params))
+        if unknown:
+            raise ValueError(f"unexpected params: {', '.join(unknown)}")
+        return {
+            name: self.params[name](value) for name, value in params.items()
+        }
+
+
+_registry: Dict[str, Renderer] = {}
+
+
+def register(
+    kind, *, key, content_type, cache="jobs", filename=None, params=None
+):
+    """Decorator registering a render function under ``kind``."""
+    def decorator(render):
+        _registry[kind] = Renderer(
+            kind, render, key, content_type, cache=cache, filename=filename,
+            params=params,
+        )
+        return render
+    return decorator
+
+
+def get_renderer(kind: str) -> Renderer:
+    """The renderer for ``kind``; raises KeyError for unknown kinds."""
+    return _registry[kind]
+
+
+def kinds():
+    return sorted(_registry)
@@ -0,0 +1,137 @@
+# jobs/shortcuts.py
+"""
+Helpers for views that hand their render off to the job queue.
+
+``serve_or_enqueue()`` turns a rendering view into a thin wrapper: serve
+the cached file when the content has been rendered before, otherwise
+queue a job and answer ``202 Accepted`` with a page (or JSON, for
+``Accept: application/json``) that polls until the result is ready.
+"""
+from __future__ import annotations
+
+import io
+import logging
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.shortcuts import render
+from django.urls import reverse
+
+from .queue import cached_file, enqueue, run_now
+from .registry import get_renderer
+
+logger = logging.getLogger(__name__)
+
+
+def file_response(
+    data, content_type, filename="", disposition="inline", cache_status=None
+):
+    """
+    Stream rendered bytes, or an open cache file (``cached_file``), with
+    a Content-Length.
+    """
+    response = FileResponse(
+        io.BytesIO(data) if isinstance(data, bytes) else data,
+        content_type=content_type,
+        as_attachment=disposition == "attachment",
+        filename=filename,
+    )
+    if cache_status:
+        response["X-Cache"] = cache_status
+    return response
+
+
+def job_payload(job):
+    """JSON-friendly status of a job, as returned by the status endpoint."""
+    return {
+        "id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "error": job.error.strip().splitlines()[-1] if job.error else "",
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": (
+            job.finished_at.isoformat() if job.finished_at else None
+        ),
+        "queue_seconds": job.queue_seconds,
+        "run_seconds": job.run_seconds,
+        "status_url": reverse("jobs:status", args=[job.pk]),
+        "result_url": reverse("jobs:result", args=[job.pk]),
+    }
+
+
+def accepted_response(request, job, disposition="inline"):
+    """
+    202 for a job that is still rendering: JSON for scripts, a wait page
+    for browsers.
+    """
+    payload = job_payload(job)
+    if disposition == "attachment":
+        payload["result_url"] += "?download=1"
+
+    if "application/json" in request.headers.get("Accept", ""):
+        response = JsonResponse(payload, status=202)
+    else:
+        response = render(
+            request,
+            "jobs/job_wait.html",
+            {"job": job, "payload": payload},
+            status=202,
+        )
+    response["Retry-After"] = "1"
+    return response
+
+
+def serve_or_enqueue(
+    request, kind, params, key=None, filename="", disposition="inline"
+):
+    """
+    The cached result for ``kind``/``params``, served from its cache file,
+    if available, else a queued job.
+
+    With ``RENDER_JOBS_EAGER`` the job is run inside the request instead,
+    which keeps single-process setups (and tests) working without a worker.
+    """
+    renderer = get_renderer(kind)
+    if key is None:
+        key = renderer.key(**params)
+
+    data = cached_file(kind, key)
+    logger.info(
+        "%s cache %s for %s", kind, "HIT" if data is not None else "MISS", key
+    )
+    if data is not None:
+        return file_response(
+            data,
+            renderer.content_type,
+            filename,
+            disposition,
+            cache_status="HIT",
+        )
+
+    job, _created = enqueue(kind, params, key=key, filename=filename)
+
+    if settings.RENDER_JOBS_EAGER:
+        job = run_now(job)
+        if job.is_active:
+            # A render worker claimed it first
+            return accepted_response(request, job, disposition)
+        data = (
+            cached_file(kind, job.key)
+            if job.status == job.STATUS_DONE else None
+        )
+        if data is None:
+            return HttpResponse(
+                f"Render failed: {job_payload(job)['error']}",
+                content_type="text/plain",
+                status=500,
+            )
+        return file_response(
+            data,
+            renderer.content_type,
+            filename,
+            disposition,
+            cache_status="MISS",
+        )
+
+    return accepted_response(request, job, disposition)
@@ -0,0 +1,425 @@
+# jobs/tests.py
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app.disk_cache import caches
+from part.tests import (
+    make_classification, make_method, make_part, make_process, make_standard,
+    make_standard_process, make_work_order,
+)
+from process.models import ProcessStep
+
+from .models import RenderJob
+from .queue import claim_next, enqueue, requeue_stale, run_job, run_now
+from .registry import get_renderer, register
+
+RENDERS = []
+# Content version read by the test_versioned key
+VERSIONS = {}
+
+
+def _echo_key(text):
+    if text == "missing":
+        raise ValueError("no such text")
+    return f"echo-{text}"
+
+
+@register(
+    "test_echo",
+    key=_echo_key,
+    content_type="text/plain",
+    filename=lambda text: f"{text}.txt",
+    params={"text": str},
+)
+def _echo(text):
+    RENDERS.append(text)
+    if text == "boom":
+        raise RuntimeError("render exploded")
+    return text.upper().encode()
+
+
+@register(
+    "test_chunks",
+    key=lambda count: f"chunks-{count}",
+    content_type="application/octet-stream",
+)
+def _chunks(count):
+    for i in range(count):
+        yield b"%d;" % i
+
+
+@register(
+    "test_versioned",
+    key=lambda text: f"versioned-{text}-{VERSIONS[text]}",
+    content_type="text/plain",
+)
+def _versioned(text):
+    return f"{text} v{VERSIONS[text]}".encode()
+
+
+class _QueueBase(TestCase):
+    def setUp(self):
+        RENDERS.clear()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        override = override_settings(
+            RENDER_CACHES={
+                'jobs': {'DIR': Path(self._tmp.name), 'MAX_BYTES': 1024 * 1024}
+            },
+            RENDER_JOBS_EAGER=False,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = User.objects.create_user(
+            username="operator", password="pass1234"
+        )
+        self.client.force_login(self.user)
+
+
+class TestRenderQueue(_QueueBase):
+    def test_enqueue_reuses_active_job_for_same_content(self):
+        first, created = enqueue("test_echo", {"text": "a"})
+        second, created_again = enqueue("test_echo", {"text": "a"})
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(first.key, "echo-a")
+        self.assertEqual(first.filename, "a.txt")
+
+    def test_claim_next_takes_oldest_queued_job(self):
+        older, _ = enqueue("test_echo", {"text": "old"})
+        enqueue("test_echo", {"text": "new"})
+        RenderJob.objects.filter(pk=older.pk).update(
+            created_at=timezone.now() - timedelta(minutes=5)
+        )
+
+        job = claim_next("test-worker")
+        self.assertEqual(job.pk, older.pk)
+        self.assertEqual(job.status, RenderJob.STATUS_RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertEqual(job.worker, "test-worker")
+
+    def test_claim_next_returns_none_when_idle(self):
+        self.assertIsNone(claim_next())
+
+    def test_run_job_stores_result_and_timings(self):
+        enqueue("test_echo", {"text": "hello"})
+        job = run_job(claim_next())
+        self.assertEqual(job.status, RenderJob.STATUS_DONE)
+        self.assertEqual(job.result_bytes, 5)
+        self.assertIsNotNone(job.run_seconds)
+        self.assertIsNotNone(job.queue_seconds)
+        self.assertEqual(caches['jobs'].get("echo-hello"), b"HELLO")
+
+    def test_run_job_stores_under_the_key_of_what_it_rendered(self):
+        VERSIONS["doc"] = 1
+        enqueue("test_versioned", {"text": "doc"})
+        VERSIONS["doc"] = 2
+        job = run_job(claim_next())
+        self.assertEqual(job.key, "versioned-doc-2")
+        self.assertIsNone(caches['jobs'].get("versioned-doc-1"))
+        self.assertEqual(caches['jobs'].get("versioned-doc-2"), b"doc v2")
+
+    def test_run_job_writes_chunked_results_to_the_cache(self):
+        job, _ = enqueue("test_chunks", {"count": 3})
+        job = run_job(claim_next())
+        self.assertEqual(job.result_bytes, 6)
+        self.assertEqual(caches['jobs'].get("chunks-3"), b"0;1;2;")
+
+        resp = self.client.get(reverse("jobs:result", args=[job.pk]))
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Length"], "6")
+        self.assertEqual(resp.getvalue(), b"0;1;2;")
+
+    def test_run_job_records_failure(self):
+        enqueue("test_echo", {"text": "boom"})
+        job = run_job(claim_next())
+        self.assertEqual(job.status, RenderJob.STATUS_FAILED)
+        self.assertIn("render exploded", job.error)
+
+    def test_requeue_stale_running_jobs(self):
+        enqueue("test_echo", {"text": "a"})
+        enqueue("test_echo", {"text": "b"})
+        retry = claim_next()
+        give_up = claim_next()
+        RenderJob.objects.filter(pk=give_up.pk).update(attempts=3)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        RenderJob.objects.update(
+            started_at=an_hour_ago, heartbeat_at=an_hour_ago
+        )
+
+        requeue_stale(timeout=60, max_attempts=3)
+
+        retry.refresh_from_db()
+        give_up.refresh_from_db()
+        self.assertEqual(retry.status, RenderJob.STATUS_QUEUED)
+        self.assertEqual(give_up.status, RenderJob.STATUS_FAILED)
+
+    def test_slow_job_with_a_heartbeat_is_left_running(self):
+        enqueue("test_echo", {"text": "slow"})
+        job = claim_next()
+        RenderJob.objects.update(
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale(timeout=60), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, RenderJob.STATUS_RUNNING)
+        self.assertEqual(job.attempts, 1)
+
+    def test_one_active_job_per_content(self):
+        enqueue("test_echo", {"text": "a"})
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RenderJob.objects.create(kind="test_echo", key="echo-a")
+
+        # A request that lost the race gets the winner's job
+        with patch(
+            "jobs.queue._active_job",
+            side_effect=[None, RenderJob.objects.get()],
+        ):
+            job, created = enqueue("test_echo", {"text": "a"})
+        self.assertFalse(created)
+        self.assertEqual(RenderJob.objects.count(), 1)
+
+    def test_run_now_leaves_a_job_claimed_by_a_worker(self):
+        job, _ = enqueue("test_echo", {"text": "a"})
+        claim_next("test-worker")
+
+        job = run_now(job)
+        self.assertEqual(job.status, RenderJob.STATUS_RUNNING)
+        self.assertEqual(job.worker, "test-worker")
+        self.assertEqual(RENDERS, [])
+
+        other, _ = enqueue("test_echo", {"text": "b"})
+        other = run_now(other)
+        self.assertEqual(other.status, RenderJob.STATUS_DONE)
+        self.assertEqual(other.attempts, 1)
+
+    def test_worker_once_drains_queue(self):
+        enqueue("test_echo", {"text": "a"})
+        enqueue("test_echo", {"text": "b"})
+        call_command("render_worker", "--once", stdout=open("/dev/null", "w"))
+        self.assertEqual(sorted(RENDERS), ["a", "b"])
+        self.assertFalse(
+            RenderJob.objects.filter(
+                status__in=RenderJob.ACTIVE_STATUSES
+            ).exists()
+        )
+
+
+class TestJobEndpoints(_QueueBase):
+    def test_enqueue_endpoint_returns_202_then_200_once_cached(self):
+        url = reverse("jobs:enqueue")
+        body = {"kind": "test_echo", "params": {"text": "hi"}}
+
+        resp = self.client.post(url, body, content_type="application/json")
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()["id"]
+
+        run_job(claim_next())
+
+        resp = self.client.post(url, body, content_type="application/json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["status"], "done")
+        self.assertIsNone(resp.json()["id"])
+        # A cache hit records nothing
+        self.assertEqual(
+            list(RenderJob.objects.values_list("pk", flat=True)), [job_id]
+        )
+
+        result = self.client.get(resp.json()["result_url"])
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.getvalue(), b"HI")
+
+    def test_render_endpoint_queues_on_miss(self):
+        url = reverse("jobs:render")
+        params = json.dumps({"text": "later"})
+
+        resp = self.client.get(
+            url, {"kind": "test_echo", "params": params},
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(RenderJob.objects.get().key, "echo-later")
+
+        resp = self.client.get(url, {"kind": "nope", "params": params})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_enqueue_endpoint_rejects_unknown_kind_and_bad_params(self):
+        url = reverse("jobs:enqueue")
+        resp = self.client.post(
+            url, {"kind": "nope"}, content_type="application/json"
+        )
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post(
+            url,
+            {"kind": "test_echo", "params": {"text": "missing"}},
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_params_outside_the_kind_schema_are_rejected(self):
+        url = reverse("jobs:enqueue")
+        for kind, params in [
+            ("test_echo", {"text": "hi", "extra": 1}),
+            # Server-side kind: no client params at all
+            ("test_versioned", {"text": "hi"}),
+            ("masking_process_pdf",
+             {"process_id": 1, "base_url": "file:///etc/"}),
+            ("drawing_page_png", {"drawing_id": True}),
+        ]:
+            with self.subTest(kind=kind):
+                resp = self.client.post(
+                    url, {"kind": kind, "params": params},
+                    content_type="application/json",
+                )
+                self.assertEqual(resp.status_code, 400)
+        self.assertFalse(RenderJob.objects.exists())
+
+    def test_page_dpi_is_clamped(self):
+        from drawings.renderers import MAX_DPI
+
+        params = get_renderer("drawing_page_png").clean_params(
+            {"drawing_id": 1, "dpi": 20000}
+        )
+        self.assertEqual(params, {"drawing_id": 1, "dpi": MAX_DPI})
+
+    def test_status_and_result(self):
+        job, _ = enqueue("test_echo", {"text": "pdf"})
+
+        status = self.client.get(reverse("jobs:status", args=[job.pk])).json()
+        self.assertEqual(status["status"], "queued")
+        result = self.client.get(
+            reverse("jobs:result", args=[job.pk]),
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(result.status_code, 202)
+
+        run_job(claim_next())
+
+        result = self.client.get(
+            reverse("jobs:result", args=[job.pk]), {"download": "1"}
+        )
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.getvalue(), b"PDF")
+        self.assertEqual(
+            result["Content-Disposition"], 'attachment; filename="pdf.txt"'
+        )
+
+    def test_result_requeues_when_cache_evicted(self):
+        job, _ = enqueue("test_echo", {"text": "gone"})
+        run_job(claim_next())
+        caches['jobs'].clear()
+
+        resp = self.client.get(reverse("jobs:result", args=[job.pk]))
+        self.assertEqual(resp.status_code, 202)
+        self.assertEqual(
+            RenderJob.objects.filter(key="echo-gone", status="queued").count(),
+            1,
+        )
+
+    def test_failed_job_result_is_500(self):
+        job, _ = enqueue("test_echo", {"text": "boom"})
+        run_job(claim_next())
+        resp = self.client.get(reverse("jobs:result", args=[job.pk]))
+        self.assertEqual(resp.status_code, 500)
+        self.assertIn("render exploded", resp.json()["error"])
+
+    def test_prune_render_jobs_keeps_recent_and_active_jobs(self):
+        old, _ = enqueue("test_echo", {"text": "old"})
+        run_job(claim_next())
+        recent, _ = enqueue("test_echo", {"text": "recent"})
+        run_job(claim_next())
+        queued, _ = enqueue("test_echo", {"text": "queued"})
+        RenderJob.objects.filter(pk=old.pk).update(
+            finished_at=timezone.now() - timedelta(days=30)
+        )
+
+        call_command("prune_render_jobs", stdout=StringIO())
+
+        self.assertEqual(
+            set(RenderJob.objects.values_list("pk", flat=True)),
+            {recent.pk, queued.pk},
+        )
+
+    def test_metrics(self):
+        enqueue("test_echo", {"text": "a"})
+        enqueue("test_echo", {"text": "b"})
+        run_job(claim_next())
+
+        data = self.client.get(reverse("jobs:metrics")).json()
+        self.assertEqual(data["queued"], 1)
+        self.assertEqual(
+            data["kinds"]["test_echo"]["counts"], {"done": 1, "queued": 1}
+        )
+        self.assertIsNotNone(data["kinds"]["test_echo"]["run_seconds"]["avg"])
+
+
+class TestServeOrEnqueue(_QueueBase):
+    """The traveler PDF view as a thin enqueue-or-serve-cached wrapper."""
+
+    def setUp(self):
+        super().setUp()
+        override = override_settings(
+            RENDER_CACHES={
+                'jobs': {
+                    'DIR': Path(self._tmp.name) / 'jobs',
+                    'MAX_BYTES': 1024 * 1024,
+                },
+                'travelers': {
+                    'DIR': Path(self._tmp.name) / 'travelers',
+                    'MAX_BYTES': 1024 * 1024,
+                    'SUFFIX': '.pdf',
+                },
+            }
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        standard = make_standard(name="AMS-2404", revision="A")
+        classification = make_classification(standard, class_name="Class 1")
+        process = make_process(
+            standard,
+            make_standard_process(standard, "Cadmium Plate"),
+            classification,
+        )
+        ProcessStep.objects.create(
+            process=process, method=make_method("Electroclean"), step_number=1
+        )
+        self.work_order = make_work_order(
+            make_part(), standard, classification, wo_number="WO-Q1"
+        )
+        self.work_order.save()
+
+    def test_miss_queues_job_then_serves_cached_pdf(self):
+        url = reverse(
+            'work_order_pdf', kwargs={'work_order_id': self.work_order.pk}
+        )
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 202)
+        self.assertTemplateUsed(resp, "jobs/job_wait.html")
+        job = RenderJob.objects.get(kind="traveler_pdf")
+        self.assertEqual(job.params, {"work_order_id": self.work_order.pk})
+
+        with patch(
+            "part.renderers.render_pdf", return_value=b"%PDF-1.7 queued"
+        ):
+            run_job(claim_next())
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["X-Cache"], "HIT")
+        self.assertEqual(resp.getvalue(), b"%PDF-1.7 queued")
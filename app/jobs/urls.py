@@ -0,0 +1,15 @@
+# jobs/urls.py
+from django.urls import path
+
+from . import views
+
+app_name = "jobs"
+
+urlpatterns = [
+    path("enqueue/", views.enqueue_view, name="enqueue"),
+    path("render/", views.render_view, name="render"),
+    path("metrics/", views.job_metrics_view, name="metrics"),
+    path("<int:pk>/", views.job_wait_view, name="wait"),
+    path("<int:pk>/status/", views.job_status_view, name="status"),
+    path("<int:pk>/result/", views.job_result_view, name="result"),
+]
@@ -0,0 +1,232 @@
+# jobs/views.py
+import json
+import math
+from datetime import timedelta
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.http import require_GET, require_POST
+
+from .models import RenderJob
+from .queue import cached_file, enqueue
+from .registry import get_renderer, kinds
+from .shortcuts import (
+    accepted_response, file_response, job_payload, serve_or_enqueue,
+)
+
+
+def _render_request(kind, params):
+    """
+    ``(renderer, params, key, None)`` for a render request, with the
+    params checked against the kind's schema, or
+    ``(None, None, None, error response)`` when it is invalid.
+    """
+    try:
+        renderer = get_renderer(kind)
+    except KeyError:
+        return None, None, None, JsonResponse(
+            {"error": f"Unknown kind {kind!r}.", "kinds": kinds()}, status=400
+        )
+    if not isinstance(params, dict):
+        return None, None, None, JsonResponse(
+            {"error": "params must be an object."}, status=400
+        )
+
+    try:
+        params = renderer.clean_params(params)
+        key = renderer.key(**params)
+    except ObjectDoesNotExist:
+        return None, None, None, JsonResponse(
+            {"error": "Not found."}, status=404
+        )
+    except (TypeError, ValueError) as exc:
+        return None, None, None, JsonResponse(
+            {"error": f"Invalid params: {exc}"}, status=400
+        )
+    return renderer, params, key, None
+
+
+def _render_url(kind, params):
+    query = urlencode({"kind": kind, "params": json.dumps(params)})
+    return f"{reverse('jobs:render')}?{query}"
+
+
+@require_POST
+def enqueue_view(request):
+    """
+    Queue a render by kind.
+
+    Body (JSON or form)::
+
+        {"kind": "traveler_pdf", "params": {"work_order_id": 12}}
+
+    Returns 200 with ``result_url`` when the content is already cached
+    (no job is recorded), otherwise 202 with the job's status.
+    """
+    try:
+        if request.content_type == "application/json":
+            body = json.loads(request.body or b"{}")
+        else:
+            body = request.POST
+        kind = body.get("kind", "")
+        params = body.get("params") or {}
+        if isinstance(params, str):
+            params = json.loads(params)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+    _renderer, params, key, error = _render_request(kind, params)
+    if error:
+        return error
+
+    cached = cached_file(kind, key)
+    if cached is not None:
+        cached.close()
+        return JsonResponse({
+            "id": None,
+            "kind": kind,
+            "status": RenderJob.STATUS_DONE,
+            "result_url": _render_url(kind, params),
+        })
+
+    job, _created = enqueue(kind, params, key=key)
+    return JsonResponse(job_payload(job), status=202)
+
+
+@require_GET
+def render_view(request):
+    """
+    The rendered bytes for ``?kind=&params=<JSON>``: served from the
+    cache, or queued like any other render (see ``serve_or_enqueue``).
+    """
+    kind = request.GET.get("kind", "")
+    try:
+        params = json.loads(request.GET.get("params") or "{}")
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON."}, status=400)
+
+    renderer, params, key, error = _render_request(kind, params)
+    if error:
+        return error
+
+    filename = renderer.filename(**params) if renderer.filename else ""
+    disposition = "attachment" if "download" in request.GET else "inline"
+    return serve_or_enqueue(
+        request, kind, params, key=key, filename=filename,
+        disposition=disposition,
+    )
+
+
+@require_GET
+def job_wait_view(request, pk):
+    """Page that polls a job and opens the result when it is ready."""
+    job = get_object_or_404(RenderJob, pk=pk)
+    return render(
+        request,
+        "jobs/job_wait.html",
+        {"job": job, "payload": job_payload(job)},
+    )
+
+
+@require_GET
+def job_status_view(request, pk):
+    job = get_object_or_404(RenderJob, pk=pk)
+    return JsonResponse(job_payload(job))
+
+
+@require_GET
+def job_result_view(request, pk):
+    """
+    Rendered bytes of a finished job.
+
+    If the cache has since evicted the result, the render is queued again
+    and the caller gets the new job's wait page.
+    """
+    job = get_object_or_404(RenderJob, pk=pk)
+    disposition = "attachment" if "download" in request.GET else "inline"
+
+    if job.status == RenderJob.STATUS_FAILED:
+        return JsonResponse(job_payload(job), status=500)
+    if job.is_active:
+        return accepted_response(request, job, disposition)
+
+    data = cached_file(job.kind, job.key)
+    if data is None:
+        new_job, _created = enqueue(
+            job.kind, job.params, key=job.key, filename=job.filename
+        )
+        return accepted_response(request, new_job, disposition)
+
+    return file_response(data, job.content_type, job.filename, disposition)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(
+        len(values) - 1, max(0, math.ceil(pct / 100.0 * len(values)) - 1)
+    )
+    return values[index]
+
+
+def _summary(values):
+    if not values:
+        return {"avg": None, "p50": None, "p95": None, "max": None}
+    return {
+        "avg": round(sum(values) / len(values), 3),
+        "p50": round(_percentile(values, 50), 3),
+        "p95": round(_percentile(values, 95), 3),
+        "max": round(max(values), 3),
+    }
+
+
+@require_GET
+def job_metrics_view(request):
+    """
+    Queue depth and per-kind timings over the last ``?hours=`` (default 24).
+
+    ``queue_seconds`` is time waiting for a worker, ``run_seconds`` is
+    render time.
+    """
+    try:
+        hours = max(1, min(24 * 30, int(request.GET.get("hours", "24"))))
+    except ValueError:
+        return HttpResponse(
+            "hours must be an integer.", content_type="text/plain", status=400
+        )
+
+    since = timezone.now() - timedelta(hours=hours)
+    rows = RenderJob.objects.filter(created_at__gte=since).values_list(
+        "kind", "status", "created_at", "started_at", "finished_at"
+    )
+
+    per_kind = {}
+    for kind, status, created_at, started_at, finished_at in rows:
+        entry = per_kind.setdefault(
+            kind, {"counts": {}, "queue": [], "run": []}
+        )
+        entry["counts"][status] = entry["counts"].get(status, 0) + 1
+        if started_at:
+            entry["queue"].append((started_at - created_at).total_seconds())
+        if started_at and finished_at and status == RenderJob.STATUS_DONE:
+            entry["run"].append((finished_at - started_at).total_seconds())
+
+    jobs = RenderJob.objects
+    return JsonResponse({
+        "hours": hours,
+        "queued": jobs.filter(status=RenderJob.STATUS_QUEUED).count(),
+        "running": jobs.filter(status=RenderJob.STATUS_RUNNING).count(),
+        "kinds": {
+            kind: {
+                "counts": entry["counts"],
+                "queue_seconds": _summary(entry["queue"]),
+                "run_seconds": _summary(entry["run"]),
+            }
+            for kind, entry in sorted(per_kind.items())
+        },
+    })
@@ -0,0 +1,128 @@
+# masking/renderers.py
+"""Masking process PDFs rendered by the job queue (see jobs/registry.py)."""
+import os
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from app.disk_cache import (
+    digest, file_fingerprint, instance_fields, template_fingerprint,
+)
+from app.pdf import render_pdf, stylesheet_path
+from jobs.registry import object_id, register
+from process.utils import logo_path
+
+from .models import MaskingProcess, MaskingStep
+
+logger = logging.getLogger(__name__)
+
+MASKING_TEMPLATE = "masking/masking_process_pdf.html"
+MASKING_STYLESHEET = "masking/css/masking_print.css"
+
+
+def _masking_steps(process):
+    return list(
+        MaskingStep.objects
+        .filter(masking_process=process)
+        .order_by("step_number")
+    )
+
+
+def masking_pdf_context(process, steps, company_logo):
+    """
+    Template context for the masking PDF; step images are read from
+    MEDIA_ROOT.
+    """
+    # Ensure images have absolute URLs using MEDIA_URL & MEDIA_ROOT
+    step_data = []
+    for step in steps:
+        image_url = None
+        if step.image:
+            image_url = step.image.path
+            if not os.path.exists(image_url):
+                logger.warning(
+                    "Masking step image not found on disk: %s", image_url
+                )
+
+        step_data.append({
+            "step_number": step.step_number,
+            "title": step.title,
+            "description": step.description,
+            "image_absolute_url": image_url
+        })
+
+    return {
+        "process": process,
+        "steps": step_data,  # Pass cleaned-up step data
+        "company_logo": company_logo,
+        "current_date": timezone.now().strftime("%Y-%m-%d"),
+    }
+
+
+def company_logo_uri():
+    """
+    ``file://`` URI of the company logo (``GRAPHVIZ_LOGO_PATH``), or ""
+    when there is none.  Derived here, never taken from a request, so a
+    client cannot point the render at another URL or file.
+    """
+    path = logo_path()
+    return Path(path).as_uri() if path and os.path.exists(path) else ""
+
+
+def _base_url():
+    # Step images are absolute MEDIA_ROOT paths; resolve them on disk
+    return os.path.join(settings.MEDIA_ROOT, "")
+
+
+def masking_pdf_key(process_id):
+    """
+    Digest of the process, its steps and step images, the logo, and
+    today's date.
+    """
+    process = MaskingProcess.objects.get(pk=process_id)
+    payload = {
+        "template": template_fingerprint(MASKING_TEMPLATE),
+        "stylesheet": file_fingerprint(stylesheet_path(MASKING_STYLESHEET)),
+        "process": instance_fields(process),
+        "steps": [
+            [
+                instance_fields(step),
+                file_fingerprint(step.image.path) if step.image else None,
+            ]
+            for step in _masking_steps(process)
+        ],
+        "logo": file_fingerprint(logo_path()),
+        "date": timezone.now().strftime("%Y-%m-%d"),
+    }
+    return f"masking-{process.pk}-{digest(payload)}"
+
+
+def masking_pdf_filename(process):
+    return f"Masking_Process_{process.part_number}.pdf"
+
+
+@register(
+    "masking_process_pdf",
+    key=masking_pdf_key,
+    filename=lambda process_id: masking_pdf_filename(
+        MaskingProcess.objects.get(pk=process_id)
+    ),
+    params={"process_id": object_id},
+    content_type="application/pdf",
+)
+def masking_process_pdf(process_id):
+    process = MaskingProcess.objects.get(pk=process_id)
+    steps = _masking_steps(process)
+    html_content = render_to_string(
+        MASKING_TEMPLATE,
+        masking_pdf_context(process, steps, company_logo_uri()),
+    )
+    return render_pdf(
+        html_content,
+        stylesheets=[stylesheet_path(MASKING_STYLESHEET)],
+        base_url=_base_url(),
+        label="masking",
+    )
@@ -1,17 +1,14 @@
 import logging
-import os
-import tempfile
 
 from django.db.models import Q, Max
-from django.http import HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.template.loader import render_to_string
 from django.urls import reverse_lazy
-from django.utils import timezone
-from weasyprint import HTML
+
+from jobs.shortcuts import serve_or_enqueue
 
 from .forms import MaskingProcessForm, MaskingStepForm
 from .models import MaskingProcess, MaskingStep
+from .renderers import masking_pdf_filename
 
 logger = logging.getLogger(__name__)
 
@@ -86,52 +83,10 @@ def masking_step_form(request, process_id=None, step_id=None):
 def masking_process_pdf_view(request, process_id):
     """Generates a PDF of the Masking Process and its steps."""
     process = get_object_or_404(MaskingProcess, id=process_id)
-    steps = MaskingStep.objects.filter(masking_process=process).order_by("step_number")
-
-    # Ensure images have absolute URLs using MEDIA_URL & MEDIA_ROOT
-    step_data = []
-    for step in steps:
-        image_url = None
-        if step.image:
-            image_url = step.image.path
-            if not os.path.exists(image_url):
-                logger.warning("Masking step image not found on disk: %s", image_url)
-
-        step_data.append({
-            "step_number": step.step_number,
-            "title": step.title,
-            "description": step.description,
-            "image_absolute_url": image_url
-        })
-
-    # Add Company Logo
-    company_logo = request.build_absolute_uri('/static/images/company_logo.png')
-
-    # Render the template
-    html_content = render_to_string(
-        "masking/masking_process_pdf.html",
-        {
-            "process": process,
-            "steps": step_data,  # Pass cleaned-up step data
-            "company_logo": company_logo,
-            "current_date": timezone.now().strftime("%Y-%m-%d"),
-        },
-        request=request
-    )
-
-    # Generate PDF
-    with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-        HTML(string=html_content, base_url=request.build_absolute_uri()).write_pdf(temp_file.name)
-        temp_file.seek(0)
-        pdf_file = temp_file.read()
-
-    # Create response
-    response = HttpResponse(pdf_file, content_type="application/pdf")
 
     # Check if user wants to download or view
-    if "download" in request.GET:
-        response["Content-Disposition"] = f'attachment; filename="Masking_Process_{process.part_number}.pdf"'
-    else:
-        response["Content-Disposition"] = f'inline; filename="Masking_Process_{process.part_number}.pdf"'
-
-    return response
+    return serve_or_enqueue(
+        request, "masking_process_pdf", {"process_id": process.pk},
+        filename=masking_pdf_filename(process),
+        disposition="attachment" if "download" in request.GET else "inline",
+    )
@@ -1,7 +1,11 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.http import HttpResponse
 from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from .models import Part, PartStandard, WorkOrder, PDFSettings
-from .forms import PartStandardForm
+from .forms import PartImportForm, PartStandardForm
+from .importer import PartImporter, read_rows
 
 
 class PartStandardInline(admin.TabularInline):
@@ -18,6 +22,56 @@ class PartAdmin(admin.ModelAdmin):
     list_display = ('part_number', 'part_description', 'part_revision')
     search_fields = ('part_number', 'part_description')
     inlines = [PartStandardInline]
+    change_list_template = 'admin/part/part/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='part_part_import',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        """Upload a CSV/XLSX of parts, standard assignments and work orders."""
+        if not self.has_add_permission(request):
+            return redirect('admin:part_part_changelist')
+
+        report = None
+        form = PartImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                report = PartImporter(
+                    dry_run=form.cleaned_data['dry_run']
+                ).run(read_rows(upload, upload.name))
+            except (ValueError, KeyError) as exc:
+                messages.error(request, f"Could not read {upload.name}: {exc}")
+            else:
+                if 'download_errors' in request.POST and report.errors:
+                    response = HttpResponse(
+                        report.errors_csv(), content_type='text/csv'
+                    )
+                    response['Content-Disposition'] = (
+                        'attachment; filename="import_errors.csv"'
+                    )
+                    return response
+                level = messages.SUCCESS if report.ok else messages.WARNING
+                messages.add_message(request, level, report.summary())
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Import parts',
+            'form': form,
+            'report': report,
+            'errors': report.errors[:500] if report else [],
+        }
+        return TemplateResponse(
+            request, 'admin/part/part/import.html', context
+        )
 
 
 @admin.register(WorkOrder)
@@ -51,6 +105,7 @@ class WorkOrderAdmin(admin.ModelAdmin):
         'classification__name',
         'customer'
     )
+    actions = ['print_travelers']
     fieldsets = (
         ("Work Order Details", {
             "fields": (
@@ -76,6 +131,11 @@ class WorkOrderAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description="Print travelers (merged PDF)")
+    def print_travelers(self, request, queryset):
+        ids = ','.join(str(pk) for pk in queryset.values_list('pk', flat=True))
+        return redirect(f"{reverse('work_order_batch_pdf')}?ids={ids}")
+
 
 @admin.register(PDFSettings)
 class PDFSettingsAdmin(admin.ModelAdmin):
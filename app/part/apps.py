@@ -5,3 +5,6 @@ class PartConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'part'
     verbose_name = 'Parts'
+
+    def ready(self):
+        import part.signals
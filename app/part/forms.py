@@ -101,3 +101,25 @@ class PartStandardForm(forms.ModelForm):
         self.fields['classification'].label_from_instance = lambda obj: (
             f"Class: {getattr(obj, 'class_name', '—')}, Type: {getattr(obj, 'type', '—')}"
         )
+
+
+class PartImportForm(forms.Form):
+    """Admin upload for part/importer.py."""
+    file = forms.FileField(
+        help_text="CSV or XLSX with a header row: part_number, "
+                  "part_description, part_revision, standard, "
+                  "standard_revision, classification, work_order_number, "
+                  "job_identity, …"
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        help_text="Validate and count rows without saving anything.",
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith(
+            ('.csv', '.txt', '.xlsx', '.xlsm')
+        ):
+            raise forms.ValidationError("Upload a .csv or .xlsx file.")
+        return upload
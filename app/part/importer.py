@@ -0,0 +1,619 @@
+# part/importer.py
+"""
+Bulk import of parts, part/standard assignments and work orders from a
+CSV or XLSX file.
+
+Each row describes one part and, optionally, a standard assignment and a
+work order for it::
+
+    part_number, part_description, part_revision,
+    standard, standard_revision, classification, classification_type,
+    work_order_number, job_identity, rework, surface_repaired, customer,
+    purchase_order_with_revision, part_quantity, serial_or_lot_numbers,
+    surface_area, date, requires_masking, requires_stress_relief,
+    requires_hydrogen_relief
+
+Only ``part_number`` is always required.  Rows are read lazily and
+written in chunks: each chunk looks up the existing rows it touches in
+one ``__in`` query per model and ``bulk_create``s the rest.  That
+pre-check is what keeps re-imports idempotent: the unique constraints on
+Part and WorkOrder include nullable columns (part revision,
+classification, surface repaired), and NULLs never conflict, so the keys
+are compared with empty and NULL treated as the same value.  New parts
+and work orders are ``full_clean()``ed first (``WorkOrder.clean()`` is
+one indexed lookup per new work order).  Standards, classifications and
+each process's ``has_rectified_step`` are loaded once into in-memory
+lookup tables.
+
+A bad row is recorded in the report with its row number and skipped; it
+never aborts the rest of the file.
+
+Usage::
+
+    from part.importer import PartImporter, read_rows
+
+    with open("parts.xlsx", "rb") as f:
+        report = PartImporter().run(read_rows(f, "parts.xlsx"))
+    report.created, report.errors
+"""
+import csv
+import io
+import os
+from contextlib import nullcontext
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+
+from process.models import Process
+from standard.models import Classification, Standard
+
+from .models import Part, PartStandard, WorkOrder
+
+CHUNK_SIZE = 1000
+
+COLUMNS = (
+    'part_number', 'part_description', 'part_revision',
+    'standard', 'standard_revision', 'classification', 'classification_type',
+    'work_order_number', 'job_identity', 'rework', 'surface_repaired',
+    'customer', 'purchase_order_with_revision', 'part_quantity',
+    'serial_or_lot_numbers', 'surface_area', 'date',
+    'requires_masking', 'requires_stress_relief', 'requires_hydrogen_relief',
+)
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y', 'x'}
+FALSE_VALUES = {'0', 'false', 'f', 'no', 'n'}
+
+RECTIFIED_ERROR = "Surface Area is required for rectified processing tanks."
+
+
+class RowError(ValueError):
+    """A problem with one row; the row is skipped and reported."""
+
+
+# ----------------------------------------------------------------------
+# Reading
+# ----------------------------------------------------------------------
+
+def _header(values):
+    return [str(v or '').strip().lower().replace(' ', '_') for v in values]
+
+
+def _csv_rows(fileobj):
+    if isinstance(fileobj.read(0), bytes):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    reader = csv.reader(fileobj)
+    header = _header(next(reader, []))
+    for number, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield number, dict(zip(header, values))
+
+
+def _xlsx_rows(fileobj, sheet=None):
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = _header(next(rows, ()))
+        for number, values in enumerate(rows, start=2):
+            if any(v not in (None, '') for v in values):
+                yield number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename, sheet=None):
+    """Yield ``(row_number, {column: value})`` from a CSV or XLSX file."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return _xlsx_rows(fileobj, sheet=sheet)
+    if extension in ('.csv', '.txt'):
+        return _csv_rows(fileobj)
+    raise ValueError(
+        f"Unsupported file type {extension!r}; upload a .csv or .xlsx file."
+    )
+
+
+# ----------------------------------------------------------------------
+# Report
+# ----------------------------------------------------------------------
+
+class ImportReport:
+    """Counts per model and the row-level errors of one import."""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = {'parts': 0, 'part_standards': 0, 'work_orders': 0}
+        self.existing = {'parts': 0, 'part_standards': 0, 'work_orders': 0}
+        self.errors = []  # (row_number, message)
+        self.dry_run = False
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, str(message)))
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    def summary(self):
+        counted = (
+            ('parts', 'parts'),
+            ('part_standards', 'standards assigned'),
+            ('work_orders', 'work orders'),
+        )
+        parts = [
+            f"{self.rows} rows",
+            *(
+                f"{label}: {self.created[key]} created, "
+                f"{self.existing[key]} existing"
+                for key, label in counted
+            ),
+            f"{len(self.errors)} errors",
+        ]
+        return ("[dry run] " if self.dry_run else "") + "; ".join(parts)
+
+    def errors_csv(self):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(['row', 'error'])
+        writer.writerows(self.errors)
+        return out.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Cell parsing
+# ----------------------------------------------------------------------
+
+def _text(row, column, max_length=None):
+    value = row.get(column)
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # XLSX stores "12345" typed as a number as 12345.0
+    value = str(value).strip()
+    if not value:
+        return None
+    if max_length and len(value) > max_length:
+        raise RowError(f"{column} is longer than {max_length} characters.")
+    return value
+
+
+def _bool(row, column, default):
+    value = _text(row, column)
+    if value is None:
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise RowError(f"{column} must be yes/no, got {value!r}.")
+
+
+def _number(row, column, cast):
+    value = row.get(column)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        number = cast(Decimal(str(value).strip()))
+    except (InvalidOperation, ValueError):
+        raise RowError(f"{column} must be a number, got {value!r}.")
+    if number < 0:
+        raise RowError(f"{column} cannot be negative.")
+    return number
+
+
+def _integer(value):
+    if value != value.to_integral_value():
+        raise ValueError(value)
+    return int(value)
+
+
+def _date(row, column):
+    value = row.get(column)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = _text(row, column)
+    if value is None:
+        return None
+    for fmt in ('%Y-%m-%d', '%m/%d/%Y', '%m-%d-%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(
+        f"{column} must be a date (YYYY-MM-DD or MM/DD/YYYY), got {value!r}."
+    )
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def _validation_message(exc):
+    if hasattr(exc, 'error_dict'):
+        return "; ".join(
+            (
+                f"{field}: {' '.join(messages)}"
+                if field != '__all__'
+                else ' '.join(messages)
+            )
+            for field, messages in exc.message_dict.items()
+        )
+    return " ".join(exc.messages)
+
+
+def _full_clean(obj, exclude=()):
+    """
+    Model validation for a row about to be bulk created; uniqueness is
+    left to the importer's own pre-check.
+    """
+    try:
+        obj.full_clean(
+            exclude=exclude, validate_unique=False, validate_constraints=False
+        )
+    except ValidationError as exc:
+        raise RowError(_validation_message(exc))
+
+
+# ----------------------------------------------------------------------
+# Import
+# ----------------------------------------------------------------------
+
+class PartImporter:
+    """
+    Import rows produced by ``read_rows()``.
+
+    With ``dry_run`` every row is validated and counted but the
+    transaction is rolled back.
+    """
+
+    def __init__(self, dry_run=False, chunk_size=CHUNK_SIZE):
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.report = ImportReport()
+        self.report.dry_run = dry_run
+
+    # Lookup tables ----------------------------------------------------
+
+    def _load_lookups(self):
+        # (name, revision) -> id; (name, None) -> latest revision
+        self.standards = {}
+        standards = Standard.objects.order_by('created_at', 'pk')
+        for pk, name, revision in standards.values_list(
+            'id', 'name', 'revision'
+        ):
+            self.standards[(name.lower(), revision.lower())] = pk
+            self.standards[(name.lower(), None)] = pk
+
+        # (standard_id, class_name, type or None) -> [ids]
+        self.classifications = {}
+        rows = Classification.objects.values_list(
+            'id', 'standard_id', 'class_name', 'type'
+        )
+        for pk, standard_id, class_name, type_ in rows:
+            name = (class_name or '').lower()
+            self.classifications.setdefault(
+                (standard_id, name, None), []
+            ).append(pk)
+            self.classifications.setdefault(
+                (standard_id, name, (type_ or '').lower()), []
+            ).append(pk)
+
+        processes = Process.objects.values_list(
+            'standard_id', 'classification_id', 'has_rectified_step'
+        )
+        self.rectified = dict(
+            ((standard_id, classification_id), rectified)
+            for standard_id, classification_id, rectified in processes
+        )
+        self.job_identities = {}
+        for value, label in WorkOrder._meta.get_field('job_identity').choices:
+            self.job_identities[value.lower()] = value
+            self.job_identities[label.lower()] = value
+
+    def _standard(self, row):
+        name = _text(row, 'standard')
+        if name is None:
+            return None
+        revision = _text(row, 'standard_revision')
+        pk = self.standards.get(
+            (name.lower(), revision.lower() if revision else None)
+        )
+        if pk is None:
+            label = f"{name} Rev {revision}" if revision else name
+            raise RowError(f"Unknown standard {label!r}.")
+        return pk
+
+    def _classification(self, row, standard_id):
+        name = _text(row, 'classification')
+        if name is None:
+            return None
+        if standard_id is None:
+            raise RowError("classification given without a standard.")
+        type_ = _text(row, 'classification_type')
+        matches = self.classifications.get(
+            (standard_id, name.lower(), type_.lower() if type_ else None), []
+        )
+        if not matches:
+            raise RowError(
+                f"Unknown classification {name!r} for this standard."
+            )
+        if len(matches) > 1:
+            raise RowError(
+                f"Classification {name!r} is ambiguous for this standard; "
+                "add classification_type."
+            )
+        return matches[0]
+
+    # Row parsing ------------------------------------------------------
+
+    def _parse(self, row):
+        """Validate one row into plain values; raises RowError."""
+        part_number = _text(
+            row, 'part_number', _max_length(Part, 'part_number')
+        )
+        if part_number is None:
+            raise RowError("part_number is required.")
+        parsed = {
+            'part': (
+                part_number,
+                _text(
+                    row, 'part_revision', _max_length(Part, 'part_revision')
+                ),
+            ),
+            'part_description': _text(
+                row, 'part_description', _max_length(Part, 'part_description')
+            ),
+        }
+        standard_id = self._standard(row)
+        classification_id = self._classification(row, standard_id)
+        parsed['standard'] = (
+            (standard_id, classification_id) if standard_id else None
+        )
+
+        work_order_number = _text(
+            row,
+            'work_order_number',
+            _max_length(WorkOrder, 'work_order_number'),
+        )
+        if work_order_number is None:
+            return parsed
+        if standard_id is None:
+            raise RowError("A work order needs a standard.")
+
+        job_identity = _text(row, 'job_identity')
+        if job_identity is None:
+            raise RowError("job_identity is required for a work order.")
+        if job_identity.lower() not in self.job_identities:
+            raise RowError(f"Unknown job_identity {job_identity!r}.")
+
+        surface_area = _number(row, 'surface_area', float)
+        if surface_area is None and self.rectified.get(
+            (standard_id, classification_id)
+        ):
+            raise RowError(RECTIFIED_ERROR)
+
+        parsed['work_order'] = {
+            'work_order_number': work_order_number,
+            'job_identity': self.job_identities[job_identity.lower()],
+            'rework': _bool(row, 'rework', False),
+            'surface_repaired': _text(
+                row,
+                'surface_repaired',
+                _max_length(WorkOrder, 'surface_repaired'),
+            ),
+            'customer': _text(
+                row, 'customer', _max_length(WorkOrder, 'customer')
+            ),
+            'purchase_order_with_revision': _text(
+                row,
+                'purchase_order_with_revision',
+                _max_length(WorkOrder, 'purchase_order_with_revision'),
+            ),
+            'part_quantity': _number(row, 'part_quantity', _integer),
+            'serial_or_lot_numbers': _text(row, 'serial_or_lot_numbers'),
+            'surface_area': surface_area,
+            'date': _date(row, 'date'),
+            'requires_masking': _bool(row, 'requires_masking', True),
+            'requires_stress_relief': _bool(
+                row, 'requires_stress_relief', True
+            ),
+            'requires_hydrogen_relief': _bool(
+                row, 'requires_hydrogen_relief', True
+            ),
+            'standard_id': standard_id,
+            'classification_id': classification_id,
+        }
+        return parsed
+
+    # Writing ----------------------------------------------------------
+
+    def _part_ids(self, keys):
+        # Keys use None for "no revision", whether stored as NULL or ''
+        numbers = {number for number, _ in keys}
+        return {
+            (number, revision or None): pk
+            for pk, number, revision in Part.objects.filter(
+                part_number__in=numbers
+            ).values_list('id', 'part_number', 'part_revision')
+        }
+
+    def _write_parts(self, rows):
+        keys = {parsed['part'] for _, parsed in rows}
+        existing = self._part_ids(keys)
+        new_parts = {}
+        for number, parsed in rows:
+            key = parsed['part']
+            if key in existing or key in new_parts:
+                continue
+            if not parsed['part_description']:
+                self.report.add_error(
+                    number, "part_description is required for a new part."
+                )
+                continue
+            part = Part(
+                part_number=key[0],
+                part_revision=key[1],
+                part_description=parsed['part_description'],
+            )
+            try:
+                _full_clean(part)
+            except RowError as exc:
+                self.report.add_error(number, exc)
+                continue
+            new_parts[key] = part
+
+        # No ignore_conflicts: the pre-check above decided what is new, and
+        # a row created concurrently fails the chunk instead of being counted
+        Part.objects.bulk_create(new_parts.values())
+        self.report.created['parts'] += len(new_parts)
+        self.report.existing['parts'] += len(keys & set(existing))
+        return self._part_ids(keys) if new_parts else existing
+
+    def _write_part_standards(self, rows, part_ids):
+        wanted = {
+            (part_ids[parsed['part']], *parsed['standard'])
+            for _, parsed in rows
+            if parsed['standard'] and parsed['part'] in part_ids
+        }
+        if not wanted:
+            return
+        existing = set(
+            PartStandard.objects.filter(
+                part_id__in={key[0] for key in wanted}
+            ).values_list('part_id', 'standard_id', 'classification_id')
+        )
+        new = wanted - existing
+        PartStandard.objects.bulk_create(
+            [
+                PartStandard(part_id=p, standard_id=s, classification_id=c)
+                for p, s, c in new
+            ]
+        )
+        self.report.created['part_standards'] += len(new)
+        self.report.existing['part_standards'] += len(wanted & existing)
+
+    @staticmethod
+    def _work_order_key(
+        part_id, number, standard_id, classification_id, surface_repaired
+    ):
+        # classification and surface_repaired are nullable: None stands for
+        # NULL (and '') on both sides of the comparison
+        return (
+            part_id, number, standard_id, classification_id,
+            surface_repaired or None,
+        )
+
+    def _write_work_orders(self, rows, part_ids):
+        wanted = {}
+        for number, parsed in rows:
+            values = parsed.get('work_order')
+            if values and parsed['part'] in part_ids:
+                part_id = part_ids[parsed['part']]
+                key = self._work_order_key(
+                    part_id, values['work_order_number'],
+                    values['standard_id'], values['classification_id'],
+                    values['surface_repaired'],
+                )
+                wanted.setdefault(key, (number, part_id, values))
+        if not wanted:
+            return
+        existing = {
+            self._work_order_key(*row)
+            for row in WorkOrder.objects.filter(
+                work_order_number__in={key[1] for key in wanted},
+                part_id__in={key[0] for key in wanted},
+            ).values_list(
+                'part_id', 'work_order_number', 'standard_id',
+                'classification_id', 'surface_repaired',
+            )
+        }
+        classifications = Classification.objects.in_bulk(
+            {
+                key[3]
+                for key in wanted
+                if key not in existing and key[3] is not None
+            }
+        )
+        new = []
+        for key, (number, part_id, values) in wanted.items():
+            if key in existing:
+                continue
+            work_order = WorkOrder(part_id=part_id, **values)
+            if work_order.classification_id is not None:
+                work_order.classification = classifications[
+                    work_order.classification_id
+                ]
+            try:
+                # The foreign keys come from the lookup tables and this chunk
+                _full_clean(
+                    work_order, exclude=['part', 'standard', 'classification']
+                )
+            except RowError as exc:
+                self.report.add_error(number, exc)
+                continue
+            new.append(work_order)
+        WorkOrder.objects.bulk_create(new)
+        self.report.created['work_orders'] += len(new)
+        self.report.existing['work_orders'] += len(wanted.keys() & existing)
+
+    def _import_chunk(self, chunk):
+        rows = []
+        for number, row in chunk:
+            try:
+                rows.append((number, self._parse(row)))
+            except RowError as exc:
+                self.report.add_error(number, exc)
+        if not rows:
+            return
+        part_ids = self._write_parts(rows)
+        self._write_part_standards(rows, part_ids)
+        self._write_work_orders(rows, part_ids)
+
+    def _import_chunk_atomic(self, chunk):
+        report = self.report
+        created, existing = dict(report.created), dict(report.existing)
+        errors = len(report.errors)
+        try:
+            with transaction.atomic():
+                self._import_chunk(chunk)
+        except DatabaseError as exc:
+            # Only this chunk is rolled back: drop its counts, and report
+            # every row in it that has no error of its own yet
+            report.created, report.existing = created, existing
+            failed = {number for number, _ in report.errors[errors:]}
+            for number, _ in chunk:
+                if number not in failed:
+                    report.add_error(
+                        number,
+                        "Not imported, the database rejected this chunk: "
+                        f"{exc}",
+                    )
+
+    def run(self, rows):
+        """
+        Import an iterable of ``(row_number, row)``; returns the
+        ImportReport.
+        """
+        self._load_lookups()
+        # Chunks commit as they go; a dry run wraps them all in one
+        # transaction to roll back
+        with transaction.atomic() if self.dry_run else nullcontext():
+            chunk = []
+            for item in rows:
+                self.report.rows += 1
+                chunk.append(item)
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk_atomic(chunk)
+                    chunk = []
+            if chunk:
+                self._import_chunk_atomic(chunk)
+            if self.dry_run:
+                transaction.set_rollback(True)
+        self.report.errors.sort(key=lambda error: error[0])
+        return self.report
@@ -0,0 +1,63 @@
+# part/management/commands/import_parts.py
+"""
+Bulk import parts, standard assignments and work orders (see part/importer.py).
+
+    python manage.py import_parts customer_parts.xlsx
+    python manage.py import_parts parts.csv --dry-run --errors errors.csv
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from part.importer import CHUNK_SIZE, PartImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Import parts, part/standard assignments and work orders from a CSV "
+        "or XLSX file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or XLSX file to import.")
+        parser.add_argument(
+            "--sheet", help="XLSX worksheet name (default: the first sheet)."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=CHUNK_SIZE,
+            help="Rows written per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate and count without saving.",
+        )
+        parser.add_argument(
+            "--errors",
+            metavar="FILE",
+            help="Write the row-level error report to this CSV file.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            with open(path, "rb") as fileobj:
+                rows = read_rows(fileobj, path, sheet=options["sheet"])
+                report = PartImporter(
+                    dry_run=options["dry_run"],
+                    chunk_size=options["chunk_size"],
+                ).run(rows)
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(str(exc))
+
+        for row_number, message in report.errors[:20]:
+            self.stderr.write(f"row {row_number}: {message}")
+        if len(report.errors) > 20:
+            self.stderr.write(f"... and {len(report.errors) - 20} more")
+
+        if options["errors"]:
+            with open(options["errors"], "w", newline="") as out:
+                out.write(report.errors_csv())
+
+        style = self.style.SUCCESS if report.ok else self.style.WARNING
+        self.stdout.write(style(report.summary()))
@@ -2,7 +2,8 @@ from django.db import models
 from django.core.exceptions import ValidationError
 from django.db.models import UniqueConstraint, Q
 from standard.models import Standard, Classification
-from process.models import Process, ProcessStep
+from process.compiled import compiled_process_for
+from process.models import Process
 from django.utils import timezone
 
 
@@ -75,6 +76,13 @@ class PartStandard(models.Model):
         return f"{self.part.part_number} - {self.standard.name} - {classification_info}"
 
 
+# Fields WorkOrder.clean() reads; saves limited to other fields skip it
+CLEAN_FIELDS = frozenset({
+    'part', 'part_id', 'standard', 'standard_id',
+    'classification', 'classification_id', 'surface_area',
+})
+
+
 class WorkOrder(models.Model):
     """
     Represents a work order for a part, tied to a standard + classification.
@@ -196,33 +204,28 @@ class WorkOrder(models.Model):
     def get_process_steps(self):
         """
         Retrieve process steps for the work order based on standard and classification.
-        Returns a QuerySet of ProcessStep objects with related Method prefetched.
+        Returns a list of compiled, read-only steps (see process/compiled.py);
+        each step's Method and recorded parameters are already loaded.
         """
-        # 1. Find the Process ID efficiently
-        process_id_qs = Process.objects.filter(
-            standard=self.standard,
-            classification=self.classification
-        ).values_list('id', flat=True).first()
-
-        if not process_id_qs:
+        compiled = compiled_process_for(
+            self.standard_id, self.classification_id
+        )
+        if not compiled:
             return []
-
-        # 2. Fetch the steps for that Process ID, prefetching the Method to avoid N+1 queries.
-        return ProcessStep.objects.filter(
-            process_id=process_id_qs
-        ).select_related('method').all()
+        return list(compiled.steps)
 
     def _has_rectified_step(self):
         """
         Return True if any step in this WO's process is a processing-tank
-        method that is marked rectified.
+        method that is marked rectified.  Reads the summary maintained on
+        Process, so this is one indexed lookup.
         """
-        steps = self.get_process_steps()
-        for step in steps:
-            m = step.method
-            if m and m.method_type == "processing_tank" and m.is_rectified:
-                return True
-        return False
+        return bool(
+            Process.objects.filter(
+                standard_id=self.standard_id,
+                classification_id=self.classification_id,
+            ).values_list('has_rectified_step', flat=True).first()
+        )
 
     def _get_current_density_for_job(self):
         """
@@ -288,8 +291,11 @@ class WorkOrder(models.Model):
             self._calc_amps()
 
     def save(self, *args, **kwargs):
-        # run our validation / amps logic before save
-        self.clean()
+        # run our validation / amps logic before save, unless this is a
+        # partial save that touches none of the fields it depends on
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not CLEAN_FIELDS.isdisjoint(update_fields):
+            self.clean()
         super().save(*args, **kwargs)
 
     def __str__(self):
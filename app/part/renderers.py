@@ -0,0 +1,149 @@
+# part/renderers.py
+"""Traveler PDFs rendered by the job queue (see jobs/registry.py)."""
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from app.pdf import render_pdf, stylesheet_path
+from app.render_pool import merge_pdfs
+from jobs.registry import boolean, object_id, object_ids, register
+from process.models import Process
+
+from .models import WorkOrder
+from .travelers import (
+    TRAVELER_STYLESHEET,
+    TRAVELER_TEMPLATE,
+    batch_traveler_key,
+    batch_traveler_pdfs,
+    template_traveler_cache_key,
+    template_traveler_context,
+    traveler_cache_key,
+    work_order_traveler_context,
+)
+
+
+def _work_order_context(work_order_id):
+    work_order = WorkOrder.objects.select_related(
+        'part', 'standard', 'classification'
+    ).get(pk=work_order_id)
+    context = work_order_traveler_context(work_order)
+    if context is None:
+        raise ValueError("No process steps found for this work order.")
+    return context
+
+
+def _template_process(process_id, **filters):
+    return Process.objects.select_related(
+        'standard', 'classification'
+    ).get(pk=process_id, **filters)
+
+
+def _template_context(process_id, requires_masking=True):
+    process = _template_process(process_id, is_template=True)
+    context = template_traveler_context(
+        process, requires_masking=requires_masking
+    )
+    if context is None:
+        raise ValueError("Process steps not found or all steps were excluded.")
+    return context
+
+
+def traveler_filename(work_order):
+    return f"Work_Order_{work_order.work_order_number}_Steps.pdf"
+
+
+def batch_work_orders(work_order_ids):
+    """The work orders that still exist, in the order of ``work_order_ids``."""
+    found = WorkOrder.objects.select_related(
+        'part', 'standard', 'classification'
+    ).in_bulk(work_order_ids)
+    return [found[pk] for pk in work_order_ids if pk in found]
+
+
+def _work_order_ids(value):
+    return object_ids(value, limit=settings.TRAVELER_BATCH_MAX)
+
+
+def batch_traveler_filename():
+    return f"Work_Order_Travelers_{timezone.now():%Y%m%d}.pdf"
+
+
+def template_traveler_filename(process):
+    classification = (
+        process.classification.class_name
+        if process.classification
+        else 'Unclassified'
+    )
+    return f"Process_{process.standard.name}_{classification}_Template.pdf"
+
+
+@register(
+    "traveler_pdf",
+    key=lambda work_order_id: traveler_cache_key(
+        _work_order_context(work_order_id)
+    ),
+    filename=lambda work_order_id: traveler_filename(
+        WorkOrder.objects.get(pk=work_order_id)
+    ),
+    cache="travelers",
+    params={"work_order_id": object_id},
+    content_type="application/pdf",
+)
+def traveler_pdf(work_order_id):
+    html_content = render_to_string(
+        TRAVELER_TEMPLATE, _work_order_context(work_order_id)
+    )
+    return render_pdf(
+        html_content,
+        stylesheets=[stylesheet_path(TRAVELER_STYLESHEET)],
+        label="traveler",
+    )
+
+
+@register(
+    "template_traveler_pdf",
+    key=lambda process_id, requires_masking=True: (
+        template_traveler_cache_key(
+            _template_context(process_id, requires_masking)
+        )
+    ),
+    filename=lambda process_id, requires_masking=True: (
+        template_traveler_filename(_template_process(process_id))
+    ),
+    cache="travelers",
+    params={"process_id": object_id, "requires_masking": boolean},
+    content_type="application/pdf",
+)
+def template_traveler_pdf(process_id, requires_masking=True):
+    html_content = render_to_string(
+        TRAVELER_TEMPLATE, _template_context(process_id, requires_masking)
+    )
+    return render_pdf(
+        html_content,
+        stylesheets=[stylesheet_path(TRAVELER_STYLESHEET)],
+        label="template_traveler",
+    )
+
+
+@register(
+    "traveler_batch_pdf",
+    key=lambda work_order_ids: batch_traveler_key(
+        batch_work_orders(work_order_ids)
+    )[0],
+    filename=lambda work_order_ids: batch_traveler_filename(),
+    cache="travelers",
+    params={"work_order_ids": _work_order_ids},
+    content_type="application/pdf",
+)
+def traveler_batch_pdf(work_order_ids):
+    """
+    One merged PDF of the work orders' travelers, in order.  Cached
+    travelers are reused; the rest are rendered across the worker's
+    process pool (``RENDER_POOL_WORKERS``, see app/render_pool.py).
+    """
+    pdfs, _skipped = batch_traveler_pdfs(batch_work_orders(work_order_ids))
+    if not pdfs:
+        raise ValueError(
+            "No process steps found for the selected work orders."
+        )
+    return merge_pdfs(pdfs)
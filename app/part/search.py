@@ -0,0 +1,110 @@
+# part/search.py
+"""
+Ranked part number / description search for the autocomplete endpoint.
+
+On PostgreSQL with the ``pg_trgm`` extension installed (migration
+``part.0032_part_trigram_indexes``) matches come from the GIN trigram
+indexes on ``part_number`` and ``part_description`` and are ranked by
+trigram similarity, so typos and partial numbers still match.  Elsewhere
+(SQLite test runs, or a server without ``pg_trgm``) a plain
+``icontains`` search ranked by prefix match is used instead.
+
+Usage::
+
+    from part.search import search_parts
+
+    for part in search_parts("MS2", limit=10):
+        part.part_number, part.rank
+"""
+from django.db import connections
+from django.db.models import Case, F, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Greatest, Upper
+
+from .models import Part
+
+_trigram_available = {}
+
+
+def trigram_available(using="default"):
+    """
+    True when ``using`` is PostgreSQL with ``pg_trgm`` installed (checked
+    once per alias).
+    """
+    if using not in _trigram_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                )
+                available = cursor.fetchone() is not None
+        _trigram_available[using] = available
+    return _trigram_available[using]
+
+
+def _trigram_search(parts, query):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    # The indexes are on UPPER(column), the expression icontains compares,
+    # so both the LIKE and the % (similarity) branches can use them.
+    return (
+        parts
+        .alias(
+            number_upper=Upper("part_number"),
+            description_upper=Upper("part_description"),
+        )
+        .filter(
+            Q(part_number__icontains=query)
+            | Q(part_description__icontains=query)
+            | Q(number_upper__trigram_similar=query)
+            | Q(description_upper__trigram_similar=query)
+        )
+        .annotate(rank=Greatest(
+            TrigramSimilarity("part_number", query),
+            TrigramSimilarity("part_description", query),
+        ))
+        .annotate(prefix=Case(
+            When(part_number__istartswith=query, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        ))
+        .order_by("-prefix", "-rank", "part_number")
+    )
+
+
+def _substring_search(parts, query):
+    return (
+        parts
+        .filter(
+            Q(part_number__icontains=query)
+            | Q(part_description__icontains=query)
+        )
+        .annotate(rank=Case(
+            When(part_number__iexact=query, then=Value(1.0)),
+            When(part_number__istartswith=query, then=Value(0.75)),
+            When(part_number__icontains=query, then=Value(0.5)),
+            default=Value(0.25),
+            output_field=FloatField(),
+        ))
+        .order_by(F("rank").desc(), "part_number")
+    )
+
+
+def search_parts(query, limit=10, using="default"):
+    """
+    The ``limit`` best matching parts for ``query``, best first.
+
+    Each part carries a ``rank`` between 0 and 1.
+    """
+    query = (query or "").strip()
+    if not query:
+        return Part.objects.none()
+    parts = Part.objects.using(using).only(
+        "id", "part_number", "part_description", "part_revision"
+    )
+    if trigram_available(using):
+        parts = _trigram_search(parts, query)
+    else:
+        parts = _substring_search(parts, query)
+    return parts[:limit]
@@ -0,0 +1,23 @@
+# part/signals.py
+"""
+Drop a work order's cached traveler PDFs when the work order is deleted.
+
+Cache keys are content digests of everything printed on a traveler, so
+a stale entry can never be served; edits (to the work order or to shared
+inputs: parts, processes, methods, standards, PDF settings) just stop
+matching the old keys, which LRU eviction then reclaims.  A save does not
+purge: ``delete_prefix`` scans the whole cache directory, which bulk
+imports would pay once per work order.  Only a deleted work order frees
+its entries straight away.
+"""
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from app.disk_cache import caches
+
+from .models import WorkOrder
+
+
+@receiver(post_delete, sender=WorkOrder)
+def drop_work_order_travelers(sender, instance, **kwargs):
+    caches['travelers'].delete_prefix(f"{instance.pk}-")
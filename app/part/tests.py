@@ -1,14 +1,33 @@
+import io
+import tempfile
 from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
 
+import fitz  # PyMuPDF
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.db import IntegrityError, transaction
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from app.disk_cache import caches as render_caches
+from app.render_pool import merge_pdfs, worker_process
+from jobs.models import RenderJob
 
 from methods.models import Method
 from process.models import Process, ProcessStep
 from standard.models import Classification, Standard, StandardProcess
 
-from .models import Part, PartStandard, WorkOrder
+from .importer import PartImporter, read_rows
+from .models import Part, PartStandard, PDFSettings, WorkOrder
+from .search import search_parts
+from .travelers import (
+    batch_traveler_pdfs, render_many, traveler_cache_key,
+    work_order_traveler_context,
+)
 
 
 def make_standard(name="AMS-2404", revision="A"):
@@ -372,6 +391,33 @@ class TestWorkOrderClean(TestCase):
         )
         self.assertIsNotNone(wo.pk)
 
+    def test_clean_is_a_single_query(self):
+        wo = make_work_order(
+            self.part, self.standard, self.classification, surface_area=144.0
+        )
+        with self.assertNumQueries(1):
+            self.assertTrue(wo._has_rectified_step())
+
+    def test_partial_save_of_unrelated_fields_skips_clean(self):
+        wo = make_work_order(
+            self.part, self.standard, self.classification, surface_area=144.0
+        )
+        wo.save()
+        WorkOrder.objects.filter(pk=wo.pk).update(surface_area=None)
+        wo.surface_area = None
+        wo.requires_masking = False
+        with self.assertNumQueries(1):
+            wo.save(update_fields=["requires_masking", "date"])
+
+    def test_partial_save_of_surface_area_still_validates(self):
+        wo = make_work_order(
+            self.part, self.standard, self.classification, surface_area=144.0
+        )
+        wo.save()
+        wo.surface_area = None
+        with self.assertRaises(ValidationError):
+            wo.save(update_fields=["surface_area"])
+
 
 # ---------------------------------------------------------------------------
 # T-1: WorkOrder._calc_amps()
@@ -450,3 +496,544 @@ class TestWorkOrderCalcAmps(TestCase):
         wo._calc_amps()
         self.assertIsNone(wo._plate_amps)
         self.assertIsNone(wo._strike_amps)
+
+
+# ---------------------------------------------------------------------------
+# Traveler PDF cache
+# ---------------------------------------------------------------------------
+
+class TestTravelerCache(TestCase):
+    """
+    Verify traveler cache keys follow every printed input and that model
+    changes drop stale cache entries.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        override = override_settings(
+            RENDER_CACHES={
+                'travelers': {
+                    'DIR': Path(self._tmp.name),
+                    'MAX_BYTES': 10 * 1024 * 1024,
+                    'SUFFIX': '.pdf',
+                },
+            }
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.standard = make_standard(name="AMS-2404", revision="A")
+        self.std_process = make_standard_process(
+            self.standard, "Cadmium Plate"
+        )
+        self.classification = make_classification(
+            self.standard, class_name="Class 1"
+        )
+        self.part = make_part()
+        self.process = make_process(
+            self.standard, self.std_process, self.classification
+        )
+        self.clean_method = make_method("Electroclean")
+        self.mask_method = Method.objects.create(
+            title="Masking",
+            method_type="manual_method",
+            is_masking_operation=True,
+        )
+        ProcessStep.objects.create(
+            process=self.process, method=self.clean_method, step_number=1
+        )
+        ProcessStep.objects.create(
+            process=self.process, method=self.mask_method, step_number=2
+        )
+        self.work_order = make_work_order(
+            self.part, self.standard, self.classification
+        )
+        self.work_order.save()
+
+    def _key(self):
+        work_order = WorkOrder.objects.get(pk=self.work_order.pk)
+        return traveler_cache_key(work_order_traveler_context(work_order))
+
+    def test_key_is_stable_when_nothing_changes(self):
+        self.assertEqual(self._key(), self._key())
+
+    def test_key_is_prefixed_with_work_order_id(self):
+        self.assertTrue(self._key().startswith(f"{self.work_order.pk}-"))
+
+    def test_masking_toggle_excludes_step_and_changes_key(self):
+        before = self._key()
+        WorkOrder.objects.filter(pk=self.work_order.pk).update(
+            requires_masking=False
+        )
+        context = work_order_traveler_context(
+            WorkOrder.objects.get(pk=self.work_order.pk)
+        )
+        self.assertEqual(
+            [s.method for s in context['process_steps']], [self.clean_method]
+        )
+        self.assertNotEqual(before, self._key())
+
+    def test_method_edit_changes_key(self):
+        before = self._key()
+        self.clean_method.description = "New instruction"
+        self.clean_method.save()
+        self.assertNotEqual(before, self._key())
+
+    def test_pdf_settings_change_key(self):
+        before = self._key()
+        PDFSettings.objects.create(doc_id="CPTS-2", revision="4")
+        self.assertNotEqual(before, self._key())
+
+    def test_work_order_save_changes_key_without_purging(self):
+        cache = render_caches['travelers']
+        before = self._key()
+        cache.set(before, b"%PDF")
+        self.work_order.rework = True
+        self.work_order.save()
+        self.assertNotEqual(before, self._key())
+        self.assertIsNotNone(cache.get(before))
+
+    def test_work_order_delete_drops_only_its_entries(self):
+        cache = render_caches['travelers']
+        key = f"{self.work_order.pk}-abc"
+        cache.set(key, b"%PDF")
+        cache.set("999999-abc", b"%PDF")
+        self.work_order.delete()
+        self.assertIsNone(cache.get(key))
+        self.assertIsNotNone(cache.get("999999-abc"))
+
+    def test_method_save_keeps_other_entries(self):
+        # The key changes instead; LRU eviction reclaims the old entry
+        cache = render_caches['travelers']
+        cache.set("999999-abc", b"%PDF")
+        self.clean_method.description = "Changed"
+        self.clean_method.save()
+        self.assertIsNotNone(cache.get("999999-abc"))
+
+    @override_settings(RENDER_JOBS_EAGER=True)
+    @patch("part.renderers.render_pdf", return_value=b"%PDF-1.7 traveler")
+    def test_print_view_serves_second_request_from_cache(self, mock_render):
+        user = User.objects.create_user(
+            username="operator", password="pass1234"
+        )
+        self.client.force_login(user)
+        url = reverse(
+            'work_order_pdf', kwargs={'work_order_id': self.work_order.pk}
+        )
+
+        first = self.client.get(url)
+        second = self.client.get(url)
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.getvalue(), b"%PDF-1.7 traveler")
+        self.assertEqual(mock_render.call_count, 1)
+
+
+# ---------------------------------------------------------------------------
+# Batch traveler printing
+# ---------------------------------------------------------------------------
+
+def fake_pdf(text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+class TestBatchTravelers(TestCase):
+    """
+    Verify batch printing keeps the requested order, reuses cached
+    travelers and skips work orders without printable steps.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        override = override_settings(
+            RENDER_CACHES={
+                'travelers': {
+                    'DIR': Path(self._tmp.name),
+                    'MAX_BYTES': 10 * 1024 * 1024,
+                    'SUFFIX': '.pdf',
+                },
+            }
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.standard = make_standard(name="AMS-2404", revision="A")
+        self.std_process = make_standard_process(
+            self.standard, "Cadmium Plate"
+        )
+        self.classification = make_classification(
+            self.standard, class_name="Class 1"
+        )
+        self.part = make_part()
+        self.process = make_process(
+            self.standard, self.std_process, self.classification
+        )
+        ProcessStep.objects.create(
+            process=self.process,
+            method=make_method("Electroclean"),
+            step_number=1,
+        )
+
+        self.wo_a = make_work_order(
+            self.part, self.standard, self.classification, wo_number="WO-A"
+        )
+        self.wo_a.save()
+        self.wo_b = make_work_order(
+            self.part, self.standard, self.classification, wo_number="WO-B"
+        )
+        self.wo_b.save()
+        other = make_standard(name="AMS-2405", revision="A")
+        self.wo_no_process = make_work_order(
+            self.part, other, None, wo_number="WO-C"
+        )
+        self.wo_no_process.save()
+
+    def _render(self, html_documents, max_workers=None, stylesheets=()):
+        return [fake_pdf(html[-40:]) for html in html_documents]
+
+    def test_returns_pdfs_in_requested_order_and_skips_unprintable(self):
+        with patch(
+            "part.travelers.render_many", side_effect=self._render
+        ) as mock_render:
+            pdfs, skipped = batch_traveler_pdfs(
+                [self.wo_b, self.wo_no_process, self.wo_a]
+            )
+        self.assertEqual(len(pdfs), 2)
+        self.assertEqual(skipped, [self.wo_no_process])
+        rendered_html = mock_render.call_args.args[0]
+        self.assertIn("WO-B", rendered_html[0])
+        self.assertIn("WO-A", rendered_html[1])
+
+    def test_cached_travelers_are_not_rendered_again(self):
+        with patch("part.travelers.render_many", side_effect=self._render):
+            batch_traveler_pdfs([self.wo_a])
+        with patch(
+            "part.travelers.render_many", side_effect=self._render
+        ) as mock_render:
+            pdfs, _ = batch_traveler_pdfs([self.wo_a, self.wo_b])
+        self.assertEqual(len(mock_render.call_args.args[0]), 1)
+        self.assertEqual(len(pdfs), 2)
+
+    def test_merge_pdfs_concatenates_pages_in_order(self):
+        merged = merge_pdfs([fake_pdf("first"), fake_pdf("second")])
+        with fitz.open(stream=merged, filetype="pdf") as doc:
+            self.assertEqual(doc.page_count, 2)
+            self.assertIn("first", doc[0].get_text())
+            self.assertIn("second", doc[1].get_text())
+
+    def test_batch_view_rejects_non_integer_ids(self):
+        user = User.objects.create_user(
+            username="supervisor", password="pass1234"
+        )
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse('work_order_batch_pdf'), {'ids': '1,abc'}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(RENDER_JOBS_EAGER=True)
+    def test_batch_view_returns_merged_pdf(self):
+        user = User.objects.create_user(
+            username="supervisor", password="pass1234"
+        )
+        self.client.force_login(user)
+        ids = f"{self.wo_a.pk},{self.wo_no_process.pk},{self.wo_b.pk}"
+        with patch("part.travelers.render_many", side_effect=self._render):
+            response = self.client.get(
+                reverse('work_order_batch_pdf'), {'ids': ids}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(
+            response['X-Skipped-Work-Orders'], str(self.wo_no_process.pk)
+        )
+        with fitz.open(stream=response.getvalue(), filetype="pdf") as doc:
+            self.assertEqual(doc.page_count, 2)
+
+        # Merged once: the same batch is served from the cache
+        with patch("part.travelers.render_many") as mock_render:
+            again = self.client.get(
+                reverse('work_order_batch_pdf'), {'ids': ids}
+            )
+        self.assertEqual(again['X-Cache'], 'HIT')
+        mock_render.assert_not_called()
+
+    @override_settings(RENDER_JOBS_EAGER=False)
+    def test_batch_view_hands_render_to_the_job_queue(self):
+        user = User.objects.create_user(
+            username="supervisor", password="pass1234"
+        )
+        self.client.force_login(user)
+        ids = f"{self.wo_b.pk},{self.wo_a.pk}"
+        with patch("part.travelers.render_many") as mock_render:
+            response = self.client.get(
+                reverse('work_order_batch_pdf'), {'ids': ids}
+            )
+        self.assertEqual(response.status_code, 202)
+        mock_render.assert_not_called()
+        job = RenderJob.objects.get(kind="traveler_batch_pdf")
+        self.assertEqual(
+            job.params, {"work_order_ids": [self.wo_b.pk, self.wo_a.pk]}
+        )
+
+    @patch("app.render_pool.get_pool")
+    def test_pool_only_in_render_worker(self, get_pool):
+        get_pool.return_value.map.side_effect = (
+            lambda render, docs: [b"%PDF"] * len(list(docs))
+        )
+        with patch("part.travelers.render_html_pdf", return_value=b"%PDF"):
+            render_many(["<p>a</p>", "<p>b</p>"], max_workers=4)
+            get_pool.assert_not_called()
+            with worker_process():
+                render_many(["<p>a</p>", "<p>b</p>"], max_workers=4)
+        get_pool.assert_called_once_with(4)
+
+
+class TestPartSearch(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="searcher", password="pass1234"
+        )
+        self.client.force_login(self.user)
+        Part.objects.create(
+            part_number="MS21042-3", part_description="Nut, self-locking"
+        )
+        Part.objects.create(
+            part_number="AN960-416", part_description="Washer for MS21042 nut"
+        )
+        Part.objects.create(part_number="XMS21042", part_description="Spacer")
+        Part.objects.create(part_number="NAS1149", part_description="Washer")
+
+    def test_prefix_matches_rank_first(self):
+        numbers = [p.part_number for p in search_parts("ms21042")]
+        self.assertEqual(numbers, ["MS21042-3", "XMS21042", "AN960-416"])
+
+    def test_limit_and_blank_query(self):
+        self.assertEqual(len(search_parts("a", limit=2)), 2)
+        self.assertEqual(list(search_parts("   ")), [])
+
+    def test_trigram_query_uses_similarity_operator(self):
+        from . import search
+        with patch.object(search, "trigram_available", return_value=True):
+            sql = str(search_parts("ms21042").query)
+        self.assertIn("SIMILARITY", sql.upper())
+        self.assertIn('UPPER("part_part"."part_number") %', sql)
+
+    def test_endpoint_returns_ranked_json(self):
+        resp = self.client.get(
+            reverse("part_search_json"), {"q": "MS21042", "limit": 2}
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(
+            [d["part_number"] for d in data], ["MS21042-3", "XMS21042"]
+        )
+        self.assertEqual(
+            data[0]["url"], reverse("part_detail", args=[data[0]["id"]])
+        )
+
+    def test_endpoint_rejects_bad_limit(self):
+        resp = self.client.get(
+            reverse("part_search_json"), {"q": "MS", "limit": "many"}
+        )
+        self.assertEqual(resp.status_code, 400)
+
+
+class TestPartImporter(TestCase):
+    HEADER = (
+        "part_number,part_description,part_revision,standard,"
+        "classification,work_order_number,job_identity,surface_area\n"
+    )
+
+    def setUp(self):
+        self.standard = make_standard(name="AMS-2404", revision="A")
+        self.classification = make_classification(
+            self.standard, class_name="Class 1"
+        )
+        process = make_process(
+            self.standard,
+            make_standard_process(self.standard),
+            self.classification,
+        )
+        ProcessStep.objects.create(
+            process=process,
+            method=make_method("Cad Tank", is_rectified=True),
+            step_number=1,
+        )
+        make_part("EXIST-1", revision="A")
+
+    def _import(self, body, **kwargs):
+        rows = read_rows(
+            io.BytesIO((self.HEADER + body).encode()), "parts.csv"
+        )
+        return PartImporter(**kwargs).run(rows)
+
+    def test_creates_parts_assignments_and_work_orders(self):
+        report = self._import(
+            "NEW-1,Bracket,B,AMS-2404,Class 1,WO-100,Cadmium Plate,144\n"
+            "NEW-2,Bolt,,AMS-2404,,,,\n"
+            "EXIST-1,,A,AMS-2404,Class 1,WO-101,cadmium_plate,12.5\n"
+        )
+        self.assertEqual(report.errors, [])
+        self.assertEqual(
+            report.created, {'parts': 2, 'part_standards': 3, 'work_orders': 2}
+        )
+        self.assertEqual(report.existing['parts'], 1)
+        wo = WorkOrder.objects.get(work_order_number="WO-100")
+        self.assertEqual(
+            (wo.part.part_number, wo.classification, wo.job_identity,
+             wo.surface_area),
+            ("NEW-1", self.classification, "cadmium_plate", 144.0),
+        )
+        self.assertTrue(
+            PartStandard.objects.filter(
+                part__part_number="NEW-2", classification__isnull=True
+            ).exists()
+        )
+
+    def test_reimport_is_idempotent(self):
+        body = "NEW-1,Bracket,,AMS-2404,Class 1,WO-100,cadmium_plate,144\n"
+        self._import(body)
+        report = self._import(body)
+        self.assertEqual(
+            report.created, {'parts': 0, 'part_standards': 0, 'work_orders': 0}
+        )
+        self.assertEqual(
+            report.existing,
+            {'parts': 1, 'part_standards': 1, 'work_orders': 1},
+        )
+        self.assertEqual(Part.objects.filter(part_number="NEW-1").count(), 1)
+
+    def test_reimport_with_null_key_columns_is_idempotent(self):
+        # No classification or surface_repaired: NULLs the unique constraint
+        # cannot match
+        body = "NEW-1,Bracket,,AMS-2404,,WO-100,strip,\n"
+        self._import(body)
+        report = self._import(body)
+        self.assertEqual(report.created['work_orders'], 0)
+        self.assertEqual(report.existing['work_orders'], 1)
+        self.assertEqual(
+            WorkOrder.objects.filter(work_order_number="WO-100").count(), 1
+        )
+
+    def test_model_validation_errors_are_row_errors(self):
+        body = (
+            "part_number,part_description,standard,work_order_number,"
+            "job_identity,part_quantity\n"
+            "NEW-1,Bracket,AMS-2404,WO-100,strip,99999999999\n"
+            "NEW-2,Bolt,AMS-2404,WO-101,strip,3\n"
+        )
+        rows = read_rows(io.BytesIO(body.encode()), "parts.csv")
+        report = PartImporter().run(rows)
+        self.assertEqual([number for number, _ in report.errors], [2])
+        self.assertIn("part_quantity", report.errors[0][1])
+        self.assertEqual(report.created['work_orders'], 1)
+        self.assertEqual(
+            list(
+                WorkOrder.objects.values_list("work_order_number", flat=True)
+            ),
+            ["WO-101"],
+        )
+
+    def test_bad_rows_are_reported_without_aborting(self):
+        report = self._import(
+            ",No number,,,,,,\n"
+            "NEW-3,Nut,,AMS-9999,,,,\n"
+            "NEW-4,Nut,,AMS-2404,Class 1,WO-102,cadmium_plate,\n"
+            "NEW-5,Nut,,AMS-2404,Class 1,WO-103,polish,1\n"
+            "NEW-6,,,,,,,\n"
+            "NEW-7,Washer,,AMS-2404,Class 1,WO-104,cadmium_plate,abc\n"
+            "NEW-8,Washer,,AMS-2404,Class 1,WO-105,cadmium_plate,5\n",
+            chunk_size=3,
+        )
+        self.assertEqual(
+            [number for number, _ in report.errors], [2, 3, 4, 5, 6, 7]
+        )
+        self.assertIn("Surface Area is required", report.errors[2][1])
+        self.assertEqual(
+            list(
+                Part.objects.filter(part_number__startswith="NEW").values_list(
+                    "part_number", flat=True
+                )
+            ),
+            ["NEW-8"],
+        )
+        self.assertTrue(
+            WorkOrder.objects.filter(work_order_number="WO-105").exists()
+        )
+
+    def test_rejected_chunk_counts_nothing_and_reports_each_row_once(self):
+        body = (
+            "NEW-1,Bracket,,AMS-2404,Class 1,WO-100,cadmium_plate,144\n"
+            "NEW-2,Nut,,AMS-9999,,,,\n"
+            "NEW-3,Washer,,AMS-2404,Class 1,WO-101,cadmium_plate,5\n"
+        )
+        with patch.object(
+            WorkOrder.objects, "bulk_create",
+            side_effect=IntegrityError("duplicate key"),
+        ):
+            report = self._import(body, chunk_size=2)
+        # The first chunk's parts were rolled back with its work orders
+        self.assertEqual(
+            report.created, {'parts': 0, 'part_standards': 0, 'work_orders': 0}
+        )
+        self.assertEqual([number for number, _ in report.errors], [2, 3, 4])
+        self.assertIn("AMS-9999", report.errors[1][1])
+        self.assertIn("database rejected", report.errors[2][1])
+        self.assertFalse(Part.objects.filter(part_number="NEW-1").exists())
+
+    def test_dry_run_saves_nothing(self):
+        report = self._import(
+            "NEW-1,Bracket,,AMS-2404,Class 1,WO-100,cadmium_plate,144\n",
+            dry_run=True,
+        )
+        self.assertEqual(report.created['work_orders'], 1)
+        self.assertFalse(Part.objects.filter(part_number="NEW-1").exists())
+
+    def test_xlsx_and_management_command(self):
+        import openpyxl
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Part Number", "Part Description", "Standard"])
+        sheet.append([55501, "Housing", "AMS-2404"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "parts.xlsx"
+            workbook.save(path)
+            out = io.StringIO()
+            call_command(
+                "import_parts", str(path), stdout=out, stderr=io.StringIO()
+            )
+        self.assertIn("parts: 1 created", out.getvalue())
+        self.assertTrue(
+            PartStandard.objects.filter(
+                part__part_number="55501", standard=self.standard
+            ).exists()
+        )
+
+    def test_admin_upload(self):
+        admin_user = User.objects.create_superuser(
+            username="admin", password="pass1234"
+        )
+        self.client.force_login(admin_user)
+        upload = SimpleUploadedFile(
+            "parts.csv",
+            (
+                self.HEADER + "NEW-9,Clip,,AMS-2404,,,,\nNEW-10,,,,,,,\n"
+            ).encode(),
+            content_type="text/csv",
+        )
+        resp = self.client.post(
+            reverse("admin:part_part_import"), {"file": upload}
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(
+            resp, "part_description is required for a new part."
+        )
+        self.assertTrue(Part.objects.filter(part_number="NEW-9").exists())
@@ -0,0 +1,333 @@
+# part/travelers.py
+"""
+Context building and cache keys for work order traveler PDFs.
+
+`work_order_traveler_context()` gathers everything the
+`work_order/work_order_steps_pdf.html` template reads.  The cache key is
+a digest of that same data, so a traveler is only re-rendered when
+something printed on it has changed.
+"""
+import functools
+
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from app.disk_cache import (
+    caches, digest, file_fingerprint, instance_fields, template_fingerprint,
+)
+from app.pdf import stylesheet_path
+from app.render_pool import pool_map, render_html_pdf
+from process.compiled import compiled_process, compiled_process_for
+
+from .models import PDFSettings
+
+TRAVELER_TEMPLATE = 'work_order/work_order_steps_pdf.html'
+TRAVELER_STYLESHEET = 'part/css/traveler_print.css'
+
+PLATING_JOBS = ('cadmium_plate', 'ni_plate', 'chrome_plate')
+
+BAKE_LABELS = [
+    "Date and Time of Start of Baking",
+    "Date and Time of Start of Soak",
+    "Date and Time of Completion of Baking",
+    "Furnace Control Instrument Set Temperature",
+    "Furnace Identification",
+    "Graph Number",
+]
+
+TEMPLATE_BAKE_LABELS = [
+    "Date and Time of Start of Baking",
+    "Date and Time of Start of Soak",
+    "Furnace Control Instrument Set Temperature",
+    "Furnace Identification",
+    "Graph Number",
+]
+
+
+def work_order_job_data(work_order):
+    """Strike/plate amps and labels for the plating block of the traveler."""
+    amps, strike_amps, normal_plate_amps = [None] * 3
+    strike_label, normal_label = [None] * 2
+    time_label, plating_time = [None] * 2
+
+    classification = work_order.classification
+    surface_area_in2 = work_order.surface_area
+    surface_area_ft2 = (
+        float(surface_area_in2) / 144.0 if surface_area_in2 else None
+    )
+
+    if (
+        classification
+        and surface_area_ft2
+        and work_order.job_identity in PLATING_JOBS
+    ):
+
+        plate_asf = getattr(classification, 'plate_asf', None)
+        strike_asf = getattr(classification, 'strike_asf', None)
+        plating_time_minutes = getattr(
+            classification, 'plating_time_minutes', None
+        )
+
+        if plating_time_minutes:
+            time_label = f"Plating Time ({plating_time_minutes} minutes)"
+            plating_time = plating_time_minutes
+
+        if plate_asf:
+            normal_plate_amps = surface_area_ft2 * float(plate_asf)
+            normal_label = f"Normal Plate Amps / Part ({plate_asf} ASF)"
+            amps = normal_plate_amps
+
+        if strike_asf:
+            strike_amps = surface_area_ft2 * float(strike_asf)
+            strike_label = f"Strike Amps / Part ({strike_asf} ASF)"
+
+    return {
+        'surface_area': surface_area_in2,
+        'current_density': None,
+        'amps': amps,
+        'strike_amps': strike_amps,
+        'strike_label': strike_label,
+        'normal_plate_amps': normal_plate_amps,
+        'normal_label': normal_label,
+        'time_label': time_label,
+        'plating_time': plating_time,
+        'is_chrome_or_cadmium_or_nickel': (
+            work_order.job_identity in PLATING_JOBS
+        ),
+        'is_chrome_plate': work_order.job_identity == 'chrome_plate',
+        'instructions': [
+            "Record amps, ramp as required, record thickness start/finish"
+        ],
+    }
+
+
+def footer_context(current_date):
+    """Doc ID / revision / repair station block from PDFSettings."""
+    pdf_settings = PDFSettings.objects.first()
+    return {
+        'doc_id': pdf_settings.doc_id if pdf_settings else 'CPTS',
+        'revision': pdf_settings.revision if pdf_settings else '0',
+        'date': (
+            pdf_settings.date.strftime('%m-%d-%Y')
+            if pdf_settings
+            else current_date
+        ),
+        'repair_station': (
+            pdf_settings.repair_station if pdf_settings else 'QKPR504X'
+        ),
+        'footer_text': (
+            pdf_settings.footer_text
+            if pdf_settings
+            else f"Printed on: {current_date}"
+        ),
+    }
+
+
+def work_order_traveler_context(work_order):
+    """
+    Template context for a work order traveler, or None when the work
+    order has no process or every step was excluded.
+    """
+    compiled = compiled_process_for(
+        work_order.standard_id, work_order.classification_id
+    )
+    if not compiled:
+        return None
+
+    process_steps = compiled.filtered_steps(
+        requires_masking=work_order.requires_masking,
+        requires_stress_relief=work_order.requires_stress_relief,
+        requires_hydrogen_relief=work_order.requires_hydrogen_relief,
+    )
+    if not process_steps:
+        return None
+
+    current_date = timezone.now().strftime("%m-%d-%Y")
+
+    inspections_qs = getattr(work_order.standard, 'inspections', None)
+    inspections = list(inspections_qs.all()) if inspections_qs else []
+
+    return {
+        'work_order': work_order,
+        'process_steps': process_steps,
+        'current_date': current_date,
+        **footer_context(current_date),
+        'job_data': work_order_job_data(work_order),
+        'inspections': inspections,
+        'bake_labels': BAKE_LABELS,
+    }
+
+
+def template_traveler_context(process, requires_masking=True):
+    """
+    Template context for an untracked (no WorkOrder) traveler printed
+    straight from a template Process, or None when every step was excluded.
+    """
+    compiled = compiled_process(process.pk, updated_at=process.updated_at)
+    process_steps = (
+        compiled.filtered_steps(requires_masking=requires_masking)
+        if compiled
+        else []
+    )
+    if not process_steps:
+        return None
+
+    current_date = timezone.now().strftime("%m-%d-%Y")
+
+    inspections_qs = getattr(process.standard, 'inspections', None)
+    inspections = list(inspections_qs.all()) if inspections_qs else []
+
+    return {
+        'process': process,
+        'standard': process.standard,
+        'classification': process.classification,
+        'process_steps': process_steps,
+        'inspections': inspections,
+        'untracked_mode': True,
+        'job_data': {
+            'surface_area': 'N/A (Template)',
+            'amps': 'N/A (Template)',
+            'instructions': [
+                "TEMPLATE ONLY: Manually record all required data."
+            ],
+        },
+        'bake_labels': TEMPLATE_BAKE_LABELS,
+        'current_date': current_date,
+        **footer_context(current_date),
+    }
+
+
+# ----------------------------------------------------------------------
+# Cache keys
+# ----------------------------------------------------------------------
+
+def traveler_cache_key(context):
+    """
+    Content digest of every input printed on a work order traveler.
+
+    Keys are prefixed with the work order id so a single work order's
+    entries can be dropped when it changes.
+    """
+    work_order = context['work_order']
+    payload = {
+        'template': template_fingerprint(TRAVELER_TEMPLATE),
+        'stylesheet': file_fingerprint(stylesheet_path(TRAVELER_STYLESHEET)),
+        'work_order': instance_fields(work_order),
+        'part': instance_fields(work_order.part),
+        'standard': instance_fields(work_order.standard),
+        'classification': instance_fields(work_order.classification),
+        **_shared_payload(context),
+    }
+    return f"{work_order.pk}-{digest(payload)}"
+
+
+def template_traveler_cache_key(context):
+    """
+    Content digest of an untracked template traveler, prefixed
+    ``template-<process id>``.
+    """
+    process = context['process']
+    payload = {
+        'template': template_fingerprint(TRAVELER_TEMPLATE),
+        'stylesheet': file_fingerprint(stylesheet_path(TRAVELER_STYLESHEET)),
+        'process': instance_fields(process),
+        'standard': instance_fields(process.standard),
+        'classification': instance_fields(process.classification),
+        **_shared_payload(context),
+    }
+    return f"template-{process.pk}-{digest(payload)}"
+
+
+def _shared_payload(context):
+    """Steps, inspections, footer and job block common to both travelers."""
+    return {
+        'steps': [
+            {
+                'step': step.fields(),
+                'method': step.method.fields(),
+                'parameters': [
+                    p.fields() for p in step.method.recorded_parameters
+                ],
+            }
+            for step in context['process_steps']
+        ],
+        'inspections': [instance_fields(i) for i in context['inspections']],
+        'footer': [
+            context[k] for k in (
+                'doc_id', 'revision', 'date', 'repair_station', 'footer_text',
+            )
+        ],
+        'job_data': context['job_data'],
+    }
+
+
+# ----------------------------------------------------------------------
+# Batch printing
+# ----------------------------------------------------------------------
+
+def batch_traveler_key(work_orders):
+    """
+    ``(key, skipped)``: cache key of the merged traveler PDF for
+    ``work_orders`` (None when none of them has printable steps) and the
+    work orders without printable steps.
+    """
+    keys = []
+    skipped = []
+    for work_order in work_orders:
+        context = work_order_traveler_context(work_order)
+        if context is None:
+            skipped.append(work_order)
+        else:
+            keys.append(traveler_cache_key(context))
+    if not keys:
+        return None, skipped
+    return f"batch-{digest(keys)}", skipped
+
+
+def render_many(html_documents, max_workers=None, stylesheets=()):
+    """
+    Render each HTML string to PDF bytes, preserving order, across the
+    render pool (in-process outside ``render_worker``).
+    """
+    render = functools.partial(
+        render_html_pdf, stylesheets=tuple(stylesheets), label="batch_traveler"
+    )
+    return pool_map(render, html_documents, max_workers=max_workers)
+
+
+def batch_traveler_pdfs(work_orders, max_workers=None):
+    """
+    Traveler PDFs for several work orders, in the order given.
+
+    Cached travelers are reused; the rest are rendered across the process
+    pool and written back to the cache.  Returns ``(pdfs, skipped)`` where
+    ``skipped`` lists work orders with no printable steps.
+    """
+    cache = caches['travelers']
+    pdfs = []
+    skipped = []
+    pending = []  # (index into pdfs, cache key, html)
+
+    for work_order in work_orders:
+        context = work_order_traveler_context(work_order)
+        if context is None:
+            skipped.append(work_order)
+            continue
+
+        cache_key = traveler_cache_key(context)
+        pdf_file = cache.get(cache_key)
+        if pdf_file is None:
+            html = render_to_string(TRAVELER_TEMPLATE, context)
+            pending.append((len(pdfs), cache_key, html))
+        pdfs.append(pdf_file)
+
+    rendered = render_many(
+        [html for _index, _key, html in pending],
+        max_workers=max_workers,
+        stylesheets=[stylesheet_path(TRAVELER_STYLESHEET)],
+    )
+    for (index, cache_key, _html), pdf_file in zip(pending, rendered):
+        cache.set(cache_key, pdf_file)
+        pdfs[index] = pdf_file
+
+    return pdfs, skipped
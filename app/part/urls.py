@@ -17,6 +17,8 @@ urlpatterns = [
     path('parts/<int:part_id>/work_orders/add/', views.work_order_create_view, name='work_order_create'),
     path('work_orders/<int:work_order_id>/', views.work_order_detail_view, name='work_order_detail'),
     path('work_orders/<int:work_order_id>/pdf/', views.work_order_print_steps_view, name='work_order_pdf'),
+    path('work_orders/batch/pdf/', views.work_order_batch_print_view,
+         name='work_order_batch_pdf'),
 
     # --- TEMPLATE (UNTRACTED) FLOW ---
     path('templates/', views.global_template_list_view, name='global_template_list'),
@@ -25,4 +27,6 @@ urlpatterns = [
 
     # --- API ENDPOINTS ---
     path('standards/<int:standard_id>/classifications/json/', views.standard_classifications_json, name='standard_classifications_json'),
+    path('parts/search/json/', views.part_search_json,
+         name='part_search_json'),
 ]
@@ -1,20 +1,31 @@
+import logging
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Part, WorkOrder, PDFSettings, PartStandard
-import tempfile
-from django.http import HttpResponse, JsonResponse
-from django.template.loader import render_to_string
-from django.utils import timezone
-from weasyprint import HTML
+from .models import Part, WorkOrder, PartStandard
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
 from process.models import Process, ProcessStep
 from django.core.paginator import Paginator
+from django.urls import reverse
 from .forms import WorkOrderForm, PartForm, PartStandardForm
 from django.contrib import messages
 from standard.models import Classification
 from django.db import IntegrityError
-from django.db.models import Q, Prefetch, Count
-from methods.models import ParameterToBeRecorded
+from django.db.models import Prefetch, Count
 # Needed for AJAX handler
 from django.db import transaction
+from jobs.shortcuts import serve_or_enqueue
+from .search import search_parts
+from .renderers import (
+    batch_traveler_filename, batch_work_orders, template_traveler_filename,
+    traveler_filename,
+)
+from .travelers import (
+    batch_traveler_key, template_traveler_cache_key,
+    template_traveler_context, traveler_cache_key,
+    work_order_traveler_context,
+)
+
+logger = logging.getLogger(__name__)
 
 
 # PART MANAGEMENT VIEWS
@@ -239,120 +250,79 @@ def work_order_create_view(request, part_id):
 
 # 📌 Print work order steps PDF
 def work_order_print_steps_view(request, work_order_id):
-    work_order = get_object_or_404(WorkOrder, id=work_order_id)
-
-    # Fetch the process for the work order
-    process = Process.objects.filter(
-        standard=work_order.standard,
-        classification=work_order.classification
-    ).first()
-
-    if not process:
-        return HttpResponse("No process steps found for this work order.", content_type="text/plain")
-
-    # Define exclusion logic based on WorkOrder toggles
-    exclusion_query = Q()
-
-    if not work_order.requires_masking:
-        exclusion_query |= Q(method__is_masking_operation=True)
-    if not work_order.requires_stress_relief:
-        exclusion_query |= Q(method__is_stress_relief_operation=True)
-    if not work_order.requires_hydrogen_relief:
-        exclusion_query |= Q(method__is_hydrogen_relief_operation=True)
-
-    # Fetch all process steps, applying exclusion filter and prefetching data
-    process_steps = (
-        ProcessStep.objects
-        .filter(process=process)
-        .exclude(exclusion_query)
-        .select_related('method')
-        .prefetch_related(
-            Prefetch(
-                'method__recorded_parameters',
-                queryset=ParameterToBeRecorded.objects.order_by('id'),
-                to_attr='prefetched_recorded_parameters',
-            )
-        )
-        .order_by('step_number')
+    work_order = get_object_or_404(
+        WorkOrder.objects.select_related('part', 'standard', 'classification'),
+        id=work_order_id
     )
 
-    if not process_steps.exists():
+    # Steps (with masking / stress relief / HE relief exclusions), amps
+    # and footer
+    context = work_order_traveler_context(work_order)
+    if context is None:
         return HttpResponse("No process steps found for this work order.", content_type="text/plain")
 
-    current_date = timezone.now().strftime("%m-%d-%Y")
-    pdf_settings = PDFSettings.objects.first()
-    classification = work_order.classification
-
-    # --- Calculation Logic ---
-    amps, strike_amps, normal_plate_amps, strike_label, normal_label = [None] * 5
-    time_label, plating_time = [None] * 2
-
-    surface_area_in2 = work_order.surface_area
-    surface_area_ft2 = float(surface_area_in2) / 144.0 if surface_area_in2 else None
-
-    if classification and surface_area_ft2 and work_order.job_identity in ('cadmium_plate', 'ni_plate', 'chrome_plate'):
-
-        plate_asf = getattr(classification, 'plate_asf', None)
-        strike_asf = getattr(classification, 'strike_asf', None)
-        plating_time_minutes = getattr(classification, 'plating_time_minutes', None)
-
-        if plating_time_minutes:
-            time_label = f"Plating Time ({plating_time_minutes} minutes)"
-            plating_time = plating_time_minutes
-
-        if plate_asf:
-            normal_plate_amps = surface_area_ft2 * float(plate_asf)
-            normal_label = f"Normal Plate Amps / Part ({plate_asf} ASF)"
-            amps = normal_plate_amps
-
-        if strike_asf:
-            strike_amps = surface_area_ft2 * float(strike_asf)
-            strike_label = f"Strike Amps / Part ({strike_asf} ASF)"
-
-    # Build context data
-    job_data = {
-        'surface_area': surface_area_in2,
-        'current_density': None,
-        'amps': amps,
-        'strike_amps': strike_amps,
-        'strike_label': strike_label,
-        'normal_plate_amps': normal_plate_amps,
-        'normal_label': normal_label,
-        'time_label': time_label,
-        'plating_time': plating_time,
-        'is_chrome_or_cadmium_or_nickel': work_order.job_identity in ['chrome_plate', 'cadmium_plate', 'ni_plate'],
-        'is_chrome_plate': work_order.job_identity == 'chrome_plate',
-        'instructions': ["Record amps, ramp as required, record thickness start/finish"],
-    }
+    # Serve the cached render when nothing printed on the traveler has changed,
+    # otherwise hand the render to the job queue (part/renderers.py)
+    return serve_or_enqueue(
+        request,
+        'traveler_pdf',
+        {'work_order_id': work_order.pk},
+        key=traveler_cache_key(context),
+        filename=traveler_filename(work_order),
+    )
 
-    inspections_qs = getattr(work_order.standard, 'inspections', None)
-    inspections = inspections_qs.all() if inspections_qs else []
 
-    bake_labels = [
-        "Date and Time of Start of Baking", "Date and Time of Start of Soak", "Date and Time of Completion of Baking",
-        "Furnace Control Instrument Set Temperature", "Furnace Identification", "Graph Number"
-    ]
+# 📌 Print travelers for several work orders as one merged PDF
+def work_order_batch_print_view(request):
+    """
+    Merged traveler PDF for ?ids=1,2,3 (or repeated ?ids=), in the order
+    given.  Served from the cache when these travelers were merged
+    before, otherwise rendered by the job queue (part/renderers.py), as
+    a large batch can take minutes.
+    """
+    raw_ids = ','.join(request.GET.getlist('ids'))
+    try:
+        ids = [int(i) for i in raw_ids.split(',') if i.strip()]
+    except ValueError:
+        return HttpResponse(
+            "Work order ids must be integers.",
+            content_type="text/plain",
+            status=400,
+        )
 
-    context = {
-        'work_order': work_order, 'process_steps': process_steps, 'current_date': current_date,
-        'doc_id': pdf_settings.doc_id if pdf_settings else 'CPTS',
-        'revision': pdf_settings.revision if pdf_settings else '0',
-        'date': pdf_settings.date.strftime('%m-%d-%Y') if pdf_settings else current_date,
-        'repair_station': pdf_settings.repair_station if pdf_settings else 'QKPR504X',
-        'footer_text': pdf_settings.footer_text if pdf_settings else f"Printed on: {current_date}",
-        'job_data': job_data, 'inspections': inspections, 'bake_labels': bake_labels,
-    }
+    ids = list(dict.fromkeys(ids))  # drop duplicates, keep order
+    if not ids:
+        return HttpResponse(
+            "No work orders selected.", content_type="text/plain", status=400
+        )
+    if len(ids) > settings.TRAVELER_BATCH_MAX:
+        return HttpResponse(
+            f"At most {settings.TRAVELER_BATCH_MAX} work orders can be "
+            "printed at once.",
+            content_type="text/plain",
+            status=400,
+        )
 
-    # Render and Generate PDF
-    html_content = render_to_string('work_order/work_order_steps_pdf.html', context)
+    work_orders = batch_work_orders(ids)
+    if not work_orders:
+        raise Http404("No matching work orders.")
 
-    with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-        HTML(string=html_content).write_pdf(temp_file.name)
-        temp_file.seek(0)
-        pdf_file = temp_file.read()
+    key, skipped = batch_traveler_key(work_orders)
+    if key is None:
+        return HttpResponse(
+            "No process steps found for the selected work orders.",
+            content_type="text/plain",
+        )
 
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'inline; filename="Work_Order_{work_order.work_order_number}_Steps.pdf"'
+    response = serve_or_enqueue(
+        request, 'traveler_batch_pdf',
+        {'work_order_ids': [wo.pk for wo in work_orders]},
+        key=key, filename=batch_traveler_filename(),
+    )
+    if skipped:
+        response['X-Skipped-Work-Orders'] = ','.join(
+            str(wo.pk) for wo in skipped
+        )
     return response
 
 
@@ -412,70 +382,19 @@ def template_process_print_view(request, process_id):
     )
 
     requires_masking = request.GET.get('masking') != 'False'
-    exclusion_query = Q()
-    if not requires_masking:
-        exclusion_query |= Q(method__is_masking_operation=True)
-
-    process_steps = (
-        ProcessStep.objects
-        .filter(process=process)
-        .exclude(exclusion_query)
-        .select_related('method')
-        .prefetch_related(
-            Prefetch(
-                'method__recorded_parameters',
-                queryset=ParameterToBeRecorded.objects.order_by('id'),
-                to_attr='prefetched_recorded_parameters',
-            )
-        )
-        .order_by('step_number')
+    context = template_traveler_context(
+        process, requires_masking=requires_masking
     )
-
-    if not process_steps.exists():
+    if context is None:
         return HttpResponse("Process steps not found or all steps were excluded.", content_type="text/plain")
 
-    pdf_settings = PDFSettings.objects.first()
-    current_date = timezone.now().strftime("%m-%d-%Y")
-
-    job_data = {
-        'surface_area': 'N/A (Template)',
-        'amps': 'N/A (Template)',
-        'instructions': ["TEMPLATE ONLY: Manually record all required data."],
-    }
-
-    inspections_qs = getattr(process.standard, 'inspections', None)
-    inspections = inspections_qs.all() if inspections_qs else []
-
-    context = {
-        'process': process,
-        'standard': process.standard,
-        'classification': process.classification,
-        'process_steps': process_steps,
-        'inspections': inspections,
-        'untracked_mode': True,
-        'job_data': job_data,
-        'bake_labels': ["Date and Time of Start of Baking", "Date and Time of Start of Soak", "Furnace Control Instrument Set Temperature", "Furnace Identification", "Graph Number"],
-        'current_date': current_date,
-        'doc_id': pdf_settings.doc_id if pdf_settings else 'CPTS',
-        'revision': pdf_settings.revision if pdf_settings else '0',
-        'date': pdf_settings.date.strftime('%m-%d-%Y') if pdf_settings else current_date,
-        'repair_station': pdf_settings.repair_station if pdf_settings else 'QKPR504X',
-        'footer_text': pdf_settings.footer_text if pdf_settings else f"Printed on: {current_date}",
-    }
-
-    # Render and Generate PDF
-    html_content = render_to_string('work_order/work_order_steps_pdf.html', context)
-
-    with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-        HTML(string=html_content).write_pdf(temp_file.name)
-        temp_file.seek(0)
-        pdf_file = temp_file.read()
-
-    # Return HTTP Response
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    filename = f"Process_{process.standard.name}_{process.classification.class_name if process.classification else 'Unclassified'}_Template.pdf"
-    response['Content-Disposition'] = f'inline; filename="{filename}"'
-    return response
+    return serve_or_enqueue(
+        request,
+        'template_traveler_pdf',
+        {'process_id': process.pk, 'requires_masking': requires_masking},
+        key=template_traveler_cache_key(context),
+        filename=template_traveler_filename(process),
+    )
 
 
 # ----------------------------------------------------------------------
@@ -486,3 +405,28 @@ def standard_classifications_json(request, standard_id):
     classifications = Classification.objects.filter(standard_id=standard_id)
     data = [{"id": c.id, "label": str(c)} for c in classifications]
     return JsonResponse(data, safe=False)
+
+
+PART_SEARCH_MAX_RESULTS = 25
+
+
+def part_search_json(request):
+    """Autocomplete: the best matching parts for ?q=, ranked by relevance."""
+    try:
+        limit = min(int(request.GET.get('limit', 10)), PART_SEARCH_MAX_RESULTS)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer.'}, status=400)
+    parts = search_parts(request.GET.get('q', ''), limit=max(limit, 1))
+    data = [
+        {
+            "id": part.id,
+            "part_number": part.part_number,
+            "part_description": part.part_description,
+            "part_revision": part.part_revision,
+            "label": str(part),
+            "rank": round(float(part.rank), 3),
+            "url": reverse('part_detail', args=[part.id]),
+        }
+        for part in parts
+    ]
+    return JsonResponse(data, safe=False)
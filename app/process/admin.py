@@ -1,8 +1,15 @@
 # process/admin.py
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import ValidationError
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from . import sequencing
+from .export import export_processes
 from .models import Process, ProcessStep
-from .forms import ProcessForm, ProcessStepInlineForm
+from .forms import ProcessCloneForm, ProcessForm, ProcessStepInlineForm
 from django.utils.html import format_html
+from .views import flowchart_zip_response
 
 
 class ProcessStepInline(admin.TabularInline):
@@ -39,7 +46,86 @@ class ProcessStepInline(admin.TabularInline):
 class ProcessAdmin(admin.ModelAdmin):
     form = ProcessForm
     list_display = ('standard', 'classification', 'created_at')
-    list_filter = ('standard',)
+    list_filter = ('standard', 'standard_process__process_type', 'is_template')
     search_fields = ('standard__name',)
     inlines = [ProcessStepInline]
+    actions = ['export_flowcharts', 'renumber_steps', 'clone_process']
 
+    @admin.action(description="Export flowcharts of selected processes (ZIP)")
+    def export_flowcharts(self, request, queryset):
+        processes = export_processes().filter(pk__in=queryset.values("pk"))
+        return flowchart_zip_response(
+            request, processes, "flowcharts-selected.zip"
+        )
+
+    @admin.action(description="Renumber steps 1..N (close gaps)")
+    def renumber_steps(self, request, queryset):
+        count = sequencing.renumber_processes(
+            list(queryset.values_list("pk", flat=True))
+        )
+        self.message_user(
+            request,
+            f"Renumbered the steps of {count} process(es).",
+            messages.SUCCESS,
+        )
+
+    @admin.action(
+        description="Clone process with its steps to another "
+                    "standard/classification"
+    )
+    def clone_process(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(
+                request, "Select exactly one process to clone.",
+                messages.WARNING,
+            )
+            return None
+        return redirect('admin:process_process_clone', queryset.get().pk)
+
+    def get_urls(self):
+        clone_view = self.admin_site.admin_view(self.clone_view)
+        urls = [
+            path('<int:pk>/clone/', clone_view, name='process_process_clone'),
+        ]
+        return urls + super().get_urls()
+
+    def clone_view(self, request, pk):
+        """
+        Pick the target standard/classification for a copy of a process and
+        its steps.
+        """
+        source = get_object_or_404(
+            Process.objects.select_related('standard', 'classification'), pk=pk
+        )
+        if not self.has_add_permission(request):
+            return redirect('admin:process_process_changelist')
+
+        form = ProcessCloneForm(
+            request.POST or None, initial={'standard': source.standard_id}
+        )
+        if request.method == 'POST' and form.is_valid():
+            try:
+                clone = sequencing.clone_process(source, **form.cleaned_data)
+            except ValidationError as exc:
+                form.add_error(None, exc)
+            else:
+                self.message_user(
+                    request,
+                    f"Cloned {source} with {clone.step_count} step(s) "
+                    f"as {clone}.",
+                    messages.SUCCESS,
+                )
+                return redirect(
+                    reverse('admin:process_process_change', args=[clone.pk])
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f'Clone {source}',
+            'source': source,
+            'form': form,
+        }
+        return TemplateResponse(
+            request, 'admin/process/process/clone.html', context
+        )
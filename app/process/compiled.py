@@ -0,0 +1,351 @@
+# process/compiled.py
+"""
+Compiled, cached view of a Process and its steps.
+
+Work orders, travelers and the scheduler all need the same thing from a
+Process: its steps in order, each step's Method, the Method's recorded
+parameters, and a few derived flags.  ``compiled_process()`` loads that
+once into immutable ``__slots__`` records and keeps it in a per-process
+LRU.
+
+Entries are versioned by ``Process.updated_at``.  The signal handlers in
+process/signals.py bump ``updated_at`` whenever a step, method or
+recorded parameter of the process changes, so every gunicorn worker sees
+the new version on its next lookup; the worker that made the change also
+drops its entry straight away.
+
+Usage::
+
+    from process.compiled import compiled_process
+
+    compiled = compiled_process(process_id)
+    if compiled and compiled.has_rectified_step:
+        ...
+    for step in compiled.steps:
+        step.step_number, step.method.title, step.duration_minutes
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from methods.models import ParameterToBeRecorded
+
+from .models import Process, ProcessStep
+
+
+class _Record:
+    """Immutable record; compares equal to the model row it was built from."""
+
+    __slots__ = ()
+    _model_label = ""
+    _nested: Tuple[str, ...] = ()  # attributes holding other records
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, _Record):
+            return type(self) is type(other) and self.id == other.id
+        meta = getattr(other, "_meta", None)
+        if meta is not None and meta.label == self._model_label:
+            return other.pk == self.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._model_label, self.id))
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}>"
+
+    def fields(self):
+        """(name, value) pairs of the record's own values, for cache keys."""
+        return [
+            (name, getattr(self, name))
+            for name in self.__slots__
+            if name not in self._nested
+        ]
+
+
+class CompiledParameter(_Record):
+    __slots__ = ("id", "description", "is_nadcap_required")
+    _model_label = "methods.ParameterToBeRecorded"
+
+
+class CompiledMethod(_Record):
+    __slots__ = (
+        "id", "method_type", "title", "category", "description", "tank_name",
+        "temp_min", "temp_max", "immersion_time_min", "immersion_time_max",
+        "touch_time_min", "touch_time_max", "run_time_min", "run_time_max",
+        "chemical", "is_rectified", "is_strike_etch", "rectifier_notes",
+        "is_masking_operation", "is_stress_relief_operation",
+        "is_hydrogen_relief_operation",
+        "recorded_parameters",
+    )
+    _model_label = "methods.Method"
+    _nested = ("recorded_parameters",)
+
+    @property
+    def prefetched_recorded_parameters(self):
+        # Same attribute name the traveler template reads from a
+        # Prefetch(to_attr=...)
+        return self.recorded_parameters
+
+    def __str__(self):
+        return f"{self.title} ({self.method_type})"
+
+
+class CompiledStep(_Record):
+    __slots__ = (
+        "id", "process_id", "method_id", "step_number", "method",
+        "is_rectified", "is_masking", "is_stress_relief", "is_hydrogen_relief",
+        "touch_minutes", "run_minutes", "duration_minutes",
+    )
+    _model_label = "process.ProcessStep"
+    _nested = ("method",)
+
+
+class CompiledProcess(_Record):
+    __slots__ = (
+        "id", "updated_at", "steps",
+        "has_rectified_step", "has_masking_step", "step_count",
+        "touch_minutes", "run_minutes",
+    )
+    _model_label = "process.Process"
+    _nested = ("steps",)
+
+    def filtered_steps(
+        self,
+        requires_masking=True,
+        requires_stress_relief=True,
+        requires_hydrogen_relief=True,
+    ):
+        """Steps a job prints, leaving out the optional ones switched off."""
+        return [
+            step for step in self.steps
+            if (requires_masking or not step.is_masking)
+            and (requires_stress_relief or not step.is_stress_relief)
+            and (requires_hydrogen_relief or not step.is_hydrogen_relief)
+        ]
+
+
+# ----------------------------------------------------------------------
+# Compilation
+# ----------------------------------------------------------------------
+
+def _minutes(value):
+    return int(value or 0)
+
+
+def _compile_method(method):
+    values = {
+        name: getattr(method, name)
+        for name in CompiledMethod.__slots__
+        if name != "recorded_parameters"
+    }
+    values["recorded_parameters"] = tuple(
+        CompiledParameter(
+            id=p.id,
+            description=p.description,
+            is_nadcap_required=p.is_nadcap_required,
+        )
+        for p in method.prefetched_recorded_parameters
+    )
+    return CompiledMethod(**values)
+
+
+def _compile_step(step, method):
+    touch = _minutes(method.touch_time_max)
+    run = _minutes(method.run_time_max)
+    return CompiledStep(
+        id=step.id,
+        process_id=step.process_id,
+        method_id=step.method_id,
+        step_number=step.step_number,
+        method=method,
+        is_rectified=(
+            method.method_type == "processing_tank"
+            and bool(method.is_rectified)
+        ),
+        is_masking=bool(method.is_masking_operation),
+        is_stress_relief=bool(method.is_stress_relief_operation),
+        is_hydrogen_relief=bool(method.is_hydrogen_relief_operation),
+        touch_minutes=touch,
+        run_minutes=run,
+        # Scheduler block length: never shorter than a minute
+        duration_minutes=max(touch + run, 1),
+    )
+
+
+def _compile(versions: Dict[int, object]) -> Dict[int, CompiledProcess]:
+    """Load and compile the processes (id -> updated_at) in two queries."""
+    steps = (
+        ProcessStep.objects
+        .filter(process_id__in=list(versions))
+        .select_related("method")
+        .prefetch_related(
+            Prefetch(
+                "method__recorded_parameters",
+                queryset=ParameterToBeRecorded.objects.order_by("id"),
+                to_attr="prefetched_recorded_parameters",
+            )
+        )
+        .order_by("process_id", "step_number")
+    )
+
+    methods: Dict[int, CompiledMethod] = {}
+    by_process: Dict[int, list] = {pk: [] for pk in versions}
+    for step in steps:
+        method = methods.get(step.method_id)
+        if method is None:
+            method = methods[step.method_id] = _compile_method(step.method)
+        by_process[step.process_id].append(_compile_step(step, method))
+
+    compiled = {}
+    for pk, process_steps in by_process.items():
+        compiled[pk] = CompiledProcess(
+            id=pk,
+            updated_at=versions[pk],
+            steps=tuple(process_steps),
+            has_rectified_step=any(s.is_rectified for s in process_steps),
+            has_masking_step=any(s.is_masking for s in process_steps),
+            step_count=len(process_steps),
+            touch_minutes=sum(s.touch_minutes for s in process_steps),
+            run_minutes=sum(s.run_minutes for s in process_steps),
+        )
+    return compiled
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+class CompiledProcessCache:
+    """Thread-safe LRU of CompiledProcess keyed by process id."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, CompiledProcess]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(
+        self, versions: Dict[int, object]
+    ) -> Dict[int, CompiledProcess]:
+        """
+        Compiled processes for ``{id: updated_at}``, compiling stale or
+        missing ones.
+        """
+        found: Dict[int, CompiledProcess] = {}
+        with self._lock:
+            for pk, version in versions.items():
+                entry = self._entries.get(pk)
+                if entry is not None and entry.updated_at == version:
+                    self._entries.move_to_end(pk)
+                    found[pk] = entry
+            self.hits += len(found)
+            self.misses += len(versions) - len(found)
+
+        missing = {pk: v for pk, v in versions.items() if pk not in found}
+        if missing:
+            fresh = _compile(missing)
+            with self._lock:
+                for pk, entry in fresh.items():
+                    self._entries[pk] = entry
+                    self._entries.move_to_end(pk)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+            found.update(fresh)
+        return found
+
+    def invalidate(self, process_ids: Iterable[int]) -> None:
+        with self._lock:
+            for pk in process_ids:
+                self._entries.pop(pk, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+cache = CompiledProcessCache(
+    getattr(settings, "COMPILED_PROCESS_CACHE_SIZE", 256)
+)
+
+
+def compiled_processes(
+    process_ids: Iterable[int],
+) -> Dict[int, CompiledProcess]:
+    """Compiled processes by id; one query when every entry is current."""
+    ids = {pk for pk in process_ids if pk is not None}
+    if not ids:
+        return {}
+    versions = dict(
+        Process.objects.filter(pk__in=ids).values_list("id", "updated_at")
+    )
+    return cache.get_many(versions)
+
+
+def compiled_process(
+    process_id: Optional[int], updated_at=None
+) -> Optional[CompiledProcess]:
+    """
+    The compiled process, or None if it does not exist.
+
+    Pass ``updated_at`` when the caller already loaded the Process row to
+    skip the version query.
+    """
+    if process_id is None:
+        return None
+    if updated_at is None:
+        return compiled_processes([process_id]).get(process_id)
+    return cache.get_many({process_id: updated_at}).get(process_id)
+
+
+def compiled_process_for(
+    standard_id, classification_id
+) -> Optional[CompiledProcess]:
+    """
+    The compiled process for a standard/classification pair (as a
+    WorkOrder resolves it).
+    """
+    row = (
+        Process.objects
+        .filter(standard_id=standard_id, classification_id=classification_id)
+        .values_list("id", "updated_at")
+        .first()
+    )
+    if row is None:
+        return None
+    return compiled_process(row[0], updated_at=row[1])
+
+
+def compiled_steps(process_id: Optional[int]) -> Tuple[CompiledStep, ...]:
+    compiled = compiled_process(process_id)
+    return compiled.steps if compiled else ()
@@ -0,0 +1,181 @@
+# process/export.py
+"""
+Bulk flowchart export: the flowchart SVG of every matching process in
+one ZIP.
+
+The ZIP is built by the job queue (``process_flowchart_zip`` in
+process/renderers.py) and cached under a digest of its flowcharts' cache
+keys, so the web process only computes that key.  The worker writes it
+to the cache file chunk by chunk as ``stream_flowchart_zip`` yields, and
+downloads are served from that file, so the archive is never held in
+memory.  In the render worker,
+flowchart content is gathered batch by batch (steps come from the
+compiled process cache, warmed once per batch).  SVGs already in the
+``flowcharts`` disk cache are read from it; the rest are rendered across
+the shared spawn pool in app/render_pool.py, which can run the
+Django-free renderers in process/flowchart_svg.py, and stored back.
+
+Usage::
+
+    from process.export import (
+        export_processes, flowchart_zip_key, stream_flowchart_zip,
+    )
+
+    processes = list(
+        export_processes(standard_id=3, process_type="electroplate")
+    )
+    key = flowchart_zip_key(processes)
+    caches["jobs"].set_chunks(key, stream_flowchart_zip(processes))
+"""
+import functools
+import zipfile
+from itertools import islice
+
+from django.utils.text import slugify
+
+from app.disk_cache import caches, digest
+from app.render_pool import pool_map
+
+from . import compiled
+from .flowchart_svg import render_flowchart
+from .models import Process
+from .utils import flowchart_cache_key, flowchart_content, flowchart_filename
+
+EXPORT_BATCH_SIZE = 32
+
+
+def export_processes(standard_id=None, process_type=None, is_template=None):
+    """
+    Processes to export, optionally narrowed by standard, standard process
+    type and template flag.
+    """
+    processes = (
+        Process.objects
+        .select_related("standard", "classification", "standard_process")
+        .order_by("standard__name", "classification__class_name", "pk")
+    )
+    if standard_id is not None:
+        processes = processes.filter(standard_id=standard_id)
+    if process_type:
+        processes = processes.filter(
+            standard_process__process_type=process_type
+        )
+    if is_template is not None:
+        processes = processes.filter(is_template=is_template)
+    return processes
+
+
+def export_filename(standard=None, process_type=None, is_template=None):
+    """
+    Download name for an export, e.g.
+    ``flowcharts-ams-2404-electroplate.zip``.
+    """
+    parts = ["flowcharts"]
+    if standard is not None:
+        parts.append(standard.name)
+    if process_type:
+        parts.append(process_type)
+    if is_template:
+        parts.append("templates")
+    if len(parts) == 1:
+        parts.append("all")
+    return slugify("-".join(parts)) + ".zip"
+
+
+def render_flowchart_svgs(processes, renderer=None, max_workers=None):
+    """
+    SVG bytes for each process, in order.
+
+    Cache hits are read from disk; misses are rendered in the pool (see
+    ``app.render_pool.pool_map``) and cached.  Each process gets the
+    renderer for its graph unless ``renderer`` is given.
+    """
+    processes = list(processes)
+    compiled.cache.get_many({p.pk: p.updated_at for p in processes})
+
+    cache = caches["flowcharts"]
+    keys = [flowchart_cache_key(p) for p in processes]
+    svgs = [cache.get(key) for key in keys]
+    missing = [i for i, svg in enumerate(svgs) if svg is None]
+
+    render = functools.partial(render_flowchart, renderer)
+    contents = [flowchart_content(processes[i]) for i in missing]
+    rendered = pool_map(render, contents, max_workers=max_workers)
+
+    for i, svg in zip(missing, rendered):
+        cache.set(keys[i], svg)
+        svgs[i] = svg
+    return svgs
+
+
+class _ZipSink:
+    """
+    Write-only file for zipfile; ``drain()`` hands back what was written
+    since the last call.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _unique(name, seen):
+    stem, dot, suffix = name.rpartition(".")
+    candidate, n = name, 1
+    while candidate in seen:
+        n += 1
+        candidate = f"{stem}-{n}{dot}{suffix}"
+    seen.add(candidate)
+    return candidate
+
+
+def stream_flowchart_zip(
+    processes, renderer=None, max_workers=None, batch_size=EXPORT_BATCH_SIZE
+):
+    """
+    Yield a ZIP of the processes' flowchart SVGs chunk by chunk.
+
+    Entries are named like the single flowchart download
+    (``flowchart_filename``).
+    """
+    sink = _ZipSink()
+    seen = set()
+    rows = (
+        processes.iterator(chunk_size=batch_size)
+        if hasattr(processes, "iterator")
+        else iter(processes)
+    )
+    compression = zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(sink, "w", compression=compression) as archive:
+        while batch := list(islice(rows, batch_size)):
+            svgs = render_flowchart_svgs(
+                batch, renderer=renderer, max_workers=max_workers
+            )
+            for process, svg in zip(batch, svgs):
+                archive.writestr(
+                    _unique(flowchart_filename(process), seen), svg
+                )
+                yield sink.drain()
+    yield sink.drain()
+
+
+def flowchart_zip_key(processes):
+    """
+    Cache key for the ZIP of ``processes``: a digest of their flowchart
+    cache keys, in order, so it changes with any flowchart in it.
+    """
+    processes = list(processes)
+    compiled.cache.get_many({p.pk: p.updated_at for p in processes})
+    keys = [flowchart_cache_key(p) for p in processes]
+    return f"flowchart-zip-{digest(keys)}"
@@ -0,0 +1,374 @@
+# process/flowchart_svg.py
+"""
+Flowchart renderers: turn flowchart content (see
+``process.utils.flowchart_content``) into SVG.
+
+Nothing here imports Django or touches the database, so the
+renderers can run in spawned pool workers (process/export.py) as well
+as in the web process.
+"""
+import base64
+import functools
+import os
+import re
+from html import escape
+
+from graphviz import Digraph
+
+
+@functools.lru_cache(maxsize=4)
+def _logo_data_uri(image_path: str, mtime_ns: int, size: int) -> str:
+    # Keyed on mtime/size so replacing the logo file is picked up
+    with open(image_path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode("ascii")
+    return "data:image/png;base64," + encoded
+
+
+def logo_data_uri(image_path: str):
+    """
+    The logo as a data: URI, read and encoded once per worker; None if
+    missing.
+    """
+    try:
+        st = os.stat(image_path)
+    except OSError:
+        return None
+    return _logo_data_uri(image_path, st.st_mtime_ns, st.st_size)
+
+
+def _embed_logo_in_svg(svg: str, image_path: str) -> str:
+    """
+    Replace the xlink:href reference to the logo file in the SVG
+    with a data:image/png;base64,... URI so the logo is embedded.
+
+    This assumes the logo appears as an <image xlink:href="...basename...">.
+    """
+    data_uri = logo_data_uri(image_path)
+    if data_uri is None:
+        return svg
+
+    basename = os.path.basename(image_path)
+
+    # Replace any xlink:href="...basename..." with data URI
+    pattern = rf'xlink:href="[^"]*{re.escape(basename)}[^"]*"'
+    replacement = f'xlink:href="{data_uri}"'
+
+    svg_embedded = re.sub(pattern, lambda _match: replacement, svg)
+    return svg_embedded
+
+
+# ---------------------------------------------------------------------
+# Flowchart nodes
+# ---------------------------------------------------------------------
+
+class FlowchartNode:
+    """One box of the flowchart: its id, text lines, tooltip and fill."""
+
+    __slots__ = ("name", "lines", "tooltip", "fillcolor")
+
+    def __init__(self, name, lines, tooltip="", fillcolor="lightgrey"):
+        self.name = name
+        self.lines = lines
+        self.tooltip = tooltip
+        self.fillcolor = fillcolor
+
+
+def _time_label(prefix, min_val, max_val):
+    if min_val is None and max_val is None:
+        return None
+    if min_val is not None and max_val is not None:
+        return f"{prefix}: {min_val}-{max_val} min"
+    return f"{prefix}: {min_val or max_val} min"
+
+
+def chain_edges(nodes):
+    """``(tail, head)`` edges from the header down a chain of nodes."""
+    names = ["header", *(node.name for node in nodes)]
+    return list(zip(names, names[1:]))
+
+
+def is_linear(content: dict) -> bool:
+    """Whether the content's edges are exactly the header-to-last chain."""
+    return list(content["edges"]) == chain_edges(content["steps"])
+
+
+def step_node(step_id, step_number, method) -> FlowchartNode:
+    """
+    The box for one process step (``method`` may be a Method or
+    CompiledMethod).
+    """
+    method_title = method.title if method else "No Method"
+    method_type = getattr(method, "method_type", "") or ""
+    chemical = getattr(method, "chemical", "") or ""
+
+    lines = [f"Step {step_number}", method_title]
+    if method_type:
+        lines.append(f"Type: {method_type}")
+    if chemical:
+        lines.append(f"Chem: {chemical}")
+    if method:
+        for label in (
+            _time_label("Touch", method.touch_time_min, method.touch_time_max),
+            _time_label("Run", method.run_time_min, method.run_time_max),
+        ):
+            if label:
+                lines.append(label)
+
+    is_rectified = getattr(method, "is_rectified", False)
+    return FlowchartNode(
+        f"step_{step_id}",
+        lines,
+        tooltip=method_title,
+        fillcolor="#ffd9d9" if is_rectified else "lightgrey",
+    )
+
+
+# ---------------------------------------------------------------------
+# Graphviz renderer
+# ---------------------------------------------------------------------
+
+def render_flowchart_graphviz(content: dict) -> str:
+    """Lay the flowchart out with the Graphviz ``dot`` binary."""
+    dot = Digraph(
+        name=content["name"],
+        comment=f"Flowchart for Process {content['process_id']}",
+        format="svg",
+    )
+    logo_abs_path = content["logo_path"]
+
+    if logo_abs_path:
+        dot.node(
+            "logo",
+            image=os.path.basename(logo_abs_path),
+            label="",
+            shape="none",
+            fixedsize="true",
+            width="1.0",
+        )
+
+    dot.node(
+        "header",
+        label="\n".join(content["header_lines"]),
+        shape="none",
+        fontcolor=content["header_color"],
+    )
+
+    if logo_abs_path:
+        dot.body.append("{ rank=min; logo; header; }")
+        dot.edge("logo", "header", style="invis")
+    else:
+        dot.body.append("{ rank=min; header; }")
+
+    # Graph attributes
+    dot.attr(
+        rankdir="TB",
+        nodesep="0.5",
+        ranksep="0.75",
+    )
+    dot.attr(
+        "node", shape="box", style="rounded,filled", fillcolor="lightgrey"
+    )
+
+    if logo_abs_path:
+        dot.attr(imagepath=os.path.dirname(logo_abs_path))
+
+    for node in content["steps"]:
+        dot.node(
+            node.name,
+            label="\n".join(node.lines),
+            tooltip=node.tooltip,
+            fillcolor=node.fillcolor,
+        )
+
+    for tail, head in content["edges"]:
+        dot.edge(tail, head)
+
+    svg = dot.pipe(format="svg").decode("utf-8")
+
+    if logo_abs_path:
+        svg = _embed_logo_in_svg(svg, logo_abs_path)
+
+    return svg
+
+
+# ---------------------------------------------------------------------
+# Native renderer
+# ---------------------------------------------------------------------
+
+# Sizes in points, the Graphviz defaults for the attributes set above
+# (Times 14pt, node margin 0.11in x 0.055in, nodesep 0.5in, ranksep
+# 0.75in, minimum box 0.75in x 0.5in, logo 1.0in x 0.5in).
+FONT_SIZE = 14.0
+LINE_HEIGHT = FONT_SIZE * 1.2
+MARGIN_X = 8.0
+MARGIN_Y = 4.0
+MIN_WIDTH = 54.0
+MIN_HEIGHT = 36.0
+NODESEP = 36.0
+RANKSEP = 54.0
+LOGO_WIDTH = 72.0
+LOGO_HEIGHT = 36.0
+PAD = 4.0
+ARROW_LENGTH = 10.0
+
+# Approximate Times-Roman advance widths as a fraction of the font size
+_NARROW = frozenset("iljtfrI.,:;'!|()[] -")
+_WIDE = frozenset("MWmw@%")
+
+
+@functools.lru_cache(maxsize=1024)
+def _text_width(text: str) -> float:
+    width = 0.0
+    for ch in text:
+        if ch in _NARROW:
+            width += 0.3
+        elif ch in _WIDE:
+            width += 0.85
+        elif ch.isupper():
+            width += 0.68
+        else:
+            width += 0.5
+    return width * FONT_SIZE
+
+
+def _box_size(lines):
+    text_width = max((_text_width(line) for line in lines), default=0.0)
+    width = text_width + 2 * MARGIN_X
+    height = len(lines) * LINE_HEIGHT + 2 * MARGIN_Y
+    return max(width, MIN_WIDTH), max(height, MIN_HEIGHT)
+
+
+def _svg_text(lines, cx, cy, fill=None):
+    first_baseline = cy - len(lines) * LINE_HEIGHT / 2 + FONT_SIZE
+    fill_attr = f' fill="{escape(fill)}"' if fill else ""
+    return [
+        f'<text text-anchor="middle" x="{cx:.2f}" '
+        f'y="{first_baseline + i * LINE_HEIGHT:.2f}" '
+        f'font-family="Times,serif" font-size="{FONT_SIZE:.2f}"{fill_attr}>'
+        f'{escape(line)}</text>'
+        for i, line in enumerate(lines)
+    ]
+
+
+def render_flowchart_native(content: dict) -> str:
+    """
+    Lay the flowchart out in Python.
+
+    A process is a straight chain (header, then each step below the
+    last), so the layout is a single column: the header, with the logo
+    to its left, on the top rank and one step box per rank under it,
+    all centred on the header, joined by arrows.  Output is a
+    self-contained SVG with the same text, colours and logo as the
+    Graphviz renderer, without starting a ``dot`` process.  Branched
+    content is refused (see ``pick_renderer``).
+    """
+    if not is_linear(content):
+        raise ValueError(
+            "The native renderer only lays out a straight chain of steps."
+        )
+    header_w, header_h = _box_size(content["header_lines"])
+    sizes = [_box_size(node.lines) for node in content["steps"]]
+    logo = content["logo_path"]
+    logo_uri = logo_data_uri(logo) if logo else None
+
+    # x relative to the chain's centre line, shifted into place below
+    left = -header_w / 2
+    right = header_w / 2
+    if logo_uri:
+        left -= NODESEP + LOGO_WIDTH
+    for w, _h in sizes:
+        left = min(left, -w / 2)
+        right = max(right, w / 2)
+    cx = PAD - left
+    width = right - left + 2 * PAD
+
+    top_h = max(header_h, LOGO_HEIGHT if logo_uri else 0.0)
+    header_cy = PAD + top_h / 2
+    centres = []
+    y = PAD + top_h
+    for _w, h in sizes:
+        y += RANKSEP
+        centres.append(y + h / 2)
+        y += h
+    height = y + PAD
+
+    out = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+        f'<svg width="{width:.0f}pt" height="{height:.0f}pt" '
+        f'viewBox="0.00 0.00 {width:.2f} {height:.2f}" '
+        'xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink">',
+        f'<!-- Flowchart for Process {content["process_id"]} -->',
+        '<g id="graph0" class="graph">',
+        f'<title>{escape(content["name"])}</title>',
+        f'<polygon fill="white" stroke="none" points="0,0 {width:.2f},0 '
+        f'{width:.2f},{height:.2f} 0,{height:.2f}"/>',
+    ]
+
+    if logo_uri:
+        x = cx - header_w / 2 - NODESEP - LOGO_WIDTH
+        out += [
+            '<g id="node_logo" class="node"><title>logo</title>',
+            f'<image xlink:href="{logo_uri}" x="{x:.2f}" '
+            f'y="{header_cy - LOGO_HEIGHT / 2:.2f}" '
+            f'width="{LOGO_WIDTH:.2f}" height="{LOGO_HEIGHT:.2f}" '
+            'preserveAspectRatio="xMidYMid meet"/>',
+            '</g>',
+        ]
+
+    out.append('<g id="node_header" class="node"><title>header</title>')
+    out += _svg_text(
+        content["header_lines"], cx, header_cy, fill=content["header_color"]
+    )
+    out.append('</g>')
+
+    previous, previous_bottom = "header", header_cy + header_h / 2
+    for node, (w, h), cy in zip(content["steps"], sizes, centres):
+        top = cy - h / 2
+        tip = top - ARROW_LENGTH
+        name = escape(node.name)
+        out += [
+            f'<g id="edge_{name}" class="edge">'
+            f'<title>{escape(previous)}&#45;&gt;{name}</title>',
+            f'<path fill="none" stroke="black" '
+            f'd="M{cx:.2f},{previous_bottom:.2f} L{cx:.2f},{tip:.2f}"/>',
+            f'<polygon fill="black" stroke="black" '
+            f'points="{cx - 3.5:.2f},{tip:.2f} '
+            f'{cx:.2f},{top:.2f} {cx + 3.5:.2f},{tip:.2f}"/>',
+            '</g>',
+            # The group's <title> is what browsers show on hover
+            f'<g id="node_{name}" class="node">'
+            f'<title>{escape(node.tooltip)}</title>',
+            f'<rect x="{cx - w / 2:.2f}" y="{top:.2f}" '
+            f'width="{w:.2f}" height="{h:.2f}" rx="4" ry="4" '
+            f'fill="{escape(node.fillcolor)}" stroke="black"/>',
+        ]
+        out += _svg_text(node.lines, cx, cy)
+        out.append('</g>')
+        previous, previous_bottom = node.name, top + h
+
+    out += ['</g>', '</svg>', '']
+    return "\n".join(out)
+
+
+FLOWCHART_RENDERERS = {
+    "native": render_flowchart_native,
+    "graphviz": render_flowchart_graphviz,
+}
+
+
+def pick_renderer(content: dict) -> str:
+    """
+    ``native`` for a straight chain, which it lays out in one column
+    without a ``dot`` process; ``graphviz`` for a branched graph.
+    """
+    return "native" if is_linear(content) else "graphviz"
+
+
+def render_flowchart(renderer, content: dict) -> bytes:
+    """
+    ``content`` rendered by the named renderer (``None``: picked from its
+    shape), as UTF-8 SVG bytes.
+    """
+    render = FLOWCHART_RENDERERS[renderer or pick_renderer(content)]
+    return render(content).encode("utf-8")
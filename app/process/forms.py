@@ -4,7 +4,7 @@ from django.core.exceptions import ValidationError
 from django.forms.models import BaseInlineFormSet
 
 from .models import Process, ProcessStep
-from standard.models import Classification, Standard
+from standard.models import Classification, Standard, StandardProcess
 from methods.models import Method
 
 
@@ -91,3 +91,33 @@ class ProcessStepInlineFormSet(BaseInlineFormSet):
             expected = set(range(1, len(numbers) + 1))
             if set(numbers) != expected:
                 raise ValidationError("Step numbers must be contiguous starting at 1 (no gaps).")
+
+
+class ProcessCloneForm(forms.Form):
+    """
+    Target of Process admin's "Clone" action (see
+    process/sequencing.py:clone_process).
+    """
+    standard = forms.ModelChoiceField(
+        queryset=Standard.objects.order_by('name', 'revision')
+    )
+    classification = forms.ModelChoiceField(
+        queryset=Classification.objects.select_related('standard'),
+        required=False,
+        help_text="Leave empty for an unclassified process.",
+    )
+    standard_process = forms.ModelChoiceField(
+        queryset=StandardProcess.objects.select_related('standard'),
+        required=False,
+        help_text="Default: the target standard's process with the same "
+                  "title or type.",
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        standard = cleaned.get('standard')
+        for name in ('classification', 'standard_process'):
+            value = cleaned.get(name)
+            if standard and value and value.standard_id != standard.pk:
+                self.add_error(name, "Must belong to the selected standard.")
+        return cleaned
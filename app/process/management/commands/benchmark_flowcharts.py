@@ -0,0 +1,108 @@
+# process/management/commands/benchmark_flowcharts.py
+"""
+Compare the native and Graphviz flowchart renderers (see process/utils.py).
+
+    python manage.py benchmark_flowcharts
+    python manage.py benchmark_flowcharts --steps 5 50 200 --repeat 50
+
+Renders synthetic processes of the given lengths (no database access) and
+prints the median time per render for each renderer.
+"""
+import statistics
+import time
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+from graphviz import ExecutableNotFound
+
+from process.flowchart_svg import (
+    chain_edges, render_flowchart_graphviz, render_flowchart_native,
+    step_node,
+)
+from process.utils import logo_path
+
+DEFAULT_STEPS = (5, 25, 50, 100, 200)
+
+
+def synthetic_content(step_count):
+    """Flowchart content for a made-up process of ``step_count`` steps."""
+    steps = []
+    for number in range(1, step_count + 1):
+        method = SimpleNamespace(
+            title=f"Method {number}",
+            method_type=(
+                "processing_tank" if number % 3 == 0 else "manual_method"
+            ),
+            chemical="Cadmium Cyanide" if number % 3 == 0 else "",
+            touch_time_min=5, touch_time_max=10,
+            run_time_min=None if number % 2 else 20, run_time_max=30,
+            is_rectified=number % 3 == 0,
+        )
+        steps.append(step_node(number, number, method))
+    return {
+        "name": "process_0",
+        "process_id": 0,
+        "header_lines": [
+            "AMS-2404", "Classification: Class 1", "Electroless Nickel",
+            "Rev: A",
+            f"Est. Avg. Touch Time: {step_count * 8} min  |  "
+            f"Est. Avg. Run Time: {step_count * 25} min",
+            "Generated 2026-01-01 — Process #0",
+        ],
+        "header_color": "#007bff",
+        "logo_path": logo_path(),
+        "steps": steps,
+        "edges": chain_edges(steps),
+    }
+
+
+def _median_ms(render, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render(content)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the native and Graphviz process flowchart renderers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--steps", type=int, nargs="+",
+                            default=list(DEFAULT_STEPS),
+                            help="Process lengths to render.")
+        parser.add_argument("--repeat", type=int, default=20,
+                            help="Renders per length and renderer.")
+
+    def handle(self, *args, **options):
+        repeat = max(options["repeat"], 1)
+        graphviz_available = True
+        self.stdout.write(
+            f"{'steps':>6}  {'native ms':>10}  {'graphviz ms':>12}  "
+            f"{'speed-up':>9}"
+        )
+        for step_count in options["steps"]:
+            content = synthetic_content(step_count)
+            native = _median_ms(render_flowchart_native, content, repeat)
+            graphviz = None
+            if graphviz_available:
+                try:
+                    graphviz = _median_ms(
+                        render_flowchart_graphviz, content, repeat
+                    )
+                except ExecutableNotFound:
+                    graphviz_available = False
+            if graphviz is None:
+                timed, speed_up = f"{'n/a':>12}", f"{'':>9}"
+            else:
+                timed = f"{graphviz:>12.2f}"
+                speed_up = f"{graphviz / native:>8.1f}x"
+            self.stdout.write(
+                f"{step_count:>6}  {native:>10.2f}  {timed}  {speed_up}"
+            )
+        if not graphviz_available:
+            self.stderr.write(
+                "Graphviz `dot` binary not found; only the native renderer "
+                "was timed."
+            )
@@ -0,0 +1,73 @@
+# Generated by Django 5.2 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+def backfill_step_summaries(apps, schema_editor):
+    Process = apps.get_model('process', 'Process')
+    ProcessStep = apps.get_model('process', 'ProcessStep')
+
+    summaries = {}
+    for step in ProcessStep.objects.select_related('method').iterator():
+        method = step.method
+        summary = summaries.setdefault(step.process_id, {
+            'has_rectified_step': False, 'has_masking_step': False,
+            'step_count': 0, 'touch_minutes': 0, 'run_minutes': 0,
+        })
+        summary['step_count'] += 1
+        summary['touch_minutes'] += method.touch_time_max or 0
+        summary['run_minutes'] += method.run_time_max or 0
+        if method.method_type == 'processing_tank' and method.is_rectified:
+            summary['has_rectified_step'] = True
+        if method.is_masking_operation:
+            summary['has_masking_step'] = True
+
+    for pk, summary in summaries.items():
+        Process.objects.filter(pk=pk).update(**summary)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process', '0011_alter_process_standard_process'),
+        ('methods', '0034_method_run_time_max_method_run_time_min_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='process',
+            name='has_masking_step',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='process',
+            name='has_rectified_step',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='process',
+            name='run_minutes',
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Sum of the steps' maximum run times.",
+            ),
+        ),
+        migrations.AddField(
+            model_name='process',
+            name='step_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='process',
+            name='touch_minutes',
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Sum of the steps' maximum touch times.",
+            ),
+        ),
+        migrations.RunPython(
+            backfill_step_summaries, migrations.RunPython.noop
+        ),
+    ]
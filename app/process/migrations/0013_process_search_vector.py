@@ -0,0 +1,115 @@
+# Generated by Django 5.2 on 2026-10-18 10:57
+
+import re
+from collections import defaultdict
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+
+
+def _join(*values):
+    return ' '.join(re.findall(r'\w+', ' '.join(str(v) for v in values if v)))
+
+
+SEARCH_INDEX = django.contrib.postgres.indexes.GinIndex(
+    fields=['search_vector'], name='process_search_vector_gin'
+)
+
+
+def create_search_index(apps, schema_editor):
+    # tsvector and GIN are PostgreSQL only (see process/search.py)
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_index(apps.get_model('process', 'Process'), SEARCH_INDEX)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_index(
+        apps.get_model('process', 'Process'), SEARCH_INDEX
+    )
+
+
+def backfill_search_vectors(apps, schema_editor):
+    # Same document as process/search.py:search_documents
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Process = apps.get_model('process', 'Process')
+    ProcessStep = apps.get_model('process', 'ProcessStep')
+    StandardProcess = apps.get_model('standard', 'StandardProcess')
+    labels = dict(
+        StandardProcess._meta.get_field('process_type').choices or []
+    )
+
+    titles = defaultdict(list)
+    steps = (
+        ProcessStep.objects
+        .order_by('process_id', 'step_number')
+        .values_list('process_id', 'method__title')
+    )
+    for process_id, title in steps.iterator():
+        titles[process_id].append(title)
+
+    rows = Process.objects.values(
+        'id', 'description',
+        'standard__name', 'standard__revision',
+        'classification__class_name', 'classification__method',
+        'classification__type',
+        'standard_process__title', 'standard_process__process_type',
+    )
+    for row in rows.iterator():
+        process_type = row['standard_process__process_type']
+        document = {
+            'A': _join(
+                row['standard__name'],
+                row['classification__class_name'],
+                row['standard_process__title'],
+            ),
+            'B': _join(
+                row['standard__revision'], row['classification__method'],
+                row['classification__type'],
+                process_type, labels.get(process_type),
+            ),
+            'C': _join(*titles[row['id']]),
+            'D': _join(row['description']),
+        }
+        vector = None
+        for weight, text in sorted(document.items()):
+            part = SearchVector(Value(text), weight=weight, config='english')
+            vector = part if vector is None else vector + part
+        Process.objects.filter(pk=row['id']).update(search_vector=vector)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process', '0012_process_step_summary'),
+        ('standard', '0023_alter_standardperiodicrequirement_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='process',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='process', index=SEARCH_INDEX,
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(create_search_index, drop_search_index),
+            ],
+        ),
+        migrations.RunPython(
+            backfill_search_vectors, migrations.RunPython.noop
+        ),
+    ]
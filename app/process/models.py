@@ -1,8 +1,11 @@
 # process/models.py
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from methods.models import Method
 from standard.models import Standard, Classification, StandardProcess
 from django.db.models import UniqueConstraint, CheckConstraint, Q
+from django.db.models.functions import Coalesce
 
 
 class Process(models.Model):
@@ -39,6 +42,25 @@ class Process(models.Model):
     )
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Step summary, maintained by touch_processes() in process/signals.py
+    # (computed by step_summaries() below)
+    has_rectified_step = models.BooleanField(default=False, editable=False)
+    has_masking_step = models.BooleanField(default=False, editable=False)
+    step_count = models.PositiveIntegerField(default=0, editable=False)
+    touch_minutes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Sum of the steps' maximum touch times.",
+    )
+    run_minutes = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Sum of the steps' maximum run times.",
+    )
+    # Full-text search document, maintained by process/signals.py (see
+    # process/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     class Meta:
         verbose_name = "Process"
         verbose_name_plural = "Processes"
@@ -55,6 +77,9 @@ class Process(models.Model):
         ]
         indexes = [
             models.Index(fields=['standard', 'classification']),
+            GinIndex(
+                fields=['search_vector'], name='process_search_vector_gin'
+            ),
         ]
 
     def __str__(self):
@@ -100,3 +125,51 @@ class ProcessStep(models.Model):
         process_info = self.process.standard.name if self.process_id and self.process.standard else "Unsaved Process"
         method_info = self.method.title if self.method_id else "No Method"
         return f"Step {self.step_number} for {process_info} - {method_info}"
+
+
+# Denormalised Process fields filled in by step_summaries()
+STEP_SUMMARY_FIELDS = (
+    "has_rectified_step", "has_masking_step", "step_count",
+    "touch_minutes", "run_minutes",
+)
+
+
+def step_summaries(process_ids):
+    """
+    Summary field values for each process, computed in one grouped query.
+
+    Processes without steps are included with the zero/False defaults.
+    """
+    rows = (
+        ProcessStep.objects
+        .filter(process_id__in=process_ids)
+        .values("process_id")
+        .annotate(
+            step_count=models.Count("id"),
+            has_rectified_step=models.Max(models.Case(
+                models.When(
+                    method__method_type="processing_tank",
+                    method__is_rectified=True,
+                    then=1,
+                ),
+                default=0,
+            )),
+            has_masking_step=models.Max(models.Case(
+                models.When(method__is_masking_operation=True, then=1),
+                default=0,
+            )),
+            touch_minutes=Coalesce(models.Sum("method__touch_time_max"), 0),
+            run_minutes=Coalesce(models.Sum("method__run_time_max"), 0),
+        )
+    )
+    empty = dict.fromkeys(STEP_SUMMARY_FIELDS, 0)
+    empty.update(has_rectified_step=False, has_masking_step=False)
+    summaries = {pk: dict(empty) for pk in process_ids}
+    for row in rows:
+        pk = row.pop("process_id")
+        summaries[pk] = {
+            **row,
+            "has_rectified_step": bool(row["has_rectified_step"]),
+            "has_masking_step": bool(row["has_masking_step"]),
+        }
+    return summaries
@@ -0,0 +1,47 @@
+# process/renderers.py
+"""
+Process flowchart SVGs and ZIPs rendered by the job queue (see
+jobs/registry.py).
+"""
+from jobs.registry import object_id, object_ids, register
+
+from .export import (
+    export_processes, flowchart_zip_key, stream_flowchart_zip,
+)
+from .models import Process
+from .utils import (
+    build_process_flowchart_svg, flowchart_cache_key, flowchart_filename,
+)
+
+
+def _process(process_id):
+    return Process.objects.select_related(
+        "standard", "classification", "standard_process"
+    ).get(pk=process_id)
+
+
+@register(
+    "process_flowchart_svg",
+    key=lambda process_id: flowchart_cache_key(_process(process_id)),
+    filename=lambda process_id: flowchart_filename(_process(process_id)),
+    cache="flowcharts",
+    params={"process_id": object_id},
+    content_type="image/svg+xml",
+)
+def process_flowchart_svg(process_id):
+    return build_process_flowchart_svg(_process(process_id)).encode("utf-8")
+
+
+def _exported(process_ids):
+    return export_processes().filter(pk__in=process_ids)
+
+
+@register(
+    "process_flowchart_zip",
+    key=lambda process_ids: flowchart_zip_key(_exported(process_ids)),
+    params={"process_ids": object_ids},
+    content_type="application/zip",
+)
+def process_flowchart_zip(process_ids):
+    # Chunks, written to the cache file as they come (see process/export.py)
+    return stream_flowchart_zip(_exported(process_ids))
@@ -0,0 +1,174 @@
+# process/search.py
+"""
+Full-text process search for the process landing page.
+
+Each Process stores a weighted ``search_vector`` (GIN-indexed, migration
+``process.0013_process_search_vector``) built from:
+
+    A  standard name, classification class, standard process title
+    B  standard revision, classification method/type, process type
+    C  method titles of its steps
+    D  process description
+
+process/signals.py rebuilds it whenever the process, one of its steps,
+a step's method, its standard, classification or standard process
+changes, so a search is a single index scan plus ``ts_rank`` instead of
+a four-way join and scan.  tsvectors are PostgreSQL only: elsewhere
+(SQLite runs) the vector is never written and ``search_processes`` falls
+back to an ``icontains`` match of every word on the same fields.
+
+Usage::
+
+    from process.search import search_processes
+
+    for process in search_processes(Process.objects.all(), "cad plate 2404"):
+        process.rank
+"""
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector,
+)
+from django.db import connections
+from django.db.models import Exists, F, FloatField, OuterRef, Q, Value
+
+from standard.models import StandardProcess
+
+from .models import Process, ProcessStep
+
+SEARCH_CONFIG = "english"
+
+_PROCESS_TYPE_LABELS = dict(StandardProcess.PROCESS_CHOICES)
+_TERM = re.compile(r"\w+")
+
+# Process fields the icontains fallback matches (the indexed document)
+_FALLBACK_FIELDS = (
+    "description", "standard__name", "standard__revision",
+    "classification__class_name", "classification__method",
+    "classification__type", "standard_process__title",
+    "standard_process__process_type",
+)
+
+
+def full_text_available(using="default"):
+    """True when ``using`` is PostgreSQL, which has tsvector."""
+    return connections[using].vendor == "postgresql"
+
+
+def _join(*values):
+    # Words only: the parser reads "AMS-2404" as "ams" and "-2404", which a
+    # search for "2404" would miss, so index the same words search_query uses
+    return " ".join(_TERM.findall(" ".join(str(v) for v in values if v)))
+
+
+def search_documents(process_ids):
+    """
+    ``{process id: {weight: text}}`` for the given processes, in two
+    queries.
+    """
+    rows = Process.objects.filter(pk__in=process_ids).values(
+        "id", "description",
+        "standard__name", "standard__revision",
+        "classification__class_name", "classification__method",
+        "classification__type",
+        "standard_process__title", "standard_process__process_type",
+    )
+    titles = defaultdict(list)
+    steps = (
+        ProcessStep.objects
+        .filter(process_id__in=process_ids)
+        .order_by("process_id", "step_number")
+        .values_list("process_id", "method__title")
+    )
+    for process_id, title in steps:
+        titles[process_id].append(title)
+
+    documents = {}
+    for row in rows:
+        process_type = row["standard_process__process_type"]
+        documents[row["id"]] = {
+            "A": _join(
+                row["standard__name"],
+                row["classification__class_name"],
+                row["standard_process__title"],
+            ),
+            "B": _join(
+                row["standard__revision"], row["classification__method"],
+                row["classification__type"],
+                process_type, _PROCESS_TYPE_LABELS.get(process_type),
+            ),
+            "C": _join(*titles[row["id"]]),
+            "D": _join(row["description"]),
+        }
+    return documents
+
+
+def search_vector(document):
+    """The weighted tsvector expression for one ``search_documents`` entry."""
+    vector = None
+    for weight, text in sorted(document.items()):
+        part = SearchVector(Value(text), weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def refresh_search_vectors(process_ids):
+    """
+    Rebuild ``search_vector`` of the processes (one UPDATE, no signals);
+    nothing off PostgreSQL.
+    """
+    if not full_text_available():
+        return
+    processes = [
+        Process(pk=pk, search_vector=search_vector(document))
+        for pk, document in search_documents(process_ids).items()
+    ]
+    Process.objects.bulk_update(processes, ["search_vector"])
+
+
+def search_query(text):
+    """
+    Prefix tsquery for free text: every word must match the start of a
+    document word, so ``cad 24`` finds "Cadmium" on AMS-2404.  None when
+    the text has no words.
+    """
+    terms = _TERM.findall(text or "")
+    if not terms:
+        return None
+    raw = " & ".join(f"{term}:*" for term in terms)
+    return SearchQuery(raw, search_type="raw", config=SEARCH_CONFIG)
+
+
+def search_processes(processes, text):
+    """
+    ``processes`` narrowed to matches for ``text``, best first.
+
+    Each process carries a ``rank``; ties keep the queryset's existing
+    ordering.  Off PostgreSQL every word must be in one of the fields
+    (case-insensitive) and the rank is 0.
+    """
+    query = search_query(text)
+    if query is None:
+        return processes.none()
+    if not full_text_available(processes.db):
+        return _fallback_search(processes, _TERM.findall(text))
+    ordering = processes.query.order_by
+    return (
+        processes
+        .filter(search_vector=query)
+        .annotate(rank=SearchRank(F("search_vector"), query))
+        .order_by(F("rank").desc(), *ordering)
+    )
+
+
+def _fallback_search(processes, terms):
+    for term in terms:
+        steps = ProcessStep.objects.filter(
+            process_id=OuterRef("pk"), method__title__icontains=term
+        )
+        match = Exists(steps)
+        for field in _FALLBACK_FIELDS:
+            match |= Q(**{f"{field}__icontains": term})
+        processes = processes.filter(match)
+    return processes.annotate(rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,262 @@
+# process/sequencing.py
+"""
+Set-based editing of a process's step sequence.
+
+``(process, step_number)`` is unique and checked row by row, so
+renumbering with ``step_number + 1`` collides half way through and the
+admin has to be walked around it one save at a time.  Every operation
+here instead runs in one transaction, with the process row locked, and
+moves steps in two UPDATEs: first up past ``OFFSET`` (clear of every
+real number and still >= 1 for the check constraint), then down to their
+final numbers.
+
+Bulk UPDATEs and ``bulk_create`` send no signals, so each operation
+calls ``touch_processes`` itself to refresh the step summary, search
+vector, compiled cache and flowcharts.
+
+Usage::
+
+    from process import sequencing
+
+    sequencing.insert_step(process, method, position=3)
+    sequencing.move_step(step, position=1)
+    sequencing.delete_step(step)
+    sequencing.reorder_steps(process, [step_c.pk, step_a.pk, step_b.pk])
+    sequencing.renumber_processes([p1.pk, p2.pk])
+    copy = sequencing.clone_process(
+        process, standard=other, classification=None
+    )
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Process, ProcessStep
+from .signals import touch_processes
+
+OFFSET = 1_000_000
+
+
+def _lock(process_id):
+    """Lock the process row so concurrent edits of one sequence queue up."""
+    locked = (
+        Process.objects.select_for_update()
+        .filter(pk=process_id)
+        .values_list("pk", flat=True)
+    )
+    if not list(locked):
+        raise ValidationError("Process does not exist.")
+
+
+def _steps(process_id):
+    return ProcessStep.objects.filter(process_id=process_id)
+
+
+def _ordered_ids(process_id):
+    steps = _steps(process_id).order_by("step_number", "pk")
+    return list(steps.values_list("pk", flat=True))
+
+
+def _shift(process_id, from_number, delta):
+    """Add ``delta`` to every step numbered ``from_number`` or later."""
+    _steps(process_id).filter(step_number__gte=from_number).update(
+        step_number=F("step_number") + OFFSET
+    )
+    _steps(process_id).filter(step_number__gte=OFFSET).update(
+        step_number=F("step_number") - OFFSET + delta
+    )
+
+
+def _apply_order(process_id, step_ids):
+    """Number ``step_ids`` 1..N in that order."""
+    steps = _steps(process_id)
+    steps.update(step_number=F("step_number") + OFFSET)
+    steps.update(step_number=Case(
+        *[
+            When(pk=pk, then=Value(number))
+            for number, pk in enumerate(step_ids, start=1)
+        ],
+        output_field=IntegerField(),
+    ))
+
+
+def _result(process_id):
+    touch_processes([process_id])
+    steps = _steps(process_id).select_related("method")
+    return list(steps.order_by("step_number"))
+
+
+def _position(position, count):
+    """A 1-based position, clamped to 1..count; None means the end."""
+    if position is None:
+        return count
+    try:
+        position = int(position)
+    except (TypeError, ValueError):
+        raise ValidationError("Position must be a whole number.")
+    if position < 1:
+        raise ValidationError("Position must be 1 or more.")
+    return min(position, count)
+
+
+@transaction.atomic
+def insert_step(process, method, position=None):
+    """
+    Insert a step running ``method`` at ``position`` (default: last),
+    pushing the step there and every later one down by one.  Returns
+    the process's steps in order.
+    """
+    _lock(process.pk)
+    numbers = list(
+        _steps(process.pk).order_by("step_number")
+        .values_list("step_number", flat=True)
+    )
+    index = _position(position, len(numbers) + 1)
+    if index > len(numbers):
+        number = (numbers[-1] + 1) if numbers else 1
+    else:
+        number = numbers[index - 1]
+        _shift(process.pk, number, 1)
+    ProcessStep.objects.bulk_create([
+        ProcessStep(process_id=process.pk, method=method, step_number=number)
+    ])
+    return _result(process.pk)
+
+
+@transaction.atomic
+def delete_step(step):
+    """
+    Delete ``step`` and close the gap behind it.  Returns the remaining
+    steps in order.
+    """
+    _lock(step.process_id)
+    number = (
+        _steps(step.process_id).filter(pk=step.pk)
+        .values_list("step_number", flat=True).first()
+    )
+    if number is None:
+        raise ValidationError("Step does not exist.")
+    _steps(step.process_id).filter(pk=step.pk).delete()
+    _shift(step.process_id, number + 1, -1)
+    return _result(step.process_id)
+
+
+@transaction.atomic
+def move_step(step, position):
+    """
+    Move ``step`` to ``position`` (1-based) and renumber the process 1..N.
+    """
+    _lock(step.process_id)
+    ids = _ordered_ids(step.process_id)
+    if step.pk not in ids:
+        raise ValidationError("Step does not exist.")
+    ids.remove(step.pk)
+    ids.insert(_position(position, len(ids) + 1) - 1, step.pk)
+    _apply_order(step.process_id, ids)
+    return _result(step.process_id)
+
+
+@transaction.atomic
+def reorder_steps(process, step_ids):
+    """
+    Renumber the process's steps 1..N in the order of ``step_ids`` (all
+    of them, once each).
+    """
+    _lock(process.pk)
+    try:
+        step_ids = [int(pk) for pk in step_ids]
+    except (TypeError, ValueError):
+        raise ValidationError("Step ids must be whole numbers.")
+    if sorted(step_ids) != sorted(_ordered_ids(process.pk)):
+        raise ValidationError(
+            "The new order must list every step of the process exactly once."
+        )
+    _apply_order(process.pk, step_ids)
+    return _result(process.pk)
+
+
+@transaction.atomic
+def renumber_steps(process):
+    """Close gaps: renumber the steps 1..N keeping their order."""
+    _lock(process.pk)
+    _apply_order(process.pk, _ordered_ids(process.pk))
+    return _result(process.pk)
+
+
+@transaction.atomic
+def renumber_processes(process_ids):
+    """
+    ``renumber_steps`` for many processes in one transaction, with one
+    ``touch_processes`` for all of them.  Returns how many were
+    renumbered.
+    """
+    # Lock in pk order so two overlapping batches cannot deadlock
+    locked = list(
+        Process.objects.select_for_update()
+        .filter(pk__in=process_ids).order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    for process_id in locked:
+        _apply_order(process_id, _ordered_ids(process_id))
+    touch_processes(locked)
+    return len(locked)
+
+
+def _target_standard_process(source, standard):
+    if standard.pk == source.standard_id:
+        return source.standard_process
+    candidates = standard.standard_processes.all()
+    match = (
+        candidates.filter(title=source.standard_process.title).first()
+        or candidates.filter(
+            process_type=source.standard_process.process_type
+        ).first()
+    )
+    if match is None:
+        raise ValidationError(
+            f"{standard} has no standard process matching "
+            f"“{source.standard_process.title}”; pick one."
+        )
+    return match
+
+
+@transaction.atomic
+def clone_process(source, standard, classification=None,
+                  standard_process=None, description=None):
+    """
+    Copy ``source`` and all its steps onto ``standard``/``classification``.
+
+    ``standard_process`` defaults to the source's (same standard) or the
+    target standard's one with the same title, then the same process
+    type.  Steps are written with one ``bulk_create``.
+    """
+    if (classification is not None
+            and classification.standard_id != standard.pk):
+        raise ValidationError(
+            "The classification must belong to the target standard."
+        )
+    if standard_process is None:
+        standard_process = _target_standard_process(source, standard)
+    if description is None:
+        description = source.description
+    process = Process(
+        standard=standard,
+        classification=classification,
+        standard_process=standard_process,
+        description=description,
+        is_template=source.is_template,
+    )
+    process.validate_constraints()
+    process.save()
+
+    source_steps = (
+        _steps(source.pk).order_by("step_number")
+        .values_list("method_id", "step_number")
+    )
+    ProcessStep.objects.bulk_create([
+        ProcessStep(process=process, method_id=method_id, step_number=number)
+        for method_id, number in source_steps
+    ])
+    touch_processes([process.pk])
+    process.refresh_from_db()
+    return process
@@ -0,0 +1,220 @@
+# process/signals.py
+"""
+Keep process/compiled.py coherent across workers.
+
+Any change to a step, method or recorded parameter bumps the owning
+processes' ``updated_at`` (the compiled cache's version), so other
+gunicorn workers recompile on their next lookup.  The local entry is
+dropped straight away.  The same write refreshes the denormalised step
+summary on Process (``has_rectified_step``, ``step_count``, ...), which
+``WorkOrder.clean()`` reads.
+
+Cached flowchart SVGs are keyed by content, so a stale one is never
+served; the receivers below also delete the affected processes' entries
+straight away (including on Standard/Classification edits, which show in
+the flowchart header) instead of waiting for LRU eviction.
+
+The same receivers keep ``Process.search_vector`` (process/search.py)
+in step with everything it indexes, on PostgreSQL (elsewhere search
+falls back to ``icontains`` and no vector is written).
+
+``processes_changed`` is sent (with ``process_ids``) whenever a
+process's steps or their methods may have changed, so other apps can
+follow without hooking every model here; scheduler/signals.py rebuilds
+the affected orders' timelines from it.  Its ``timing`` argument is
+False when the change cannot move a scheduled step (step order, a
+method's ``SCHEDULE_METHOD_FIELDS``), e.g. a method's description.
+"""
+from django.conf import settings
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from app.disk_cache import caches
+from methods.models import Method, ParameterToBeRecorded
+from standard.models import Classification, Standard, StandardProcess
+
+from . import compiled
+from .models import (
+    STEP_SUMMARY_FIELDS, Process, ProcessStep, step_summaries,
+)
+from .search import (
+    full_text_available, refresh_search_vectors, search_documents,
+    search_vector,
+)
+
+processes_changed = Signal()
+
+# Method fields a scheduled step is built from (scheduler/timeline.py)
+SCHEDULE_METHOD_FIELDS = (
+    "title", "tank_name", "touch_time_max", "run_time_max",
+)
+
+
+def touch_processes(process_ids, search=True, timing=True):
+    """
+    Refresh the step summary (and, with ``search`` on PostgreSQL, the
+    search vector) and bump ``updated_at`` on the given processes in one
+    UPDATE, and drop their compiled entries.  ``timing`` is passed on to
+    ``processes_changed``.
+    """
+    process_ids = [pk for pk in set(process_ids) if pk is not None]
+    if not process_ids:
+        return
+    now = timezone.now()
+    fields = ["updated_at", *STEP_SUMMARY_FIELDS]
+    processes = {
+        pk: Process(pk=pk, updated_at=now, **summary)
+        for pk, summary in step_summaries(process_ids).items()
+    }
+    if search and full_text_available():
+        fields.append("search_vector")
+        documents = search_documents(process_ids)
+        for pk in list(processes):
+            if pk not in documents:
+                del processes[pk]  # deleted
+            else:
+                processes[pk].search_vector = search_vector(documents[pk])
+    Process.objects.bulk_update(processes.values(), fields)
+    compiled.cache.invalidate(process_ids)
+    drop_flowcharts(process_ids)
+    processes_changed.send(
+        sender=Process, process_ids=process_ids, timing=timing
+    )
+
+
+def _indexed(kwargs, fields):
+    """
+    Whether a save/delete may change what search_documents() reads:
+    ``update_fields`` (post_save only) leaving ``fields`` alone means no.
+    """
+    update_fields = kwargs.get("update_fields")
+    return update_fields is None or not fields.isdisjoint(update_fields)
+
+
+def drop_flowcharts(process_ids):
+    """Delete the cached flowchart SVGs of the given processes."""
+    if "flowcharts" not in settings.RENDER_CACHES:
+        return
+    cache = caches["flowcharts"]
+    for pk in process_ids:
+        cache.delete_prefix(f"flowchart-{pk}-")
+
+
+def header_changed(process_ids):
+    """
+    A standard/classification/standard process changed: re-index and drop
+    flowcharts.
+    """
+    process_ids = list(process_ids)
+    refresh_search_vectors(process_ids)
+    drop_flowcharts(process_ids)
+
+
+def _processes_using_method(method_id):
+    return (
+        ProcessStep.objects.filter(method_id=method_id)
+        .values_list("process_id", flat=True)
+        .distinct()
+    )
+
+
+def _processes_with(**filters):
+    return Process.objects.filter(**filters).values_list("id", flat=True)
+
+
+@receiver(post_save, sender=Process)
+@receiver(post_delete, sender=Process)
+def process_changed(sender, instance, **kwargs):
+    # auto_now already moved updated_at on save
+    compiled.cache.invalidate([instance.pk])
+    drop_flowcharts([instance.pk])
+    if kwargs["signal"] is post_save:
+        refresh_search_vectors([instance.pk])
+        # The timeline only reads the steps, which send their own
+        processes_changed.send(
+            sender=Process, process_ids=[instance.pk], timing=False
+        )
+
+
+@receiver(post_save, sender=ProcessStep)
+@receiver(post_delete, sender=ProcessStep)
+def process_step_changed(sender, instance, **kwargs):
+    # The indexed fields are also the ones the schedule reads
+    changed = _indexed(kwargs, {"process", "method", "step_number"})
+    touch_processes([instance.process_id], search=changed, timing=changed)
+
+
+def _schedule_values(method):
+    return tuple(getattr(method, name) for name in SCHEDULE_METHOD_FIELDS)
+
+
+@receiver(pre_save, sender=Method)
+def method_saving(sender, instance, **kwargs):
+    # Remember the scheduled fields so post_save can tell whether they moved
+    if instance.pk is not None and kwargs.get("update_fields") is None:
+        instance._schedule_before = (
+            Method.objects.filter(pk=instance.pk)
+            .values_list(*SCHEDULE_METHOD_FIELDS).first()
+        )
+
+
+def _schedule_changed(instance, kwargs):
+    """Whether a Method save/delete may move the steps scheduled with it."""
+    if kwargs["signal"] is post_delete or kwargs.get("created"):
+        return True
+    if kwargs.get("update_fields") is not None:
+        return _indexed(kwargs, set(SCHEDULE_METHOD_FIELDS))
+    before = instance.__dict__.pop("_schedule_before", None)
+    return before != _schedule_values(instance)
+
+
+@receiver(post_save, sender=Method)
+@receiver(post_delete, sender=Method)
+def method_changed(sender, instance, **kwargs):
+    touch_processes(
+        _processes_using_method(instance.pk),
+        search=_indexed(kwargs, {"title"}),
+        timing=_schedule_changed(instance, kwargs),
+    )
+
+
+@receiver(post_save, sender=ParameterToBeRecorded)
+@receiver(post_delete, sender=ParameterToBeRecorded)
+def recorded_parameter_changed(sender, instance, **kwargs):
+    # Recorded parameters are not indexed
+    touch_processes(
+        _processes_using_method(instance.method_id),
+        search=False, timing=False,
+    )
+
+
+@receiver(post_save, sender=Standard)
+def standard_changed(sender, instance, **kwargs):
+    header_changed(_processes_with(standard_id=instance.pk))
+
+
+@receiver(post_save, sender=Classification)
+def classification_changed(sender, instance, **kwargs):
+    header_changed(_processes_with(classification_id=instance.pk))
+
+
+@receiver(pre_delete, sender=Classification)
+def classification_deleting(sender, instance, **kwargs):
+    # SET_NULL has cleared classification_id by post_delete, so remember
+    # the processes now
+    instance._process_ids = list(
+        _processes_with(classification_id=instance.pk)
+    )
+
+
+@receiver(post_delete, sender=Classification)
+def classification_deleted(sender, instance, **kwargs):
+    header_changed(getattr(instance, "_process_ids", ()))
+
+
+@receiver(post_save, sender=StandardProcess)
+def standard_process_changed(sender, instance, **kwargs):
+    header_changed(_processes_with(standard_process_id=instance.pk))
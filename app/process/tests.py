@@ -1,15 +1,41 @@
+import io
 import json
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from unittest.mock import patch
 
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.db.models import ProtectedError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from methods.models import Method
+from app.render_pool import worker_process
+from jobs.models import RenderJob
+from jobs.queue import claim_next, run_job
+from methods.models import Method, ParameterToBeRecorded
 from standard.models import Classification, Standard, StandardProcess
 
+from .compiled import cache as compiled_cache
+from . import sequencing
+from .compiled import compiled_process
+from .export import export_processes, render_flowchart_svgs
+from .search import search_processes
 from .models import Process, ProcessStep
+from .flowchart_svg import (
+    FlowchartNode, _logo_data_uri, logo_data_uri, pick_renderer,
+    render_flowchart_native,
+)
+from .utils import (
+    build_process_flowchart_svg, flowchart_cache_key, flowchart_content,
+    flowchart_filename,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -142,6 +168,31 @@ class _AuthBase(TestCase):
         cls.sp = make_standard_process(cls.standard)
         cls.process = make_process(cls.standard, cls.sp)
 
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        override = override_settings(
+            RENDER_CACHES={
+                'flowcharts': {
+                    'DIR': Path(self._tmp.name) / 'flowcharts',
+                    'MAX_BYTES': 1024 * 1024,
+                    'SUFFIX': '.svg',
+                },
+                'travelers': {
+                    'DIR': Path(self._tmp.name) / 'travelers',
+                    'MAX_BYTES': 1024 * 1024,
+                    'SUFFIX': '.pdf',
+                },
+                'jobs': {
+                    'DIR': Path(self._tmp.name) / 'jobs',
+                    'MAX_BYTES': 1024 * 1024,
+                },
+            },
+            RENDER_JOBS_EAGER=True,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
     def _login(self):
         self.client.force_login(self.user)
 
@@ -182,9 +233,8 @@ class TestProcessLandingView(_AuthBase):
 
     def test_search_by_description(self):
         self._login()
-        Process.objects.filter(pk=self.process.pk).update(
-            description="Special anodize run"
-        )
+        self.process.description = "Special anodize run"
+        self.process.save()
         resp = self.client.get(
             reverse("process_landing"), {"q": "anodize"}
         )
@@ -192,6 +242,302 @@ class TestProcessLandingView(_AuthBase):
         self.assertIn(self.process.pk, pks)
 
 
+class TestProcessSearch(TestCase):
+    def setUp(self):
+        self.standard = make_standard(name="AMS-2404", revision="C")
+        self.classification = make_classification(
+            self.standard, class_name="Class 2"
+        )
+        self.plate = make_process(
+            self.standard,
+            make_standard_process(self.standard, "Cadmium Plate"),
+            self.classification,
+        )
+        other = make_standard(name="MIL-A-8625", revision="F")
+        self.anodize = make_process(
+            other, make_standard_process(other, "Sulfuric Anodize")
+        )
+        self.anodize.description = "Seal after Cadmium strip"
+        self.anodize.save()
+
+    def _search(self, text):
+        return list(search_processes(Process.objects.order_by("pk"), text))
+
+    def test_prefix_terms_match(self):
+        self.assertEqual(self._search("cad 24"), [self.plate])
+        self.assertEqual(self._search("AMS-2404 class 2"), [self.plate])
+
+    def test_title_match_outranks_description_match(self):
+        results = self._search("cadmium")
+        self.assertEqual(results, [self.plate, self.anodize])
+        self.assertGreater(results[0].rank, results[1].rank)
+
+    def test_step_method_titles_are_indexed(self):
+        method = make_method("Chromate Conversion")
+        ProcessStep.objects.create(
+            process=self.anodize, method=method, step_number=1
+        )
+        self.assertEqual(self._search("chromate"), [self.anodize])
+
+        method.title = "Dichromate Seal"
+        method.save()
+        self.assertEqual(self._search("chromate"), [])
+        self.assertEqual(self._search("dichromate"), [self.anodize])
+
+    def test_untouched_index_columns_skip_the_rebuild(self):
+        method = make_method("Chromate Conversion")
+        ProcessStep.objects.create(
+            process=self.anodize, method=method, step_number=1
+        )
+        method.title = "Dichromate Seal"
+        with patch("process.signals.search_documents") as documents:
+            method.save(update_fields=["title"])
+        documents.assert_called_once()
+        with patch("process.signals.search_documents") as documents:
+            method.touch_time_max = 9
+            method.save(update_fields=["touch_time_max"])
+        documents.assert_not_called()
+        self.anodize.refresh_from_db()
+        self.assertEqual(self.anodize.touch_minutes, 9)
+
+    def test_header_edits_reindex(self):
+        self.classification.class_name = "Grade Z"
+        self.classification.save()
+        self.assertEqual(self._search("grade"), [self.plate])
+
+        self.classification.delete()
+        self.assertEqual(self._search("grade"), [])
+
+    def test_no_words_matches_nothing(self):
+        self.assertEqual(self._search("--"), [])
+
+    def test_other_backends_skip_the_vector_and_use_icontains(self):
+        method = make_method("Chromate Conversion")
+        off = {"return_value": False}
+        with patch("process.signals.full_text_available", **off), \
+                patch("process.search.full_text_available", **off), \
+                patch("process.signals.search_documents") as documents:
+            ProcessStep.objects.create(
+                process=self.anodize, method=method, step_number=1
+            )
+            documents.assert_not_called()
+            self.assertEqual(self._search("chromate"), [self.anodize])
+            self.assertEqual(
+                self._search("cadmium"), [self.plate, self.anodize]
+            )
+            self.assertEqual(self._search("ams-2404 class"), [self.plate])
+
+
+class TestStepSequencing(TestCase):
+    def setUp(self):
+        self.standard = make_standard()
+        self.sp = make_standard_process(self.standard)
+        self.process = make_process(self.standard, self.sp)
+        self.methods = [make_method(f"M{i}") for i in range(1, 6)]
+        self.steps = [
+            ProcessStep.objects.create(
+                process=self.process, method=m, step_number=i
+            )
+            for i, m in enumerate(self.methods, start=1)
+        ]
+
+    def _titles(self, process=None):
+        return list(
+            ProcessStep.objects.filter(process=process or self.process)
+            .order_by("step_number")
+            .values_list("step_number", "method__title")
+        )
+
+    def test_insert_in_the_middle_shifts_later_steps(self):
+        sequencing.insert_step(self.process, make_method("New"), position=3)
+        self.assertEqual(
+            self._titles(),
+            [(1, "M1"), (2, "M2"), (3, "New"),
+             (4, "M3"), (5, "M4"), (6, "M5")],
+        )
+        self.process.refresh_from_db()
+        self.assertEqual(self.process.step_count, 6)
+
+    def test_insert_appends_by_default(self):
+        sequencing.insert_step(self.process, make_method("Last"))
+        self.assertEqual(self._titles()[-1], (6, "Last"))
+
+    def test_insert_cost_does_not_grow_with_step_count(self):
+        def queries():
+            with CaptureQueriesContext(connection) as ctx:
+                sequencing.insert_step(
+                    self.process, self.methods[0], position=1
+                )
+            return len(ctx.captured_queries)
+
+        few = queries()
+        for i in range(30):
+            sequencing.insert_step(self.process, self.methods[0])
+        self.assertEqual(queries(), few)
+
+    def test_delete_closes_the_gap(self):
+        sequencing.delete_step(self.steps[1])
+        self.assertEqual(
+            self._titles(), [(1, "M1"), (2, "M3"), (3, "M4"), (4, "M5")]
+        )
+
+    def test_move_down_and_up(self):
+        sequencing.move_step(self.steps[0], 4)
+        self.assertEqual(
+            [t for _n, t in self._titles()], ["M2", "M3", "M4", "M1", "M5"]
+        )
+        sequencing.move_step(self.steps[4], 1)
+        self.assertEqual(self._titles()[0], (1, "M5"))
+        self.assertEqual([n for n, _t in self._titles()], [1, 2, 3, 4, 5])
+
+    def test_reorder_requires_every_step_once(self):
+        order = [s.pk for s in reversed(self.steps)]
+        sequencing.reorder_steps(self.process, order)
+        self.assertEqual(
+            [t for _n, t in self._titles()], ["M5", "M4", "M3", "M2", "M1"]
+        )
+        with self.assertRaises(ValidationError):
+            sequencing.reorder_steps(self.process, order[:-1])
+
+    def test_renumber_closes_gaps(self):
+        ProcessStep.objects.filter(pk=self.steps[4].pk).update(step_number=50)
+        sequencing.renumber_steps(self.process)
+        self.assertEqual([n for n, _t in self._titles()], [1, 2, 3, 4, 5])
+
+    def test_changes_refresh_compiled_process(self):
+        compiled_process(self.process.pk)
+        sequencing.move_step(self.steps[0], 5)
+        steps = compiled_process(self.process.pk).steps
+        self.assertEqual(steps[-1].method.title, "M1")
+
+    def test_clone_copies_steps_to_other_standard(self):
+        other = make_standard(name="AMS-2417", revision="B")
+        make_standard_process(other, self.sp.title)
+        classification = make_classification(other, "Class 3")
+        clone = sequencing.clone_process(self.process, other, classification)
+        self.assertEqual(clone.standard, other)
+        self.assertEqual(clone.standard_process.standard, other)
+        self.assertEqual(clone.step_count, 5)
+        self.assertEqual(self._titles(clone), self._titles())
+
+        with self.assertRaises(ValidationError):
+            sequencing.clone_process(self.process, other, classification)
+
+    def test_clone_needs_a_matching_standard_process(self):
+        with self.assertRaises(ValidationError):
+            sequencing.clone_process(self.process, make_standard(name="Bare"))
+
+
+class TestProcessStepsApi(_AuthBase):
+    def setUp(self):
+        super().setUp()
+        self._login()
+        self.url = reverse("process_steps_api", args=[self.process.pk])
+        self.first = ProcessStep.objects.create(
+            process=self.process, method=make_method("A"), step_number=1
+        )
+        self.second = ProcessStep.objects.create(
+            process=self.process, method=make_method("B"), step_number=2
+        )
+
+    def _post(self, body):
+        return self.client.post(
+            self.url, json.dumps(body), content_type="application/json"
+        )
+
+    def test_get_lists_steps(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual([s["method"] for s in data["steps"]], ["A", "B"])
+
+    def test_insert_move_delete(self):
+        method = make_method("C")
+        data = self._post(
+            {"op": "insert", "method_id": method.pk, "position": 1}
+        ).json()
+        self.assertEqual([s["method"] for s in data["steps"]], ["C", "A", "B"])
+        data = self._post(
+            {"op": "move", "step_id": self.second.pk, "position": 1}
+        ).json()
+        self.assertEqual([s["method"] for s in data["steps"]], ["B", "C", "A"])
+        data = self._post({"op": "delete", "step_id": self.first.pk}).json()
+        self.assertEqual(
+            [(s["step_number"], s["method"]) for s in data["steps"]],
+            [(1, "B"), (2, "C")],
+        )
+
+    def test_errors(self):
+        self.assertEqual(self._post({"op": "explode"}).status_code, 400)
+        reorder = {"op": "reorder", "step_ids": [self.first.pk]}
+        self.assertEqual(self._post(reorder).status_code, 400)
+        self.assertEqual(
+            self._post({"op": "delete", "step_id": 99999}).status_code, 404
+        )
+
+
+class TestProcessAdminSequencing(_AuthBase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(
+            User.objects.create_superuser(username="admin", password="pass")
+        )
+        ProcessStep.objects.create(
+            process=self.process, method=make_method("A"), step_number=3
+        )
+
+    def test_renumber_action(self):
+        self.client.post(
+            reverse("admin:process_process_changelist"),
+            {
+                "action": "renumber_steps",
+                "_selected_action": [self.process.pk],
+            },
+        )
+        self.assertEqual(
+            list(self.process.steps.values_list("step_number", flat=True)), [1]
+        )
+
+    def test_renumber_action_touches_all_processes_once(self):
+        other_standard = make_standard(name="AMS-2417", revision="B")
+        other = make_process(
+            other_standard, make_standard_process(other_standard)
+        )
+        ProcessStep.objects.create(
+            process=other, method=make_method("B"), step_number=5
+        )
+        ProcessStep.objects.create(
+            process=other, method=make_method("C"), step_number=9
+        )
+
+        with patch("process.sequencing.touch_processes") as touch:
+            self.client.post(
+                reverse("admin:process_process_changelist"),
+                {
+                    "action": "renumber_steps",
+                    "_selected_action": [self.process.pk, other.pk],
+                },
+            )
+        touch.assert_called_once_with([self.process.pk, other.pk])
+        numbers = other.steps.order_by("step_number").values_list(
+            "step_number", flat=True
+        )
+        self.assertEqual(list(numbers), [1, 2])
+
+    def test_clone_view(self):
+        classification = make_classification(self.standard, "Class 9")
+        resp = self.client.post(
+            reverse("admin:process_process_clone", args=[self.process.pk]),
+            {
+                "standard": self.standard.pk,
+                "classification": classification.pk,
+            },
+        )
+        clone = Process.objects.get(classification=classification)
+        self.assertRedirects(
+            resp, reverse("admin:process_process_change", args=[clone.pk])
+        )
+        self.assertEqual(clone.steps.count(), 1)
+
+
 # ---------------------------------------------------------------------------
 # ProcessFlowchartView
 # ---------------------------------------------------------------------------
@@ -204,14 +550,18 @@ class TestProcessFlowchartView(_AuthBase):
             resp, f"/login/?next={url}", fetch_redirect_response=False
         )
 
-    @patch("process.views.build_process_flowchart_svg", return_value="<svg/>")
+    @patch(
+        "process.renderers.build_process_flowchart_svg", return_value="<svg/>"
+    )
     def test_returns_200_authenticated(self, _mock_svg):
         self._login()
         url = reverse("process_flowchart", args=[self.process.pk])
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
 
-    @patch("process.views.build_process_flowchart_svg", return_value="<svg/>")
+    @patch(
+        "process.renderers.build_process_flowchart_svg", return_value="<svg/>"
+    )
     def test_context_contains_process_and_svg(self, _mock_svg):
         self._login()
         url = reverse("process_flowchart", args=[self.process.pk])
@@ -225,6 +575,19 @@ class TestProcessFlowchartView(_AuthBase):
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 404)
 
+    @override_settings(RENDER_JOBS_EAGER=False)
+    def test_cache_miss_queues_the_render(self):
+        self._login()
+        url = reverse("process_flowchart", args=[self.process.pk])
+        with patch("process.renderers.build_process_flowchart_svg") as svg:
+            resp = self.client.get(url)
+        svg.assert_not_called()
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsNone(resp.context["svg"])
+        job = RenderJob.objects.get(kind="process_flowchart_svg")
+        self.assertEqual(job.params, {"process_id": self.process.pk})
+        self.assertEqual(resp.context["job_payload"]["id"], job.pk)
+
 
 # ---------------------------------------------------------------------------
 # ProcessFlowchartDownloadView
@@ -238,7 +601,9 @@ class TestProcessFlowchartDownloadView(_AuthBase):
             resp, f"/login/?next={url}", fetch_redirect_response=False
         )
 
-    @patch("process.views.build_process_flowchart_svg", return_value="<svg/>")
+    @patch(
+        "process.renderers.build_process_flowchart_svg", return_value="<svg/>"
+    )
     def test_returns_svg_content_type(self, _mock_svg):
         self._login()
         url = reverse("process_flowchart_download", args=[self.process.pk])
@@ -246,7 +611,9 @@ class TestProcessFlowchartDownloadView(_AuthBase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp["Content-Type"], "image/svg+xml")
 
-    @patch("process.views.build_process_flowchart_svg", return_value="<svg/>")
+    @patch(
+        "process.renderers.build_process_flowchart_svg", return_value="<svg/>"
+    )
     def test_content_disposition_is_attachment(self, _mock_svg):
         self._login()
         url = reverse("process_flowchart_download", args=[self.process.pk])
@@ -260,6 +627,340 @@ class TestProcessFlowchartDownloadView(_AuthBase):
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 404)
 
+    @override_settings(RENDER_JOBS_EAGER=False)
+    def test_cache_miss_returns_202_with_a_job(self):
+        self._login()
+        url = reverse("process_flowchart_download", args=[self.process.pk])
+        resp = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.status_code, 202)
+        self.assertTrue(resp.json()["result_url"].endswith("?download=1"))
+        self.assertTrue(
+            RenderJob.objects.filter(kind="process_flowchart_svg").exists()
+        )
+
+
+# ---------------------------------------------------------------------------
+# Flowchart SVG cache
+# ---------------------------------------------------------------------------
+
+class TestFlowchartCache(_AuthBase):
+    def _key(self):
+        process = Process.objects.select_related(
+            "standard", "classification", "standard_process"
+        ).get(pk=self.process.pk)
+        return flowchart_cache_key(process)
+
+    @patch(
+        "process.renderers.build_process_flowchart_svg", return_value="<svg/>"
+    )
+    def test_second_request_is_served_from_cache(self, mock_svg):
+        self._login()
+        url = reverse("process_flowchart_download", args=[self.process.pk])
+        first = self.client.get(url)
+        second = self.client.get(url)
+        self.assertEqual(mock_svg.call_count, 1)
+        self.assertEqual(first.getvalue(), second.getvalue())
+        self.assertEqual(second["X-Cache"], "HIT")
+
+    def test_key_changes_when_step_or_method_changes(self):
+        method = make_method("Rinse")
+        step = ProcessStep.objects.create(
+            process=self.process, method=method, step_number=1
+        )
+        key = self._key()
+
+        method.touch_time_max = 15
+        method.save()
+        edited = self._key()
+        self.assertNotEqual(edited, key)
+
+        step.step_number = 2
+        step.save()
+        self.assertNotEqual(self._key(), edited)
+
+    def test_key_changes_when_header_changes(self):
+        key = self._key()
+        self.standard.revision = "B"
+        self.standard.save()
+        self.assertNotEqual(self._key(), key)
+
+    def test_key_is_stable(self):
+        self.assertEqual(self._key(), self._key())
+
+    @patch(
+        "process.renderers.build_process_flowchart_svg", return_value="<svg/>"
+    )
+    def test_standard_edit_drops_cached_svg(self, _mock_svg):
+        from app.disk_cache import caches
+
+        self._login()
+        self.client.get(
+            reverse("process_flowchart_download", args=[self.process.pk])
+        )
+        cache = caches["flowcharts"]
+        self.assertIsNotNone(cache.get(self._key()))
+
+        self.standard.description = "Edited"
+        self.standard.save()
+        self.assertEqual(list(Path(self._tmp.name).rglob("flowchart-*")), [])
+
+
+class TestNativeFlowchartRenderer(TestCase):
+    SVG = "{http://www.w3.org/2000/svg}"
+
+    def setUp(self):
+        standard = make_standard()
+        classification = make_classification(standard, class_name="Class 1")
+        self.process = make_process(
+            standard, make_standard_process(standard), classification
+        )
+        rinse = make_method("Rinse")
+        rinse.touch_time_min, rinse.touch_time_max = 5, 10
+        rinse.save()
+        plate = make_method("Cadmium Plate", method_type="processing_tank")
+        plate.is_rectified = True
+        plate.run_time_max = 30
+        plate.chemical = "Cadmium <Cyanide>"
+        plate.save()
+        ProcessStep.objects.create(
+            process=self.process, method=rinse, step_number=1
+        )
+        ProcessStep.objects.create(
+            process=self.process, method=plate, step_number=2
+        )
+        self.process.refresh_from_db()
+
+    def _render(self, **kwargs):
+        with override_settings(**kwargs):
+            return build_process_flowchart_svg(self.process, renderer="native")
+
+    def test_output_is_valid_svg_with_header_steps_and_edges(self):
+        root = ET.fromstring(self._render(GRAPHVIZ_LOGO_PATH=None))
+        text = [t.text for t in root.iter(f"{self.SVG}text")]
+        self.assertIn("AMS-2404", text)
+        self.assertIn("Classification: Class 1", text)
+        self.assertIn("Touch: 5-10 min", text)
+        self.assertIn("Run: 30 min", text)
+        self.assertIn("Chem: Cadmium <Cyanide>", text)
+        self.assertEqual(len(list(root.iter(f"{self.SVG}rect"))), 2)
+        edges = [
+            g for g in root.iter(f"{self.SVG}g") if g.get("class") == "edge"
+        ]
+        self.assertEqual(len(edges), 2)
+
+    def test_rectified_step_is_highlighted(self):
+        fills = [
+            r.get("fill")
+            for r in ET.fromstring(self._render()).iter(f"{self.SVG}rect")
+        ]
+        self.assertEqual(fills, ["lightgrey", "#ffd9d9"])
+
+    def test_steps_are_stacked_top_to_bottom(self):
+        ys = [
+            float(r.get("y"))
+            for r in ET.fromstring(self._render()).iter(f"{self.SVG}rect")
+        ]
+        self.assertEqual(ys, sorted(ys))
+
+    def test_logo_is_embedded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "logo.png").write_bytes(b"\x89PNG")
+            svg = self._render(
+                BASE_DIR=Path(tmp), GRAPHVIZ_LOGO_PATH="logo.png"
+            )
+        self.assertIn('xlink:href="data:image/png;base64,', svg)
+
+    def test_no_steps_renders_header_only(self):
+        ProcessStep.objects.filter(process=self.process).delete()
+        self.process.refresh_from_db()
+        root = ET.fromstring(self._render())
+        self.assertEqual(list(root.iter(f"{self.SVG}rect")), [])
+        self.assertIn(
+            "AMS-2404", [t.text for t in root.iter(f"{self.SVG}text")]
+        )
+
+    def test_graphviz_renderer_gets_same_content(self):
+        with patch("process.flowchart_svg.render_flowchart_graphviz",
+                   return_value="<svg/>") as render, \
+                patch.dict("process.flowchart_svg.FLOWCHART_RENDERERS",
+                           {"graphviz": render}):
+            svg = build_process_flowchart_svg(
+                self.process, renderer="graphviz"
+            )
+            self.assertEqual(svg, "<svg/>")
+        content = render.call_args.args[0]
+        self.assertEqual(
+            content["header_lines"],
+            flowchart_content(self.process)["header_lines"],
+        )
+        self.assertEqual(
+            [n.name for n in content["steps"]],
+            [n.name for n in flowchart_content(self.process)["steps"]],
+        )
+
+    def test_renderer_is_picked_from_the_graph_shape(self):
+        content = flowchart_content(self.process)
+        self.assertEqual(pick_renderer(content), "native")
+
+        # A step with two successors
+        extra = FlowchartNode("step_extra", ["Step 3", "Rework"])
+        first = content["steps"][0].name
+        branched = dict(
+            content,
+            steps=[*content["steps"], extra],
+            edges=[*content["edges"], (first, extra.name)],
+        )
+        self.assertEqual(pick_renderer(branched), "graphviz")
+        with self.assertRaises(ValueError):
+            render_flowchart_native(branched)
+
+        with patch("process.flowchart_svg.render_flowchart_native",
+                   return_value="<svg/>") as native, \
+                patch.dict("process.flowchart_svg.FLOWCHART_RENDERERS",
+                           {"native": native}):
+            self.assertEqual(
+                build_process_flowchart_svg(self.process), "<svg/>"
+            )
+
+    def test_benchmark_command_runs(self):
+        out = io.StringIO()
+        call_command(
+            "benchmark_flowcharts", "--steps", "5", "--repeat", "1",
+            stdout=out, stderr=io.StringIO(),
+        )
+        self.assertIn("native ms", out.getvalue())
+
+
+class TestFlowchartExport(_AuthBase):
+    def setUp(self):
+        super().setUp()
+        ProcessStep.objects.create(
+            process=self.process, method=make_method("Rinse"), step_number=1
+        )
+        self.other_standard = make_standard(name="AMS-2417", revision="B")
+        strip = StandardProcess.objects.create(
+            standard=self.other_standard,
+            process_type="strip",
+            title="Nickel Strip",
+        )
+        self.template = make_process(self.other_standard, strip)
+        self.template.is_template = True
+        self.template.save()
+
+    def _zip(self, **params):
+        self._login()
+        resp = self.client.get(reverse("process_flowchart_export"), params)
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.streaming)
+        self.assertEqual(resp["Content-Type"], "application/zip")
+        return resp, zipfile.ZipFile(
+            io.BytesIO(b"".join(resp.streaming_content))
+        )
+
+    def _filename(self, process):
+        return flowchart_filename(export_processes().get(pk=process.pk))
+
+    def test_exports_every_process(self):
+        resp, archive = self._zip()
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted([
+                self._filename(self.process), self._filename(self.template)
+            ]),
+        )
+        self.assertIn("flowcharts-all.zip", resp["Content-Disposition"])
+        for name in archive.namelist():
+            ET.fromstring(archive.read(name))
+
+    def test_filters_by_standard(self):
+        resp, archive = self._zip(standard=self.standard.pk)
+        self.assertEqual(archive.namelist(), [self._filename(self.process)])
+        self.assertIn("flowcharts-ams-2404.zip", resp["Content-Disposition"])
+
+    def test_filters_by_process_type_and_template_flag(self):
+        _resp, archive = self._zip(process_type="strip")
+        self.assertEqual(archive.namelist(), [self._filename(self.template)])
+        _resp, archive = self._zip(is_template="0")
+        self.assertEqual(archive.namelist(), [self._filename(self.process)])
+
+    def test_no_match_is_404(self):
+        self._login()
+        resp = self.client.get(
+            reverse("process_flowchart_export"), {"process_type": "anodize"}
+        )
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(
+            reverse("process_flowchart_export"), {"standard": "abc"}
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_pool_renders_misses_and_caches_them(self):
+        processes = list(export_processes())
+        with ThreadPoolExecutor(max_workers=2) as pool, worker_process(), \
+                patch("app.render_pool.get_pool",
+                      return_value=pool) as get_pool:
+            first = render_flowchart_svgs(processes, max_workers=2)
+            self.assertEqual(get_pool.call_count, 1)
+            with patch("process.export.render_flowchart") as render:
+                second = render_flowchart_svgs(processes, max_workers=2)
+            render.assert_not_called()
+        self.assertEqual(first, second)
+        self.assertIn(b"Rinse", first[0])
+
+    def test_zip_is_built_once_by_the_job_queue(self):
+        self._login()
+        url = reverse("process_flowchart_export")
+        with override_settings(RENDER_JOBS_EAGER=False):
+            resp = self.client.get(url, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.status_code, 202)
+        job = RenderJob.objects.get(kind="process_flowchart_zip")
+        self.assertEqual(
+            sorted(job.params["process_ids"]),
+            sorted([self.process.pk, self.template.pk]),
+        )
+
+        run_job(claim_next())
+        with patch("process.export.render_flowchart") as render:
+            resp, archive = self._zip()
+        render.assert_not_called()
+        self.assertEqual(resp["X-Cache"], "HIT")
+        self.assertEqual(len(archive.namelist()), 2)
+
+    def test_admin_action_streams_selected(self):
+        admin = User.objects.create_superuser(
+            username="admin", password="pass"
+        )
+        self.client.force_login(admin)
+        resp = self.client.post(
+            reverse("admin:process_process_changelist"),
+            {
+                "action": "export_flowcharts",
+                "_selected_action": [self.template.pk],
+            },
+        )
+        self.assertEqual(resp.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(resp.streaming_content)))
+        self.assertEqual(archive.namelist(), [self._filename(self.template)])
+
+
+class TestLogoDataUri(TestCase):
+    def test_encodes_once_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "logo.png"
+            path.write_bytes(b"\x89PNG-one")
+            _logo_data_uri.cache_clear()
+
+            first = logo_data_uri(str(path))
+            self.assertTrue(first.startswith("data:image/png;base64,"))
+            self.assertEqual(logo_data_uri(str(path)), first)
+            self.assertEqual(_logo_data_uri.cache_info().hits, 1)
+
+            path.write_bytes(b"\x89PNG-second")
+            self.assertNotEqual(logo_data_uri(str(path)), first)
+
+    def test_missing_file(self):
+        self.assertIsNone(logo_data_uri("/nonexistent/logo.png"))
+
 
 # ---------------------------------------------------------------------------
 # AJAX: get_classifications
@@ -326,3 +1027,199 @@ class TestGetMethodInfoView(_AuthBase):
         )
         data = json.loads(resp.content)
         self.assertEqual(data["method_type"], "manual_method")
+
+
+# ---------------------------------------------------------------------------
+# Compiled process cache
+# ---------------------------------------------------------------------------
+
+class TestCompiledProcess(TestCase):
+    def setUp(self):
+        compiled_cache.clear()
+        self.addCleanup(compiled_cache.clear)
+        standard = make_standard()
+        self.process = make_process(standard, make_standard_process(standard))
+        self.clean_method = Method.objects.create(
+            title="Electroclean",
+            method_type="processing_tank",
+            touch_time_max=5,
+            run_time_max=10,
+        )
+        self.plate_method = Method.objects.create(
+            title="Cadmium Plate",
+            method_type="processing_tank",
+            is_rectified=True,
+            run_time_max=30,
+        )
+        self.mask_method = Method.objects.create(
+            title="Mask",
+            method_type="manual_method",
+            is_masking_operation=True,
+        )
+        ParameterToBeRecorded.objects.create(
+            method=self.plate_method, description="Record amps"
+        )
+        for number, method in enumerate(
+            [self.clean_method, self.mask_method, self.plate_method], start=1
+        ):
+            ProcessStep.objects.create(
+                process=self.process, method=method, step_number=number
+            )
+
+    def test_compiles_steps_in_order_with_flags(self):
+        compiled = compiled_process(self.process.pk)
+        self.assertEqual(
+            [s.method.title for s in compiled.steps],
+            ["Electroclean", "Mask", "Cadmium Plate"],
+        )
+        self.assertTrue(compiled.has_rectified_step)
+        self.assertTrue(compiled.has_masking_step)
+        self.assertEqual(compiled.step_count, 3)
+        self.assertEqual(
+            [s.duration_minutes for s in compiled.steps], [15, 1, 30]
+        )
+        self.assertEqual(
+            [
+                p.description
+                for p in compiled.steps[2].method.recorded_parameters
+            ],
+            ["Record amps"],
+        )
+        self.assertEqual(
+            [
+                s.method.title
+                for s in compiled.filtered_steps(requires_masking=False)
+            ],
+            ["Electroclean", "Cadmium Plate"],
+        )
+
+    def test_records_are_immutable(self):
+        step = compiled_process(self.process.pk).steps[0]
+        with self.assertRaises(AttributeError):
+            step.step_number = 9
+        with self.assertRaises(AttributeError):
+            step.method.title = "Changed"
+
+    def test_cache_hit_costs_one_version_query(self):
+        first = compiled_process(self.process.pk)
+        with self.assertNumQueries(1):
+            second = compiled_process(self.process.pk)
+        self.assertIs(first, second)
+        self.assertEqual(compiled_cache.info()["hits"], 1)
+
+    def test_step_change_recompiles(self):
+        before = compiled_process(self.process.pk)
+        ProcessStep.objects.filter(
+            process=self.process, step_number=2
+        ).get().delete()
+        after = compiled_process(self.process.pk)
+        self.assertGreater(after.updated_at, before.updated_at)
+        self.assertFalse(after.has_masking_step)
+
+    def test_method_change_recompiles(self):
+        compiled_process(self.process.pk)
+        self.plate_method.is_rectified = False
+        self.plate_method.save()
+        self.assertFalse(compiled_process(self.process.pk).has_rectified_step)
+
+    def test_recorded_parameter_change_recompiles(self):
+        compiled_process(self.process.pk)
+        ParameterToBeRecorded.objects.create(
+            method=self.plate_method, description="Record time"
+        )
+        compiled = compiled_process(self.process.pk)
+        params = compiled.steps[2].method.recorded_parameters
+        self.assertEqual(
+            [p.description for p in params], ["Record amps", "Record time"]
+        )
+
+    def test_stale_entry_in_other_worker_is_recompiled(self):
+        """
+        Another worker's change only moves updated_at; the version check
+        catches it.
+        """
+        compiled_process(self.process.pk)
+        Method.objects.filter(pk=self.clean_method.pk).update(
+            title="Alkaline Clean"
+        )
+        Process.objects.filter(pk=self.process.pk).update(
+            updated_at=self.process.updated_at.replace(year=2099)
+        )
+        self.assertEqual(
+            compiled_process(self.process.pk).steps[0].method.title,
+            "Alkaline Clean",
+        )
+
+
+class TestProcessStepSummary(TestCase):
+    def setUp(self):
+        standard = make_standard()
+        self.process = make_process(standard, make_standard_process(standard))
+        self.method = Method.objects.create(
+            title="Cadmium Plate",
+            method_type="processing_tank",
+            touch_time_max=5,
+            run_time_max=30,
+        )
+
+    def _summary(self):
+        self.process.refresh_from_db()
+        p = self.process
+        return (
+            p.has_rectified_step,
+            p.has_masking_step,
+            p.step_count,
+            p.touch_minutes,
+            p.run_minutes,
+        )
+
+    def test_new_process_is_empty(self):
+        self.assertEqual(self._summary(), (False, False, 0, 0, 0))
+
+    def test_follows_step_and_method_changes(self):
+        step = ProcessStep.objects.create(
+            process=self.process, method=self.method, step_number=1
+        )
+        self.assertEqual(self._summary(), (False, False, 1, 5, 30))
+
+        self.method.is_rectified = True
+        self.method.save()
+        self.assertEqual(self._summary(), (True, False, 1, 5, 30))
+
+        mask = Method.objects.create(
+            title="Mask",
+            method_type="manual_method",
+            is_masking_operation=True,
+        )
+        ProcessStep.objects.create(
+            process=self.process, method=mask, step_number=2
+        )
+        self.assertEqual(self._summary(), (True, True, 2, 5, 30))
+
+        step.delete()
+        self.assertEqual(self._summary(), (False, True, 1, 0, 0))
+
+    def test_shared_method_edit_is_one_update(self):
+        processes = [self.process]
+        for i in range(5):
+            standard = make_standard(name=f"AMS-{i}")
+            processes.append(
+                make_process(standard, make_standard_process(standard))
+            )
+        for process in processes:
+            ProcessStep.objects.create(
+                process=process, method=self.method, step_number=1
+            )
+
+        self.method.touch_time_max = 7
+        with CaptureQueriesContext(connection) as ctx:
+            self.method.save()
+        updates = [
+            q["sql"] for q in ctx.captured_queries
+            if q["sql"].startswith('UPDATE "process_process"')
+        ]
+        self.assertEqual(len(updates), 1)
+        touched = Process.objects.filter(pk__in=[p.pk for p in processes])
+        self.assertEqual(
+            set(touched.values_list("touch_minutes", flat=True)), {7}
+        )
@@ -8,5 +8,9 @@ urlpatterns = [
     path('admin/process/get_method_info/', views.get_method_info, name='get_method_info'),
     path('process/<int:pk>/flowchart/', views.process_flowchart_view, name='process_flowchart'),
     path('', views.ProcessLandingView.as_view(), name='process_landing'),
-    path('<int:pk>/flowchart/download/', views.process_flowchart_download_view, name='process_flowchart_download'),
+    path('<int:pk>/flowchart/download/', views.process_flowchart_download_view,
+         name='process_flowchart_download'),
+    path('<int:pk>/steps/', views.process_steps_api, name='process_steps_api'),
+    path('flowcharts/export/', views.process_flowchart_export_view,
+         name='process_flowchart_export'),
 ]
@@ -1,14 +1,27 @@
 # process/views.py
-from django.db.models import Q, F
-from django.http import HttpResponse, JsonResponse
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, render
-from django.utils.text import slugify
+from django.views.decorators.http import require_http_methods
 from django.views.generic import ListView
 
+from jobs.queue import cached_result, enqueue, run_now
+from jobs.shortcuts import job_payload, serve_or_enqueue
 from methods.models import Method
-from standard.models import Classification
-from .models import Process
-from .utils import build_process_flowchart_svg
+from standard.models import Classification, Standard, StandardProcess
+from .export import export_filename, export_processes, flowchart_zip_key
+from . import sequencing
+from .models import Process, ProcessStep
+from .search import search_processes
+from .utils import flowchart_cache_key, flowchart_filename
+
+# Registered in process/renderers.py
+FLOWCHART_KIND = "process_flowchart_svg"
+FLOWCHART_ZIP_KIND = "process_flowchart_zip"
 
 
 def get_classifications(request):
@@ -44,7 +57,8 @@ class ProcessLandingView(ListView):
     """
     Operator-facing landing page:
     - Lists all Processes
-    - Search by Standard name, Classification class_name, StandardProcess title, or Process description
+    - Ranked full-text search over standard, classification, standard process,
+      step method titles and description (process/search.py)
     """
     model = Process
     template_name = "process/process_landing.html"
@@ -63,65 +77,205 @@ class ProcessLandingView(ListView):
 
         q = self.request.GET.get("q", "").strip()
         if q:
-            qs = qs.filter(
-                Q(standard__name__icontains=q)
-                | Q(classification__class_name__icontains=q)
-                | Q(standard_process__title__icontains=q)
-                | Q(description__icontains=q)  # <-- Process.description (correct)
-            )
+            # Ranked full-text match on the stored search vector
+            # (process/search.py); the ordering above breaks ties
+            qs = search_processes(qs, q)
 
         return qs
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Choices for the bulk flowchart export form
+        context["export_standards"] = (
+            Standard.objects.filter(processes__isnull=False)
+            .distinct()
+            .order_by("name")
+        )
+        context["export_process_types"] = StandardProcess.PROCESS_CHOICES
+        return context
+
+
+def _flowchart_process(pk):
+    return get_object_or_404(
+        Process.objects.select_related(
+            "standard", "classification", "standard_process"
+        ),
+        pk=pk,
+    )
+
 
 def process_flowchart_view(request, pk):
     """
     Read-only view that shows a Graphviz SVG flowchart for a Process.
+
+    The SVG comes from the flowcharts cache; on a miss it is queued on the
+    render worker and the page reloads itself once the job is done.
     """
-    process = get_object_or_404(
-        Process.objects.select_related("standard", "classification", "standard_process")
-        .prefetch_related("steps__method"),
-        pk=pk,
-    )
+    process = _flowchart_process(pk)
 
-    svg = build_process_flowchart_svg(process)
+    key = flowchart_cache_key(process)
+    data = cached_result(FLOWCHART_KIND, key)
+    payload = None
+    if data is None:
+        job, _created = enqueue(
+            FLOWCHART_KIND, {"process_id": process.pk}, key=key
+        )
+        if settings.RENDER_JOBS_EAGER:
+            job = run_now(job)
+            data = cached_result(FLOWCHART_KIND, job.key)
+        if data is None:
+            payload = job_payload(job)
 
     return render(
         request,
         "process/process_flowchart.html",
         {
             "process": process,
-            "svg": svg,
+            "svg": data.decode("utf-8") if data is not None else None,
+            "job_payload": payload,
         },
     )
 
 
 def process_flowchart_download_view(request, pk):
     """
-    Returns the process flowchart as an SVG file download.
+    Returns the process flowchart as an SVG file download, rendered by
+    the job queue on a cache miss.
     """
-    process = get_object_or_404(
-        Process.objects.select_related("standard", "classification", "standard_process")
-        .prefetch_related("steps__method"),
-        pk=pk,
+    process = _flowchart_process(pk)
+
+    return serve_or_enqueue(
+        request,
+        FLOWCHART_KIND,
+        {"process_id": process.pk},
+        key=flowchart_cache_key(process),
+        filename=flowchart_filename(process),
+        disposition="attachment",
     )
 
-    svg = build_process_flowchart_svg(process)
 
-    standard_name = process.standard.name if process.standard else "process"
-    classification_name = (
-        process.classification.class_name
-        if process.classification_id
-        else "unclassified"
+def _flag(value):
+    """
+    GET flag: "1"/"true"/"yes" -> True, "0"/"false"/"no" -> False,
+    anything else -> None.
+    """
+    value = (value or "").strip().lower()
+    if value in ("1", "true", "yes", "on"):
+        return True
+    if value in ("0", "false", "no", "off"):
+        return False
+    return None
+
+
+def flowchart_zip_response(request, processes, filename):
+    """
+    The processes' flowcharts as a ZIP download, built by the job queue
+    (a wait page until the render worker has it).
+    """
+    processes = list(processes)
+    return serve_or_enqueue(
+        request,
+        FLOWCHART_ZIP_KIND,
+        {"process_ids": [process.pk for process in processes]},
+        key=flowchart_zip_key(processes),
+        filename=filename,
+        disposition="attachment",
     )
-    process_title = (
-        process.standard_process.title
-        if process.standard_process_id
-        else "standard-process"
+
+
+def process_flowchart_export_view(request):
+    """
+    Download the flowcharts of every process matching the filters as one ZIP.
+
+    GET params (all optional): ``standard`` (id), ``process_type``
+    (StandardProcess.process_type) and ``is_template`` (1/0).
+    """
+    standard = None
+    if request.GET.get("standard"):
+        try:
+            standard = get_object_or_404(
+                Standard, pk=int(request.GET["standard"])
+            )
+        except ValueError:
+            raise Http404("Invalid standard.")
+    process_type = request.GET.get("process_type", "").strip() or None
+    is_template = _flag(request.GET.get("is_template"))
+
+    processes = export_processes(
+        standard_id=standard.pk if standard else None,
+        process_type=process_type,
+        is_template=is_template,
     )
+    if not processes.exists():
+        raise Http404("No processes match these filters.")
+    filename = export_filename(standard, process_type, is_template)
+    return flowchart_zip_response(request, processes, filename)
 
-    base_name = f"{standard_name}-{classification_name}-{process_title}-process-{process.pk}"
-    filename = slugify(base_name) + ".svg"
 
-    response = HttpResponse(svg, content_type="image/svg+xml")
-    response["Content-Disposition"] = f'attachment; filename="{filename}"'
-    return response
+def _steps_json(process, steps):
+    return {
+        "process_id": process.pk,
+        "steps": [
+            {"id": step.pk, "step_number": step.step_number,
+             "method_id": step.method_id, "method": step.method.title}
+            for step in steps
+        ],
+    }
+
+
+@require_http_methods(["GET", "POST"])
+def process_steps_api(request, pk):
+    """
+    A process's steps as JSON; POST edits the sequence (see
+    process/sequencing.py).
+
+    Body, one of::
+
+        {"op": "insert", "method_id": 7, "position": 3}  # no position: append
+        {"op": "delete", "step_id": 12}
+        {"op": "move", "step_id": 12, "position": 1}
+        {"op": "reorder", "step_ids": [14, 12, 13]}
+        {"op": "renumber"}
+    """
+    process = get_object_or_404(Process, pk=pk)
+    if request.method == "GET":
+        steps = process.steps.select_related("method").order_by("step_number")
+        return JsonResponse(_steps_json(process, steps))
+
+    try:
+        body = json.loads(request.body or b"{}")
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object.")
+        op = body.get("op")
+        if op == "insert":
+            method = Method.objects.filter(pk=body.get("method_id")).first()
+            if method is None:
+                return JsonResponse({"error": "Unknown method."}, status=404)
+            steps = sequencing.insert_step(
+                process, method, body.get("position")
+            )
+        elif op in ("delete", "move"):
+            step = ProcessStep.objects.filter(
+                pk=body.get("step_id"), process=process
+            ).first()
+            if step is None:
+                return JsonResponse({"error": "Unknown step."}, status=404)
+            if op == "delete":
+                steps = sequencing.delete_step(step)
+            else:
+                steps = sequencing.move_step(step, body.get("position"))
+        elif op == "reorder":
+            steps = sequencing.reorder_steps(
+                process, body.get("step_ids") or []
+            )
+        elif op == "renumber":
+            steps = sequencing.renumber_steps(process)
+        else:
+            raise ValueError(
+                "op must be one of insert, delete, move, reorder, renumber."
+            )
+    except ValidationError as exc:
+        return JsonResponse({"error": " ".join(exc.messages)}, status=400)
+    except (ValueError, TypeError) as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    return JsonResponse(_steps_json(process, steps))
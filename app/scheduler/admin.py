@@ -1,7 +1,7 @@
 # scheduler/admin.py
 from django.contrib import admin
 
-from .models import DelayLog, ManufacturingOrder
+from .models import DelayLog, ManufacturingOrder, ScheduledStep
 
 
 @admin.register(ManufacturingOrder)
@@ -47,3 +47,33 @@ class DelayLogAdmin(admin.ModelAdmin):
     list_filter = ("timestamp",)
     search_fields = ("order__work_order", "order__part_number", "reason")
     ordering = ("-timestamp",)
+
+
+@admin.register(ScheduledStep)
+class ScheduledStepAdmin(admin.ModelAdmin):
+    """
+    Read-only view of the materialised timeline (rebuilt by
+    scheduler/signals.py).
+    """
+
+    list_display = (
+        "order",
+        "step_number",
+        "title",
+        "tank",
+        "start_time",
+        "end_time",
+        "delay_minutes",
+    )
+    list_filter = ("is_delayed", "tank")
+    date_hierarchy = "start_time"
+    search_fields = (
+        "order__work_order", "order__part_number", "title", "tank",
+    )
+    list_select_related = ("order",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,262 @@
+# scheduler/analytics.py
+"""
+Tank utilisation and bottleneck analytics over a schedule horizon.
+
+Every timeline step with a tank (``ScheduledStep.tank``, from
+``Method.tank_name``) that overlaps the horizon is clipped to it and
+fed to one NumPy interval sweep: each step becomes a +1 event at its
+start and a -1 at its end, the events are sorted by (tank, time, end
+before start), and a running sum gives every tank's concurrency between
+consecutive events.  Per tank that yields
+
+    busy minutes        time with at least one step in the tank
+    utilisation         busy minutes / horizon minutes
+    peak concurrency    most steps in the tank at once (> 1 is a clash)
+    queue wait          minutes of steps beyond the tank's capacity of
+                        one, i.e. the waiting the clashes imply
+
+Tanks are ranked as bottlenecks by queue wait, then utilisation.  Delay
+minutes logged against each tank's steps are split back into the
+``[15m] reason`` entries AddDelayView appends, so the dashboard can show
+which reasons feed each bottleneck.
+
+Results are cached on disk per horizon (``RENDER_CACHES['analytics']``)
+under the horizon's timeline version (scheduler/feed.py), so any change
+to the schedule in that range computes afresh.
+
+Usage::
+
+    from scheduler.analytics import tank_utilisation
+
+    report = tank_utilisation(start, end)
+    report["tanks"][0]["tank"], report["tanks"][0]["utilisation"]
+"""
+import json
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+from django.conf import settings
+from django.db.models.functions import Extract
+
+from app.disk_cache import caches, digest
+
+from .feed import window_version
+from .models import DelayLog, ScheduledStep
+
+TOP_REASONS = 5
+TOP_BOTTLENECKS = 3
+_REASON_ENTRY = re.compile(r"^\[(\d+)m\]\s*(.*)$")
+
+
+def sweep(tank_codes, starts, ends, n_tanks: int) -> Dict[str, np.ndarray]:
+    """
+    Per-tank busy time, queue wait and peak concurrency for intervals
+    ``[starts[i], ends[i])`` in tank ``tank_codes[i]`` (0..n_tanks-1).
+    Times are plain numbers (minutes here); empty intervals are ignored.
+    """
+    tank_codes = np.asarray(tank_codes, dtype=np.int64)
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    keep = ends > starts
+    tank_codes, starts, ends = tank_codes[keep], starts[keep], ends[keep]
+
+    result = {
+        "busy": np.zeros(n_tanks),
+        "wait": np.zeros(n_tanks),
+        "peak": np.zeros(n_tanks, dtype=np.int64),
+        "demand": np.bincount(tank_codes, weights=ends - starts,
+                              minlength=n_tanks),
+        "steps": np.bincount(tank_codes, minlength=n_tanks),
+    }
+    if not len(starts):
+        return result
+
+    n = len(starts)
+    times = np.concatenate([starts, ends])
+    ones = np.ones(n, dtype=np.int64)
+    deltas = np.concatenate([ones, -ones])
+    tanks = np.concatenate([tank_codes, tank_codes])
+    # Sort by tank, then time, ends (-1) before starts (+1) so touching
+    # steps never overlap
+    order = np.lexsort((deltas, times, tanks))
+    times, deltas, tanks = times[order], deltas[order], tanks[order]
+
+    # Each tank's deltas sum to zero, so one running sum is every tank's
+    # concurrency
+    concurrency = np.cumsum(deltas)
+    segment = np.zeros_like(times)
+    segment[:-1] = np.where(tanks[1:] == tanks[:-1], np.diff(times), 0.0)
+
+    busy = segment * (concurrency > 0)
+    queued = segment * np.maximum(concurrency - 1, 0)
+    result["busy"] = np.bincount(tanks, weights=busy, minlength=n_tanks)
+    result["wait"] = np.bincount(tanks, weights=queued, minlength=n_tanks)
+    np.maximum.at(result["peak"], tanks, concurrency)
+    return result
+
+
+def split_reasons(reason: str, added_minutes: int):
+    """
+    ``[(minutes, reason)]`` from a DelayLog reason: AddDelayView appends
+    one ``[15m] reason`` line per delay; anything else counts as a single
+    entry for the whole ``added_minutes``.
+    """
+    entries, loose = [], []
+    for line in (reason or "").splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        match = _REASON_ENTRY.match(line)
+        if match:
+            text = match.group(2).strip() or "(no reason)"
+            entries.append((int(match.group(1)), text))
+        else:
+            loose.append(line)
+    accounted = sum(minutes for minutes, _ in entries)
+    if loose or not entries:
+        rest = max(int(added_minutes or 0) - accounted, 0)
+        entries.append((rest, " ".join(loose) or "(no reason)"))
+    return entries
+
+
+def _steps_in(start: datetime, end: datetime):
+    return (
+        ScheduledStep.objects
+        .filter(start_time__lt=end, end_time__gt=start)
+        .exclude(tank="")
+        .order_by()
+        .annotate(start_epoch=Extract("start_time", "epoch"),
+                  end_epoch=Extract("end_time", "epoch"))
+        .values_list("tank", "order_id", "step_number", "delay_minutes",
+                     "start_epoch", "end_epoch")
+    )
+
+
+def _heaviest_first(item):
+    # (reason, (minutes, ...)) items: most minutes first, then by reason
+    return -item[1][0], item[0]
+
+
+def _reasons_by_tank(
+    step_tanks: Dict[tuple, str],
+) -> Dict[str, List[Dict[str, Any]]]:
+    totals = defaultdict(lambda: defaultdict(lambda: [0, 0]))
+    delays = (
+        DelayLog.objects
+        .filter(order_id__in={order_id for order_id, _ in step_tanks})
+        .values_list("order_id", "step_number", "reason", "added_minutes")
+    )
+    for order_id, step_number, reason, added_minutes in delays:
+        tank = step_tanks.get((order_id, step_number))
+        if tank is None:
+            continue
+        for minutes, text in split_reasons(reason, added_minutes):
+            entry = totals[tank][text.lower()]
+            entry[0] += minutes
+            entry[1] += 1
+    return {
+        tank: [
+            {"reason": text, "minutes": minutes, "count": count}
+            for text, (minutes, count) in sorted(reasons.items(),
+                                                 key=_heaviest_first)
+        ]
+        for tank, reasons in totals.items()
+    }
+
+
+def compute_tank_utilisation(start: datetime, end: datetime) -> Dict[str, Any]:
+    """The analytics report for ``[start, end)``, uncached."""
+    horizon = max((end - start).total_seconds() / 60, 0.0)
+    rows = list(_steps_in(start, end))
+    names = sorted({row[0] for row in rows})
+    codes = {name: i for i, name in enumerate(names)}
+
+    origin = start.timestamp()
+    n_rows = len(rows)
+    tank_codes = np.fromiter((codes[row[0]] for row in rows),
+                             dtype=np.int64, count=n_rows)
+    starts = np.fromiter((float(row[4]) for row in rows),
+                         dtype=float, count=n_rows)
+    ends = np.fromiter((float(row[5]) for row in rows),
+                       dtype=float, count=n_rows)
+    # Minutes from the horizon start, clipped to the horizon
+    starts = np.clip((starts - origin) / 60, 0, horizon)
+    ends = np.clip((ends - origin) / 60, 0, horizon)
+    stats = sweep(tank_codes, starts, ends, len(names))
+
+    delays = np.fromiter((row[3] for row in rows), dtype=float, count=n_rows)
+    delay_minutes = np.bincount(tank_codes, weights=delays,
+                                minlength=len(names))
+    orders = defaultdict(set)
+    step_tanks = {}
+    for tank, order_id, step_number, *_ in rows:
+        orders[tank].add(order_id)
+        step_tanks[(order_id, step_number)] = tank
+    reasons = _reasons_by_tank(step_tanks)
+
+    tanks = [
+        {
+            "tank": name,
+            "steps": int(stats["steps"][i]),
+            "orders": len(orders[name]),
+            "busyMinutes": round(float(stats["busy"][i]), 1),
+            "demandMinutes": round(float(stats["demand"][i]), 1),
+            "utilisation": (
+                round(100 * float(stats["busy"][i]) / horizon, 1)
+                if horizon else 0.0
+            ),
+            "peakConcurrency": int(stats["peak"][i]),
+            "queueWaitMinutes": round(float(stats["wait"][i]), 1),
+            "delayMinutes": int(delay_minutes[i]),
+            "reasons": reasons.get(name, [])[:TOP_REASONS],
+        }
+        for i, name in enumerate(names)
+    ]
+    tanks.sort(key=lambda t: (-t["queueWaitMinutes"], -t["utilisation"],
+                              t["tank"]))
+    for rank, tank in enumerate(tanks, start=1):
+        tank["rank"] = rank
+
+    waiting = [t for t in tanks if t["queueWaitMinutes"] > 0]
+    bottlenecks = waiting[:TOP_BOTTLENECKS]
+    combined = defaultdict(lambda: [0, 0, set()])
+    for tank in bottlenecks:
+        for entry in reasons.get(tank["tank"], []):
+            total = combined[entry["reason"]]
+            total[0] += entry["minutes"]
+            total[1] += entry["count"]
+            total[2].add(tank["tank"])
+
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "horizonMinutes": round(horizon, 1),
+        "tanks": tanks,
+        "bottlenecks": [t["tank"] for t in bottlenecks],
+        "bottleneckReasons": [
+            {"reason": text, "minutes": minutes, "count": count,
+             "tanks": sorted(names_)}
+            for text, (minutes, count, names_) in sorted(combined.items(),
+                                                         key=_heaviest_first)
+        ][:TOP_REASONS],
+    }
+
+
+def tank_utilisation(start: datetime, end: datetime) -> Dict[str, Any]:
+    """
+    ``compute_tank_utilisation``, cached per horizon and timeline version.
+    """
+    if "analytics" not in settings.RENDER_CACHES:
+        return compute_tank_utilisation(start, end)
+    cache = caches["analytics"]
+    version = window_version(start, end)
+    key = "tanks-" + digest({"start": start, "end": end, "version": version})
+    data = cache.get(key)
+    if data is not None:
+        return json.loads(data)
+    report = compute_tank_utilisation(start, end)
+    cache.set(key, json.dumps(report).encode())
+    return report
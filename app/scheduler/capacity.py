@@ -0,0 +1,317 @@
+# scheduler/capacity.py
+"""
+Finite-capacity tank planning.
+
+Every order's waterfall (scheduler/timeline.py) assumes the line to
+itself.  Here each tank (``Method.tank_name``; steps without one are
+unconstrained) is a capacity-1 resource:
+
+``find_conflicts``
+    Interval sweep per tank: bookings sorted by start, with a heap of
+    the ends still open, so each overlap is found once in
+    O(n log n + overlaps).
+
+``plan``
+    Priority-queue list scheduling.  Orders that cannot move (running or
+    on hold) are booked first.  Movable orders are then taken off a heap
+    by planned start (then id) and each is placed at the earliest start,
+    not before its own, at which none of its steps meets a busy tank.
+    An order's steps stay back to back and in step order, so its start
+    is the only thing that moves; a clash on step *i* pushes the start
+    to the first gap in that tank long enough for step *i* (less its
+    offset), and the check goes round the steps until all of them fit in
+    a row.  Each tank's busy time is kept as sorted, merged spans, so a
+    probe is a bisect plus a walk over the spans too close together.
+
+``replan`` loads the open orders' timelines, plans, and optionally
+applies the new starts (one ``bulk_update`` plus ``refresh_timelines``
+for the moved orders).
+
+Usage::
+
+    from scheduler.capacity import replan
+
+    result = replan()                    # proposal only
+    result = replan(apply=True)          # move the orders
+    result.shifts, result.conflicts
+"""
+import heapq
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, List
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ManufacturingOrder, ScheduledStep
+from .timeline import refresh_timelines
+
+# Orders that hold a tank but must not be moved
+FIXED_STATUSES = ("in_progress", "hold")
+OPEN_STATUSES = ("planned",) + FIXED_STATUSES
+
+
+class Booking:
+    """One step of one order in one tank over ``[start, end)``."""
+
+    __slots__ = ("order_id", "step_number", "tank", "start", "end")
+
+    def __init__(self, order_id, step_number, tank, start, end):
+        self.order_id = order_id
+        self.step_number = step_number
+        self.tank = tank
+        self.start = start
+        self.end = end
+
+
+class Conflict:
+    """Two bookings sharing a tank over ``[start, end)``."""
+
+    __slots__ = ("tank", "first", "second", "start", "end")
+
+    def __init__(self, tank, first, second, start, end):
+        self.tank = tank
+        self.first = first
+        self.second = second
+        self.start = start
+        self.end = end
+
+
+class PlanOrder:
+    """
+    An order as the planner sees it: its start and its steps as
+    ``(step number, tank, offset from start, duration)`` in step order.
+    """
+
+    __slots__ = ("order_id", "start", "steps", "movable")
+
+    def __init__(self, order_id, start, steps, movable=True):
+        self.order_id = order_id
+        self.start = start
+        self.steps = steps
+        self.movable = movable
+
+    def bookings(self, start=None):
+        start = self.start if start is None else start
+        return [
+            Booking(self.order_id, number, tank,
+                    start + offset, start + offset + duration)
+            for number, tank, offset, duration in self.steps
+            if tank
+        ]
+
+
+def find_conflicts(bookings) -> List[Conflict]:
+    """
+    Every pair of bookings that overlap in the same tank (different orders
+    only).
+    """
+    by_tank = defaultdict(list)
+    for booking in bookings:
+        if booking.tank:
+            by_tank[booking.tank].append(booking)
+
+    conflicts = []
+    for tank in sorted(by_tank):
+        open_ends = []  # heap of (end, seq, booking)
+        ordered = sorted(by_tank[tank],
+                         key=lambda b: (b.start, b.end, b.order_id))
+        for seq, booking in enumerate(ordered):
+            while open_ends and open_ends[0][0] <= booking.start:
+                heapq.heappop(open_ends)
+            for end, _, other in open_ends:
+                if other.order_id != booking.order_id:
+                    conflicts.append(Conflict(
+                        tank, other, booking,
+                        booking.start, min(end, booking.end),
+                    ))
+            heapq.heappush(open_ends, (booking.end, seq, booking))
+    return conflicts
+
+
+class _TankCalendar:
+    """Busy time of one tank as sorted, disjoint ``[start, end)`` spans."""
+
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    def next_free(self, start, duration):
+        """
+        Earliest ``t >= start`` with ``[t, t + duration)`` free; None if
+        ``start`` already is.
+        """
+        starts, ends = self.starts, self.ends
+        i = bisect_right(starts, start) - 1
+        t = start
+        if i >= 0 and ends[i] > t:
+            t = ends[i]
+        i += 1
+        # Skip spans until the gap before the next one is long enough
+        while i < len(starts) and starts[i] < t + duration:
+            t = max(t, ends[i])
+            i += 1
+        return None if t == start else t
+
+    def book(self, start, end):
+        i = bisect_right(self.starts, start)
+        # Merge with the span before and any spans the new one reaches
+        if i > 0 and self.ends[i - 1] >= start:
+            i -= 1
+            start = self.starts[i]
+            end = max(end, self.ends[i])
+        j = i
+        while j < len(self.starts) and self.starts[j] <= end:
+            end = max(end, self.ends[j])
+            j += 1
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+
+def _earliest_start(order, calendars):
+    steps = [step for step in order.steps if step[1]]
+    start = order.start
+    # Walk the steps round-robin until all of them fit in a row; a clash
+    # pushes the start and restarts the count from that step
+    i = fits = 0
+    while fits < len(steps):
+        _, tank, offset, duration = steps[i]
+        free_at = calendars[tank].next_free(start + offset, duration)
+        if free_at is None:
+            fits += 1
+            i = (i + 1) % len(steps)
+        else:
+            start = free_at - offset
+            fits = 0
+    return start
+
+
+def plan(orders) -> Dict[int, object]:
+    """
+    ``{order id: new start}`` for the movable orders that have to move
+    so that no two orders share a tank at once (fixed orders that
+    already clash with each other are left as they are).
+    """
+    calendars = defaultdict(_TankCalendar)
+    for order in orders:
+        if not order.movable:
+            for booking in order.bookings():
+                calendars[booking.tank].book(booking.start, booking.end)
+
+    queue = [(order.start, order.order_id, order)
+             for order in orders if order.movable]
+    heapq.heapify(queue)
+    moves = {}
+    while queue:
+        _, _, order = heapq.heappop(queue)
+        start = _earliest_start(order, calendars)
+        for booking in order.bookings(start):
+            calendars[booking.tank].book(booking.start, booking.end)
+        if start != order.start:
+            moves[order.order_id] = start
+    return moves
+
+
+# ----------------------------------------------------------------------
+# Orders from the timeline
+# ----------------------------------------------------------------------
+
+class ReplanResult:
+    """
+    What ``replan`` found: the moves, and the conflicts before and after
+    them.
+    """
+
+    __slots__ = ("orders", "shifts", "conflicts", "remaining", "applied")
+
+    def __init__(self, orders, shifts, conflicts, remaining, applied):
+        self.orders = orders
+        self.shifts = shifts
+        self.conflicts = conflicts
+        self.remaining = remaining
+        self.applied = applied
+
+
+def open_orders(now=None) -> Dict[int, PlanOrder]:
+    """
+    Open orders with a step still to finish after ``now``, as PlanOrders
+    (one query).
+    """
+    now = now or timezone.now()
+    rows = (
+        ScheduledStep.objects
+        .filter(
+            order__status__in=OPEN_STATUSES,
+            order_id__in=(
+                ScheduledStep.objects.filter(end_time__gt=now)
+                .values("order_id")
+            ),
+        )
+        .order_by("order_id", "step_number")
+        .values_list(
+            "order_id", "step_number", "tank", "start_time", "end_time",
+            "order__planned_start_time", "order__status",
+        )
+    )
+    orders: Dict[int, PlanOrder] = {}
+    for order_id, number, tank, start, end, planned_start, status in rows:
+        order = orders.get(order_id)
+        if order is None:
+            movable = status not in FIXED_STATUSES
+            order = orders[order_id] = PlanOrder(
+                order_id, planned_start, [], movable=movable,
+            )
+        order.steps.append(
+            (number, tank.strip(), start - planned_start, end - start)
+        )
+    return orders
+
+
+def _bookings(orders, starts=None):
+    starts = starts or {}
+    return [b for order in orders
+            for b in order.bookings(starts.get(order.order_id))]
+
+
+def replan(apply: bool = False, now=None) -> ReplanResult:
+    """
+    Plan the open orders around tank capacity; with ``apply``, move them.
+
+    The orders are locked while planning so two re-plans cannot
+    interleave.
+    """
+    with transaction.atomic():
+        if apply:
+            list(
+                ManufacturingOrder.objects.select_for_update()
+                .filter(status__in=OPEN_STATUSES).values_list("pk", flat=True)
+            )
+        orders = open_orders(now)
+        plan_orders = list(orders.values())
+        moves = plan(plan_orders)
+        conflicts = find_conflicts(_bookings(plan_orders))
+        remaining = find_conflicts(_bookings(plan_orders, moves))
+        shifts = {pk: (orders[pk].start, start) for pk, start in moves.items()}
+        if apply and moves:
+            apply_starts(moves)
+    applied = apply and bool(moves)
+    return ReplanResult(orders, shifts, conflicts, remaining, applied)
+
+
+def apply_starts(starts: Dict[int, object]) -> None:
+    """
+    Set ``planned_start_time`` on the given orders and rebuild their
+    timelines.
+    """
+    now = timezone.now()
+    orders = list(ManufacturingOrder.objects.filter(pk__in=list(starts)))
+    for order in orders:
+        order.planned_start_time = starts[order.pk]
+        order.updated_at = now
+    # bulk_update sends no signals
+    ManufacturingOrder.objects.bulk_update(
+        orders, ["planned_start_time", "updated_at"], batch_size=500
+    )
+    refresh_timelines(starts)
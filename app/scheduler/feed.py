@@ -0,0 +1,122 @@
+# scheduler/feed.py
+"""
+Data loading for the scheduler feed (``SchedulerDataView``).
+
+FullCalendar asks for the events of the visible range
+(``?start=...&end=...``).  The waterfall is already materialised as
+``ScheduledStep`` rows (scheduler/timeline.py), so the feed is one
+query: every step of each order with a step overlapping the range,
+found through the ``(end_time, start_time)`` index, with the order's
+columns joined in.  Rows are plain dicts: at a few thousand rows per
+week, building model instances cost more than the query.  Orders whose
+process has no steps have nothing to draw and are left out.
+
+Change tracking: a timeline is rewritten (new rows, new ids) whenever
+anything the feed shows for an order changes, so an order's largest row
+id is its version.  ``window_version`` (largest id and row count in the
+range) is the feed's ETag; ``order_versions`` and ``timeline_in_window``
+with ``order_ids`` serve the delta endpoint, which returns only orders
+whose version is past the client's cursor.
+"""
+from datetime import datetime, time
+from typing import Dict, Optional, Tuple
+
+from django.db.models import Count, F, Max
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import ScheduledStep
+
+
+def parse_instant(value: Optional[str]) -> Optional[datetime]:
+    """
+    A FullCalendar range bound (ISO datetime or date) as an aware datetime;
+    None if missing or invalid.
+    """
+    if not value:
+        return None
+    # A "+" offset arrives as a space when the query string was not encoded
+    value = value.strip().replace(" ", "+")
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_window(params) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """
+    ``(start, end)`` from request GET params; either may be None
+    (unbounded).
+    """
+    return parse_instant(params.get("start")), parse_instant(params.get("end"))
+
+
+def _in_window(start: Optional[datetime], end: Optional[datetime]):
+    """Timeline rows of the orders with a step overlapping ``[start, end)``."""
+    rows = ScheduledStep.objects.all()
+    if start is not None or end is not None:
+        overlapping = ScheduledStep.objects.all()
+        if end is not None:
+            overlapping = overlapping.filter(start_time__lt=end)
+        if start is not None:
+            overlapping = overlapping.filter(end_time__gt=start)
+        rows = rows.filter(order_id__in=overlapping.values("order_id"))
+    return rows
+
+
+def timeline_in_window(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    order_ids=None,
+):
+    """
+    Timeline rows (dicts) of the orders with a step overlapping
+    ``[start, end)``, ordered by order then step; no bound means unbounded
+    on that side.  ``order_ids`` narrows them further.
+    """
+    rows = _in_window(start, end)
+    if order_ids is not None:
+        rows = rows.filter(order_id__in=list(order_ids))
+    rows = rows.order_by(
+        "order__planned_start_time", "order_id", "step_number"
+    )
+    return rows.values(
+        "id", "order_id", "step_number", "title", "tank",
+        "start_time", "end_time", "is_delayed",
+        work_order=F("order__work_order"),
+        occurrence=F("order__occurrence"),
+        part_number=F("order__part_number"),
+        status=F("order__status"),
+        planned_start_time=F("order__planned_start_time"),
+    )
+
+
+def window_version(
+    start: Optional[datetime] = None, end: Optional[datetime] = None
+) -> Tuple[int, int]:
+    """
+    ``(largest row id, row count)`` of the window: changes whenever its
+    feed would.
+    """
+    state = _in_window(start, end).aggregate(last=Max("id"), rows=Count("id"))
+    return state["last"] or 0, state["rows"]
+
+
+def order_versions(
+    start: Optional[datetime] = None, end: Optional[datetime] = None
+) -> Dict[int, int]:
+    """``{order id: version}`` for every order in the window, in one query."""
+    return dict(
+        _in_window(start, end).order_by()
+        .values("order_id")
+        .annotate(version=Max("id"))
+        .values_list("order_id", "version")
+    )
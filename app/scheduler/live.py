@@ -0,0 +1,127 @@
+# scheduler/live.py
+"""
+Live scheduler change notifications.
+
+Writers call ``notify_orders`` (AddDelayView, UpdateStatusView, applied
+re-plans), which sends a PostgreSQL ``NOTIFY`` on ``CHANNEL``.  Postgres
+delivers it on commit to every listening process, so this works across
+gunicorn workers and hosts without a broker.
+
+Readers are ``SchedulerEventsView`` streams (server-sent events) served
+by the ASGI app.  Each ASGI process keeps one ``LISTEN`` connection,
+opened when the first stream subscribes and closed with the last, and
+``ChangeHub`` fans its notifications out to the open streams' queues on
+the event loop.  No thread or worker is held per client.
+
+Payloads are JSON: ``{"kind": "delay", "orders": [12, 13]}``.
+"""
+import asyncio
+import json
+import logging
+
+import psycopg2
+from django.db import connection, connections
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "scheduler_changes"
+# NOTIFY payloads must stay under 8000 bytes
+NOTIFY_BATCH = 500
+QUEUE_SIZE = 100
+RESYNC = json.dumps({"kind": "resync", "orders": []})
+
+
+def notify_orders(order_ids, kind: str) -> None:
+    """
+    Tell open schedulers that these orders changed (sent when the
+    transaction commits).
+    """
+    ids = sorted({int(pk) for pk in order_ids if pk is not None})
+    with connection.cursor() as cursor:
+        for i in range(0, len(ids), NOTIFY_BATCH):
+            batch = ids[i:i + NOTIFY_BATCH]
+            payload = json.dumps({"kind": kind, "orders": batch})
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+
+class ChangeHub:
+    """One LISTEN connection per process, fanned out to subscriber queues."""
+
+    def __init__(self, channel: str = CHANNEL):
+        self.channel = channel
+        self._queues = set()
+        self._conn = None
+        self._loop = None
+        self._lock = None
+        self._lock_loop = None
+
+    def _loop_lock(self, loop) -> asyncio.Lock:
+        # asyncio primitives belong to one loop; tests run several
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        async with self._loop_lock(loop):
+            if self._conn is not None and self._loop is not loop:
+                self._close()
+            if self._conn is None:
+                self._conn = await asyncio.to_thread(self._connect)
+                self._loop = loop
+                loop.add_reader(self._conn.fileno(), self._on_readable)
+            self._queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._queues.discard(queue)
+        if not self._queues:
+            self._close()
+
+    def publish(self, payload: str) -> None:
+        for queue in list(self._queues):
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                # A stalled client: let it catch up with one full refresh
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def _connect(self):
+        params = connections["default"].get_connection_params()
+        conn = psycopg2.connect(**params)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return conn
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except psycopg2.Error:
+            logger.warning("Scheduler change listener lost its connection",
+                           exc_info=True)
+            self._close()
+            for queue in list(self._queues):
+                queue.put_nowait(RESYNC)
+            return
+        while self._conn.notifies:
+            self.publish(self._conn.notifies.pop(0).payload)
+
+    def _close(self) -> None:
+        if self._conn is None:
+            return
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.remove_reader(self._conn.fileno())
+        try:
+            self._conn.close()
+        except psycopg2.Error:
+            pass
+        self._conn = None
+        self._loop = None
+
+
+hub = ChangeHub()
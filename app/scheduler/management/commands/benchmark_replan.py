@@ -0,0 +1,134 @@
+# scheduler/management/commands/benchmark_replan.py
+"""
+Time the tank-capacity re-plan against a synthetic open order book.
+
+    python manage.py benchmark_replan
+    python manage.py benchmark_replan --orders 300 --tanks 12 --steps 10 \
+        --days 5
+
+Creates ``--steps`` methods spread over ``--tanks`` tanks, a process
+per order pattern, and ``--orders`` planned orders starting within the
+next ``--days`` days, then times the proposal (load + sweep + plan) and
+the apply, and reports the conflicts before and after.  Everything runs
+in a transaction that is rolled back at the end.
+"""
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from methods.models import Method
+from process.models import Process, ProcessStep
+from scheduler.capacity import replan
+from scheduler.models import ManufacturingOrder
+from scheduler.timeline import refresh_timelines
+from standard.models import Classification, Standard, StandardProcess
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the tank-capacity re-plan on synthetic open orders "
+        "(rolled back afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=300,
+                            help="Open orders to plan.")
+        parser.add_argument("--tanks", type=int, default=12,
+                            help="Distinct tanks.")
+        parser.add_argument("--steps", type=int, default=10,
+                            help="Steps per process.")
+        parser.add_argument("--processes", type=int, default=8,
+                            help="Distinct processes.")
+        parser.add_argument("--days", type=int, default=5,
+                            help="Spread order starts over this many days.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, options):
+        rng = random.Random(options["seed"])
+        standard = Standard.objects.create(
+            name="BENCH-REPLAN", revision="A", description="Benchmark",
+            author="Benchmark",
+        )
+        standard_process = StandardProcess.objects.create(
+            standard=standard, process_type="clean", title="Benchmark"
+        )
+        processes = []
+        for p in range(options["processes"]):
+            classification = Classification.objects.create(
+                standard=standard, class_name=f"Class {p}"
+            )
+            process = Process.objects.create(
+                standard=standard, standard_process=standard_process,
+                classification=classification,
+            )
+            for number in range(1, options["steps"] + 1):
+                method = Method.objects.create(
+                    title=f"Bench {p}.{number}", method_type="processing_tank",
+                    tank_name=f"BENCH-T{rng.randrange(options['tanks'])}",
+                    touch_time_max=rng.randint(2, 10),
+                    run_time_max=rng.randint(5, 45),
+                )
+                ProcessStep.objects.create(
+                    process=process, method=method, step_number=number
+                )
+            processes.append(process)
+
+        now = timezone.now()
+        span = options["days"] * 24 * 60
+        orders = ManufacturingOrder.objects.bulk_create([
+            ManufacturingOrder(
+                work_order=f"BENCH-R{i}",
+                occurrence=1,
+                part_number="P-1",
+                quantity=1,
+                process=rng.choice(processes),
+                planned_start_time=(
+                    now + timedelta(minutes=rng.randrange(span))
+                ),
+                status="in_progress" if i % 25 == 0 else "planned",
+            )
+            for i in range(options["orders"])
+        ])
+        # bulk_create sends no signals
+        refresh_timelines(order.pk for order in orders)
+
+    def _run(self, options):
+        self._seed(options)
+
+        started = time.perf_counter()
+        proposal = replan()
+        proposed_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        applied = replan(apply=True)
+        applied_ms = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(
+            f"{len(proposal.orders)} open orders, {options['tanks']} tanks, "
+            f"{options['steps']} steps each"
+        )
+        self.stdout.write(
+            f"conflicts: {len(proposal.conflicts)} before, "
+            f"{len(proposal.remaining)} after (between fixed orders); "
+            f"{len(proposal.shifts)} orders moved"
+        )
+        self.stdout.write(
+            f"propose: {proposed_ms:.1f} ms   apply: {applied_ms:.1f} ms "
+            f"({len(applied.shifts)} orders)"
+        )
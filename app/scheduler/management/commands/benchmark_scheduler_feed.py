@@ -0,0 +1,160 @@
+# scheduler/management/commands/benchmark_scheduler_feed.py
+"""
+Time the scheduler feed against a large order history.
+
+    python manage.py benchmark_scheduler_feed
+    python manage.py benchmark_scheduler_feed --orders 10000 --days 730 \
+        --repeat 5
+
+Creates a throw-away process and ``--orders`` manufacturing orders spread
+over the last ``--days`` days (a few with delays), builds their timeline
+(scheduler/timeline.py), requests the feed for
+a one-day and a one-week window and unbounded, and reports time, query
+count and payload size for each.  Everything runs in a transaction that
+is rolled back at the end.
+"""
+import json
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from methods.models import Method
+from process.models import Process, ProcessStep
+from scheduler.models import DelayLog, ManufacturingOrder, ScheduledStep
+from scheduler.timeline import refresh_timelines
+from scheduler.views import SchedulerDataView
+from standard.models import Standard, StandardProcess
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the scheduler feed with a large synthetic order history "
+        "(rolled back afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orders", type=int, default=10_000,
+                            help="Historic orders to create.")
+        parser.add_argument("--days", type=int, default=730,
+                            help="Spread orders over this many past days.")
+        parser.add_argument("--steps", type=int, default=12,
+                            help="Steps in the benchmark process.")
+        parser.add_argument("--repeat", type=int, default=3,
+                            help="Requests per window.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _seed(self, options):
+        standard = Standard.objects.create(
+            name="BENCH-FEED", revision="A", description="Benchmark",
+            author="Benchmark",
+        )
+        standard_process = StandardProcess.objects.create(
+            standard=standard, process_type="clean", title="Benchmark"
+        )
+        process = Process.objects.create(
+            standard=standard, standard_process=standard_process
+        )
+        for number in range(1, options["steps"] + 1):
+            method = Method.objects.create(
+                title=f"Bench step {number}", method_type="manual_method",
+                touch_time_max=10, run_time_max=20,
+            )
+            ProcessStep.objects.create(
+                process=process, method=method, step_number=number
+            )
+
+        now = timezone.now()
+        span = options["days"] * 24 * 60
+        count = max(options["orders"], 1)
+        orders = ManufacturingOrder.objects.bulk_create(
+            [
+                ManufacturingOrder(
+                    work_order=f"BENCH-{i}",
+                    occurrence=1,
+                    part_number=f"P-{i % 500}",
+                    quantity=1,
+                    process=process,
+                    planned_start_time=(
+                        now - timedelta(minutes=span * (count - i) // count)
+                    ),
+                    status="done" if i < count * 0.9 else "planned",
+                )
+                for i in range(count)
+            ],
+            batch_size=2000,
+        )
+        DelayLog.objects.bulk_create(
+            [
+                DelayLog(order=order, step_number=1, added_minutes=15,
+                         reason="bench")
+                for order in orders[::20]
+            ],
+            batch_size=2000,
+        )
+        # bulk_create sends no signals
+        started = time.perf_counter()
+        refresh_timelines(order.pk for order in orders)
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(f"timeline built in {elapsed:.0f} ms")
+        # Fresh planner statistics, as autovacuum would have on a real table
+        with connection.cursor() as cursor:
+            for model in (ManufacturingOrder, DelayLog, ScheduledStep):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+        return now
+
+    def _run(self, options):
+        now = self._seed(options)
+        factory = RequestFactory()
+        view = SchedulerDataView.as_view()
+        url = reverse("scheduler:data")
+
+        def window(before, after):
+            return {"start": (now - before).isoformat(),
+                    "end": (now + after).isoformat()}
+
+        windows = [
+            ("day", window(timedelta(hours=12), timedelta(hours=12))),
+            ("week", window(timedelta(days=6), timedelta(days=1))),
+            ("unbounded", {}),
+        ]
+        self.stdout.write(
+            f"{options['orders']} orders over {options['days']} days, "
+            f"{options['steps']} steps each"
+        )
+        self.stdout.write(
+            f"{'window':>10}  {'orders':>7}  {'queries':>7}  "
+            f"{'median ms':>10}  {'KiB':>8}"
+        )
+        for label, params in windows:
+            timings = []
+            for _ in range(max(options["repeat"], 1)):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = view(factory.get(url, params))
+                    timings.append((time.perf_counter() - started) * 1000)
+            payload = json.loads(response.content)
+            shown = sum(1 for r in payload["resources"] if "parentId" not in r)
+            query_count = len(queries.captured_queries)
+            kib = len(response.content) / 1024
+            self.stdout.write(
+                f"{label:>10}  {shown:>7}  {query_count:>7}  "
+                f"{statistics.median(timings):>10.1f}  {kib:>8.1f}"
+            )
@@ -0,0 +1,32 @@
+# scheduler/management/commands/rebuild_timeline.py
+"""
+Rewrite the materialised scheduler timeline (``ScheduledStep``).
+
+    python manage.py rebuild_timeline
+    python manage.py rebuild_timeline --order 12 --order 13
+
+Signals keep the timeline current; run this after bulk imports or SQL
+edits of orders, delays, steps or methods, which send none.
+"""
+from django.core.management.base import BaseCommand
+
+from scheduler.models import ManufacturingOrder
+from scheduler.timeline import refresh_timelines
+
+
+class Command(BaseCommand):
+    help = "Rebuild the scheduler timeline for all orders, or the given ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--order", type=int, action="append",
+                            dest="orders", help="Order id (repeatable).")
+
+    def handle(self, *args, **options):
+        order_ids = (
+            options["orders"]
+            or ManufacturingOrder.objects.values_list("id", flat=True)
+        )
+        written = refresh_timelines(order_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {written} scheduled steps.")
+        )
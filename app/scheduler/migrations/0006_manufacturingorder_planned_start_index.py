@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process', '0013_process_search_vector'),
+        ('scheduler', '0005_alter_delaylog_options_alter_delaylog_added_minutes_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='manufacturingorder',
+            index=models.Index(
+                fields=['planned_start_time'],
+                name='sched_mo_planned_start_idx',
+            ),
+        ),
+    ]
@@ -0,0 +1,117 @@
+# Generated by Django 5.2 on 2026-10-18 11:11
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_timeline(apps, schema_editor):
+    # Same waterfall as scheduler/timeline.py:build_timeline
+    ManufacturingOrder = apps.get_model('scheduler', 'ManufacturingOrder')
+    DelayLog = apps.get_model('scheduler', 'DelayLog')
+    ScheduledStep = apps.get_model('scheduler', 'ScheduledStep')
+    ProcessStep = apps.get_model('process', 'ProcessStep')
+
+    steps = defaultdict(list)
+    rows = (
+        ProcessStep.objects
+        .order_by('process_id', 'step_number')
+        .values_list(
+            'process_id', 'step_number', 'method__title', 'method__tank_name',
+            'method__touch_time_max', 'method__run_time_max',
+        )
+    )
+    for process_id, number, title, tank, touch, run in rows.iterator():
+        if title is not None:
+            minutes = max(int(touch or 0) + int(run or 0), 1)
+            steps[process_id].append((number, title, tank or '', minutes))
+
+    delays = defaultdict(dict)
+    totals = (
+        DelayLog.objects
+        .values('order_id', 'step_number')
+        .annotate(minutes=Sum('added_minutes'))
+        .order_by()
+    )
+    for row in totals:
+        delays[row['order_id']][row['step_number']] = int(row['minutes'] or 0)
+
+    batch = []
+    orders = ManufacturingOrder.objects.values_list(
+        'id', 'process_id', 'planned_start_time'
+    )
+    for order_id, process_id, pointer in orders.iterator():
+        for number, title, tank, minutes in steps[process_id]:
+            extra = delays[order_id].get(number, 0)
+            end = pointer + timedelta(minutes=minutes + extra)
+            batch.append(ScheduledStep(
+                order_id=order_id, step_number=number, title=title, tank=tank,
+                start_time=pointer, end_time=end, delay_minutes=extra,
+                is_delayed=extra > 0,
+            ))
+            pointer = end
+        if len(batch) >= 1000:
+            ScheduledStep.objects.bulk_create(batch)
+            batch = []
+    ScheduledStep.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process', '0013_process_search_vector'),
+        ('scheduler', '0006_manufacturingorder_planned_start_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledStep',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('step_number', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('tank', models.CharField(blank=True, max_length=255)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('delay_minutes', models.PositiveIntegerField(default=0)),
+                ('is_delayed', models.BooleanField(default=False)),
+                (
+                    'order',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='timeline',
+                        to='scheduler.manufacturingorder',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Scheduled Step',
+                'verbose_name_plural': 'Scheduled Steps',
+                'ordering': ['order', 'step_number'],
+                'indexes': [
+                    models.Index(
+                        fields=['end_time', 'start_time'],
+                        name='sched_step_window_idx',
+                    )
+                ],
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('order', 'step_number'),
+                        name='uq_scheduled_step_order_step',
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_timeline, migrations.RunPython.noop),
+    ]
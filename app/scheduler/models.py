@@ -49,6 +49,11 @@ class ManufacturingOrder(models.Model):
         ordering = ["planned_start_time"]
         indexes = [
             models.Index(fields=["work_order", "occurrence"]),
+            # Scheduler feed window (scheduler/feed.py)
+            models.Index(
+                fields=["planned_start_time"],
+                name="sched_mo_planned_start_idx",
+            ),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -105,3 +110,47 @@ class DelayLog(models.Model):
 
     def __str__(self) -> str:
         return f"{self.order.work_order} Step {self.step_number} Delay"
+
+
+class ScheduledStep(models.Model):
+    """
+    One step of an order's waterfall, materialised.
+
+    Rebuilt per order by scheduler/timeline.py whenever the order, its
+    delays, its process steps or their methods change
+    (scheduler/signals.py), so the scheduler feed reads a range of rows
+    instead of replaying every order's steps on each request.
+    """
+
+    order = models.ForeignKey(
+        ManufacturingOrder,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    step_number = models.PositiveIntegerField()
+    title = models.CharField(max_length=255)
+    tank = models.CharField(max_length=255, blank=True)
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    delay_minutes = models.PositiveIntegerField(default=0)
+    is_delayed = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Scheduled Step"
+        verbose_name_plural = "Scheduled Steps"
+        ordering = ["order", "step_number"]
+        indexes = [
+            # Scheduler feed window: end_time > start AND start_time < end
+            models.Index(
+                fields=["end_time", "start_time"], name="sched_step_window_idx"
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["order", "step_number"],
+                name="uq_scheduled_step_order_step",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.order.work_order} Step {self.step_number}"
@@ -0,0 +1,31 @@
+# scheduler/renderers.py
+"""Large timeline rebuilds run by the job queue (see jobs/registry.py)."""
+import json
+
+from app.disk_cache import digest
+from jobs.registry import register
+from process.models import Process
+
+from .timeline import refresh_process_timelines
+
+
+def timeline_key(process_ids):
+    # updated_at moves with every step/method change, so a later edit
+    # queues a new rebuild instead of joining one that may have read
+    # the old steps
+    versions = Process.objects.filter(pk__in=process_ids).values_list(
+        "id", "updated_at"
+    )
+    return "timeline-" + digest(
+        sorted((pk, at.isoformat()) for pk, at in versions)
+    )
+
+
+@register(
+    "scheduler_timeline",
+    key=timeline_key,
+    content_type="application/json",
+)
+def scheduler_timeline(process_ids):
+    written = refresh_process_timelines(process_ids)
+    return json.dumps({"steps": written}).encode()
@@ -0,0 +1,45 @@
+# scheduler/signals.py
+"""
+Keep the materialised timeline (scheduler/timeline.py) in step with the
+orders, delays and processes it is built from.  Each receiver rebuilds
+only the orders the change affects; process edits that cannot move a
+step (``timing=False``) rebuild nothing.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from process.signals import processes_changed
+
+from .models import DelayLog, ManufacturingOrder
+from .timeline import refresh_timelines, schedule_process_timelines
+
+
+def _deleting_orders(origin):
+    """
+    True when a delete cascades from ManufacturingOrder (its timeline goes
+    with it).
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is ManufacturingOrder
+    return isinstance(origin, ManufacturingOrder)
+
+
+@receiver(post_save, sender=ManufacturingOrder)
+def order_saved(sender, instance, **kwargs):
+    refresh_timelines([instance.pk])
+
+
+@receiver(post_save, sender=DelayLog)
+@receiver(post_delete, sender=DelayLog)
+def delay_changed(sender, instance, **kwargs):
+    deleted = kwargs["signal"] is post_delete
+    if deleted and _deleting_orders(kwargs.get("origin")):
+        return
+    refresh_timelines([instance.order_id])
+
+
+@receiver(processes_changed)
+def process_changed(sender, process_ids, timing=True, **kwargs):
+    if timing:
+        schedule_process_timelines(process_ids)
@@ -1,8 +1,37 @@
+import asyncio
+import io
 import json
 import os
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest.mock import patch
 
-from django.test import Client, TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from asgiref.sync import sync_to_async
+from django.test import (
+    AsyncClient, Client, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+
+from jobs.models import RenderJob
+from jobs.queue import run_now
+from methods.models import Method
+from process import sequencing
+from process.models import Process, ProcessStep
+from standard.models import Standard, StandardProcess
+
+from .analytics import (
+    compute_tank_utilisation, split_reasons, sweep, tank_utilisation,
+)
+from .capacity import Booking, PlanOrder, find_conflicts, plan, replan
+from .feed import parse_instant, timeline_in_window
+from .live import CHANNEL, ChangeHub, hub, notify_orders
+from .models import DelayLog, ManufacturingOrder, ScheduledStep
 
 
 class TestCSRFProtection(TestCase):
@@ -155,3 +184,842 @@ class TestNoCSRFExemptInViews(TestCase):
             source,
             "csrf_exempt is still imported in scheduler/views.py."
         )
+
+
+# ---------------------------------------------------------------------------
+# Scheduler feed window
+# ---------------------------------------------------------------------------
+
+class _FeedBase(TestCase):
+    """A two-step process (10 + 20 minutes) and a fixed reference time."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="planner", password="pass"
+        )
+        standard = Standard.objects.create(
+            name="AMS-2404", revision="A", description="Test", author="Test"
+        )
+        standard_process = StandardProcess.objects.create(
+            standard=standard, process_type="electroplate",
+            title="Cadmium Plate",
+        )
+        cls.process = Process.objects.create(
+            standard=standard, standard_process=standard_process
+        )
+        for number, (touch, run) in enumerate([(5, 5), (10, 10)], start=1):
+            method = Method.objects.create(
+                title=f"Step {number}", method_type="manual_method",
+                touch_time_max=touch, run_time_max=run,
+                tank_name=f"T{number}",
+            )
+            ProcessStep.objects.create(
+                process=cls.process, method=method, step_number=number
+            )
+        cls.t0 = timezone.make_aware(datetime(2026, 3, 2, 8, 0))
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        suffixes = {'flowcharts': '.svg', 'travelers': '.pdf',
+                    'analytics': '.json', 'jobs': '.bin'}
+        override = override_settings(RENDER_CACHES={
+            name: {'DIR': Path(self._tmp.name) / name,
+                   'MAX_BYTES': 1024 * 1024, 'SUFFIX': suffix}
+            for name, suffix in suffixes.items()
+        })
+        override.enable()
+        self.addCleanup(override.disable)
+        self.client.force_login(self.user)
+
+    def make_order(self, work_order, start, status="planned"):
+        return ManufacturingOrder.objects.create(
+            work_order=work_order, part_number="P-1", quantity=1,
+            process=self.process, planned_start_time=start, status=status,
+        )
+
+    def feed(self, start=None, end=None):
+        params = {}
+        if start is not None:
+            params["start"] = start.isoformat()
+        if end is not None:
+            params["end"] = end.isoformat()
+        response = self.client.get(reverse("scheduler:data"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    @staticmethod
+    def order_ids(payload):
+        return {
+            e["extendedProps"]["orderId"]
+            for e in payload["events"]
+            if e["extendedProps"]["isSummary"]
+        }
+
+
+class TestSchedulerFeedWindow(_FeedBase):
+    def test_unbounded_feed_returns_every_order(self):
+        a = self.make_order("WO-A", self.t0)
+        b = self.make_order("WO-B", self.t0 + timedelta(days=30))
+        self.assertEqual(self.order_ids(self.feed()), {a.id, b.id})
+
+    def test_window_excludes_orders_outside_the_range(self):
+        inside = self.make_order("WO-IN", self.t0 + timedelta(hours=2))
+        self.make_order("WO-BEFORE", self.t0 - timedelta(days=3))
+        self.make_order("WO-AFTER", self.t0 + timedelta(days=3))
+        payload = self.feed(self.t0, self.t0 + timedelta(days=1))
+        self.assertEqual(self.order_ids(payload), {inside.id})
+        self.assertEqual(
+            {r["id"] for r in payload["resources"] if "parentId" not in r},
+            {f"order-{inside.id}"},
+        )
+
+    def test_order_still_running_at_window_start_is_included(self):
+        # Runs 07:40-08:10; the window opens at 08:00
+        running = self.make_order("WO-RUN", self.t0 - timedelta(minutes=20))
+        self.assertEqual(
+            self.order_ids(self.feed(self.t0, self.t0 + timedelta(hours=1))),
+            {running.id},
+        )
+
+    def test_order_ending_at_window_start_is_excluded(self):
+        self.make_order("WO-END", self.t0 - timedelta(minutes=30))
+        self.assertEqual(
+            self.order_ids(self.feed(self.t0, self.t0 + timedelta(hours=1))),
+            set(),
+        )
+
+    def test_delays_extend_the_order_into_the_window(self):
+        order = self.make_order("WO-LATE", self.t0 - timedelta(minutes=60))
+        self.assertEqual(
+            self.order_ids(self.feed(self.t0, self.t0 + timedelta(hours=1))),
+            set(),
+        )
+        DelayLog.objects.create(
+            order=order, step_number=2, added_minutes=45, reason="rack"
+        )
+        payload = self.feed(self.t0, self.t0 + timedelta(hours=1))
+        self.assertEqual(self.order_ids(payload), {order.id})
+        summary = next(
+            e for e in payload["events"] if e["id"] == f"summary-{order.id}"
+        )
+        self.assertEqual(
+            summary["end"], (self.t0 + timedelta(minutes=15)).isoformat()
+        )
+
+    def test_window_returns_every_step_of_an_overlapping_order(self):
+        # Only step 2 (08:10-08:30) overlaps, but the order is drawn whole
+        order = self.make_order("WO-IN", self.t0)
+        self.make_order("WO-OLD", self.t0 - timedelta(days=10))
+        start = self.t0 + timedelta(minutes=15)
+        rows = list(timeline_in_window(start, self.t0 + timedelta(hours=1)))
+        self.assertEqual(
+            [(r["order_id"], r["step_number"]) for r in rows],
+            [(order.id, 1), (order.id, 2)],
+        )
+
+    def test_feed_reads_the_timeline_in_one_query(self):
+        # Plus the ETag's version aggregate
+        self.make_order("WO-IN", self.t0)
+        with CaptureQueriesContext(connection) as queries:
+            self.feed(self.t0, self.t0 + timedelta(days=1))
+        feed_queries = [
+            q for q in queries.captured_queries if "scheduler_" in q["sql"]
+        ]
+        self.assertEqual(len(feed_queries), 2)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.make_order("WO-0", self.t0)
+        with CaptureQueriesContext(connection) as one:
+            self.feed(self.t0 - timedelta(days=1), self.t0 + timedelta(days=1))
+        for i in range(1, 6):
+            order = self.make_order(f"WO-{i}", self.t0 + timedelta(hours=i))
+            DelayLog.objects.create(
+                order=order, step_number=1, added_minutes=5, reason="wait"
+            )
+        with CaptureQueriesContext(connection) as six:
+            payload = self.feed(
+                self.t0 - timedelta(days=1), self.t0 + timedelta(days=1)
+            )
+        self.assertEqual(len(self.order_ids(payload)), 6)
+        self.assertEqual(len(six.captured_queries), len(one.captured_queries))
+
+
+class TestScheduledStepTimeline(_FeedBase):
+    def timeline(self, order):
+        return list(
+            ScheduledStep.objects.filter(order=order)
+            .values_list("step_number", "tank", "start_time", "end_time",
+                         "delay_minutes", "is_delayed")
+        )
+
+    def minutes(self, n):
+        return self.t0 + timedelta(minutes=n)
+
+    def test_new_order_gets_its_timeline(self):
+        order = self.make_order("WO-1", self.t0)
+        self.assertEqual(self.timeline(order), [
+            (1, "T1", self.t0, self.minutes(10), 0, False),
+            (2, "T2", self.minutes(10), self.minutes(30), 0, False),
+        ])
+
+    def test_moving_the_order_moves_its_timeline(self):
+        order = self.make_order("WO-1", self.t0)
+        order.planned_start_time = self.minutes(60)
+        order.save()
+        self.assertEqual(
+            self.timeline(order)[0][2:4], (self.minutes(60), self.minutes(70))
+        )
+
+    def test_add_delay_view_shifts_later_steps(self):
+        order = self.make_order("WO-1", self.t0)
+        other = self.make_order("WO-2", self.t0)
+        untouched = self.timeline(other)
+        response = self.client.post(
+            reverse("scheduler:add_delay"),
+            data=json.dumps({"orderId": order.id, "stepNumber": 1,
+                             "minutes": 15, "reason": "rack"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.timeline(order), [
+            (1, "T1", self.t0, self.minutes(25), 15, True),
+            (2, "T2", self.minutes(25), self.minutes(45), 0, False),
+        ])
+        self.assertEqual(self.timeline(other), untouched)
+
+    def test_removing_a_delay_restores_the_timeline(self):
+        order = self.make_order("WO-1", self.t0)
+        delay = DelayLog.objects.create(
+            order=order, step_number=2, added_minutes=5, reason="wait"
+        )
+        self.assertEqual(self.timeline(order)[1][3], self.minutes(35))
+        delay.delete()
+        self.assertEqual(self.timeline(order)[1][3], self.minutes(30))
+
+    def test_update_status_view_keeps_the_timeline(self):
+        order = self.make_order("WO-1", self.t0)
+        before = self.timeline(order)
+        response = self.client.post(
+            reverse("scheduler:update_status"),
+            data=json.dumps({"orderId": order.id, "status": "done"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.timeline(order), before)
+        summary = next(e for e in self.feed()["events"]
+                       if e["id"] == f"summary-{order.id}")
+        self.assertTrue(summary["extendedProps"]["isCompleted"])
+
+    def test_method_time_change_rebuilds_orders_using_it(self):
+        order = self.make_order("WO-1", self.t0)
+        method = Method.objects.get(title="Step 1")
+        method.run_time_max = 35
+        method.save()
+        self.assertEqual(
+            self.timeline(order)[1][2:4], (self.minutes(40), self.minutes(60))
+        )
+
+    def test_process_edit_rebuilds_orders_on_it(self):
+        order = self.make_order("WO-1", self.t0)
+        method = Method.objects.create(
+            title="Dry", method_type="manual_method", run_time_max=5
+        )
+        sequencing.insert_step(self.process, method, position=1)
+        self.assertEqual(
+            [(n, start, end)
+             for n, _, start, end, _, _ in self.timeline(order)],
+            [(1, self.t0, self.minutes(5)),
+             (2, self.minutes(5), self.minutes(15)),
+             (3, self.minutes(15), self.minutes(35))],
+        )
+
+    def step_ids(self, order):
+        return set(
+            ScheduledStep.objects.filter(order=order)
+            .values_list("id", flat=True)
+        )
+
+    def test_untimed_method_and_parameter_edits_keep_timelines(self):
+        order = self.make_order("WO-1", self.t0)
+        before = self.step_ids(order)
+        method = Method.objects.get(title="Step 1")
+        method.description = "Rinse twice"
+        method.save()
+        method.recorded_parameters.create(description="Rinse pH")
+        self.assertEqual(self.step_ids(order), before)
+        method.touch_time_max = 6
+        method.save()
+        self.assertNotEqual(self.step_ids(order), before)
+
+    def test_process_edit_skips_old_finished_orders(self):
+        now = timezone.now()
+        month, day = timedelta(days=30), timedelta(days=1)
+        old = self.make_order("WO-1", now - month, status="done")
+        recent = self.make_order("WO-2", now - day, status="done")
+        late = self.make_order("WO-3", now - month)
+        before = {order: self.step_ids(order) for order in (old, recent, late)}
+        method = Method.objects.get(title="Step 1")
+        method.save(update_fields=["run_time_max"])
+        self.assertEqual(self.step_ids(old), before[old])
+        self.assertNotEqual(self.step_ids(recent), before[recent])
+        self.assertNotEqual(self.step_ids(late), before[late])
+
+    @override_settings(SCHEDULER_TIMELINE_QUEUE_AT=1)
+    def test_large_process_rebuild_is_queued(self):
+        orders = [self.make_order(f"WO-{i}", self.t0) for i in range(2)]
+        method = Method.objects.get(title="Step 1")
+        method.run_time_max = 35
+        method.save()
+        self.assertEqual(self.timeline(orders[0])[1][2], self.minutes(10))
+        job = RenderJob.objects.get(kind="scheduler_timeline")
+        self.assertEqual(job.params, {"process_ids": [self.process.pk]})
+        run_now(job)
+        for order in orders:
+            self.assertEqual(
+                self.timeline(order)[1][2:4],
+                (self.minutes(40), self.minutes(60)),
+            )
+
+    def test_deleting_an_order_with_delays_drops_its_timeline(self):
+        order = self.make_order("WO-1", self.t0)
+        DelayLog.objects.create(
+            order=order, step_number=1, added_minutes=5, reason="wait"
+        )
+        order.delete()
+        self.assertFalse(ScheduledStep.objects.exists())
+
+    def test_rebuild_command_restores_bulk_written_orders(self):
+        order = self.make_order("WO-1", self.t0)
+        ManufacturingOrder.objects.filter(pk=order.pk).update(
+            planned_start_time=self.minutes(60)
+        )
+        call_command("rebuild_timeline", stdout=io.StringIO())
+        self.assertEqual(self.timeline(order)[0][2], self.minutes(60))
+
+
+# ---------------------------------------------------------------------------
+# ETag and delta feed
+# ---------------------------------------------------------------------------
+
+class TestSchedulerFeedChanges(_FeedBase):
+    def window(self, **extra):
+        return {"start": self.t0.isoformat(),
+                "end": (self.t0 + timedelta(days=1)).isoformat(), **extra}
+
+    def get(self, name, params, **headers):
+        return self.client.get(reverse(name), params, **headers)
+
+    def test_unchanged_feed_is_not_modified(self):
+        self.make_order("WO-1", self.t0)
+        first = self.get("scheduler:data", self.window())
+        self.assertIn("ETag", first)
+        self.assertIn("no-cache", first["Cache-Control"])
+        again = self.get(
+            "scheduler:data", self.window(), HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+    def test_etag_changes_with_delays_status_and_deletes(self):
+        order = self.make_order("WO-1", self.t0)
+        other = self.make_order("WO-2", self.t0)
+        tags = [self.get("scheduler:data", self.window())["ETag"]]
+        DelayLog.objects.create(
+            order=order, step_number=1, added_minutes=5, reason="wait"
+        )
+        tags.append(self.get("scheduler:data", self.window())["ETag"])
+        order.mark_done()
+        tags.append(self.get("scheduler:data", self.window())["ETag"])
+        other.delete()
+        tags.append(self.get("scheduler:data", self.window())["ETag"])
+        self.assertEqual(len(set(tags)), 4)
+
+    def test_etag_depends_on_the_window(self):
+        self.make_order("WO-1", self.t0)
+        day = self.get("scheduler:data", self.window())["ETag"]
+        end = (self.t0 + timedelta(days=7)).isoformat()
+        week = self.get("scheduler:data", self.window(end=end))["ETag"]
+        self.assertNotEqual(day, week)
+
+    def test_changes_returns_only_orders_past_the_cursor(self):
+        a = self.make_order("WO-A", self.t0)
+        b = self.make_order("WO-B", self.t0 + timedelta(hours=1))
+        full = self.get("scheduler:data", self.window()).json()
+        self.assertEqual(set(full["versions"]), {str(a.pk), str(b.pk)})
+
+        nothing = self.get(
+            "scheduler:changes", self.window(since=full["cursor"])
+        ).json()
+        self.assertEqual((nothing["events"], nothing["resources"]), ([], []))
+        self.assertEqual(nothing["versions"], full["versions"])
+        self.assertEqual(nothing["cursor"], full["cursor"])
+
+        DelayLog.objects.create(
+            order=b, step_number=2, added_minutes=5, reason="wait"
+        )
+        delta = self.get(
+            "scheduler:changes", self.window(since=full["cursor"])
+        ).json()
+        self.assertEqual(self.order_ids(delta), {b.pk})
+        self.assertEqual(
+            {r["id"] for r in delta["resources"] if "parentId" not in r},
+            {f"order-{b.pk}"},
+        )
+        self.assertGreater(delta["cursor"], full["cursor"])
+        self.assertEqual(
+            delta["versions"][str(a.pk)], full["versions"][str(a.pk)]
+        )
+        self.assertNotEqual(
+            delta["versions"][str(b.pk)], full["versions"][str(b.pk)]
+        )
+
+    def test_changes_drops_orders_that_left_the_window(self):
+        a = self.make_order("WO-A", self.t0)
+        full = self.get("scheduler:data", self.window()).json()
+        a.planned_start_time = self.t0 + timedelta(days=3)
+        a.save()
+        delta = self.get(
+            "scheduler:changes", self.window(since=full["cursor"])
+        ).json()
+        self.assertEqual((delta["versions"], delta["events"]), ({}, []))
+
+    def test_changes_is_conditional_too(self):
+        self.make_order("WO-A", self.t0)
+        first = self.get("scheduler:changes", self.window(since=0))
+        self.assertEqual(first.status_code, 200)
+        again = self.get("scheduler:changes", self.window(since=0),
+                         HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_changes_rejects_a_bad_cursor(self):
+        response = self.get("scheduler:changes", self.window(since="abc"))
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------------------------------------------------------------------------
+# Tank capacity
+# ---------------------------------------------------------------------------
+
+class TestCapacityPlanner(TestCase):
+    """The planner core on plain integer minutes."""
+
+    def test_sweep_finds_each_overlap_once(self):
+        bookings = [
+            Booking(1, 1, "T1", 0, 10),
+            Booking(2, 1, "T1", 5, 15),
+            Booking(3, 1, "T1", 10, 20),   # touches 1, overlaps 2
+            Booking(4, 1, "T2", 0, 30),    # other tank
+            Booking(1, 2, "T1", 8, 9),     # same order as the first booking
+        ]
+        found = {
+            (c.tank, c.first.order_id, c.second.order_id, c.start, c.end)
+            for c in find_conflicts(bookings)
+        }
+        self.assertEqual(found, {
+            ("T1", 1, 2, 5, 10), ("T1", 2, 3, 10, 15), ("T1", 2, 1, 8, 9),
+        })
+
+    def test_plan_shifts_the_later_order_past_the_busy_tank(self):
+        first = PlanOrder(1, 0, [(1, "T1", 0, 10), (2, "T2", 10, 20)])
+        second = PlanOrder(2, 5, [(1, "T3", 0, 5), (2, "T2", 5, 20)])
+        # second needs T2 from 10 but first holds it until 30
+        self.assertEqual(plan([first, second]), {2: 25})
+
+    def test_plan_keeps_step_order_and_gaps_closed(self):
+        orders = [
+            PlanOrder(1, 0, [(1, "A", 0, 10), (2, "B", 10, 10)]),
+            PlanOrder(
+                2, 0, [(1, "C", 0, 5), (2, "A", 5, 10), (3, "B", 15, 10)]
+            ),
+        ]
+        moves = plan(orders)
+        starts = {o.order_id: moves.get(o.order_id, o.start) for o in orders}
+        bookings = [b for o in orders for b in o.bookings(starts[o.order_id])]
+        self.assertEqual(find_conflicts(bookings), [])
+        # A is busy until 10, so order 2 starts at 5 and its B step lands
+        # at 20-30
+        self.assertEqual(starts, {1: 0, 2: 5})
+
+    def test_fixed_orders_do_not_move(self):
+        running = PlanOrder(1, 10, [(1, "T1", 0, 10)], movable=False)
+        planned = PlanOrder(2, 0, [(1, "T1", 0, 15)])
+        self.assertEqual(plan([running, planned]), {2: 20})
+
+    def test_planned_orders_fill_gaps_that_fit(self):
+        busy = [
+            PlanOrder(1, 0, [(1, "T1", 0, 10)], movable=False),
+            PlanOrder(2, 30, [(1, "T1", 0, 10)], movable=False),
+        ]
+        short = PlanOrder(3, 0, [(1, "T1", 0, 20)])
+        long = PlanOrder(4, 0, [(1, "T1", 0, 25)])
+        self.assertEqual(plan(busy + [short, long]), {3: 10, 4: 40})
+
+    def test_steps_without_a_tank_are_unconstrained(self):
+        orders = [PlanOrder(1, 0, [(1, "", 0, 10)]),
+                  PlanOrder(2, 0, [(1, "", 0, 10)])]
+        self.assertEqual(plan(orders), {})
+
+
+class TestReplan(_FeedBase):
+    """
+    replan() and the re-plan API over the timeline; both process steps use
+    tanks T1 and T2.
+    """
+
+    def test_proposal_does_not_write(self):
+        self.make_order("WO-1", self.t0 + timedelta(days=1))
+        second = self.make_order("WO-2", self.t0 + timedelta(days=1))
+        with patch("scheduler.capacity.timezone.now", return_value=self.t0):
+            result = replan()
+        self.assertEqual(len(result.conflicts), 2)
+        self.assertEqual(result.remaining, [])
+        self.assertEqual(list(result.shifts), [second.pk])
+        second.refresh_from_db()
+        self.assertEqual(
+            second.planned_start_time, self.t0 + timedelta(days=1)
+        )
+
+    def test_apply_moves_the_order_and_its_timeline(self):
+        start = self.t0 + timedelta(days=1)
+        self.make_order("WO-1", start)
+        second = self.make_order("WO-2", start)
+        with patch("scheduler.capacity.timezone.now", return_value=self.t0):
+            result = replan(apply=True)
+        self.assertTrue(result.applied)
+        second.refresh_from_db()
+        # Step 1 (T1, 10 min) waits for WO-1's step 1; step 2 then follows
+        # WO-1's step 2
+        self.assertEqual(
+            second.planned_start_time, start + timedelta(minutes=20)
+        )
+        starts = ScheduledStep.objects.filter(order=second).values_list(
+            "start_time", flat=True
+        )
+        self.assertEqual(
+            list(starts),
+            [start + timedelta(minutes=20), start + timedelta(minutes=30)],
+        )
+
+    def test_running_and_done_orders(self):
+        start = self.t0 + timedelta(days=1)
+        planned = self.make_order("WO-P", start)
+        self.make_order(
+            "WO-R", start + timedelta(minutes=5), status="in_progress"
+        )
+        self.make_order("WO-D", start, status="done")
+        with patch("scheduler.capacity.timezone.now", return_value=self.t0):
+            result = replan()
+        # Done orders free their tanks; the running one stays put and the
+        # planned one waits
+        self.assertEqual(list(result.shifts), [planned.pk])
+        self.assertEqual(
+            result.shifts[planned.pk][1], start + timedelta(minutes=25)
+        )
+
+    def test_finished_orders_are_ignored(self):
+        self.make_order("WO-OLD-1", self.t0 - timedelta(days=2))
+        self.make_order("WO-OLD-2", self.t0 - timedelta(days=2))
+        with patch("scheduler.capacity.timezone.now", return_value=self.t0):
+            result = replan()
+        self.assertEqual((len(result.orders), result.shifts), (0, {}))
+
+    def test_api_proposes_on_get_and_applies_on_post(self):
+        start = timezone.now() + timedelta(days=1)
+        self.make_order("WO-1", start)
+        second = self.make_order("WO-2", start)
+        url = reverse("scheduler:replan")
+
+        proposal = self.client.get(url).json()
+        self.assertFalse(proposal["applied"])
+        self.assertEqual(proposal["orders"], 2)
+        self.assertEqual(
+            [
+                (s["orderId"], s["workOrder"], s["minutes"])
+                for s in proposal["shifts"]
+            ],
+            [(second.pk, "WO-2 #1", 20)],
+        )
+        self.assertEqual(
+            {c["tank"] for c in proposal["conflicts"]}, {"T1", "T2"}
+        )
+
+        applied = self.client.post(
+            url, data=json.dumps({"apply": True}),
+            content_type="application/json",
+        ).json()
+        self.assertTrue(applied["applied"])
+        self.assertEqual(applied["remaining"], [])
+        self.assertEqual(self.client.get(url).json()["conflicts"], [])
+
+    def test_api_rejects_bad_json(self):
+        response = self.client.post(
+            reverse("scheduler:replan"), data="{",
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+# ---------------------------------------------------------------------------
+# Tank utilisation analytics
+# ---------------------------------------------------------------------------
+
+class TestUtilisationSweep(TestCase):
+    """The NumPy sweep on plain minute intervals."""
+
+    def test_busy_wait_and_peak_per_tank(self):
+        # Tank 0: [0, 10) and [5, 20) overlap for 5; tank 1: [0, 10) and
+        # [10, 15) only touch
+        stats = sweep([0, 0, 1, 1], [0, 5, 0, 10], [10, 20, 10, 15], 2)
+        self.assertEqual(stats["busy"].tolist(), [20.0, 15.0])
+        self.assertEqual(stats["demand"].tolist(), [25.0, 15.0])
+        self.assertEqual(stats["wait"].tolist(), [5.0, 0.0])
+        self.assertEqual(stats["peak"].tolist(), [2, 1])
+        self.assertEqual(stats["steps"].tolist(), [2, 2])
+
+    def test_three_deep_pile_up(self):
+        stats = sweep([0, 0, 0], [0, 0, 0], [30, 30, 30], 1)
+        self.assertEqual(
+            (stats["busy"][0], stats["wait"][0], stats["peak"][0]),
+            (30.0, 60.0, 3),
+        )
+
+    def test_empty_intervals_are_ignored(self):
+        stats = sweep([0, 1], [5, 0], [5, 0], 2)
+        self.assertEqual(stats["busy"].tolist(), [0.0, 0.0])
+        self.assertEqual(stats["peak"].tolist(), [0, 0])
+
+    def test_split_reasons(self):
+        self.assertEqual(
+            split_reasons("\n[15m] Rack late\n[10m] rinse", 25),
+            [(15, "Rack late"), (10, "rinse")],
+        )
+        self.assertEqual(
+            split_reasons("Legacy note", 12), [(12, "Legacy note")]
+        )
+        self.assertEqual(split_reasons("", 0), [(0, "(no reason)")])
+
+
+class TestTankUtilisation(_FeedBase):
+    """
+    Utilisation over the timeline; step 1 runs in T1 (10 min), step 2 in
+    T2 (20 min).
+    """
+
+    def horizon(self):
+        return self.t0, self.t0 + timedelta(hours=1)
+
+    def test_clash_ranks_the_tank_with_queue_wait_first(self):
+        self.make_order("WO-1", self.t0)
+        self.make_order("WO-2", self.t0 + timedelta(minutes=10))
+        report = compute_tank_utilisation(*self.horizon())
+        self.assertEqual(report["horizonMinutes"], 60.0)
+        tanks = {t["tank"]: t for t in report["tanks"]}
+        # T1: [0, 10) and [10, 20); T2: [10, 30) and [20, 40) overlap for 10
+        self.assertEqual(
+            (tanks["T1"]["busyMinutes"], tanks["T1"]["queueWaitMinutes"]),
+            (20.0, 0.0),
+        )
+        t2 = tanks["T2"]
+        self.assertEqual(
+            (t2["busyMinutes"], t2["peakConcurrency"], t2["queueWaitMinutes"]),
+            (30.0, 2, 10.0),
+        )
+        self.assertEqual(tanks["T2"]["utilisation"], 50.0)
+        self.assertEqual([t["tank"] for t in report["tanks"]], ["T2", "T1"])
+        self.assertEqual(report["bottlenecks"], ["T2"])
+
+    def test_steps_are_clipped_to_the_horizon(self):
+        self.make_order("WO-1", self.t0 - timedelta(minutes=5))
+        report = compute_tank_utilisation(*self.horizon())
+        tanks = {t["tank"]: t for t in report["tanks"]}
+        self.assertEqual(tanks["T1"]["busyMinutes"], 5.0)
+        self.assertEqual(tanks["T2"]["busyMinutes"], 20.0)
+
+    def test_delay_reasons_follow_their_tank(self):
+        first = self.make_order("WO-1", self.t0)
+        self.make_order("WO-2", self.t0 + timedelta(minutes=10))
+        DelayLog.objects.create(
+            order=first, step_number=2, added_minutes=25,
+            reason="\n[15m] Rectifier\n[10m] rectifier",
+        )
+        report = compute_tank_utilisation(*self.horizon())
+        tanks = {t["tank"]: t for t in report["tanks"]}
+        self.assertEqual(tanks["T2"]["delayMinutes"], 25)
+        self.assertEqual(
+            tanks["T2"]["reasons"],
+            [{"reason": "rectifier", "minutes": 25, "count": 2}],
+        )
+        self.assertEqual(tanks["T1"]["reasons"], [])
+        self.assertEqual(report["bottleneckReasons"][0]["tanks"], ["T2"])
+
+    def test_cached_per_timeline_version(self):
+        order = self.make_order("WO-1", self.t0)
+        first = tank_utilisation(*self.horizon())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(tank_utilisation(*self.horizon()), first)
+        # Only the version aggregate on a hit
+        self.assertEqual(len(queries), 1)
+        DelayLog.objects.create(
+            order=order, step_number=1, added_minutes=10, reason="[10m] late"
+        )
+        self.assertNotEqual(
+            tank_utilisation(*self.horizon())["tanks"], first["tanks"]
+        )
+
+    def test_api_and_dashboard(self):
+        self.make_order("WO-1", self.t0)
+        start, end = self.horizon()
+        response = self.client.get(
+            reverse("scheduler:analytics_data"),
+            {"start": start.isoformat(), "end": end.isoformat()},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "success")
+        self.assertEqual(
+            {t["tank"] for t in response.json()["tanks"]}, {"T1", "T2"}
+        )
+
+        bad = self.client.get(
+            reverse("scheduler:analytics_data"),
+            {"start": end.isoformat(), "end": start.isoformat()},
+        )
+        self.assertEqual(bad.status_code, 400)
+
+        page = self.client.get(
+            reverse("scheduler:analytics"),
+            {"start": "2026-03-02", "end": "2026-03-03"},
+        )
+        self.assertEqual(page.status_code, 200)
+        self.assertContains(page, "T2")
+
+
+# ---------------------------------------------------------------------------
+# Live change notifications
+# ---------------------------------------------------------------------------
+
+class TestSchedulerEvents(_FeedBase):
+    def test_wsgi_request_gets_a_retry_instead_of_a_stream(self):
+        response = self.client.get(reverse("scheduler:events"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(response["X-Accel-Buffering"], "no")
+        self.assertTrue(response.content.startswith(b"retry: "))
+
+    def test_notify_orders_batches_payloads(self):
+        with CaptureQueriesContext(connection) as queries:
+            notify_orders(range(1, 1201), "replan")
+        notifies = [q["sql"] for q in queries.captured_queries
+                    if "pg_notify" in q["sql"]]
+        self.assertEqual(len(notifies), 3)
+        self.assertTrue(all(len(sql) < 8000 for sql in notifies))
+
+    def test_writers_notify(self):
+        order = self.make_order("WO-1", self.t0)
+        with patch("scheduler.views.notify_orders") as notify:
+            self.client.post(
+                reverse("scheduler:add_delay"),
+                data=json.dumps({"orderId": order.id, "stepNumber": 1,
+                                 "minutes": 5, "reason": "rack"}),
+                content_type="application/json",
+            )
+            self.client.post(
+                reverse("scheduler:update_status"),
+                data=json.dumps({"orderId": order.id, "status": "hold"}),
+                content_type="application/json",
+            )
+        self.assertEqual(
+            [call.args for call in notify.call_args_list],
+            [([order.id], "delay"), ([order.id], "status")],
+        )
+
+
+class TestChangeHub(TransactionTestCase):
+    """LISTEN/NOTIFY end to end; notifications are only delivered on commit."""
+
+    async def next_payload(self, queue):
+        return json.loads(await asyncio.wait_for(queue.get(), timeout=5))
+
+    async def test_committed_notifications_reach_every_subscriber(self):
+        changes = ChangeHub(CHANNEL)
+        first, second = await changes.subscribe(), await changes.subscribe()
+        try:
+            await sync_to_async(notify_orders)([7, 3], "delay")
+            expected = {"kind": "delay", "orders": [3, 7]}
+            self.assertEqual(await self.next_payload(first), expected)
+            self.assertEqual(await self.next_payload(second), expected)
+        finally:
+            changes.unsubscribe(first)
+            changes.unsubscribe(second)
+        self.assertIsNone(changes._conn)
+
+    async def test_a_full_queue_collapses_to_a_resync(self):
+        changes = ChangeHub(CHANNEL)
+        queue = await changes.subscribe()
+        try:
+            for _ in range(queue.maxsize + 1):
+                changes.publish(json.dumps({"kind": "delay", "orders": [1]}))
+            self.assertEqual(queue.qsize(), 1)
+            payload = await self.next_payload(queue)
+            self.assertEqual(payload["kind"], "resync")
+        finally:
+            changes.unsubscribe(queue)
+
+    async def test_asgi_stream_delivers_order_events(self):
+        user = await sync_to_async(User.objects.create_user)(
+            username="floor", password="pass"
+        )
+        client = AsyncClient()
+        await client.aforce_login(user)
+        response = await client.get(reverse("scheduler:events"))
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = aiter(response.streaming_content)
+        try:
+            self.assertTrue((await anext(stream)).startswith(b"retry: "))
+            await sync_to_async(notify_orders)([42], "status")
+            chunk = await asyncio.wait_for(anext(stream), timeout=5)
+            self.assertEqual(
+                chunk,
+                b'event: orders\n'
+                b'data: {"kind": "status", "orders": [42]}\n\n',
+            )
+        finally:
+            await stream.aclose()
+            # The ASGI server cancels the stream on disconnect; here, let go
+            # of the listener by hand
+            for queue in list(hub._queues):
+                hub.unsubscribe(queue)
+
+
+class TestParseInstant(TestCase):
+    def test_offset_datetime(self):
+        moment = parse_instant("2026-03-02T08:00:00+02:00")
+        self.assertEqual(
+            moment, datetime(2026, 3, 2, 6, 0, tzinfo=dt_timezone.utc)
+        )
+
+    def test_unencoded_plus_offset(self):
+        self.assertEqual(
+            parse_instant("2026-03-02T08:00:00 02:00"),
+            parse_instant("2026-03-02T08:00:00+02:00"),
+        )
+
+    def test_date_is_midnight_local(self):
+        moment = parse_instant("2026-03-02")
+        self.assertTrue(timezone.is_aware(moment))
+        self.assertEqual(timezone.localtime(moment).hour, 0)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_instant(None))
+        self.assertIsNone(parse_instant(""))
+        self.assertIsNone(parse_instant("next tuesday"))
+        self.assertIsNone(parse_instant("2026-13-40"))
+
+    def test_invalid_bounds_fall_back_to_unbounded(self):
+        user = User.objects.create_user(username="viewer", password="pass")
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse("scheduler:data"), {"start": "garbage", "end": "also"}
+        )
+        self.assertEqual(response.status_code, 200)
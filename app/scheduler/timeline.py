@@ -0,0 +1,163 @@
+# scheduler/timeline.py
+"""
+The materialised order timeline (``ScheduledStep``).
+
+An order's waterfall is fixed by its ``planned_start_time``, its
+process's steps (method ``touch_time_max + run_time_max``, never shorter
+than a minute) and the delay minutes logged against each step.  Instead
+of replaying that for every order on every feed request, the rows are
+written here once per change and scheduler/signals.py calls
+``refresh_timelines`` for just the orders a change touches:
+
+    order saved (new, moved, status)      that order
+    delay logged / edited / removed       that order
+    process steps or a method's timing    open and recent orders on
+                                          those processes
+
+Orders marked done that were planned to start more than
+``SCHEDULER_TIMELINE_HISTORY_DAYS`` ago keep the timeline they ran with.
+A process edit touching more than ``SCHEDULER_TIMELINE_QUEUE_AT`` orders
+is rebuilt by the render worker (scheduler/renderers.py) instead of
+inside the request.
+
+Bulk writes (``update``, ``bulk_create``) send no signals; call
+``refresh_timelines`` after them, or ``manage.py rebuild_timeline``.
+
+Usage::
+
+    from scheduler.timeline import refresh_timelines
+
+    refresh_timelines([order.pk])
+"""
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from jobs.queue import enqueue, run_now
+from process.compiled import compiled_processes
+
+from .models import DelayLog, ManufacturingOrder, ScheduledStep
+
+REFRESH_BATCH_SIZE = 500
+
+
+def delay_minutes(order_ids) -> Dict[int, Dict[int, int]]:
+    """
+    ``{order id: {step number: minutes}}`` summed over DelayLog, in one
+    query.
+    """
+    totals: Dict[int, Dict[int, int]] = {}
+    rows = (
+        DelayLog.objects
+        .filter(order_id__in=list(order_ids))
+        .values("order_id", "step_number")
+        .annotate(minutes=Sum("added_minutes"))
+        .order_by()
+    )
+    for row in rows:
+        steps = totals.setdefault(row["order_id"], {})
+        steps[row["step_number"]] = int(row["minutes"] or 0)
+    return totals
+
+
+def build_timeline(order, process, delays) -> List[ScheduledStep]:
+    """
+    Unsaved ScheduledStep rows for ``order`` run through the compiled
+    ``process`` with ``{step number: delay minutes}``, back to back from
+    ``planned_start_time``.  Steps without a method are skipped.
+    """
+    rows = []
+    pointer = order.planned_start_time
+    for step in process.steps if process else ():
+        method = step.method
+        if not method:
+            continue
+        extra = int(delays.get(step.step_number, 0) or 0)
+        end = pointer + timedelta(minutes=step.duration_minutes + extra)
+        rows.append(ScheduledStep(
+            order_id=order.pk,
+            step_number=step.step_number,
+            title=method.title,
+            tank=getattr(method, "tank_name", None) or "",
+            start_time=pointer,
+            end_time=end,
+            delay_minutes=extra,
+            is_delayed=extra > 0,
+        ))
+        pointer = end
+    return rows
+
+
+def _refresh_batch(order_ids: List[int]) -> int:
+    orders = list(
+        ManufacturingOrder.objects
+        .filter(pk__in=order_ids)
+        .only("id", "process_id", "planned_start_time")
+    )
+    processes = compiled_processes({order.process_id for order in orders})
+    delays = delay_minutes(order_ids)
+    rows = []
+    for order in orders:
+        process = processes.get(order.process_id)
+        rows.extend(build_timeline(order, process, delays.get(order.pk, {})))
+    with transaction.atomic():
+        ScheduledStep.objects.filter(order_id__in=order_ids).delete()
+        ScheduledStep.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def refresh_timelines(order_ids: Iterable[int]) -> int:
+    """
+    Rewrite the timeline of the given orders; returns the number of rows
+    written.
+    """
+    ids = sorted({pk for pk in order_ids if pk is not None})
+    written = 0
+    for i in range(0, len(ids), REFRESH_BATCH_SIZE):
+        written += _refresh_batch(ids[i:i + REFRESH_BATCH_SIZE])
+    return written
+
+
+def process_order_ids(process_ids: Iterable[int]) -> List[int]:
+    """
+    Orders on the given processes whose timeline follows process edits:
+    those not done, and done ones planned within the history window.
+    """
+    ids = [pk for pk in process_ids if pk is not None]
+    if not ids:
+        return []
+    cutoff = timezone.now() - timedelta(
+        days=settings.SCHEDULER_TIMELINE_HISTORY_DAYS
+    )
+    return list(
+        ManufacturingOrder.objects
+        .filter(process_id__in=ids)
+        .filter(~Q(status="done") | Q(planned_start_time__gte=cutoff))
+        .order_by("id")
+        .values_list("id", flat=True)
+    )
+
+
+def refresh_process_timelines(process_ids: Iterable[int]) -> int:
+    """Rewrite the timeline of the open and recent orders on the processes."""
+    return refresh_timelines(process_order_ids(process_ids))
+
+
+def schedule_process_timelines(process_ids: Iterable[int]) -> int:
+    """
+    ``refresh_process_timelines`` in the calling process for up to
+    ``SCHEDULER_TIMELINE_QUEUE_AT`` orders; above that the rebuild is
+    queued as a ``scheduler_timeline`` job and 0 is returned.
+    """
+    ids = sorted({pk for pk in process_ids if pk is not None})
+    order_ids = process_order_ids(ids)
+    if len(order_ids) <= settings.SCHEDULER_TIMELINE_QUEUE_AT:
+        return refresh_timelines(order_ids)
+    job, created = enqueue("scheduler_timeline", {"process_ids": ids})
+    if created and settings.RENDER_JOBS_EAGER:
+        run_now(job)
+    return 0
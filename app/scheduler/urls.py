@@ -1,12 +1,21 @@
 # scheduler/urls.py
 from django.urls import path
-from .views import SchedulerView, SchedulerDataView, AddDelayView, UpdateStatusView
+from .views import (
+    SchedulerView, SchedulerDataView, SchedulerChangesView,
+    SchedulerEventsView, AddDelayView, UpdateStatusView, ReplanView,
+    AnalyticsView, AnalyticsDataView,
+)
 
 app_name = "scheduler"
 
 urlpatterns = [
     path("", SchedulerView.as_view(), name="main"),
     path("api/data/", SchedulerDataView.as_view(), name="data"),
+    path("api/changes/", SchedulerChangesView.as_view(), name="changes"),
+    path("api/events/", SchedulerEventsView.as_view(), name="events"),
     path("api/add-delay/", AddDelayView.as_view(), name="add_delay"),
     path("api/update-status/", UpdateStatusView.as_view(), name="update_status"),
+    path("api/replan/", ReplanView.as_view(), name="replan"),
+    path("analytics/", AnalyticsView.as_view(), name="analytics"),
+    path("api/analytics/", AnalyticsDataView.as_view(), name="analytics_data"),
 ]
@@ -1,13 +1,26 @@
 # scheduler/views.py
+import asyncio
 import hashlib
 import json
-from datetime import timedelta
-from typing import Any, Dict, List
+from itertools import groupby
+from operator import itemgetter
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, List, Tuple
 
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
 from django.views.generic import TemplateView, View
 
+from .analytics import tank_utilisation
+from .capacity import replan
+from .feed import (
+    order_versions, parse_window, timeline_in_window, window_version,
+)
+from .live import RESYNC, hub, notify_orders
 from .models import DelayLog, ManufacturingOrder
 
 
@@ -16,8 +29,76 @@ class SchedulerView(TemplateView):
     template_name = "scheduler/main.html"
 
 
+ANALYTICS_DEFAULT_DAYS = 7
+
+
+def analytics_horizon(params) -> Tuple[datetime, datetime]:
+    """
+    ``(start, end)`` from ``?start=&end=``; defaults to today and the week
+    after it.
+    """
+    start, end = parse_window(params)
+    if start is None:
+        midnight = datetime.combine(timezone.localdate(), time.min)
+        start = timezone.make_aware(midnight)
+    if end is None:
+        end = start + timedelta(days=ANALYTICS_DEFAULT_DAYS)
+    if end <= start:
+        raise ValueError("end must be after start")
+    return start, end
+
+
+class AnalyticsView(TemplateView):
+    """Tank utilisation and bottleneck dashboard (scheduler/analytics.py)."""
+    template_name = "scheduler/analytics.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            start, end = analytics_horizon(self.request.GET)
+        except ValueError as exc:
+            start, end = analytics_horizon({})
+            context["error"] = str(exc)
+        context["report"] = tank_utilisation(start, end)
+        context["start"] = timezone.localtime(start).date()
+        context["end"] = timezone.localtime(end).date()
+        return context
+
+
+class AnalyticsDataView(View):
+    """Tank utilisation and bottlenecks over ``?start=&end=`` as JSON."""
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            start, end = analytics_horizon(request.GET)
+        except ValueError as exc:
+            return JsonResponse({"status": "error", "message": str(exc)},
+                                status=400)
+        report = tank_utilisation(start, end)
+        return JsonResponse({"status": "success", **report})
+
+
+def feed_etag(request) -> str:
+    """
+    ETag of a feed request: the window's timeline version plus the query
+    that chose it.
+    """
+    window_start, window_end = parse_window(request.GET)
+    last, rows = window_version(window_start, window_end)
+    query = "&".join(f"{key}={request.GET.get(key, '')}"
+                     for key in ("start", "end", "since"))
+    return hashlib.md5(f"{last}:{rows}:{query}".encode()).hexdigest()
+
+
+@method_decorator(etag(feed_etag), name="get")
 class SchedulerDataView(View):
-    """Builds FullCalendar Scheduler resources/events (waterfall) for each MO."""
+    """
+    Builds FullCalendar Scheduler resources/events (waterfall) for each MO.
+
+    Responses carry an ETag (``feed_etag``) and must be revalidated, so a
+    refetch of an unchanged window is a 304.  ``versions`` and ``cursor``
+    in the payload feed SchedulerChangesView.
+    """
 
     STATUS_COLORS = {
         "planned": None,           # uses hashed color per WO
@@ -25,122 +106,121 @@ class SchedulerDataView(View):
         "hold": "#ffc107",         # yellow
         "done": "#dc3545",         # red
     }
+    STATUS_LABELS = dict(ManufacturingOrder.ORDER_STATUS_CHOICES)
 
     def get(self, request, *args, **kwargs) -> JsonResponse:
-        orders = ManufacturingOrder.objects.select_related("process").all()
+        # Only orders overlapping FullCalendar's visible range (?start=&end=),
+        # read from the materialised timeline (scheduler/timeline.py)
+        window_start, window_end = parse_window(request.GET)
+        rows = timeline_in_window(window_start, window_end)
+        payload = self.build_payload(rows)
+        payload["cursor"] = max(payload["versions"].values(), default=0)
+        return self.respond(payload)
 
+    @staticmethod
+    def respond(payload: Dict[str, Any]) -> JsonResponse:
+        response = JsonResponse(payload)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def build_payload(self, rows) -> Dict[str, Any]:
+        """
+        Resources and events for timeline rows (grouped by order), plus each
+        order's version.
+        """
         events: List[Dict[str, Any]] = []
         resources: List[Dict[str, Any]] = []
 
-        for order in orders:
-            base_color = self._generate_color(order.work_order)
-            status_override = self.STATUS_COLORS.get(order.status)
+        versions: Dict[int, int] = {}
+
+        for order_id, order_steps in groupby(rows, key=itemgetter("order_id")):
+            steps = list(order_steps)
+            order = steps[0]
+            versions[order_id] = max(step["id"] for step in steps)
+            status = order["status"]
+            status_label = self.STATUS_LABELS.get(status, status)
+
+            base_color = self._generate_color(order["work_order"])
+            status_override = self.STATUS_COLORS.get(status)
             order_color = status_override or base_color
-            is_done = order.status == "done"
+            is_done = status == "done"
 
-            parent_id = f"order-{order.id}"
+            parent_id = f"order-{order_id}"
 
             resources.append(
                 {
                     "id": parent_id,
-                    "title": f"{order.work_order} #{order.occurrence}",
-                    "partNumber": order.part_number,
-                    "status": order.get_status_display(),
+                    "title": f"{order['work_order']} #{order['occurrence']}",
+                    "partNumber": order["part_number"],
+                    "status": status_label,
                     "color": order_color,
                     "uiOrder": 0,
                 }
             )
 
-            steps_qs = (
-                order.process.steps.all()
-                .select_related("method")
-                .order_by("step_number")
-            )
-
-            current_pointer = order.planned_start_time
-            mo_start_time = order.planned_start_time
-
-            delays: Dict[int, int] = {}
-            for delay in order.delays.all():
-                step_no = int(delay.step_number)
-                delays[step_no] = delays.get(step_no, 0) + int(delay.added_minutes or 0)
-
-            for step in steps_qs:
-                method = step.method
-                if not method:
-                    continue
-
-                child_resource_id = f"step-{order.id}-{step.step_number}"
+            for step in steps:
+                step_number = step["step_number"]
+                child_resource_id = f"step-{order_id}-{step_number}"
 
                 resources.append(
                     {
                         "id": child_resource_id,
                         "parentId": parent_id,
-                        "title": f"Step {step.step_number}: {method.title}",
-                        "tank": getattr(method, "tank_name", None) or "N/A",
-                        "uiOrder": step.step_number,
+                        "title": f"Step {step_number}: {step['title']}",
+                        "tank": step["tank"] or "N/A",
+                        "uiOrder": step_number,
                     }
                 )
 
-                t_max = int(getattr(method, "touch_time_max", 0) or 0)
-                r_max = int(getattr(method, "run_time_max", 0) or 0)
-                extra = int(delays.get(step.step_number, 0) or 0)
-
-                duration = max(t_max + r_max, 1) + extra
-                end_pointer = current_pointer + timedelta(minutes=duration)
-
                 events.append(
                     {
-                        "id": f"evt-{order.id}-{step.step_number}",
+                        "id": f"evt-{order_id}-{step_number}",
                         "resourceId": child_resource_id,
-                        "start": current_pointer.isoformat(),
-                        "end": end_pointer.isoformat(),
-                        "title": method.title,
+                        "start": step["start_time"].isoformat(),
+                        "end": step["end_time"].isoformat(),
+                        "title": step["title"],
                         "backgroundColor": order_color,
                         "extendedProps": {
                             "isSummary": False,
-                            "orderId": order.id,
-                            "stepNumber": step.step_number,
-                            "isDelayed": extra > 0,
+                            "orderId": order_id,
+                            "stepNumber": step_number,
+                            "isDelayed": step["is_delayed"],
                             "isCompleted": is_done,
-                            "status": order.status,
+                            "status": status,
                             "details": (
-                                f"WO: {order.work_order}\n"
-                                f"Step {step.step_number}: {method.title}\n"
-                                f"Status: {order.get_status_display()}"
+                                f"WO: {order['work_order']}\n"
+                                f"Step {step_number}: {step['title']}\n"
+                                f"Status: {status_label}"
                             ),
                         },
                     }
                 )
 
-                current_pointer = end_pointer
-
-            if steps_qs.exists():
-                events.append(
-                    {
-                        "id": f"summary-{order.id}",
-                        "resourceId": parent_id,
-                        "start": mo_start_time.isoformat(),
-                        "end": current_pointer.isoformat(),
-                        "title": "Completed"
-                        if is_done
-                        else f"Total Order: {order.work_order}",
-                        "display": "block",
-                        "backgroundColor": order_color,
-                        "extendedProps": {
-                            "isSummary": True,
-                            "orderId": order.id,
-                            "isCompleted": is_done,
-                            "status": order.status,
-                            "details": (
-                                f"WO: {order.work_order}\n"
-                                f"Status: {order.get_status_display()}"
-                            ),
-                        },
-                    }
-                )
+            events.append(
+                {
+                    "id": f"summary-{order_id}",
+                    "resourceId": parent_id,
+                    "start": order["planned_start_time"].isoformat(),
+                    "end": steps[-1]["end_time"].isoformat(),
+                    "title": "Completed"
+                    if is_done
+                    else f"Total Order: {order['work_order']}",
+                    "display": "block",
+                    "backgroundColor": order_color,
+                    "extendedProps": {
+                        "isSummary": True,
+                        "orderId": order_id,
+                        "isCompleted": is_done,
+                        "status": status,
+                        "details": (
+                            f"WO: {order['work_order']}\n"
+                            f"Status: {status_label}"
+                        ),
+                    },
+                }
+            )
 
-        return JsonResponse({"events": events, "resources": resources})
+        return {"events": events, "resources": resources, "versions": versions}
 
     @staticmethod
     def _generate_color(text: str) -> str:
@@ -148,6 +228,41 @@ class SchedulerDataView(View):
         return f"#{hash_obj.hexdigest()[:6]}"
 
 
+@method_decorator(etag(feed_etag), name="get")
+class SchedulerChangesView(SchedulerDataView):
+    """
+    Delta feed: ``?start=&end=&since=<cursor>``.
+
+    Returns events/resources only for the orders in the window whose
+    timeline changed after ``since``, with ``versions`` for every order
+    in the window (the page drops orders missing from it, and refetches
+    in full if a version moved without the order being sent) and the
+    next ``cursor``.
+    """
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            since = int(request.GET.get("since") or 0)
+        except ValueError:
+            return JsonResponse(
+                {"status": "error",
+                 "message": "since must be a cursor from the feed"},
+                status=400,
+            )
+        window_start, window_end = parse_window(request.GET)
+        versions = order_versions(window_start, window_end)
+        changed = [order_id for order_id, version in versions.items()
+                   if version > since]
+        rows = (
+            timeline_in_window(window_start, window_end, order_ids=changed)
+            if changed else ()
+        )
+        payload = self.build_payload(rows)
+        payload["versions"] = versions
+        payload["cursor"] = max([since, *versions.values()])
+        return self.respond(payload)
+
+
 class AddDelayView(View):
     """Adds delay minutes and appends a mandatory reason to the DelayLog."""
 
@@ -192,6 +307,7 @@ class AddDelayView(View):
             delay.added_minutes = int(delay.added_minutes or 0) + minutes
             delay.reason = (delay.reason or "") + f"\n[{minutes}m] {reason}"
             delay.save()
+            notify_orders([order.id], "delay")
 
             return JsonResponse({"status": "success"})
 
@@ -243,6 +359,7 @@ class UpdateStatusView(View):
                 order.completed_at = None
 
             order.save(update_fields=["status", "completed_at", "updated_at"])
+            notify_orders([order.id], "status")
             return JsonResponse({"status": "success"})
 
         except ManufacturingOrder.DoesNotExist:
@@ -260,3 +377,125 @@ class UpdateStatusView(View):
                 {"status": "error", "message": str(exc)},
                 status=400,
             )
+
+
+class ReplanView(View):
+    """
+    Tank-capacity re-plan (scheduler/capacity.py).
+
+    GET proposes: the tank conflicts among open orders and the start
+    shifts that would clear them.  POST ``{"apply": true}`` moves the
+    orders; without it, POST proposes like GET.
+    """
+
+    def get(self, request, *args, **kwargs) -> JsonResponse:
+        return JsonResponse(self._payload(replan()))
+
+    def post(self, request, *args, **kwargs) -> JsonResponse:
+        try:
+            data = json.loads(request.body or "{}")
+        except json.JSONDecodeError as exc:
+            return JsonResponse(
+                {"status": "error", "message": f"Bad request: {exc}"},
+                status=400,
+            )
+        result = replan(apply=bool(data.get("apply")))
+        if result.applied:
+            notify_orders(result.shifts, "replan")
+        return JsonResponse(self._payload(result))
+
+    @staticmethod
+    def _payload(result) -> Dict[str, Any]:
+        ids = set(result.shifts)
+        for conflict in result.conflicts + result.remaining:
+            ids.update((conflict.first.order_id, conflict.second.order_id))
+        labels = {
+            pk: f"{work_order} #{occurrence}"
+            for pk, work_order, occurrence in ManufacturingOrder.objects
+            .filter(pk__in=ids).values_list("id", "work_order", "occurrence")
+        }
+
+        def booking(b):
+            return {"orderId": b.order_id, "workOrder": labels.get(b.order_id),
+                    "stepNumber": b.step_number}
+
+        def conflicts(items):
+            return [
+                {
+                    "tank": c.tank,
+                    "start": c.start.isoformat(),
+                    "end": c.end.isoformat(),
+                    "first": booking(c.first),
+                    "second": booking(c.second),
+                }
+                for c in items
+            ]
+
+        return {
+            "status": "success",
+            "applied": result.applied,
+            "orders": len(result.orders),
+            "conflicts": conflicts(result.conflicts),
+            "remaining": conflicts(result.remaining),
+            "shifts": [
+                {
+                    "orderId": pk,
+                    "workOrder": labels.get(pk),
+                    "from": old.isoformat(),
+                    "to": new.isoformat(),
+                    "minutes": int((new - old).total_seconds() // 60),
+                }
+                for pk, (old, new) in sorted(result.shifts.items(),
+                                             key=lambda item: item[1][1])
+            ],
+        }
+
+
+class SchedulerEventsView(View):
+    """
+    Server-sent events: one ``orders`` event per change notification
+    (scheduler/live.py), so open schedulers can pull the delta feed.
+
+    Only streams under ASGI, where a waiting client costs a coroutine
+    rather than a worker.  Under WSGI it answers at once with a long
+    ``retry`` so EventSource backs off without holding the worker.
+    Streams end after ``STREAM_SECONDS`` (and after a resync); the
+    browser reconnects by itself.
+    """
+
+    STREAM_SECONDS = 600
+    KEEPALIVE_SECONDS = 20
+    RETRY_MS = 3000
+    WSGI_RETRY_MS = 300000
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        if not isinstance(request, ASGIRequest):
+            response = HttpResponse(f"retry: {self.WSGI_RETRY_MS}\n\n",
+                                    content_type="text/event-stream")
+        else:
+            queue = await hub.subscribe()
+            response = StreamingHttpResponse(
+                self._stream(queue), content_type="text/event-stream"
+            )
+        response["Cache-Control"] = "no-cache"
+        # Tell nginx not to buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+    async def _stream(self, queue):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.STREAM_SECONDS
+        try:
+            yield f"retry: {self.RETRY_MS}\n\n"
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    timeout = min(self.KEEPALIVE_SECONDS, remaining)
+                    payload = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: orders\ndata: {payload}\n\n"
+                if payload == RESYNC:
+                    break
+        finally:
+            hub.unsubscribe(queue)
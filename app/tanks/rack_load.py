@@ -0,0 +1,258 @@
+# tanks/rack_load.py
+"""
+Rack-load planning for a plating tank.
+
+Strike and plate current for a part is ``surface_area_ft2 * ASF`` (the
+same arithmetic as ``WorkOrder._calc_amps``).  When several parts are
+racked into one tank the rectifier has to supply the sum for the whole
+rack, once during the strike and once during the plate, so the planner
+computes every line in one NumPy pass, totals the rack, compares the
+peak against ``Tank.max_amps`` and, when the load is too big, suggests
+how to split it over several racks.
+
+Usage::
+
+    from tanks.rack_load import LoadLine, plan_rack_load
+
+    plan = plan_rack_load(
+        [LoadLine("WO-1 / 12345", surface_area=144, quantity=10,
+                  strike_asf=25, plate_asf=15)],
+        max_amps=500,
+    )
+    plan["totals"]["peak_amps"], plan["over_capacity"], plan["racks"]
+
+Inputs come from users, so ``plan_rack_load`` raises ValueError for a
+``max_amps`` that is not a positive number, a line over ``MAX_QUANTITY``
+parts, or a split needing more than ``MAX_RACKS`` racks.
+"""
+import math
+
+import numpy as np
+
+SQ_IN_PER_SQ_FT = 144.0
+# Most parts on one line, and most racks a split may suggest
+MAX_QUANTITY = 100_000
+MAX_RACKS = 1000
+
+
+class LoadLine:
+    """One line of a rack: ``quantity`` identical parts."""
+
+    __slots__ = (
+        "label", "surface_area", "quantity", "strike_asf", "plate_asf",
+        "work_order_id",
+    )
+
+    def __init__(self, label, surface_area, quantity=1, strike_asf=None,
+                 plate_asf=None, work_order_id=None):
+        self.label = label
+        self.surface_area = surface_area  # square inches per part
+        self.quantity = quantity
+        self.strike_asf = strike_asf
+        self.plate_asf = plate_asf
+        self.work_order_id = work_order_id
+
+    @classmethod
+    def from_work_order(cls, work_order):
+        """
+        A line for a work order; uses its classification's ASF and part
+        quantity.
+        """
+        classification = work_order.classification
+        return cls(
+            label=(
+                f"{work_order.work_order_number} / "
+                f"{work_order.part.part_number}"
+            ),
+            surface_area=work_order.surface_area,
+            quantity=work_order.part_quantity or 1,
+            strike_asf=classification.strike_asf if classification else None,
+            plate_asf=classification.plate_asf if classification else None,
+            work_order_id=work_order.pk,
+        )
+
+
+def _column(lines, name):
+    # None -> NaN so missing inputs propagate instead of silently reading
+    # as zero
+    values = [getattr(line, name) for line in lines]
+    return np.array(
+        [np.nan if v is None else float(v) for v in values], dtype=float
+    )
+
+
+def compute_amps(lines):
+    """
+    Per-part and per-line strike/plate amps for ``lines`` as NumPy arrays.
+
+    Missing surface areas or ASFs come back as NaN per part and count as
+    zero in the line totals.
+    """
+    area_ft2 = _column(lines, "surface_area") / SQ_IN_PER_SQ_FT
+    quantity = np.array(
+        [max(int(line.quantity or 0), 0) for line in lines], dtype=np.int64
+    )
+    strike_asf, plate_asf = (
+        _column(lines, "strike_asf"), _column(lines, "plate_asf")
+    )
+    asf = np.stack([strike_asf, plate_asf], axis=1)  # (n, 2)
+
+    per_part = area_ft2[:, None] * asf  # (n, 2): strike, plate
+    per_line = np.nan_to_num(per_part) * quantity[:, None]
+    return per_part, per_line, quantity
+
+
+def _fits(remaining, part):
+    """How many more of ``part`` (strike, plate amps) each rack can take."""
+    active = part > 0
+    if not active.any():
+        return np.full(len(remaining), np.inf)
+    # Small tolerance so 5 x 100 A still fits a 500 A rack after float
+    # subtraction
+    return np.floor((remaining[:, active] / part[active]).min(axis=1) + 1e-9)
+
+
+def split_into_racks(per_part, quantity, max_amps, max_racks=MAX_RACKS):
+    """
+    Assign parts to racks so no rack's strike or plate total exceeds
+    ``max_amps``.
+
+    First-fit decreasing on the larger of each part's strike/plate amps:
+    each line places as many of its parts as still fit in the open racks,
+    then opens as many full racks as the rest needs plus one for the
+    remainder.  Returns ``(racks, unplaceable)`` where ``racks`` is a
+    list of ``{line index: count}`` and ``unplaceable`` the indexes of
+    lines whose single part is already over capacity.  Raises ValueError
+    past ``max_racks`` racks.
+    """
+    load = np.nan_to_num(per_part)
+    order = np.argsort(-load.max(axis=1), kind="stable")
+    remaining = np.empty((0, 2))
+    empty = np.array([[max_amps, max_amps]])
+    racks, unplaceable = [], []
+
+    for index in order.tolist():
+        count = int(quantity[index])
+        part = load[index]
+        if not count:
+            continue
+        if (part > max_amps).any():
+            unplaceable.append(index)
+            continue
+
+        fits = _fits(remaining, part)
+        for slot in np.flatnonzero(fits >= 1).tolist():
+            placed = int(min(count, fits[slot]))
+            racks[slot][index] = racks[slot].get(index, 0) + placed
+            remaining[slot] -= part * placed
+            count -= placed
+            if not count:
+                break
+        if not count:
+            continue
+
+        # A part with no load fits any number of times
+        per_rack = _fits(empty, part)[0]
+        per_rack = int(per_rack) if np.isfinite(per_rack) else count
+        full, rest = divmod(count, per_rack)
+        counts = [per_rack] * full + ([rest] if rest else [])
+        if len(racks) + len(counts) > max_racks:
+            raise ValueError(f"The load needs more than {max_racks} racks.")
+        racks.extend({index: n} for n in counts)
+        remaining = np.vstack([remaining, max_amps - np.outer(counts, part)])
+    return racks, unplaceable
+
+
+def plan_rack_load(lines, max_amps=None):
+    """
+    Amps per line, rack totals and (with ``max_amps``) a capacity check
+    and suggested rack split, as a JSON-ready dict.
+    """
+    if max_amps is not None and not (
+        math.isfinite(max_amps) and max_amps > 0
+    ):
+        raise ValueError("max_amps must be a positive number.")
+    lines = list(lines)
+    if not lines:
+        per_part = per_line = np.zeros((0, 2))
+        quantity = np.zeros(0, dtype=np.int64)
+    else:
+        per_part, per_line, quantity = compute_amps(lines)
+        for line, count in zip(lines, quantity.tolist()):
+            if count > MAX_QUANTITY:
+                raise ValueError(
+                    f"{line.label}: at most {MAX_QUANTITY} parts per line."
+                )
+        if np.isinf(per_part).any():
+            raise ValueError("Surface areas and ASFs must be finite.")
+
+    strike_total, plate_total = (
+        (float(v) for v in per_line.sum(axis=0)) if len(lines) else (0.0, 0.0)
+    )
+    peak = max(strike_total, plate_total)
+    plan = {
+        "lines": [
+            {
+                "label": line.label,
+                "work_order_id": line.work_order_id,
+                "surface_area": line.surface_area,
+                "quantity": int(quantity[i]),
+                "strike_asf": (
+                    None if line.strike_asf is None else float(line.strike_asf)
+                ),
+                "plate_asf": (
+                    None if line.plate_asf is None else float(line.plate_asf)
+                ),
+                "strike_amps_per_part": _rounded(per_part[i, 0]),
+                "plate_amps_per_part": _rounded(per_part[i, 1]),
+                "strike_amps": _rounded(per_line[i, 0]),
+                "plate_amps": _rounded(per_line[i, 1]),
+                "missing": [
+                    name
+                    for name in ("surface_area", "strike_asf", "plate_asf")
+                    if getattr(line, name) is None
+                ],
+            }
+            for i, line in enumerate(lines)
+        ],
+        "totals": {
+            "parts": int(quantity.sum()),
+            "strike_amps": round(strike_total, 2),
+            "plate_amps": round(plate_total, 2),
+            "peak_amps": round(peak, 2),
+        },
+        "max_amps": max_amps,
+        "over_capacity": bool(max_amps is not None and peak > max_amps),
+        "utilisation": round(peak / max_amps, 3) if max_amps else None,
+        "racks": [],
+        "unplaceable": [],
+    }
+
+    if max_amps:
+        racks, unplaceable = split_into_racks(
+            per_part, quantity, float(max_amps)
+        )
+        placeable = np.delete(per_line, unplaceable, axis=0)
+        plan["minimum_racks"] = math.ceil(
+            placeable.sum(axis=0).max(initial=0.0) / max_amps
+        )
+        plan["unplaceable"] = [lines[i].label for i in unplaceable]
+        for rack in racks:
+            idx = np.fromiter(rack.keys(), dtype=np.int64)
+            counts = np.fromiter(rack.values(), dtype=np.float64)
+            strike, plate = (
+                np.nan_to_num(per_part[idx]) * counts[:, None]
+            ).sum(axis=0)
+            plan["racks"].append({
+                "lines": [
+                    {"label": lines[i].label, "quantity": int(n)}
+                    for i, n in rack.items()
+                ],
+                "strike_amps": round(float(strike), 2),
+                "plate_amps": round(float(plate), 2),
+            })
+    return plan
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 2)
@@ -1,3 +1,173 @@
+import json
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from part.tests import make_classification, make_part, make_standard
+from part.models import WorkOrder
+
+from .models import ProductionLine, Tank
+from .rack_load import MAX_QUANTITY, MAX_RACKS, LoadLine, plan_rack_load
+
+
+class TestRackLoadPlan(TestCase):
+    def test_amps_per_part_and_totals(self):
+        plan = plan_rack_load([
+            LoadLine("A", surface_area=144, quantity=4, strike_asf=25,
+                     plate_asf=15),
+            LoadLine("B", surface_area=72, quantity=2, strike_asf=None,
+                     plate_asf=20),
+        ])
+        a, b = plan["lines"]
+        self.assertEqual(
+            (a["strike_amps_per_part"], a["plate_amps_per_part"]), (25.0, 15.0)
+        )
+        self.assertEqual((a["strike_amps"], a["plate_amps"]), (100.0, 60.0))
+        self.assertIsNone(b["strike_amps_per_part"])
+        self.assertEqual(b["missing"], ["strike_asf"])
+        self.assertEqual(
+            plan["totals"],
+            {
+                "parts": 6,
+                "strike_amps": 100.0,
+                "plate_amps": 80.0,
+                "peak_amps": 100.0,
+            },
+        )
+        self.assertFalse(plan["over_capacity"])
+
+    def test_over_capacity_is_split_into_racks_within_limit(self):
+        lines = [
+            LoadLine(
+                "A", surface_area=144, quantity=10, strike_asf=25, plate_asf=15
+            ),
+            LoadLine(
+                "B", surface_area=288, quantity=3, strike_asf=10, plate_asf=20
+            ),
+        ]
+        plan = plan_rack_load(lines, max_amps=100)
+        self.assertTrue(plan["over_capacity"])
+        self.assertEqual(plan["minimum_racks"], 4)  # strike: 250 + 60 = 310 A
+        for rack in plan["racks"]:
+            self.assertLessEqual(rack["strike_amps"], 100)
+            self.assertLessEqual(rack["plate_amps"], 100)
+        placed = {}
+        for rack in plan["racks"]:
+            for line in rack["lines"]:
+                placed[line["label"]] = (
+                    placed.get(line["label"], 0) + line["quantity"]
+                )
+        self.assertEqual(placed, {"A": 10, "B": 3})
+
+    def test_part_larger_than_rectifier_is_unplaceable(self):
+        huge = LoadLine(
+            "Huge", surface_area=144 * 10, strike_asf=20, plate_asf=20
+        )
+        plan = plan_rack_load([huge], max_amps=100)
+        self.assertEqual(plan["unplaceable"], ["Huge"])
+        self.assertEqual(plan["racks"], [])
+
+    def test_full_racks_are_filled_in_one_step(self):
+        line = LoadLine("A", surface_area=144, quantity=MAX_QUANTITY,
+                        plate_asf=1)
+        plan = plan_rack_load([line], max_amps=499)
+        self.assertEqual(len(plan["racks"]), 201)  # 200 x 499 + 1 x 200
+        self.assertEqual(plan["racks"][0]["plate_amps"], 499.0)
+        self.assertEqual(plan["racks"][-1]["lines"][0]["quantity"], 200)
+
+    def test_unbounded_inputs_are_rejected(self):
+        line = LoadLine("A", surface_area=144, quantity=2, plate_asf=10)
+        for max_amps in (float("nan"), float("inf"), 0, -5):
+            with self.subTest(max_amps=max_amps):
+                with self.assertRaises(ValueError):
+                    plan_rack_load([line], max_amps=max_amps)
+        too_many = LoadLine("A", surface_area=144,
+                            quantity=MAX_QUANTITY + 1, plate_asf=10)
+        with self.assertRaises(ValueError):
+            plan_rack_load([too_many], max_amps=100)
+        # One part per rack
+        crowded = LoadLine("A", surface_area=144,
+                           quantity=MAX_RACKS + 1, plate_asf=100)
+        with self.assertRaisesMessage(ValueError, "more than"):
+            plan_rack_load([crowded], max_amps=100)
+
+
+class TestRackLoadViews(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_user(username="plater", password="pass1234")
+        )
+        line = ProductionLine.objects.create(name="l1")
+        self.tank = Tank.objects.create(
+            production_line=line,
+            name="Cad Tank",
+            chemical_composition="Cd",
+            max_amps=100,
+        )
+        standard = make_standard()
+        classification = make_classification(standard)
+        classification.strike_asf = 25
+        classification.plate_asf = 15
+        classification.save()
+        self.work_order = WorkOrder.objects.create(
+            part=make_part(),
+            standard=standard,
+            classification=classification,
+            work_order_number="WO-R1",
+            job_identity="cadmium_plate",
+            surface_area=144,
+            part_quantity=6,
+        )
+
+    def test_api_uses_work_orders_and_tank_capacity(self):
+        resp = self.client.post(
+            reverse("rack_load_api"),
+            json.dumps({
+                "tank_id": self.tank.pk,
+                "work_order_ids": [self.work_order.pk],
+                "lines": [{
+                    "label": "Extra", "surface_area": 144, "quantity": 1,
+                    "plate_asf": 15,
+                }],
+            }),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["lines"][0]["work_order_id"], self.work_order.pk)
+        self.assertEqual(data["totals"]["strike_amps"], 150.0)
+        self.assertTrue(data["over_capacity"])
+        self.assertEqual(data["tank"]["name"], "Cad Tank")
+
+    def test_api_rejects_bad_numbers(self):
+        resp = self.client.post(
+            reverse("rack_load_api"),
+            json.dumps({"lines": [{"surface_area": "lots"}]}),
+            content_type="application/json",
+        )
+        self.assertEqual(resp.status_code, 400)
+
+    def test_api_rejects_non_finite_and_oversized_values(self):
+        line = {"surface_area": 144, "quantity": 2, "plate_asf": 10}
+        for body in [
+            {"max_amps": "NaN", "lines": [line]},
+            {"max_amps": 100, "lines": [{**line, "plate_asf": "Infinity"}]},
+            {"max_amps": 100, "lines": [{**line, "surface_area": -1}]},
+            {"max_amps": 100, "lines": [{**line, "quantity": 10 ** 9}]},
+        ]:
+            with self.subTest(body=body):
+                resp = self.client.post(
+                    reverse("rack_load_api"), json.dumps(body),
+                    content_type="application/json",
+                )
+                self.assertEqual(resp.status_code, 400)
 
-# Create your tests here.
+    def test_page_renders_plan(self):
+        resp = self.client.get(
+            reverse("rack_load"),
+            {"tank": self.tank.pk, "ids": str(self.work_order.pk)},
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Over rectifier capacity")
+        self.assertContains(resp, "WO-R1")
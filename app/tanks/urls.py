@@ -1,7 +1,11 @@
 from django.urls import path
-from .views import tank_list, export_tanks_to_excel
+from .views import (
+    tank_list, export_tanks_to_excel, rack_load_api, rack_load_view,
+)
 
 urlpatterns = [
     path("", tank_list, name="tank_list"),
     path("export/", export_tanks_to_excel, name="export_tanks_to_excel"),
+    path("rack-load/", rack_load_view, name="rack_load"),
+    path("rack-load/plan/", rack_load_api, name="rack_load_api"),
 ]
@@ -1,8 +1,17 @@
-from django.shortcuts import render
+import csv
+import io
+import json
+import math
+
+from django.shortcuts import get_object_or_404, render
 from .models import Tank, ProductionLine
 from collections import OrderedDict
 import pandas as pd
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_POST
+
+from part.models import WorkOrder
+from .rack_load import LoadLine, plan_rack_load
 
 
 def tank_list(request):
@@ -54,3 +63,138 @@ def export_tanks_to_excel(request):
         df.to_excel(writer, index=False, sheet_name="Tanks Data")
 
     return response
+
+
+# Rack-load planner (tanks/rack_load.py)
+
+def _work_order_lines(work_order_ids):
+    work_orders = (
+        WorkOrder.objects.filter(pk__in=work_order_ids)
+        .select_related('part', 'classification')
+        .order_by('work_order_number')
+    )
+    return [LoadLine.from_work_order(wo) for wo in work_orders]
+
+
+def _manual_line(row, number):
+    """
+    LoadLine from ``{label, surface_area, quantity, strike_asf,
+    plate_asf}``; raises ValueError.  Numbers must be finite and positive.
+    """
+    def value(name, cast):
+        raw = row.get(name)
+        if raw in (None, ''):
+            return None
+        try:
+            result = cast(raw)
+        except (TypeError, ValueError, OverflowError):
+            result = math.nan
+        if not (math.isfinite(result) and result > 0):
+            raise ValueError(
+                f"Line {number}: {name} must be a positive number."
+            )
+        return result
+
+    return LoadLine(
+        label=str(row.get('label') or f"Line {number}"),
+        surface_area=value('surface_area', float),
+        quantity=value('quantity', int) or 1,
+        strike_asf=value('strike_asf', float),
+        plate_asf=value('plate_asf', float),
+    )
+
+
+def _parse_manual_rows(text):
+    """``label, surface_area, quantity, strike_asf, plate_asf`` per line."""
+    fields = ('label', 'surface_area', 'quantity', 'strike_asf', 'plate_asf')
+    rows = csv.reader(io.StringIO(text or ''))
+    return [
+        _manual_line(dict(zip(fields, (v.strip() for v in values))), number)
+        for number, values in enumerate(rows, start=1)
+        if any(v.strip() for v in values)
+    ]
+
+
+def _parse_ids(raw):
+    return [
+        int(v)
+        for v in str(raw or '').replace(' ', '').split(',')
+        if v.isdigit()
+    ]
+
+
+def rack_load_view(request):
+    """
+    Plan a plating rack: work orders and/or manual lines against a tank's
+    rectifier.
+    """
+    tanks = (
+        Tank.objects.filter(max_amps__isnull=False)
+        .select_related('production_line')
+        .order_by('name')
+    )
+    tank = None
+    if request.GET.get('tank'):
+        tank = get_object_or_404(Tank, pk=request.GET['tank'])
+
+    work_order_ids = _parse_ids(request.GET.get('ids'))
+    manual_rows = request.GET.get('lines', '')
+    plan, error = None, None
+    if work_order_ids or manual_rows.strip():
+        try:
+            lines = _work_order_lines(work_order_ids)
+            lines += _parse_manual_rows(manual_rows)
+            plan = plan_rack_load(
+                lines, max_amps=tank.max_amps if tank else None
+            )
+        except ValueError as exc:
+            error = str(exc)
+
+    context = {
+        'tanks': tanks,
+        'tank': tank,
+        'ids': ','.join(str(pk) for pk in work_order_ids),
+        'lines': manual_rows,
+        'plan': plan,
+        'error': error,
+    }
+    return render(request, 'tanks/rack_load.html', context)
+
+
+@require_POST
+def rack_load_api(request):
+    """
+    JSON rack plan.  Body: ``{"tank_id" | "max_amps",
+    "work_order_ids": [...], "lines": [{"label", "surface_area",
+    "quantity", "strike_asf", "plate_asf"}]}``.
+    """
+    try:
+        body = json.loads(request.body or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object.")
+        work_order_ids = body.get('work_order_ids', [])
+        lines = _work_order_lines(
+            _parse_ids(','.join(str(v) for v in work_order_ids))
+        )
+        lines += [
+            _manual_line(row, number)
+            for number, row in enumerate(body.get('lines', []), start=1)
+        ]
+        max_amps = body.get('max_amps')
+        tank = None
+        if body.get('tank_id') is not None:
+            tank = Tank.objects.filter(pk=body['tank_id']).first()
+            if tank is None:
+                return JsonResponse({'error': 'Unknown tank.'}, status=404)
+            max_amps = tank.max_amps
+        max_amps = float(max_amps) if max_amps is not None else None
+        plan = plan_rack_load(lines, max_amps=max_amps)
+    except (ValueError, TypeError, AttributeError) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    plan['tank'] = (
+        {'id': tank.pk, 'name': tank.name, 'max_amps': tank.max_amps}
+        if tank
+        else None
+    )
+    return JsonResponse(plan)